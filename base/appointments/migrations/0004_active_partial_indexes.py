@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0003_appointmentevent_archive_reason_and_more'),
+        ('encounters', '0014_active_partial_indexes'),
+        ('patients', '0003_active_partial_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointmentevent',
+            index=models.Index(condition=models.Q(('is_archived', False)), fields=['schedule', 'start'], name='appointmen_schedul_2e23b2_act'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_active_partial_indexes'),
+        ('encounters', '0014_active_partial_indexes'),
+        ('patients', '0003_active_partial_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointmentevent',
+            index=models.Index(fields=['start'], name='appointment_start_idx'),
+        ),
+    ]
@@ -5,7 +5,7 @@ from patients.models import Patient
 import recurrence.fields
 from datetime import datetime, timedelta
 from base.models import ArchivableModel
-from base.services import ArchiveManager
+from base.services import ActiveArchiveManager, ArchiveManager
 
 class AppointmentStatus(models.TextChoices):
     SCHEDULED = "scheduled", "Запланирован"
@@ -72,6 +72,10 @@ class AppointmentEvent(ArchivableModel, models.Model):
     encounter = models.OneToOneField('encounters.Encounter', null=True, blank=True, on_delete=models.SET_NULL, related_name='appointment')
     objects = ArchiveManager()
     all_objects = models.Manager()
+    active_objects = ActiveArchiveManager()
+
+    # Частичные индексы активных записей: приемы слота расписания по времени
+    active_indexes = [('schedule', 'start')]
 
     @property
     def doctor(self):
@@ -94,6 +98,11 @@ class AppointmentEvent(ArchivableModel, models.Model):
     def is_completed(self):
         return self.status == AppointmentStatus.COMPLETED
 
+    @classmethod
+    def get_auto_archive_queryset(cls, cutoff):
+        """Автоархивирование: приемы, закончившиеся раньше cutoff"""
+        return cls.all_objects.filter(end__lt=cutoff)
+
     def _archive_related_records(self, user, reason):
         """Архивирует связанные записи при архивировании AppointmentEvent"""
         # Архивируем связанный случай обращения
@@ -121,3 +130,9 @@ class AppointmentEvent(ArchivableModel, models.Model):
     class Meta:
         verbose_name = "Запись на прием"
         verbose_name_plural = "Записи на прием"
+        indexes = [
+            # Keyset-пагинация API по (start, id) и окна календаря
+            models.Index(fields=['start'], name='appointment_start_idx'),
+            # Хронология пациента (patients.services.PatientTimelineService)
+            models.Index(fields=['patient', 'start'], name='appointment_patient_start_idx'),
+        ]
@@ -4,6 +4,7 @@ from rest_framework import serializers
 from .models import AppointmentEvent, Schedule # Make sure Schedule is imported
 from patients.models import Patient
 from django.contrib.auth import get_user_model
+from base.api_mixins import SparseFieldsetSerializerMixin
 
 User = get_user_model()
 
@@ -13,6 +14,8 @@ class DoctorSerializer(serializers.ModelSerializer):
         fields = ('id', 'first_name', 'last_name')
 
 class PatientSerializer(serializers.ModelSerializer):
+    field_dependencies = {'full_name': ('last_name', 'first_name', 'middle_name')}
+
     class Meta:
         model = Patient
         fields = ('id', 'full_name')
@@ -23,12 +26,25 @@ class ScheduleSerializer(serializers.ModelSerializer):
         model = Schedule
         fields = '__all__'
 
-class AppointmentEventSerializer(serializers.ModelSerializer):
+DOCTOR_NAME_FIELDS = (
+    'schedule__doctor__last_name', 'schedule__doctor__first_name',
+    'schedule__doctor__doctor_profile__full_name',
+)
+
+
+class AppointmentEventSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     patient = PatientSerializer(read_only=True)
     schedule = ScheduleSerializer(read_only=True)
     title = serializers.SerializerMethodField()
     doctor_full_name = serializers.SerializerMethodField()
 
+    # Без ?expand= пациент и слот расписания выводятся идентификаторами
+    expandable_fields = ('patient', 'schedule')
+    field_dependencies = {
+        'title': ('patient__last_name', 'patient__first_name', 'patient__middle_name') + DOCTOR_NAME_FIELDS,
+        'doctor_full_name': DOCTOR_NAME_FIELDS,
+    }
+
     class Meta:
         model = AppointmentEvent
         fields = ('id', 'schedule', 'patient', 'start', 'end', 'notes', 'status', 'title', 'doctor_full_name')
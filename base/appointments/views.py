@@ -2,6 +2,7 @@
 import json
 
 from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
 from django.http import JsonResponse
 from django.views.generic import TemplateView, CreateView, UpdateView, View, DetailView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -19,32 +20,63 @@ from django.views.decorators.csrf import csrf_exempt
 from encounters.models import Encounter
 from django.shortcuts import get_object_or_404, redirect
 
+from base.api_mixins import ConditionalGzipMixin, SparseFieldsetViewSetMixin
+from base.api_pagination import KeysetPagination
+
 from .models import Schedule, AppointmentEvent
 from .serializers import AppointmentEventSerializer
 from .forms import AppointmentEventForm
 
 User = get_user_model()
 
-class AppointmentEventViewSet(viewsets.ModelViewSet):
+class AppointmentEventPagination(KeysetPagination):
+    """Записи на прием по (start, id) для синхронизации календарей"""
+    ordering_field = 'start'
+    descending = False
+    page_size = 100
+    max_page_size = 500
+
+
+class AppointmentEventViewSet(ConditionalGzipMixin, SparseFieldsetViewSetMixin, viewsets.ModelViewSet):
+    """
+    Записи на прием. С параметрами start/end (окно FullCalendar) возвращается
+    список записей окна без пагинации, иначе - страницы по курсору.
+    Поддерживает ?fields=, ?expand=patient,schedule, ETag и gzip.
+    """
     queryset = AppointmentEvent.objects.all()
     serializer_class = AppointmentEventSerializer
+    pagination_class = AppointmentEventPagination
+
+    def get_range(self):
+        """(start, end) окна календаря или None; несуществующая дата - ответ 400"""
+        try:
+            start = parse_datetime(self.request.query_params.get('start', ''))
+            end = parse_datetime(self.request.query_params.get('end', ''))
+        except ValueError:
+            raise ValidationError({'detail': 'Неверная дата start/end окна календаря'})
+        if start is None or end is None:
+            return None
+        return start, end
 
     def get_queryset(self):
-        """Оптимизируем queryset для избежания N+1 запросов"""
-        queryset = AppointmentEvent.objects.select_related(
-            'patient',
-            'schedule__doctor',
-            'encounter'
-        ).prefetch_related(
-            'encounter__documents',
-            'encounter__diagnoses__diagnosis'
-        )
-        
+        """Только связи и столбцы, которые выводит сериализатор"""
+        queryset = self.narrow_queryset(AppointmentEvent.objects.all())
+
         doctor_id = self.request.query_params.get('doctor')
         if doctor_id and doctor_id != '__all_free__':
             queryset = queryset.filter(schedule__doctor__id=doctor_id)
+
+        window = self.get_range()
+        if window:
+            queryset = queryset.filter(start__lt=window[1], end__gt=window[0]).order_by('start', 'id')
         return queryset
 
+    def paginate_queryset(self, queryset):
+        # Окно календаря ограничено по времени, FullCalendar ждет простой список
+        if self.get_range():
+            return None
+        return super().paginate_queryset(queryset)
+
 
 class AppointmentEventsAPI(View):
     """
@@ -52,7 +84,7 @@ class AppointmentEventsAPI(View):
     """
 
     def get(self, request, *args, **kwargs):
-        appointments = AppointmentEvent.objects.select_related(
+        appointments = AppointmentEvent.active_objects.select_related(
             'patient',
             'schedule__doctor',
             'encounter'
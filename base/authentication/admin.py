@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
-from .models import UserProfile
+from .models import AllowedLoginNetwork, UserProfile
 
 class UserProfileInline(admin.StackedInline):
     model = UserProfile
@@ -66,3 +66,10 @@ class UserProfileAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(AllowedLoginNetwork)
+class AllowedLoginNetworkAdmin(admin.ModelAdmin):
+    list_display = ('network', 'description', 'updated_at')
+    search_fields = ('network', 'description')
+    readonly_fields = ('created_at', 'updated_at')
@@ -5,3 +5,7 @@ class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authentication'
     verbose_name = 'Аутентификация'
+
+    def ready(self):
+        """Регистрируем сигналы при запуске приложения"""
+        import authentication.signals
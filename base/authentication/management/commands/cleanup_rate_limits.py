@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from authentication.services import RateLimiter
+
+
+class Command(BaseCommand):
+
+    help = 'Удаляет счетчики ограничения частоты без событий в окне и без действующей блокировки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пакета удаления')
+
+    def handle(self, *args, **options):
+        self.stdout.write("🔍 Удаляю устаревшие счетчики попыток входа...")
+        started = time.monotonic()
+        deleted = RateLimiter.cleanup(batch_size=options['batch_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"✅ Удалено счетчиков: {deleted} за {elapsed:.2f} с"))
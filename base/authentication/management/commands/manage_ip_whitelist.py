@@ -1,8 +1,10 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
-from django.core.cache import cache
 import ipaddress
 
+from authentication.models import AllowedLoginNetwork
+from authentication.services import IPAllowList, LoginRateLimitService
+
 
 class Command(BaseCommand):
     help = 'Управление IP-фильтрацией для входа в систему'
@@ -23,6 +25,12 @@ class Command(BaseCommand):
             type=str,
             help='Сеть для добавления/удаления (например, 192.168.1.0/24)'
         )
+        parser.add_argument(
+            '--description',
+            type=str,
+            default='',
+            help='Описание добавляемой записи'
+        )
     
     def handle(self, *args, **options):
         action = options['action']
@@ -69,62 +77,71 @@ class Command(BaseCommand):
         else:
             self.stdout.write('\nРазрешенные сети: не настроены')
         
+        # Сети из БД (применяются без перезапуска)
+        db_networks = list(AllowedLoginNetwork.objects.all())
+        if db_networks:
+            self.stdout.write('\nРазрешенные сети из БД:')
+            for item in db_networks:
+                description = f' - {item.description}' if item.description else ''
+                self.stdout.write(f'  • {item.network}{description}')
+        else:
+            self.stdout.write('\nРазрешенные сети из БД: нет')
+        
+        compiled = IPAllowList.compile(IPAllowList.get_entries())
+        self.stdout.write(
+            f'\nИнтервалов после объединения: IPv4 - {len(compiled[4][0])}, IPv6 - {len(compiled[6][0])}'
+        )
+        
         # Статистика блокировок
         self.show_blocked_ips_stats()
     
     def add_ip_or_network(self, options):
-        """Добавить IP или сеть в белый список"""
+        """Добавить IP или сеть в белый список (БД)"""
         ip = options.get('ip')
         network = options.get('network')
         
         if not ip and not network:
             raise CommandError('Укажите --ip или --network для добавления')
         
-        if ip:
-            try:
-                # Проверяем корректность IP
-                ipaddress.ip_address(ip)
-                self.stdout.write(f'Добавление IP: {ip}')
-                # Здесь можно добавить логику для динамического обновления настроек
-                self.stdout.write(
-                    self.style.SUCCESS(f'IP {ip} добавлен в белый список')
-                )
-            except ValueError:
-                raise CommandError(f'Некорректный IP-адрес: {ip}')
-        
-        if network:
-            try:
-                # Проверяем корректность сети
-                ipaddress.ip_network(network)
-                self.stdout.write(f'Добавление сети: {network}')
-                # Здесь можно добавить логику для динамического обновления настроек
-                self.stdout.write(
-                    self.style.SUCCESS(f'Сеть {network} добавлена в белый список')
-                )
-            except ValueError:
-                raise CommandError(f'Некорректная сеть: {network}')
+        for value, kind in ((ip, 'IP'), (network, 'Сеть')):
+            if not value:
+                continue
+            parsed = self.parse(value, kind)
+            item, created = AllowedLoginNetwork.objects.get_or_create(
+                network=str(parsed),
+                defaults={'description': options.get('description', '')}
+            )
+            if created:
+                self.stdout.write(self.style.SUCCESS(f'{kind} {item.network} добавлен(а) в белый список'))
+            else:
+                self.stdout.write(self.style.WARNING(f'{kind} {item.network} уже в белом списке'))
     
     def remove_ip_or_network(self, options):
-        """Удалить IP или сеть из белого списка"""
+        """Удалить IP или сеть из белого списка (БД)"""
         ip = options.get('ip')
         network = options.get('network')
         
         if not ip and not network:
             raise CommandError('Укажите --ip или --network для удаления')
         
-        if ip:
-            self.stdout.write(f'Удаление IP: {ip}')
-            # Здесь можно добавить логику для динамического обновления настроек
-            self.stdout.write(
-                self.style.SUCCESS(f'IP {ip} удален из белого списка')
-            )
-        
-        if network:
-            self.stdout.write(f'Удаление сети: {network}')
-            # Здесь можно добавить логику для динамического обновления настроек
-            self.stdout.write(
-                self.style.SUCCESS(f'Сеть {network} удалена из белого списка')
-            )
+        for value, kind in ((ip, 'IP'), (network, 'Сеть')):
+            if not value:
+                continue
+            parsed = str(self.parse(value, kind))
+            deleted, _ = AllowedLoginNetwork.objects.filter(network=parsed).delete()
+            if deleted:
+                self.stdout.write(self.style.SUCCESS(f'{kind} {parsed} удален(а) из белого списка'))
+            else:
+                self.stdout.write(self.style.WARNING(
+                    f'{kind} {parsed} нет в БД (записи из settings.py удаляются в настройках)'
+                ))
+    
+    def parse(self, value, kind):
+        """Проверка и нормализация адреса/сети"""
+        try:
+            return IPAllowList.parse_network(value)
+        except ValueError:
+            raise CommandError(f'Некорректный {kind}: {value}')
     
     def enable_ip_filtering(self):
         """Включить IP-фильтрацию"""
@@ -143,25 +160,31 @@ class Command(BaseCommand):
         )
     
     def clear_ip_whitelist(self):
-        """Очистить белый список IP"""
+        """Очистить белый список IP в БД"""
         self.stdout.write('Очистка белого списка IP...')
-        # Здесь можно добавить логику для динамического обновления настроек
+        deleted, _ = AllowedLoginNetwork.objects.all().delete()
         self.stdout.write(
-            self.style.SUCCESS('Белый список IP очищен')
+            self.style.SUCCESS(f'Белый список IP очищен (удалено записей: {deleted}); записи из settings.py сохранены')
         )
     
     def show_blocked_ips_stats(self):
         """Показать статистику заблокированных IP"""
         self.stdout.write('\n=== Статистика блокировок ===')
         
-        # Получаем все ключи кэша, связанные с заблокированными IP
-        blocked_keys = [key for key in cache._cache.keys() if key.startswith('unauthorized_ip_')]
+        # Счетчики общие для всех воркеров (LoginRateLimitService)
+        blocked_ips = LoginRateLimitService.unauthorized_limiter().get_active()
         
-        if blocked_keys:
+        if blocked_ips:
             self.stdout.write('Заблокированные IP (последний час):')
-            for key in blocked_keys:
-                ip = key.replace('unauthorized_ip_', '')
-                attempts = cache.get(key, 0)
-                self.stdout.write(f'  • {ip}: {attempts} попыток')
+            for ip, state in blocked_ips:
+                self.stdout.write(f'  • {ip}: {state["count"]} попыток')
         else:
             self.stdout.write('Заблокированных IP нет')
+        
+        login_blocks = LoginRateLimitService.username_limiter().get_active()
+        login_blocks += LoginRateLimitService.ip_limiter().get_active()
+        blocked = [(key, state) for key, state in login_blocks if state['blocked']]
+        if blocked:
+            self.stdout.write('\nЗаблокированные после неудачных входов:')
+            for key, state in blocked:
+                self.stdout.write(f'  • {key}: еще {state["retry_after"]} с')
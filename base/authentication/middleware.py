@@ -1,11 +1,23 @@
-from django.core.cache import cache
 from django.conf import settings
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 from django.http import HttpResponseForbidden
-import ipaddress
+
+from .services import IPAllowList, LoginRateLimitService, get_client_ip
+
+
+_login_path = None
+
+
+def get_login_path():
+    """Путь страницы входа (вычисляется один раз на процесс)"""
+    global _login_path
+    if _login_path is None:
+        _login_path = reverse('authentication:login')
+    return _login_path
+
 
 class LoginBlockingMiddleware:
     """Middleware для проверки блокировки пользователей при попытке входа"""
@@ -15,12 +27,11 @@ class LoginBlockingMiddleware:
     
     def __call__(self, request):
         # Проверяем только для страницы входа
-        if request.path == reverse('authentication:login') and request.method == 'POST':
+        if request.path == get_login_path() and request.method == 'POST':
             username = request.POST.get('username', '')
             if username:
                 # Проверяем блокировку
-                blocked_key = f'login_blocked_{username}'
-                if cache.get(blocked_key) is not None:
+                if LoginRateLimitService.is_blocked(username, get_client_ip(request)):
                     # Пользователь заблокирован - перенаправляем на страницу входа с ошибкой
                     messages.error(
                         request,
@@ -39,15 +50,12 @@ class IPFilteringMiddleware:
     
     def __init__(self, get_response):
         self.get_response = get_response
-        # Получаем разрешенные IP из настроек
-        self.allowed_ips = getattr(settings, 'ALLOWED_LOGIN_IPS', [])
-        self.allowed_networks = getattr(settings, 'ALLOWED_LOGIN_NETWORKS', [])
         self.ip_whitelist_enabled = getattr(settings, 'IP_WHITELIST_ENABLED', False)
         self.blocked_response_type = getattr(settings, 'IP_BLOCKED_RESPONSE_TYPE', '403')
     
     def __call__(self, request):
         # Проверяем только для страницы входа
-        if request.path == reverse('authentication:login'):
+        if request.path == get_login_path():
             client_ip = self.get_client_ip(request)
             
             # Если IP-фильтрация включена, проверяем доступ
@@ -60,36 +68,11 @@ class IPFilteringMiddleware:
     
     def get_client_ip(self, request):
         """Получение реального IP клиента"""
-        # Проверяем заголовки прокси
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            # Берем первый IP из списка
-            client_ip = x_forwarded_for.split(',')[0].strip()
-        else:
-            client_ip = request.META.get('REMOTE_ADDR')
-        
-        return client_ip
+        return get_client_ip(request)
     
     def is_ip_allowed(self, client_ip):
-        """Проверка, разрешен ли IP-адрес"""
-        try:
-            client_ip_obj = ipaddress.ip_address(client_ip)
-            
-            # Проверяем точные IP-адреса
-            for allowed_ip in self.allowed_ips:
-                if client_ip_obj == ipaddress.ip_address(allowed_ip):
-                    return True
-            
-            # Проверяем сети/подсети
-            for network in self.allowed_networks:
-                if client_ip_obj in ipaddress.ip_network(network):
-                    return True
-            
-            return False
-            
-        except ValueError:
-            # Если IP-адрес некорректный, блокируем
-            return False
+        """Проверка, разрешен ли IP-адрес (скомпилированный белый список)"""
+        return IPAllowList.is_allowed(client_ip)
     
     def handle_unauthorized_ip(self, request, client_ip):
         """Обработка неавторизованного IP"""
@@ -134,7 +117,5 @@ class IPFilteringMiddleware:
         # Здесь можно добавить логирование в базу данных или файл
         print(f"Unauthorized access attempt from IP: {client_ip}")
         
-        # Сохраняем в кэш для мониторинга
-        cache_key = f'unauthorized_ip_{client_ip}'
-        attempts = cache.get(cache_key, 0) + 1
-        cache.set(cache_key, attempts, 3600)  # 1 час
+        # Счетчик за последний час для мониторинга (общий для воркеров)
+        LoginRateLimitService.unauthorized_limiter().hit(client_ip)
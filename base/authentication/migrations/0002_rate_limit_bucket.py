@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True, verbose_name='Ключ')),
+                ('tat', models.FloatField(verbose_name='Теоретическое время прихода (unix)')),
+                ('blocked_until', models.FloatField(blank=True, null=True, verbose_name='Заблокирован до (unix)')),
+            ],
+            options={
+                'verbose_name': 'Счетчик ограничения частоты',
+                'verbose_name_plural': 'Счетчики ограничения частоты',
+                'indexes': [models.Index(fields=['tat'], name='rate_limit_tat_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_rate_limit_bucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AllowedLoginNetwork',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('network', models.CharField(help_text='Адрес сети в нотации CIDR; отдельный IP хранится как /32 или /128', max_length=64, unique=True, verbose_name='Сеть')),
+                ('description', models.CharField(blank=True, max_length=255, verbose_name='Описание')),
+            ],
+            options={
+                'verbose_name': 'Разрешенная сеть для входа',
+                'verbose_name_plural': 'Разрешенные сети для входа',
+                'ordering': ['network'],
+            },
+        ),
+    ]
@@ -1,3 +1,6 @@
+import ipaddress
+
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
 from base.models import TimeStampedModel
@@ -62,3 +65,53 @@ class UserProfile(TimeStampedModel):
             # Здесь можно добавить логику получения отделения из DoctorProfile
             return self.department
         return self.department
+
+
+class RateLimitBucket(models.Model):
+    """
+    Состояние ограничителя частоты (GCRA) для одного ключа.
+    Хранится в БД, поэтому общее для всех воркеров и переживает перезапуск
+    """
+    key = models.CharField("Ключ", max_length=255, unique=True)
+    tat = models.FloatField("Теоретическое время прихода (unix)")
+    blocked_until = models.FloatField("Заблокирован до (unix)", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Счетчик ограничения частоты"
+        verbose_name_plural = "Счетчики ограничения частоты"
+        indexes = [
+            models.Index(fields=['tat'], name='rate_limit_tat_idx'),
+        ]
+
+    def __str__(self):
+        return self.key
+
+
+class AllowedLoginNetwork(TimeStampedModel):
+    """
+    Разрешенный для входа IP-адрес или сеть (дополняет ALLOWED_LOGIN_IPS и
+    ALLOWED_LOGIN_NETWORKS из настроек). Изменения подхватываются воркерами
+    без перезапуска (IPAllowList)
+    """
+    network = models.CharField(
+        "Сеть",
+        max_length=64,
+        unique=True,
+        help_text="Адрес сети в нотации CIDR; отдельный IP хранится как /32 или /128"
+    )
+    description = models.CharField("Описание", max_length=255, blank=True)
+
+    class Meta:
+        verbose_name = "Разрешенная сеть для входа"
+        verbose_name_plural = "Разрешенные сети для входа"
+        ordering = ['network']
+
+    def __str__(self):
+        return self.network
+
+    def clean(self):
+        """Проверяем адрес и приводим его к нотации CIDR"""
+        try:
+            self.network = str(ipaddress.ip_network((self.network or '').strip(), strict=False))
+        except ValueError:
+            raise ValidationError({'network': 'Некорректный IP-адрес или сеть'})
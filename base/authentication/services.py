@@ -0,0 +1,287 @@
+import ipaddress
+import math
+import time
+from bisect import bisect_right
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import Count, F, FloatField, Max, Q, Value
+from django.db.models.functions import Greatest
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import AllowedLoginNetwork, RateLimitBucket
+
+
+def get_client_ip(request) -> Optional[str]:
+    """
+    Получение реального IP клиента.
+
+    X-Forwarded-For задает клиент, поэтому заголовку доверяем только за
+    обратным прокси: при TRUSTED_PROXY_COUNT = N берется N-й адрес справа -
+    его дописал внешний из доверенных прокси. Без прокси (0, по умолчанию)
+    и при заголовке короче N используется REMOTE_ADDR.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR')
+    proxy_count = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if not proxy_count or not x_forwarded_for:
+        return remote_addr
+    forwarded = [ip.strip() for ip in x_forwarded_for.split(',')]
+    if len(forwarded) < proxy_count:
+        return remote_addr
+    try:
+        return str(ipaddress.ip_address(forwarded[-proxy_count]))
+    except ValueError:
+        return remote_addr
+
+
+class RateLimiter:
+    """
+    Ограничитель частоты по алгоритму GCRA со скользящим окном.
+
+    Для ключа хранится одно число - теоретическое время прихода (TAT):
+    каждое событие сдвигает его на window / limit секунд вперед от
+    max(TAT, сейчас). Число событий в окне - (TAT - сейчас) / интервал,
+    оно убывает непрерывно, без сброса на границе окна. При достижении
+    limit ключ блокируется на block_seconds. Проверка и учет события -
+    несколько запросов по уникальному ключу, независимо от числа событий.
+    """
+
+    def __init__(self, scope: str, limit: int, window: float, block_seconds: Optional[float] = None):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+        self.interval = window / limit
+        self.block_seconds = window if block_seconds is None else block_seconds
+
+    def make_key(self, identifier) -> str:
+        return f'{self.scope}:{identifier}'
+
+    def _state(self, tat, blocked_until, now) -> Dict[str, Any]:
+        count = max(0, math.ceil((tat - now) / self.interval - 1e-9)) if tat is not None else 0
+        blocked = blocked_until is not None and blocked_until > now
+        return {
+            'count': count,
+            'remaining': 0 if blocked else max(0, self.limit - count),
+            'blocked': blocked,
+            'blocked_until': blocked_until if blocked else None,
+            'retry_after': math.ceil(blocked_until - now) if blocked else 0,
+        }
+
+    def hit(self, identifier, now: Optional[float] = None) -> Dict[str, Any]:
+        """Учитывает событие (например, неудачный вход) и возвращает состояние ключа"""
+        now = time.time() if now is None else now
+        key = self.make_key(identifier)
+        buckets = RateLimitBucket.objects.filter(key=key)
+        next_tat = Greatest(F('tat'), Value(now, output_field=FloatField())) + self.interval
+
+        with transaction.atomic():
+            # Обновление одним UPDATE атомарно для параллельных воркеров
+            if not buckets.update(tat=next_tat):
+                try:
+                    with transaction.atomic():
+                        RateLimitBucket.objects.create(key=key, tat=now + self.interval)
+                except IntegrityError:
+                    buckets.update(tat=next_tat)
+            tat, blocked_until = buckets.values_list('tat', 'blocked_until').get()
+            state = self._state(tat, blocked_until, now)
+            if not state['blocked'] and state['count'] >= self.limit:
+                blocked_until = now + self.block_seconds
+                buckets.update(blocked_until=blocked_until)
+                state = self._state(tat, blocked_until, now)
+        return state
+
+    def get_state(self, identifier, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.time() if now is None else now
+        row = RateLimitBucket.objects.filter(key=self.make_key(identifier)).values_list(
+            'tat', 'blocked_until'
+        ).first()
+        return self._state(*(row or (None, None)), now)
+
+    def is_blocked(self, identifier, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return RateLimitBucket.objects.filter(key=self.make_key(identifier), blocked_until__gt=now).exists()
+
+    def reset(self, identifier) -> None:
+        RateLimitBucket.objects.filter(key=self.make_key(identifier)).delete()
+
+    def get_active(self, now: Optional[float] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Ключи области с событиями в окне или блокировкой: [(идентификатор, состояние)]"""
+        now = time.time() if now is None else now
+        prefix = self.make_key('')
+        rows = RateLimitBucket.objects.filter(key__startswith=prefix).filter(
+            Q(tat__gt=now) | Q(blocked_until__gt=now)
+        ).order_by('key').values_list('key', 'tat', 'blocked_until')
+        return [(key[len(prefix):], self._state(tat, blocked_until, now)) for key, tat, blocked_until in rows]
+
+    @staticmethod
+    def cleanup(now: Optional[float] = None, batch_size: int = 1000) -> int:
+        """
+        Удаляет пакетами ключи без событий в окне и без блокировки
+        (их состояние не отличается от отсутствующего ключа)
+
+        Returns:
+            Количество удаленных ключей
+        """
+        now = time.time() if now is None else now
+        stale = RateLimitBucket.objects.filter(tat__lte=now).filter(
+            Q(blocked_until__isnull=True) | Q(blocked_until__lte=now)
+        )
+        deleted = 0
+        while True:
+            ids = list(stale.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += RateLimitBucket.objects.filter(pk__in=ids).delete()[0]
+
+
+class LoginRateLimitService:
+    """
+    Ограничение попыток входа по имени пользователя и по IP-адресу.
+    Лимиты и время блокировки - LOGIN_ATTEMPTS_LIMIT, LOGIN_IP_ATTEMPTS_LIMIT,
+    LOGIN_ATTEMPTS_TIMEOUT
+    """
+
+    UNAUTHORIZED_WINDOW = 3600
+
+    @staticmethod
+    def username_limiter() -> RateLimiter:
+        return RateLimiter('login_user', settings.LOGIN_ATTEMPTS_LIMIT, settings.LOGIN_ATTEMPTS_TIMEOUT)
+
+    @staticmethod
+    def ip_limiter() -> RateLimiter:
+        return RateLimiter(
+            'login_ip', getattr(settings, 'LOGIN_IP_ATTEMPTS_LIMIT', 20), settings.LOGIN_ATTEMPTS_TIMEOUT
+        )
+
+    @classmethod
+    def unauthorized_limiter(cls) -> RateLimiter:
+        """Счетчик обращений с IP вне белого списка (для мониторинга, без блокировки)"""
+        return RateLimiter('unauthorized_ip', 1000, cls.UNAUTHORIZED_WINDOW, block_seconds=0)
+
+    @classmethod
+    def is_blocked(cls, username: str, ip: Optional[str] = None) -> bool:
+        if username and cls.username_limiter().is_blocked(username):
+            return True
+        return bool(ip) and cls.ip_limiter().is_blocked(ip)
+
+    @classmethod
+    def record_failure(cls, username: str, ip: Optional[str] = None) -> Dict[str, Any]:
+        """Учитывает неудачный вход; возвращает состояние ключа пользователя"""
+        if ip:
+            cls.ip_limiter().hit(ip)
+        return cls.username_limiter().hit(username)
+
+    @classmethod
+    def get_remaining_attempts(cls, username: str) -> int:
+        return cls.username_limiter().get_state(username)['remaining']
+
+    @classmethod
+    def reset(cls, username: str) -> None:
+        cls.username_limiter().reset(username)
+
+
+class IPAllowList:
+    """
+    Белый список IP для входа: ALLOWED_LOGIN_IPS и ALLOWED_LOGIN_NETWORKS из
+    настроек плюс сети AllowedLoginNetwork из БД.
+
+    Список компилируется один раз в отсортированные непересекающиеся
+    интервалы целых чисел (отдельно для IPv4 и IPv6); проверка адреса -
+    бинарный поиск по началам интервалов, O(log n) независимо от числа сетей.
+    Раз в IP_WHITELIST_RELOAD_INTERVAL секунд процесс сверяет сигнатуру
+    таблицы (количество, max id, max updated_at) и при изменении
+    перекомпилирует список - изменения из manage_ip_whitelist и админки
+    применяются без перезапуска.
+    """
+
+    _compiled = None
+    _signature = None
+    _checked = 0
+
+    @staticmethod
+    def parse_network(value: str):
+        """Адрес или сеть в объект ip_network (биты хоста отбрасываются)"""
+        return ipaddress.ip_network(value.strip(), strict=False)
+
+    @classmethod
+    def compile(cls, entries) -> Dict[int, Tuple[List[int], List[int]]]:
+        """
+        Компилирует адреса и сети в {версия IP: (начала, концы)}
+        с объединением пересекающихся и смежных интервалов
+        """
+        intervals = {4: [], 6: []}
+        for entry in entries:
+            try:
+                network = cls.parse_network(entry)
+            except ValueError:
+                print(f"Некорректная запись белого списка IP пропущена: {entry}")
+                continue
+            intervals[network.version].append(
+                (int(network.network_address), int(network.broadcast_address))
+            )
+
+        compiled = {}
+        for version, items in intervals.items():
+            starts, ends = [], []
+            for start, end in sorted(items):
+                if ends and start <= ends[-1] + 1:
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+            compiled[version] = (starts, ends)
+        return compiled
+
+    @staticmethod
+    def get_signature():
+        return AllowedLoginNetwork.objects.aggregate(
+            count=Count('pk'), last_id=Max('pk'), last_update=Max('updated_at')
+        )
+
+    @classmethod
+    def get_entries(cls) -> List[str]:
+        entries = list(getattr(settings, 'ALLOWED_LOGIN_IPS', []))
+        entries += list(getattr(settings, 'ALLOWED_LOGIN_NETWORKS', []))
+        entries += list(AllowedLoginNetwork.objects.values_list('network', flat=True))
+        return entries
+
+    @classmethod
+    def get_compiled(cls) -> Dict[int, Tuple[List[int], List[int]]]:
+        """Скомпилированный список; перечитывается, если таблица изменилась"""
+        interval = getattr(settings, 'IP_WHITELIST_RELOAD_INTERVAL', 30)
+        if cls._compiled is not None and time.monotonic() - cls._checked < interval:
+            return cls._compiled
+        try:
+            signature = cls.get_signature()
+            if cls._compiled is None or signature != cls._signature:
+                cls._compiled = cls.compile(cls.get_entries())
+                cls._signature = signature
+        except DatabaseError as e:
+            # Таблица недоступна (например, миграции еще не применены) - только настройки
+            print(f"Ошибка загрузки белого списка IP из БД: {e}")
+            if cls._compiled is None:
+                cls._compiled = cls.compile(
+                    list(getattr(settings, 'ALLOWED_LOGIN_IPS', []))
+                    + list(getattr(settings, 'ALLOWED_LOGIN_NETWORKS', []))
+                )
+        cls._checked = time.monotonic()
+        return cls._compiled
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Сбрасывает список текущего процесса (перекомпилируется при следующей проверке)"""
+        cls._compiled = None
+        cls._signature = None
+
+    @classmethod
+    def is_allowed(cls, client_ip: Optional[str]) -> bool:
+        """Разрешен ли IP-адрес; некорректный адрес не разрешен"""
+        try:
+            address = ipaddress.ip_address(client_ip)
+        except ValueError:
+            return False
+        starts, ends = cls.get_compiled()[address.version]
+        value = int(address)
+        index = bisect_right(starts, value) - 1
+        return index >= 0 and value <= ends[index]
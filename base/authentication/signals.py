@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import AllowedLoginNetwork
+from .services import IPAllowList
+
+
+@receiver(post_save, sender=AllowedLoginNetwork)
+@receiver(post_delete, sender=AllowedLoginNetwork)
+def reload_ip_allow_list(sender, **kwargs):
+    """
+    Сбрасывает белый список IP текущего процесса; остальные воркеры
+    подхватят изменение по сигнатуре таблицы
+    """
+    IPAllowList.invalidate()
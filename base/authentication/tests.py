@@ -1,3 +1,135 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .models import AllowedLoginNetwork, RateLimitBucket
+from .services import IPAllowList, LoginRateLimitService, RateLimiter, get_client_ip
+
+
+class RateLimiterTests(TestCase):
+    """Скользящее окно GCRA в общей таблице"""
+
+    def test_blocks_at_limit_and_window_slides(self):
+        limiter = RateLimiter('test', limit=3, window=300)
+        now = 1_000_000.0
+        self.assertEqual(limiter.hit('user', now)['remaining'], 2)
+        self.assertEqual(limiter.hit('user', now + 1)['remaining'], 1)
+        state = limiter.hit('user', now + 2)
+        self.assertTrue(state['blocked'])
+        self.assertEqual(state['retry_after'], 300)
+
+        # Другой экземпляр (другой воркер) видит то же состояние
+        other = RateLimiter('test', limit=3, window=300)
+        self.assertTrue(other.is_blocked('user', now + 299))
+        self.assertFalse(other.is_blocked('user', now + 303))
+        # За время блокировки события окна истекли - новые попытки доступны
+        self.assertEqual(other.get_state('user', now + 303)['remaining'], 3)
+        # Через интервал (window / limit) освобождается одна попытка
+        self.assertEqual(other.get_state('user', now + 102)['count'], 2)
+
+    def test_cleanup_removes_only_expired_keys(self):
+        limiter = RateLimiter('test', limit=3, window=300)
+        now = 1_000_000.0
+        for _ in range(3):
+            limiter.hit('blocked', now)
+        limiter.hit('recent', now + 250)
+        limiter.hit('stale', now - 1000)
+
+        self.assertEqual(RateLimiter.cleanup(now=now + 200, batch_size=1), 1)
+        self.assertEqual(
+            sorted(RateLimitBucket.objects.values_list('key', flat=True)), ['test:blocked', 'test:recent']
+        )
+
+
+@override_settings(LOGIN_ATTEMPTS_LIMIT=2, LOGIN_IP_ATTEMPTS_LIMIT=3)
+class LoginRateLimitTests(TestCase):
+    """Блокировка входа по пользователю и по IP"""
+
+    def setUp(self):
+        get_user_model().objects.create_user(username='doctor', password='password')
+        self.url = reverse('authentication:login')
+
+    def test_username_is_blocked_after_limit(self):
+        for _ in range(2):
+            self.client.post(self.url, {'username': 'doctor', 'password': 'wrong'})
+        self.assertTrue(LoginRateLimitService.is_blocked('doctor'))
+
+        # Заблокированный вход отклоняется до аутентификации (LoginBlockingMiddleware)
+        response = self.client.post(self.url, {'username': 'doctor', 'password': 'password'})
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+
+    def test_ip_is_blocked_across_usernames(self):
+        for username in ('first', 'second', 'third'):
+            self.client.post(self.url, {'username': username, 'password': 'wrong'})
+        self.assertFalse(LoginRateLimitService.username_limiter().is_blocked('doctor'))
+        self.assertTrue(LoginRateLimitService.is_blocked('doctor', '127.0.0.1'))
+
+    def test_forwarded_for_does_not_move_ip_counter_without_proxy(self):
+        for username in ('first', 'second', 'third'):
+            self.client.post(
+                self.url, {'username': username, 'password': 'wrong'}, HTTP_X_FORWARDED_FOR='10.9.9.9'
+            )
+        self.assertTrue(LoginRateLimitService.is_blocked('doctor', '127.0.0.1'))
+        self.assertFalse(LoginRateLimitService.is_blocked('doctor', '10.9.9.9'))
+
+
+class ClientIPTests(SimpleTestCase):
+    """IP клиента для ограничителя и белого списка"""
+
+    def request(self, forwarded_for=None):
+        extra = {'HTTP_X_FORWARDED_FOR': forwarded_for} if forwarded_for else {}
+        return RequestFactory().get('/', REMOTE_ADDR='10.0.0.2', **extra)
+
+    def test_forwarded_for_is_ignored_without_trusted_proxy(self):
+        self.assertEqual(get_client_ip(self.request('1.2.3.4')), '10.0.0.2')
+        self.assertEqual(get_client_ip(self.request()), '10.0.0.2')
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_address_appended_by_trusted_proxy_is_used(self):
+        # Первый адрес подставлен клиентом, последний дописал прокси
+        self.assertEqual(get_client_ip(self.request('6.6.6.6, 203.0.113.7')), '203.0.113.7')
+        self.assertEqual(get_client_ip(self.request('203.0.113.7')), '203.0.113.7')
+        self.assertEqual(get_client_ip(self.request('not-an-ip')), '10.0.0.2')
+        self.assertEqual(get_client_ip(self.request()), '10.0.0.2')
+
+    @override_settings(TRUSTED_PROXY_COUNT=2)
+    def test_chain_of_trusted_proxies(self):
+        self.assertEqual(get_client_ip(self.request('6.6.6.6, 203.0.113.7, 10.0.0.1')), '203.0.113.7')
+        self.assertEqual(get_client_ip(self.request('203.0.113.7')), '10.0.0.2')
+
+
+@override_settings(
+    ALLOWED_LOGIN_IPS=['127.0.0.1', '::1'],
+    ALLOWED_LOGIN_NETWORKS=['10.0.0.0/24', '10.0.1.0/24', '10.0.0.128/25'],
+    IP_WHITELIST_RELOAD_INTERVAL=0,
+)
+class IPAllowListTests(TestCase):
+    """Скомпилированный белый список IP с перезагрузкой из БД"""
+
+    def setUp(self):
+        IPAllowList.invalidate()
+        self.addCleanup(IPAllowList.invalidate)
+
+    def test_networks_are_merged_into_sorted_intervals(self):
+        starts, ends = IPAllowList.get_compiled()[4]
+        # Смежные 10.0.0.0/24 и 10.0.1.0/24 объединены, вложенная /25 поглощена
+        self.assertEqual(len(starts), 2)
+        self.assertTrue(IPAllowList.is_allowed('10.0.1.255'))
+        self.assertFalse(IPAllowList.is_allowed('10.0.2.0'))
+        self.assertFalse(IPAllowList.is_allowed('9.255.255.255'))
+        self.assertTrue(IPAllowList.is_allowed('::1'))
+        self.assertFalse(IPAllowList.is_allowed('not-an-ip'))
+
+    def test_database_changes_are_picked_up_without_restart(self):
+        url = reverse('authentication:login')
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='192.168.5.10').status_code, 403)
+
+        # Изменение из другого процесса (без сигналов) видно по сигнатуре таблицы
+        AllowedLoginNetwork.objects.bulk_create([AllowedLoginNetwork(network='192.168.5.0/24')])
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='192.168.5.10').status_code, 200)
+
+        call_command('manage_ip_whitelist', 'remove', '--network', '192.168.5.0/24', stdout=StringIO())
+        self.assertFalse(IPAllowList.is_allowed('192.168.5.10'))
@@ -6,11 +6,9 @@ from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.cache import cache
 from django.conf import settings
-from django.utils import timezone
-from datetime import timedelta
 from .forms import MedicalAuthenticationForm
+from .services import LoginRateLimitService, get_client_ip
 
 class MedicalLoginView(LoginView):
     form_class = MedicalAuthenticationForm
@@ -18,46 +16,30 @@ class MedicalLoginView(LoginView):
     redirect_authenticated_user = True
     success_url = reverse_lazy('patients:home')
     
-    def _get_cache_key(self, username):
-        """Получение ключа кэша для отслеживания попыток входа"""
-        return f'login_attempts_{username}'
-    
-    def _get_blocked_key(self, username):
-        """Получение ключа кэша для блокировки пользователя"""
-        return f'login_blocked_{username}'
-    
+    # Счетчики попыток хранятся в БД (LoginRateLimitService), а не в кэше
+    # процесса: лимит общий для всех воркеров и сохраняется при перезапуске
+
     def _is_user_blocked(self, username):
-        """Проверка, заблокирован ли пользователь"""
-        blocked_key = self._get_blocked_key(username)
-        return cache.get(blocked_key) is not None
+        """Проверка, заблокирован ли пользователь (или IP клиента)"""
+        return LoginRateLimitService.is_blocked(username, get_client_ip(self.request))
     
     def _get_remaining_attempts(self, username):
         """Получение оставшихся попыток входа"""
-        attempts_key = self._get_cache_key(username)
-        attempts = cache.get(attempts_key, 0)
-        return max(0, settings.LOGIN_ATTEMPTS_LIMIT - attempts)
+        return LoginRateLimitService.get_remaining_attempts(username)
     
     def _record_failed_attempt(self, username):
         """Запись неудачной попытки входа"""
-        attempts_key = self._get_cache_key(username)
-        attempts = cache.get(attempts_key, 0) + 1
-        cache.set(attempts_key, attempts, settings.LOGIN_ATTEMPTS_TIMEOUT)
-        
-        # Если превышен лимит, блокируем пользователя
-        if attempts >= settings.LOGIN_ATTEMPTS_LIMIT:
-            blocked_key = self._get_blocked_key(username)
-            cache.set(blocked_key, True, settings.LOGIN_ATTEMPTS_TIMEOUT)
-            
+        state = LoginRateLimitService.record_failure(username, get_client_ip(self.request))
+        
+        # Если превышен лимит, пользователь заблокирован
+        if state['blocked']:
             # Сохраняем информацию о блокировке в сессии
             self.request.session['blocked_username'] = username
-            self.request.session['blocked_until'] = timezone.now().timestamp() + settings.LOGIN_ATTEMPTS_TIMEOUT
+            self.request.session['blocked_until'] = state['blocked_until']
     
     def _reset_attempts(self, username):
         """Сброс счетчика попыток входа при успешной аутентификации"""
-        attempts_key = self._get_cache_key(username)
-        blocked_key = self._get_blocked_key(username)
-        cache.delete(attempts_key)
-        cache.delete(blocked_key)
+        LoginRateLimitService.reset(username)
         
         # Очищаем информацию о блокировке из сессии
         if self.request.session.get('blocked_username') == username:
@@ -0,0 +1,129 @@
+"""
+Общие примеси REST API: выборочные поля и сжатие ответов.
+
+    GET /api/v1/archive-logs/?fields=id,action,timestamp
+    GET /appointments/events/?expand=patient,schedule
+
+?fields= оставляет в ответе только перечисленные поля. ?expand= разворачивает
+связанные объекты из expandable_fields сериализатора; без него они выводятся
+первичным ключом. SparseFieldsetViewSetMixin строит по итоговому набору полей
+select_related() и only(), поэтому SQL читает только нужные столбцы и
+таблицы. Вычисляемым полям нужные поля модели указываются в
+field_dependencies сериализатора.
+
+ConditionalGzipMixin добавляет представлению ETag с ответом 304 на
+If-None-Match и gzip для клиентов с Accept-Encoding: gzip.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import conditional_page
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def get_requested_fields(request, param):
+    """Множество имен из параметра ?fields=a,b или None, если параметр не передан"""
+    if request is None:
+        return None
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    ?fields= и ?expand= для ModelSerializer.
+    expandable_fields - вложенные сериализаторы, выводимые первичным ключом без ?expand=.
+    """
+    expandable_fields = ()
+    field_dependencies = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+
+        expand = get_requested_fields(request, 'expand') or set()
+        for name in self.expandable_fields:
+            if name in self.fields and name not in expand:
+                source = self.fields[name].source
+                self.fields[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True, **({'source': source} if source != name else {})
+                )
+
+        # Состав полей сужается только для чтения: запись использует все поля
+        requested = get_requested_fields(request, 'fields')
+        if requested and request.method in SAFE_METHODS:
+            for name in list(self.fields):
+                if name not in requested:
+                    self.fields.pop(name)
+
+
+def get_query_plan(serializer, prefix=''):
+    """
+    (select_related, only) для сериализатора: связи вложенных сериализаторов
+    и поля модели, которые он читает. only = None, если поле сериализатора
+    не удалось сопоставить с моделью - тогда столбцы не ограничиваются.
+    """
+    model = serializer.Meta.model
+    dependencies = getattr(serializer, 'field_dependencies', {})
+    related, only = set(), set()
+    narrowable = True
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in dependencies:
+            for path in dependencies[name]:
+                only.add(prefix + path)
+                relation = path.rpartition('__')[0]
+                if relation:
+                    related.add(prefix + relation)
+            continue
+
+        source = field.source
+        if isinstance(field, serializers.BaseSerializer) and not isinstance(field, serializers.ListSerializer):
+            path = prefix + source
+            related.add(path)
+            only.add(path)
+            nested_related, nested_only = get_query_plan(field, path + '__')
+            related |= nested_related
+            # Без only() для вложенной модели читаются все ее столбцы
+            only |= nested_only or set()
+            continue
+
+        try:
+            model._meta.get_field(source)
+        except FieldDoesNotExist:
+            narrowable = False
+        else:
+            only.add(prefix + source)
+
+    # Вложенные пути select_related покрывают родительские
+    related = {path for path in related if not any(other.startswith(path + '__') for other in related)}
+    return related, (only if narrowable else None)
+
+
+class SparseFieldsetViewSetMixin:
+    """Сужает queryset чтения (select_related/only) по полям сериализатора"""
+
+    def narrow_queryset(self, queryset):
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        related, only = get_query_plan(self.get_serializer())
+        if related:
+            queryset = queryset.select_related(*sorted(related))
+        if only is not None:
+            queryset = queryset.only(*sorted(only))
+        return queryset
+
+
+class ConditionalGzipMixin:
+    """ETag/304 и gzip для всех действий ViewSet"""
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        # ETag считается по несжатому ответу, затем ответ сжимается
+        return gzip_page(conditional_page(super().as_view(*args, **kwargs)))
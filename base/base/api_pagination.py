@@ -0,0 +1,101 @@
+"""
+Keyset-пагинация для REST API.
+
+Страница выбирается условием по ключу (поле упорядочивания, id) от
+последней записи предыдущей страницы, а не OFFSET: стоимость запроса не
+растет с номером страницы, а COUNT(*) не выполняется. Курсор - непрозрачная
+строка base64 с ключом последней записи; ответ содержит только ссылку на
+следующую страницу:
+
+    {"next": "https://.../api/v1/archive-logs/?cursor=WyIyMDI2...", "results": [...]}
+"""
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по (ordering_field, id) без COUNT(*).
+    Подклассы задают поле упорядочивания, направление и размер страницы.
+    """
+    ordering_field = 'timestamp'
+    descending = True
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Неверный курсор'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw_value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            value = model._meta.get_field(self.ordering_field).to_python(raw_value)
+            return value, int(pk)
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance):
+        field = instance._meta.get_field(self.ordering_field)
+        key = [field.value_to_string(instance), instance.pk]
+        return base64.urlsafe_b64encode(json.dumps(key).encode('ascii')).decode('ascii')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request, queryset.model)
+
+        field = self.ordering_field
+        if self.descending:
+            queryset = queryset.order_by(f'-{field}', '-id')
+        else:
+            queryset = queryset.order_by(field, 'id')
+
+        if cursor is not None:
+            value, pk = cursor
+            # (field, id) < (value, pk) в развернутом виде: первое условие
+            # дает диапазон по индексу поля, второе отсекает равные значения
+            op = 'lt' if self.descending else 'gt'
+            bound = 'lte' if self.descending else 'gte'
+            queryset = queryset.filter(**{f'{field}__{bound}': value}).filter(
+                Q(**{f'{field}__{op}': value}) | Q(**{f'id__{op}': pk})
+            )
+
+        # Одна лишняя запись показывает, есть ли следующая страница
+        page = list(queryset[:page_size + 1])
+        self.next_cursor = self.encode_cursor(page[page_size - 1]) if len(page) > page_size else None
+        return page[:page_size]
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
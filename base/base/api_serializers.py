@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import User
+from .api_mixins import SparseFieldsetSerializerMixin
 from .models import ArchiveLog, ArchiveConfiguration
 
 
@@ -18,6 +19,7 @@ class UserSerializer(serializers.ModelSerializer):
     Сериализатор для пользователей
     """
     full_name = serializers.SerializerMethodField()
+    field_dependencies = {'full_name': ('first_name', 'last_name', 'username')}
     
     class Meta:
         model = User
@@ -28,13 +30,17 @@ class UserSerializer(serializers.ModelSerializer):
         return obj.get_full_name() or obj.username
 
 
-class ArchiveLogSerializer(serializers.ModelSerializer):
+class ArchiveLogSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
-    Сериализатор для логов архивирования
+    Сериализатор для логов архивирования.
+    Тип содержимого и пользователь разворачиваются по ?expand=content_type,user
     """
     content_type = ContentTypeSerializer(read_only=True)
     user = UserSerializer(read_only=True)
     action_display = serializers.CharField(source='get_action_display', read_only=True)
+
+    expandable_fields = ('content_type', 'user')
+    field_dependencies = {'action_display': ('action',)}
     
     class Meta:
         model = ArchiveLog
@@ -63,7 +69,7 @@ class ArchiveConfigurationSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'content_type', 'model_name', 'app_label',
             'is_archivable', 'cascade_archive', 'cascade_restore',
-            'auto_archive_related', 'archive_after_days',
+            'auto_archive_related', 'archive_after_days', 'log_retention_days', 'cold_storage_after_days',
             'show_archived_in_list', 'show_archived_in_search',
             'allow_restore', 'require_reason',
             'archive_permission', 'restore_permission'
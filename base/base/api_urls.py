@@ -1,7 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .api_viewsets import (
-    ArchiveLogViewSet, ArchiveConfigurationViewSet, ArchiveActionViewSet
+    ArchiveLogViewSet, ArchiveConfigurationViewSet, ArchiveActionViewSet,
+    ReferenceDataSnapshotViewSet
 )
 
 # Создаем роутер для API
@@ -9,6 +10,7 @@ router = DefaultRouter()
 router.register(r'archive-logs', ArchiveLogViewSet, basename='archive-logs')
 router.register(r'archive-configurations', ArchiveConfigurationViewSet, basename='archive-configurations')
 router.register(r'archive-actions', ArchiveActionViewSet, basename='archive-actions')
+router.register(r'reference-data', ReferenceDataSnapshotViewSet, basename='reference-data')
 
 # URL-паттерны для API
 urlpatterns = [
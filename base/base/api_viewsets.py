@@ -1,35 +1,43 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError, PermissionDenied
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
+from django.conf import settings
+from django.http import HttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags
 from typing import List, Dict, Any
 
+from .api_mixins import ConditionalGzipMixin, SparseFieldsetViewSetMixin
+from .api_pagination import KeysetPagination
 from .models import ArchiveLog, ArchiveConfiguration
 from .api_serializers import (
     ArchiveLogSerializer, ArchiveConfigurationSerializer,
     ArchiveActionSerializer, ArchiveStatusSerializer,
     BulkArchiveResponseSerializer, ArchiveFilterSerializer
 )
-from .services import ArchiveService
+from .services import ArchiveService, ArchiveStatisticsService
+from .cold_storage import ColdStorageService
+from .reference_data import ReferenceDataSnapshotService
 
 
-class ArchiveLogPagination(PageNumberPagination):
+class ArchiveLogPagination(KeysetPagination):
     """
-    Пагинация для логов архивирования
+    Пагинация для логов архивирования: курсор по (timestamp, id), новые первыми
     """
+    ordering_field = 'timestamp'
+    descending = True
     page_size = 20
-    page_size_query_param = 'page_size'
     max_page_size = 100
 
 
-class ArchiveLogViewSet(viewsets.ReadOnlyModelViewSet):
+class ArchiveLogViewSet(ConditionalGzipMixin, SparseFieldsetViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
-    ViewSet для просмотра логов архивирования
+    ViewSet для просмотра логов архивирования (?fields=, ?expand=content_type,user)
     """
     queryset = ArchiveLog.objects.all()
     serializer_class = ArchiveLogSerializer
@@ -71,39 +79,29 @@ class ArchiveLogViewSet(viewsets.ReadOnlyModelViewSet):
         if until_date:
             queryset = queryset.filter(timestamp__lte=until_date)
         
-        return queryset.select_related('content_type', 'user').order_by('-timestamp')
+        return self.narrow_queryset(queryset).order_by('-timestamp', '-id')
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """
-        Получение статистики архивирования
+        Получение статистики архивирования из дневных счетчиков.
+        Параметры since/until (ГГГГ-ММ-ДД) ограничивают период.
         """
-        total_logs = ArchiveLog.objects.count()
-        archive_count = ArchiveLog.objects.filter(action='archive').count()
-        restore_count = ArchiveLog.objects.filter(action='restore').count()
-        
-        # Статистика по моделям
-        model_stats = ArchiveLog.objects.values(
-            'content_type__app_label', 'content_type__model'
-        ).annotate(
-            archive_count=Q(action='archive').count(),
-            restore_count=Q(action='restore').count()
-        )
-        
-        # Статистика по пользователям
-        user_stats = ArchiveLog.objects.values(
-            'user__username', 'user__first_name', 'user__last_name'
-        ).annotate(
-            total_actions=Q().count()
-        ).order_by('-total_actions')[:10]
-        
-        return Response({
-            'total_logs': total_logs,
-            'archive_count': archive_count,
-            'restore_count': restore_count,
-            'model_statistics': list(model_stats),
-            'top_users': list(user_stats)
-        })
+        period = {}
+        for param in ('since', 'until'):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                period[param] = parse_date(value)
+            except ValueError:
+                period[param] = None
+            if period[param] is None:
+                return Response(
+                    {'error': f'Неверная дата {param}: ожидается ГГГГ-ММ-ДД'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        return Response(ArchiveStatisticsService.get_statistics(**period))
 
 
 class ArchiveConfigurationViewSet(viewsets.ModelViewSet):
@@ -147,6 +145,8 @@ class ArchiveConfigurationViewSet(viewsets.ModelViewSet):
         config.cascade_restore = True
         config.auto_archive_related = True
         config.archive_after_days = None
+        config.log_retention_days = None
+        config.cold_storage_after_days = None
         config.show_archived_in_list = True
         config.show_archived_in_search = False
         config.allow_restore = True
@@ -255,7 +255,10 @@ class ArchiveActionViewSet(viewsets.ViewSet):
             # Получаем модель и запись
             content_type = ContentType.objects.get(app_label=app_label, model=model_name)
             model_class = content_type.model_class()
-            instance = get_object_or_404(model_class, pk=pk)
+            # Архивированная запись может находиться в холодном хранилище
+            instance = ColdStorageService.get_object(model_class, pk)
+            if instance is None:
+                return Response({'error': 'Запись не найдена'}, status=status.HTTP_404_NOT_FOUND)
             
             # Проверяем поддержку архивирования
             if not hasattr(instance, 'is_archived'):
@@ -369,7 +372,10 @@ class ArchiveActionViewSet(viewsets.ViewSet):
             # Получаем модель и запись
             content_type = ContentType.objects.get(app_label=app_label, model=model_name)
             model_class = content_type.model_class()
-            instance = get_object_or_404(model_class, pk=pk)
+            # Архивированная запись может находиться в холодном хранилище
+            instance = ColdStorageService.get_object(model_class, pk)
+            if instance is None:
+                return Response({'error': 'Запись не найдена'}, status=status.HTTP_404_NOT_FOUND)
             
             # Проверяем поддержку архивирования
             if not hasattr(instance, 'is_archived'):
@@ -401,3 +407,33 @@ class ArchiveActionViewSet(viewsets.ViewSet):
                 {'error': f'Внутренняя ошибка сервера: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class ReferenceDataSnapshotViewSet(viewsets.ViewSet):
+    """
+    ViewSet для версионированного снимка справочных данных.
+    Ответ отдается со строгим ETag и Cache-Control, поэтому браузеры и
+    воркеры повторно используют его, пока справочники не изменятся.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request):
+        """
+        Получение снимка справочных данных (304 при совпадении ETag)
+        """
+        snapshot = ReferenceDataSnapshotService.get_snapshot()
+        etag = snapshot['etag']
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(snapshot['content'], content_type='application/json; charset=utf-8')
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age={}, must-revalidate'.format(
+            getattr(settings, 'REFERENCE_DATA_CACHE_MAX_AGE', 300)
+        )
+        response['Vary'] = 'Cookie'
+        return response
+
@@ -5,3 +5,12 @@ class BaseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'base'
     verbose_name = 'Базовая функциональность'
+
+    def ready(self):
+        """Подключаем сброс снимка справочных данных к сигналам моделей"""
+        from .reference_data import ReferenceDataSnapshotService
+        ReferenceDataSnapshotService.connect_signals()
+
+        # Счетчики статистики архивирования переживают удаление пользователя
+        from .services import ArchiveStatisticsService
+        ArchiveStatisticsService.connect_signals()
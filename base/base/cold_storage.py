@@ -0,0 +1,357 @@
+"""
+Холодное хранилище архивированных записей.
+
+Записи, архивированные дольше ArchiveConfiguration.cold_storage_after_days,
+переносятся из основной ("горячей") таблицы модели в теневую таблицу
+<таблица>_cold с теми же колонками. Горячие таблицы остаются небольшими,
+а обычные запросы их не видят. ArchiveQuerySet.including_cold()
+объединяет обе таблицы (UNION ALL) и возвращает экземпляры исходной
+модели; восстановление из архива возвращает запись в горячую таблицу.
+
+Переносятся только записи, на которые не ссылаются строки горячих таблиц
+(внешние ключи горячих таблиц проверяются СУБД). Поэтому модели
+обрабатываются от ссылающихся к целевым: документы и приемы раньше
+случаев обращения. В теневых таблицах нет ограничений внешних ключей
+и уникальности, все колонки кроме первичного ключа допускают NULL:
+колонки, добавленные в модель позже, дописываются при следующем переносе.
+"""
+import time
+
+from django.apps import apps as global_apps
+from django.apps.registry import Apps
+from django.db import connection, models, transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.sql.datastructures import BaseTable
+from django.utils import timezone
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from .models import ArchiveConfiguration
+
+
+class ColdColumn(models.Field):
+    """Колонка теневой таблицы с типом колонки исходного поля"""
+
+    def __init__(self, *args, column_type=None, **kwargs):
+        self.column_type = column_type
+        super().__init__(*args, **kwargs)
+
+    def db_type(self, connection):
+        return self.column_type
+
+
+class ColdStorageService:
+    """Перенос архивированных записей между горячими и теневыми таблицами"""
+
+    BATCH_SIZE = 500
+    TABLE_SUFFIX = '_cold'
+    # Как долго считать список теневых таблиц актуальным, сек
+    TABLES_TTL = 60
+
+    _registry = Apps()
+    _cold_models = {}
+    _tables = None
+    _tables_checked = 0
+
+    # --- Теневые таблицы ---
+
+    @classmethod
+    def get_table_name(cls, model) -> str:
+        return f'{model._meta.db_table}{cls.TABLE_SUFFIX}'
+
+    @classmethod
+    def get_cold_model(cls, model):
+        """Модель теневой таблицы (только для DDL, в реестре приложений не регистрируется)"""
+        label = model._meta.label_lower
+        if label not in cls._cold_models:
+            attrs = {
+                '__module__': __name__,
+                'Meta': type('Meta', (), {
+                    'app_label': model._meta.app_label,
+                    'db_table': cls.get_table_name(model),
+                    'apps': cls._registry,
+                }),
+            }
+            for field in model._meta.concrete_fields:
+                column_type = field.db_type(connection)
+                if column_type is None:
+                    continue
+                attrs[field.attname] = ColdColumn(
+                    column_type=column_type,
+                    db_column=field.column,
+                    primary_key=field.primary_key,
+                    null=not field.primary_key,
+                    db_index=field.is_relation,
+                )
+            cls._cold_models[label] = type(f'{model.__name__}Cold', (models.Model,), attrs)
+        return cls._cold_models[label]
+
+    @classmethod
+    def get_tables(cls, refresh=False) -> set:
+        """Существующие теневые таблицы (список кешируется на TABLES_TTL)"""
+        if refresh or cls._tables is None or time.monotonic() - cls._tables_checked > cls.TABLES_TTL:
+            cls._tables = {
+                name for name in connection.introspection.table_names()
+                if name.endswith(cls.TABLE_SUFFIX)
+            }
+            cls._tables_checked = time.monotonic()
+        return cls._tables
+
+    @classmethod
+    def get_cold_table(cls, model) -> Optional[str]:
+        """Имя теневой таблицы модели или None, если ее нет"""
+        table = cls.get_table_name(model)
+        return table if table in cls.get_tables() else None
+
+    @classmethod
+    def ensure_table(cls, model) -> str:
+        """Создает теневую таблицу или дописывает в нее новые колонки модели"""
+        cold_model = cls.get_cold_model(model)
+        table = cold_model._meta.db_table
+        with connection.schema_editor() as schema_editor:
+            if table not in connection.introspection.table_names():
+                schema_editor.create_model(cold_model)
+            else:
+                with connection.cursor() as cursor:
+                    existing = {
+                        column.name for column in connection.introspection.get_table_description(cursor, table)
+                    }
+                for field in cold_model._meta.local_fields:
+                    if field.column not in existing:
+                        schema_editor.add_field(cold_model, field)
+        cls.get_tables(refresh=True)
+        return table
+
+    @classmethod
+    def get_cold_models(cls) -> List:
+        """Архивируемые модели, у которых есть теневая таблица"""
+        tables = cls.get_tables()
+        return [
+            model for model in global_apps.get_models()
+            if hasattr(model, 'is_archived') and cls.get_table_name(model) in tables
+        ]
+
+    # --- Чтение ---
+
+    @classmethod
+    def as_cold_queryset(cls, queryset):
+        """
+        Копия queryset, читающая теневую таблицу вместо горячей
+        (те же условия и колонки, экземпляры исходной модели)
+        """
+        table = cls.get_cold_table(queryset.model)
+        if table is None:
+            return None
+        cold = queryset._chain()
+        alias = cold.query.get_initial_alias()
+        cold.query.alias_map[alias] = BaseTable(table, alias)
+        return cold
+
+    @classmethod
+    def get_object(cls, model, pk):
+        """Запись по первичному ключу из горячей или теневой таблицы"""
+        instance = model._base_manager.filter(pk=pk).first()
+        if instance is None:
+            cold = cls.as_cold_queryset(model._base_manager.filter(pk=pk))
+            instance = cold.first() if cold is not None else None
+        return instance
+
+    # --- Перенос ---
+
+    @staticmethod
+    def _columns(model) -> str:
+        qn = connection.ops.quote_name
+        return ', '.join(qn(field.column) for field in model._meta.concrete_fields)
+
+    @classmethod
+    def _move_rows(cls, model, ids, source, target) -> None:
+        qn = connection.ops.quote_name
+        columns = cls._columns(model)
+        placeholders = ', '.join(['%s'] * len(ids))
+        pk_column = qn(model._meta.pk.column)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {qn(target)} ({columns}) SELECT {columns} FROM {qn(source)} '
+                f'WHERE {pk_column} IN ({placeholders})',
+                ids
+            )
+            cursor.execute(f'DELETE FROM {qn(source)} WHERE {pk_column} IN ({placeholders})', ids)
+
+    @staticmethod
+    def _unreferenced(queryset):
+        """Исключает записи, на которые ссылаются строки горячих таблиц"""
+        model = queryset.model
+        for relation in model._meta.related_objects:
+            field = relation.field
+            target = OuterRef(field.target_field.attname) if not field.many_to_many else OuterRef('pk')
+            queryset = queryset.exclude(
+                Exists(relation.related_model._base_manager.filter(**{field.name: target}))
+            )
+        for field in model._meta.many_to_many:
+            through = field.remote_field.through
+            queryset = queryset.exclude(
+                Exists(through._base_manager.filter(**{field.m2m_field_name(): OuterRef('pk')}))
+            )
+        return queryset
+
+    @classmethod
+    def get_eligible_queryset(cls, model, cutoff):
+        """Горячие записи, архивированные раньше cutoff и свободные от ссылок"""
+        return cls._unreferenced(
+            model._base_manager.filter(is_archived=True, archived_at__lt=cutoff)
+        )
+
+    @staticmethod
+    def get_configurations(labels=None):
+        """Конфигурации с заданным сроком переноса в холодное хранилище"""
+        configs = ArchiveConfiguration.objects.filter(
+            cold_storage_after_days__isnull=False
+        ).select_related('content_type')
+        result = []
+        for config in configs:
+            model = config.content_type.model_class()
+            label = f'{config.content_type.app_label}.{config.content_type.model}'
+            if model is None or not hasattr(model, 'is_archived'):
+                continue
+            if labels and label not in {item.lower() for item in labels}:
+                continue
+            result.append((model, config))
+        return result
+
+    @staticmethod
+    def _references(model, target) -> bool:
+        return any(
+            field.is_relation and field.many_to_one and field.related_model is target
+            for field in model._meta.concrete_fields
+        ) or any(field.related_model is target for field in model._meta.many_to_many)
+
+    @classmethod
+    def order_for_move(cls, items):
+        """
+        Порядок переноса: модель переносится после всех моделей, которые на
+        нее ссылаются (документы раньше случаев обращения)
+        """
+        ordered = []
+        remaining = list(items)
+        while remaining:
+            for item in remaining:
+                if not any(
+                    other is not item and cls._references(other[0], item[0]) for other in remaining
+                ):
+                    break
+            else:
+                item = remaining[0]
+            ordered.append(item)
+            remaining.remove(item)
+        return ordered
+
+    @classmethod
+    def move_to_cold(cls, labels=None, now=None, batch_size=None, dry_run=False) -> Dict[str, int]:
+        """
+        Переносит давно архивированные записи в теневые таблицы
+
+        Args:
+            labels: Ограничить моделями 'app_label.model'
+            batch_size: Записей в пакете
+            dry_run: Только посчитать записи к переносу
+
+        Returns:
+            {'app_label.model': количество записей}
+        """
+        now = now or timezone.now()
+        batch_size = batch_size or cls.BATCH_SIZE
+        result = {}
+
+        for model, config in cls.order_for_move(cls.get_configurations(labels)):
+            label = model._meta.label_lower
+            queryset = cls.get_eligible_queryset(
+                model, now - timedelta(days=config.cold_storage_after_days)
+            )
+            if dry_run:
+                count = queryset.count()
+            else:
+                table = cls.ensure_table(model)
+                count = 0
+                last_pk = None
+                while True:
+                    chunk = queryset.order_by('pk')
+                    if last_pk is not None:
+                        chunk = chunk.filter(pk__gt=last_pk)
+                    pks = list(chunk.values_list('pk', flat=True)[:batch_size])
+                    if not pks:
+                        break
+                    last_pk = pks[-1]
+                    with transaction.atomic():
+                        # Перепроверяем под блокировкой: запись могли восстановить
+                        ids = list(
+                            queryset.select_for_update().filter(pk__in=pks).values_list('pk', flat=True)
+                        )
+                        if ids:
+                            cls._move_rows(model, ids, model._meta.db_table, table)
+                    count += len(ids)
+            if count:
+                result[label] = count
+        return result
+
+    @classmethod
+    def move_to_hot(cls, model, pks, with_children=False, _seen=None) -> int:
+        """
+        Возвращает записи из теневой таблицы в горячую
+
+        Сначала возвращаются записи, на которые они ссылаются (иначе нарушатся
+        внешние ключи); with_children дополнительно возвращает холодные
+        записи, ссылающиеся на восстановленные (для каскадного восстановления).
+
+        Returns:
+            Количество возвращенных записей модели
+        """
+        table = cls.get_cold_table(model)
+        pks = [pk for pk in pks if pk is not None]
+        if table is None or not pks:
+            return 0
+        _seen = _seen if _seen is not None else set()
+        qn = connection.ops.quote_name
+        pk_column = qn(model._meta.pk.column)
+
+        with transaction.atomic():
+            placeholders = ', '.join(['%s'] * len(pks))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT {pk_column} FROM {qn(table)} WHERE {pk_column} IN ({placeholders})', pks
+                )
+                ids = [row[0] for row in cursor.fetchall() if (model, row[0]) not in _seen]
+            if not ids:
+                return 0
+            _seen.update((model, pk) for pk in ids)
+            placeholders = ', '.join(['%s'] * len(ids))
+            cold_models = cls.get_cold_models()
+
+            # Родительские записи
+            for field in model._meta.concrete_fields:
+                if field.is_relation and field.many_to_one and field.related_model in cold_models:
+                    with connection.cursor() as cursor:
+                        cursor.execute(
+                            f'SELECT DISTINCT {qn(field.column)} FROM {qn(table)} '
+                            f'WHERE {pk_column} IN ({placeholders})',
+                            ids
+                        )
+                        parent_ids = [row[0] for row in cursor.fetchall()]
+                    cls.move_to_hot(field.related_model, parent_ids, _seen=_seen)
+
+            cls._move_rows(model, ids, table, model._meta.db_table)
+
+            # Дочерние записи
+            if with_children:
+                for child in cold_models:
+                    for field in child._meta.concrete_fields:
+                        if not (field.is_relation and field.many_to_one and field.related_model is model):
+                            continue
+                        with connection.cursor() as cursor:
+                            cursor.execute(
+                                f'SELECT {qn(child._meta.pk.column)} FROM {qn(cls.get_table_name(child))} '
+                                f'WHERE {qn(field.column)} IN ({placeholders})',
+                                ids
+                            )
+                            child_ids = [row[0] for row in cursor.fetchall()]
+                        cls.move_to_hot(child, child_ids, with_children=True, _seen=_seen)
+        return len(ids)
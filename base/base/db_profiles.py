@@ -0,0 +1,112 @@
+"""
+Профили подключения к базе данных, выбираемые переменными окружения.
+
+DB_ENGINE=sqlite (по умолчанию) - один узел: файл SQLite, на каждом новом
+соединении выполняются PRAGMA из SQLITE_PRAGMAS (WAL, synchronous=NORMAL,
+busy_timeout, mmap). Значения переопределяются переменными SQLITE_<PRAGMA>,
+например SQLITE_MMAP_SIZE=0.
+
+DB_ENGINE=postgresql - несколько воркеров/узлов: постоянные соединения
+(DB_CONN_MAX_AGE) с проверкой перед использованием или пул psycopg
+(DB_POOL=min:max, требует psycopg[pool]). Только на PostgreSQL создаются
+GIN-индексы по JSON-полям (postgres_only_sql в миграциях).
+"""
+import os
+from pathlib import Path
+
+
+SQLITE_PRAGMAS = {
+    # Читатели не блокируют писателя и наоборот
+    'journal_mode': 'WAL',
+    # В режиме WAL fsync только при контрольной точке; потеря последних
+    # транзакций возможна лишь при сбое ОС, но не процесса
+    'synchronous': 'NORMAL',
+    # Ждать освобождения блокировки вместо ошибки "database is locked", мс
+    'busy_timeout': '5000',
+    # Чтение файла через отображение в память, байт
+    'mmap_size': str(256 * 1024 * 1024),
+    # Кеш страниц на соединение (отрицательное значение - в КиБ)
+    'cache_size': str(-64 * 1024),
+    'temp_store': 'MEMORY',
+}
+
+
+def get_sqlite_pragmas(env=None) -> dict:
+    """PRAGMA профиля SQLite с учетом переменных окружения SQLITE_<PRAGMA>"""
+    env = os.environ if env is None else env
+    return {
+        name: env.get(f'SQLITE_{name.upper()}', value)
+        for name, value in SQLITE_PRAGMAS.items()
+    }
+
+
+def get_sqlite_init_command(pragmas) -> str:
+    return ''.join(f'PRAGMA {name}={value};' for name, value in pragmas.items())
+
+
+def get_database_settings(base_dir, env=None) -> dict:
+    """
+    Настройка DATABASES['default'] для профиля из DB_ENGINE
+
+    Args:
+        base_dir: Каталог проекта (для файла SQLite по умолчанию)
+        env: Переменные окружения (по умолчанию os.environ)
+    """
+    env = os.environ if env is None else env
+    engine = env.get('DB_ENGINE', 'sqlite').lower()
+
+    if engine in ('postgres', 'postgresql'):
+        database = {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': env.get('DB_NAME', 'base'),
+            'USER': env.get('DB_USER', 'postgres'),
+            'PASSWORD': env.get('DB_PASSWORD', ''),
+            'HOST': env.get('DB_HOST', 'localhost'),
+            'PORT': env.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(env.get('DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+        pool = env.get('DB_POOL')
+        if pool:
+            # Пул psycopg несовместим с постоянными соединениями Django
+            min_size, _, max_size = pool.partition(':')
+            database['OPTIONS']['pool'] = {
+                'min_size': int(min_size),
+                'max_size': int(max_size or min_size),
+            }
+            database['CONN_MAX_AGE'] = 0
+        return database
+
+    if engine not in ('sqlite', 'sqlite3'):
+        raise ValueError(f'Неизвестный DB_ENGINE: {engine}')
+
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': env.get('DB_NAME') or Path(base_dir) / 'db.sqlite3',
+        'CONN_MAX_AGE': int(env.get('DB_CONN_MAX_AGE', 60)),
+        'OPTIONS': {
+            'init_command': get_sqlite_init_command(get_sqlite_pragmas(env)),
+            # Транзакция сразу берет блокировку записи: без взаимоблокировки
+            # при повышении уровня блокировки внутри транзакции
+            'transaction_mode': env.get('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+        },
+    }
+
+
+def postgres_only_sql(sql, reverse_sql):
+    """
+    Операция миграции, выполняющая SQL только на PostgreSQL
+    (на SQLite миграция применяется без изменений схемы)
+    """
+    from django.db import migrations
+
+    def forwards(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+
+    def backwards(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(reverse_sql)
+
+    return migrations.RunPython(forwards, backwards)
@@ -0,0 +1,493 @@
+"""
+Генератор синтетических данных для нагрузочного тестирования.
+
+Объем задается масштабом: единица масштаба - SCALE_UNIT пациентов со
+случаями обращения, документами, планами обследования и лечения,
+назначениями в планировщике, результатами анализов с подписями и
+записями на прием. Данные создаются bulk_create пакетами по BATCH_SIZE
+в транзакции на каждый вид объектов; генератор случайных чисел
+инициализируется seed, поэтому при одинаковых seed, масштабе и дате
+отсчета получаются одинаковые данные.
+
+bulk_create не вызывает save() и сигналы: номера обращений, поисковый
+индекс документов и назначения планировщика генератор заполняет сам.
+"""
+import random
+import time
+from datetime import datetime, time as dt_time, timedelta
+
+import recurrence
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+
+from appointments.models import AppointmentEvent, Schedule
+from clinical_scheduling.models import ScheduledAppointment
+from departments.models import Department, PatientDepartmentStatus
+from diagnosis.models import Diagnosis
+from document_signatures.models import DocumentSignature, SignatureWorkflow
+from documents.models import ClinicalDocument, DocumentType
+from documents.services import DocumentSearchIndexService
+from encounters.models import Encounter
+from examination_management.models import ExaminationInstrumental, ExaminationLabTest, ExaminationPlan
+from instrumental_procedures.models import InstrumentalProcedureDefinition
+from lab_tests.models import LabTestDefinition, LabTestResult
+from patients.models import Patient
+from pharmacy.models import DosingInstruction, Medication, PopulationCriteria, Regimen
+from profiles.models import DoctorProfile
+from treatment_management.models import TreatmentMedication, TreatmentPlan
+
+
+LAST_NAMES = [
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов',
+    'Новиков', 'Федоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семенов', 'Егоров',
+    'Павлов', 'Козлов', 'Степанов', 'Николаев', 'Орлов', 'Андреев', 'Макаров', 'Никитин',
+]
+MALE_FIRST_NAMES = ['Александр', 'Сергей', 'Дмитрий', 'Андрей', 'Алексей', 'Иван', 'Михаил', 'Николай']
+FEMALE_FIRST_NAMES = ['Елена', 'Ольга', 'Наталья', 'Татьяна', 'Ирина', 'Анна', 'Мария', 'Светлана']
+MALE_MIDDLE_NAMES = ['Александрович', 'Сергеевич', 'Иванович', 'Петрович', 'Николаевич']
+FEMALE_MIDDLE_NAMES = ['Александровна', 'Сергеевна', 'Ивановна', 'Петровна', 'Николаевна']
+
+COMPLAINTS = [
+    'головная боль', 'слабость', 'повышение температуры тела', 'кашель с мокротой',
+    'боль в груди при нагрузке', 'одышка', 'боль в животе', 'тошнота', 'головокружение',
+]
+STATES = ['удовлетворительное', 'средней тяжести', 'тяжелое']
+# Код МКБ-10, наименование и препарат схемы лечения
+DIAGNOSES = [
+    ('J06.9', 'Острая респираторная вирусная инфекция', 'Парацетамол'),
+    ('I11.9', 'Гипертоническая болезнь II стадии', 'Лозартан'),
+    ('J18.9', 'Внебольничная пневмония', 'Цефтриаксон'),
+    ('K29.5', 'Хронический гастрит, обострение', 'Омепразол'),
+    ('I20.8', 'ИБС, стенокардия напряжения', 'Аторвастатин'),
+    ('E11.9', 'Сахарный диабет 2 типа', 'Метформин'),
+    ('J20.9', 'Острый бронхит', 'Амоксициллин'),
+]
+TREATMENTS = ['режим палатный', 'диета стол 10', 'инфузионная терапия', 'антибактериальная терапия']
+
+DOCUMENT_TYPES = {
+    'Дневниковая запись': ['complaints', 'severity_assessment', 'objective_status'],
+    'Первичный осмотр': ['complaints', 'anamnesis', 'diagnosis', 'treatment_plan'],
+    'Выписной эпикриз': ['diagnosis', 'treatment', 'recommendations'],
+}
+LAB_TESTS = {
+    'Общий анализ крови': {'hemoglobin': (110, 170), 'leukocytes': (3.5, 12.0), 'platelets': (150, 400)},
+    'Биохимический анализ крови': {'glucose': (3.5, 9.0), 'creatinine': (50, 130), 'alt': (5, 60)},
+    'Общий анализ мочи': {'density': (1005, 1030), 'protein': (0, 0.3)},
+    'Коагулограмма': {'inr': (0.8, 1.6), 'aptt': (25, 40)},
+}
+PROCEDURES = ['ЭКГ', 'УЗИ органов брюшной полости', 'Рентгенография органов грудной клетки']
+MEDICATIONS = [
+    ('Парацетамол', 'tablet'), ('Ибупрофен', 'tablet'), ('Амоксициллин', 'capsule'),
+    ('Омепразол', 'capsule'), ('Метформин', 'tablet'), ('Аторвастатин', 'tablet'),
+    ('Лозартан', 'tablet'), ('Цефтриаксон', 'injection'),
+]
+DEPARTMENTS = [
+    ('Терапевтическое отделение', 'load-therapy'), ('Кардиологическое отделение', 'load-cardiology'),
+    ('Хирургическое отделение', 'load-surgery'), ('Неврологическое отделение', 'load-neurology'),
+]
+
+
+class LoadDataGenerator:
+    """
+    Синтетические данные масштаба scale (дробный масштаб допустим).
+
+    Объем на единицу масштаба: SCALE_UNIT пациентов, 1-5 случаев обращения
+    на пациента, 2 документа на случай, план обследования у половины и план
+    лечения у 40% случаев, 2 записи на прием на пациента.
+    """
+
+    SCALE_UNIT = 1000
+    DOCTORS_PER_UNIT = 20
+    BATCH_SIZE = 1000
+    USERNAME_PREFIX = 'load_doctor_'
+
+    def __init__(self, scale=1.0, seed=42, now=None, batch_size=None, log=None):
+        self.scale = scale
+        self.random = random.Random(seed)
+        self.now = (now or timezone.now()).replace(minute=0, second=0, microsecond=0)
+        self.batch_size = batch_size or self.BATCH_SIZE
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    # --- Вспомогательные ---
+
+    def _bulk_create(self, model, objects):
+        with transaction.atomic():
+            created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        label = model._meta.label
+        self.counts[label] = self.counts.get(label, 0) + len(created)
+        return created
+
+    def _step(self, title, func, *args):
+        started = time.monotonic()
+        result = func(*args)
+        self.log(f"  {title}: {len(result)} за {time.monotonic() - started:.2f} с")
+        return result
+
+    def _past(self, max_days):
+        return self.now - timedelta(days=self.random.uniform(0, max_days))
+
+    def _text(self):
+        return f"Жалобы на {self.random.choice(COMPLAINTS)}. Состояние {self.random.choice(STATES)}."
+
+    # --- Справочники ---
+
+    def create_reference_data(self):
+        """Отделения, типы документов, исследования, препараты, диагнозы со схемами, процесс подписи"""
+        self.departments = [
+            Department.objects.get_or_create(slug=slug, defaults={'name': name})[0]
+            for name, slug in DEPARTMENTS
+        ]
+        self.document_types = [
+            DocumentType.objects.get_or_create(
+                name=name,
+                defaults={'schema': {'fields': [
+                    {'name': field, 'type': 'textarea', 'label': field} for field in fields
+                ]}}
+            )[0]
+            for name, fields in DOCUMENT_TYPES.items()
+        ]
+        self.document_fields = {document_type.pk: DOCUMENT_TYPES[document_type.name] for document_type in self.document_types}
+        self.lab_tests = [
+            LabTestDefinition.objects.get_or_create(name=name)[0] for name in LAB_TESTS
+        ]
+        self.procedures = [
+            InstrumentalProcedureDefinition.objects.get_or_create(name=name)[0] for name in PROCEDURES
+        ]
+        self.medications = [
+            Medication.objects.get_or_create(name=name, defaults={'medication_form': form})[0]
+            for name, form in MEDICATIONS
+        ]
+        self.create_diagnoses()
+        self.workflow = SignatureWorkflow.objects.filter(workflow_type='simple', is_active=True).first()
+        if self.workflow is None:
+            self.workflow = SignatureWorkflow.objects.create(name='Простая подпись', workflow_type='simple')
+        self.content_types = {
+            model: ContentType.objects.get_for_model(model)
+            for model in (ExaminationLabTest, ExaminationInstrumental, TreatmentMedication, LabTestResult)
+        }
+
+    def create_diagnoses(self):
+        """
+        Диагнозы случаев обращения берутся из справочника Diagnosis целиком;
+        синтетические диагнозы добавляются со схемой лечения для взрослых,
+        чтобы у сценариев рекомендаций были показания и подходящие схемы.
+        """
+        medications = {medication.name: medication for medication in self.medications}
+        for code, name, medication_name in DIAGNOSES:
+            diagnosis = Diagnosis.objects.get_or_create(code=code, defaults={'name': name})[0]
+            regimen, created = Regimen.objects.get_or_create(
+                medication=medications[medication_name], name=f'Схема при {code}'
+            )
+            if created:
+                regimen.indications.add(diagnosis)
+                PopulationCriteria.objects.create(regimen=regimen, name='Взрослые', min_age_days=18 * 365)
+                DosingInstruction.objects.create(
+                    regimen=regimen, dose_description='1 таб.',
+                    frequency_description='2 раза в сутки', duration_description='7 дней',
+                )
+        self.diagnoses = list(Diagnosis.objects.order_by('code'))
+        return self.diagnoses
+
+    def create_doctors(self):
+        User = get_user_model()
+        start = User.objects.filter(username__startswith=self.USERNAME_PREFIX).count()
+        count = max(1, round(self.DOCTORS_PER_UNIT * self.scale))
+        # Хеш пароля вычисляется один раз для всех врачей
+        password = make_password('load-password')
+        users = self._bulk_create(User, [
+            User(
+                username=f'{self.USERNAME_PREFIX}{start + i}',
+                password=password,
+                last_name=self.random.choice(LAST_NAMES),
+                first_name=self.random.choice(MALE_FIRST_NAMES + FEMALE_FIRST_NAMES),
+            )
+            for i in range(count)
+        ])
+        self._bulk_create(DoctorProfile, [
+            DoctorProfile(
+                user=user,
+                full_name=f'{user.last_name} {user.first_name}',
+                specialization=self.random.choice(['Терапевт', 'Кардиолог', 'Хирург', 'Невролог']),
+                employment_date=(self.now - timedelta(days=self.random.randint(365, 7300))).date(),
+            )
+            for user in users
+        ])
+        self.doctors = users
+        return users
+
+    def create_schedules(self):
+        rule = recurrence.deserialize('RRULE:FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR')
+        self.schedules = self._bulk_create(Schedule, [
+            Schedule(
+                doctor=doctor,
+                start_time=dt_time(self.random.choice([8, 9, 10])),
+                end_time=dt_time(self.random.choice([14, 16, 18])),
+                duration=30,
+                recurrences=rule,
+            )
+            for doctor in self.doctors
+        ])
+        return self.schedules
+
+    # --- Пациенты и случаи ---
+
+    def create_patients(self):
+        patients = []
+        for _ in range(max(1, round(self.SCALE_UNIT * self.scale))):
+            gender = self.random.choice(['male', 'female'])
+            male = gender == 'male'
+            last_name = self.random.choice(LAST_NAMES)
+            patients.append(Patient(
+                last_name=last_name if male else f'{last_name}а',
+                first_name=self.random.choice(MALE_FIRST_NAMES if male else FEMALE_FIRST_NAMES),
+                middle_name=self.random.choice(MALE_MIDDLE_NAMES if male else FEMALE_MIDDLE_NAMES),
+                birth_date=(self.now - timedelta(days=self.random.randint(18 * 365, 90 * 365))).date(),
+                gender=gender,
+            ))
+        self.patients = self._bulk_create(Patient, patients)
+        return self.patients
+
+    def create_encounters(self):
+        encounters = []
+        for patient in self.patients:
+            starts = sorted(self._past(3 * 365) for _ in range(self.random.randint(1, 5)))
+            for number, date_start in enumerate(starts, start=1):
+                closed = number < len(starts) or self.random.random() < 0.6
+                encounter = Encounter(
+                    patient=patient,
+                    doctor=self.random.choice(self.doctors),
+                    diagnosis=self.random.choice(self.diagnoses),
+                    date_start=date_start,
+                    sequence_number=number,
+                )
+                if closed:
+                    encounter.date_end = min(date_start + timedelta(days=self.random.randint(1, 14)), self.now)
+                    encounter.outcome = self.random.choice(['consultation_end'] * 4 + ['transferred'])
+                    encounter.is_active = False
+                    if encounter.outcome == 'transferred':
+                        encounter.transfer_to_department = self.random.choice(self.departments)
+                    if encounter.date_end < self.now - timedelta(days=2 * 365) and self.random.random() < 0.3:
+                        encounter.is_archived = True
+                        encounter.archived_at = encounter.date_end + timedelta(days=365)
+                encounters.append(encounter)
+        self.encounters = self._bulk_create(Encounter, encounters)
+        return self.encounters
+
+    def create_department_statuses(self):
+        self.department_statuses = self._bulk_create(PatientDepartmentStatus, [
+            PatientDepartmentStatus(
+                patient_id=encounter.patient_id,
+                department=encounter.transfer_to_department,
+                source_encounter=encounter,
+                status='accepted' if encounter.date_end < self.now - timedelta(days=14) else 'pending',
+                admission_date=encounter.date_end,
+            )
+            for encounter in self.encounters if encounter.outcome == 'transferred'
+        ])
+        return self.department_statuses
+
+    def create_documents(self):
+        documents = []
+        for encounter in self.encounters:
+            for _ in range(2):
+                document_type = self.random.choice(self.document_types)
+                end = encounter.date_end or self.now
+                documents.append(ClinicalDocument(
+                    document_type=document_type,
+                    encounter=encounter,
+                    author_id=encounter.doctor_id,
+                    author_position='Врач',
+                    datetime_document=encounter.date_start + (end - encounter.date_start) * self.random.random(),
+                    is_signed=encounter.date_end is not None,
+                    data={
+                        field: (
+                            encounter.diagnosis.name if field == 'diagnosis'
+                            else self.random.choice(TREATMENTS) if field in ('treatment', 'treatment_plan')
+                            else self._text()
+                        )
+                        for field in self.document_fields[document_type.pk]
+                    },
+                ))
+        self.documents = self._bulk_create(ClinicalDocument, documents)
+        return self.documents
+
+    # --- Планы и назначения ---
+
+    def create_examination_plans(self):
+        plans = [
+            ExaminationPlan(
+                encounter=encounter,
+                name='План обследования',
+                priority=self.random.choice(['normal'] * 8 + ['urgent', 'emergency']),
+                created_by_id=encounter.doctor_id,
+            )
+            for encounter in self.encounters if self.random.random() < 0.5
+        ]
+        self.examination_plans = self._bulk_create(ExaminationPlan, plans)
+        encounters = {encounter.pk: encounter for encounter in self.encounters}
+
+        lab_tests, procedures = [], []
+        for plan in self.examination_plans:
+            done = encounters[plan.encounter_id].date_end is not None
+            for lab_test in self.random.sample(self.lab_tests, 3):
+                lab_tests.append(ExaminationLabTest(
+                    examination_plan=plan, lab_test=lab_test,
+                    status='completed' if done else 'active',
+                ))
+            procedures.append(ExaminationInstrumental(
+                examination_plan=plan, instrumental_procedure=self.random.choice(self.procedures),
+                status='completed' if done else 'active',
+            ))
+        self.examination_lab_tests = self._bulk_create(ExaminationLabTest, lab_tests)
+        self.examination_procedures = self._bulk_create(ExaminationInstrumental, procedures)
+        return self.examination_plans
+
+    def create_treatment_plans(self):
+        plans = [
+            TreatmentPlan(encounter=encounter, name='Основной план лечения', created_by_id=encounter.doctor_id)
+            for encounter in self.encounters if self.random.random() < 0.4
+        ]
+        self.treatment_plans = self._bulk_create(TreatmentPlan, plans)
+        encounters = {encounter.pk: encounter for encounter in self.encounters}
+        medications = []
+        for plan in self.treatment_plans:
+            done = encounters[plan.encounter_id].date_end is not None
+            for medication in self.random.sample(self.medications, self.random.randint(2, 4)):
+                medications.append(TreatmentMedication(
+                    treatment_plan=plan, medication=medication,
+                    dosage=self.random.choice(['1 таб.', '500 мг', '1 г']),
+                    frequency=self.random.choice(['1 раз в день', '2 раза в день', '3 раза в день']),
+                    status='completed' if done else 'active',
+                ))
+        self.treatment_medications = self._bulk_create(TreatmentMedication, medications)
+        return self.treatment_plans
+
+    def create_scheduled_appointments(self):
+        """Назначения планировщика: исследования - один раз, препараты - курс 7 дней"""
+        encounters = {encounter.pk: encounter for encounter in self.encounters}
+        plans = {plan.pk: plan for plan in self.examination_plans}
+        treatment_plans = {plan.pk: plan for plan in self.treatment_plans}
+        appointments = []
+
+        def add(assignment, encounter, day, hour):
+            done = encounter.date_end is not None
+            scheduled_date = (encounter.date_start + timedelta(days=day)).date()
+            appointments.append(ScheduledAppointment(
+                content_type=self.content_types[type(assignment)],
+                object_id=assignment.pk,
+                patient_id=encounter.patient_id,
+                created_department=self.random.choice(self.departments),
+                encounter=encounter,
+                scheduled_date=scheduled_date,
+                scheduled_time=dt_time(hour),
+                execution_status=(
+                    self.random.choice(['completed'] * 8 + ['skipped', 'rejected']) if done else 'scheduled'
+                ),
+            ))
+
+        for assignment in self.examination_lab_tests + self.examination_procedures:
+            encounter = encounters[plans[assignment.examination_plan_id].encounter_id]
+            add(assignment, encounter, self.random.randint(0, 2), self.random.choice([8, 9, 10]))
+        for assignment in self.treatment_medications:
+            encounter = encounters[treatment_plans[assignment.treatment_plan_id].encounter_id]
+            times = {'1 раз в день': (9,), '2 раза в день': (9, 21), '3 раза в день': (8, 14, 20)}[assignment.frequency]
+            for day in range(7):
+                for hour in times:
+                    add(assignment, encounter, day, hour)
+        self.scheduled_appointments = self._bulk_create(ScheduledAppointment, appointments)
+        return self.scheduled_appointments
+
+    def create_lab_results(self):
+        """Результаты выполненных анализов с подписью врача"""
+        encounters = {encounter.pk: encounter for encounter in self.encounters}
+        plans = {plan.pk: plan for plan in self.examination_plans}
+        definitions = {definition.pk: definition for definition in self.lab_tests}
+        results = []
+        for lab_test in self.examination_lab_tests:
+            if lab_test.status != 'completed':
+                continue
+            plan = plans[lab_test.examination_plan_id]
+            encounter = encounters[plan.encounter_id]
+            ranges = LAB_TESTS[definitions[lab_test.lab_test_id].name]
+            results.append(LabTestResult(
+                patient_id=encounter.patient_id,
+                examination_plan=plan,
+                examination_lab_test=lab_test,
+                procedure_definition_id=lab_test.lab_test_id,
+                author_id=encounter.doctor_id,
+                datetime_result=encounter.date_start + timedelta(hours=self.random.randint(2, 48)),
+                data={name: round(self.random.uniform(low, high), 2) for name, (low, high) in ranges.items()},
+                is_completed=True,
+                status='completed',
+            ))
+        self.lab_results = self._bulk_create(LabTestResult, results)
+
+        signatures = []
+        for result in self.lab_results:
+            signed = self.random.random() < 0.9
+            signatures.append(DocumentSignature(
+                content_type=self.content_types[LabTestResult],
+                object_id=result.pk,
+                workflow=self.workflow,
+                signature_type='doctor',
+                status='signed' if signed else 'pending',
+                required_signer_id=result.author_id,
+                actual_signer_id=result.author_id if signed else None,
+                signed_at=result.datetime_result + timedelta(hours=1) if signed else None,
+            ))
+        self._bulk_create(DocumentSignature, signatures)
+        return self.lab_results
+
+    def create_appointments(self):
+        """Записи на прием по слотам расписаний: прошлые и будущие"""
+        appointments = []
+        booked = set()
+        for patient in self.patients:
+            for _ in range(2):
+                schedule = self.random.choice(self.schedules)
+                day = (self.now + timedelta(days=self.random.randint(-60, 30))).date()
+                while day.weekday() >= 5:
+                    day += timedelta(days=1)
+                slots = (schedule.end_time.hour - schedule.start_time.hour) * 60 // schedule.duration
+                start = timezone.make_aware(datetime.combine(day, schedule.start_time)) + timedelta(
+                    minutes=schedule.duration * self.random.randrange(slots)
+                )
+                if (schedule.pk, start) in booked:
+                    continue
+                booked.add((schedule.pk, start))
+                past = start < self.now
+                appointments.append(AppointmentEvent(
+                    schedule=schedule,
+                    patient=patient,
+                    start=start,
+                    end=start + timedelta(minutes=schedule.duration),
+                    status=self.random.choice(['completed'] * 5 + ['canceled']) if past else 'scheduled',
+                ))
+        self.appointments = self._bulk_create(AppointmentEvent, appointments)
+        return self.appointments
+
+    # --- Запуск ---
+
+    def run(self):
+        """Создает все данные; возвращает {модель: количество созданных}"""
+        self.create_reference_data()
+        self._step('Врачи', self.create_doctors)
+        self._step('Расписания', self.create_schedules)
+        self._step('Пациенты', self.create_patients)
+        self._step('Случаи обращения', self.create_encounters)
+        self._step('Переводы в отделения', self.create_department_statuses)
+        self._step('Документы', self.create_documents)
+        self._step('Планы обследования', self.create_examination_plans)
+        self._step('Планы лечения', self.create_treatment_plans)
+        self._step('Назначения планировщика', self.create_scheduled_appointments)
+        self._step('Результаты анализов', self.create_lab_results)
+        self._step('Записи на прием', self.create_appointments)
+
+        started = time.monotonic()
+        indexed = DocumentSearchIndexService.rebuild()
+        self.log(f"  Поисковый индекс документов: {indexed} за {time.monotonic() - started:.2f} с")
+        return self.counts
@@ -0,0 +1,43 @@
+# base/management/commands/auto_archive.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from base.services import AutoArchiveService
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Архивирует записи старше ArchiveConfiguration.archive_after_days пакетами '
+        'с сохранением прогресса; прерванный запуск продолжается с места остановки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', dest='models', help='Модель app_label.model (можно несколько)')
+        parser.add_argument('--chunk-size', type=int, default=AutoArchiveService.CHUNK_SIZE, help='Записей в пакете')
+        parser.add_argument('--max-chunks', type=int, help='Не более пакетов на модель за запуск')
+        parser.add_argument('--sleep', type=float, default=0, help='Пауза между пакетами, сек')
+        parser.add_argument('--time-limit', type=float, help='Ограничение длительности запуска, сек')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать количество записей к архивированию')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        self.stdout.write("🔍 Ищу записи для автоархивирования...")
+        started = time.monotonic()
+        result = AutoArchiveService.run(
+            labels=options['models'],
+            chunk_size=options['chunk_size'],
+            max_chunks=options['max_chunks'],
+            sleep=options['sleep'],
+            time_limit=options['time_limit'],
+            dry_run=dry_run,
+        )
+        elapsed = time.monotonic() - started
+
+        for label, count in sorted(result.items()):
+            self.stdout.write(f"  {label}: {count}")
+        verb = "К архивированию" if dry_run else "Архивировано"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {verb} записей: {sum(result.values())} за {elapsed:.2f} с"
+        ))
@@ -0,0 +1,156 @@
+# base/management/commands/benchmark_database.py
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from base.db_profiles import get_sqlite_pragmas
+
+
+# Настройки SQLite по умолчанию (без профиля): журнал отката и fsync на каждый коммит
+DEFAULT_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Сравнивает профили базы данных: синтетическая нагрузка на временный файл SQLite '
+        'с PRAGMA по умолчанию и профиля (--pragmas) и типовые запросы к текущей БД (--queries).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pragmas', action='store_true', help='Сравнить PRAGMA SQLite на временном файле')
+        parser.add_argument('--queries', action='store_true', help='Замерить типовые запросы к текущей БД')
+        parser.add_argument('--writes', type=int, default=500, help='Транзакций записи в синтетическом тесте')
+        parser.add_argument('--readers', type=int, default=4, help='Параллельных читателей в синтетическом тесте')
+        parser.add_argument('--repeat', type=int, default=20, help='Повторов каждого запроса к текущей БД')
+
+    def handle(self, *args, **options):
+        run_all = not options['pragmas'] and not options['queries']
+        if options['pragmas'] or run_all:
+            self.benchmark_pragmas(options['writes'], options['readers'])
+        if options['queries'] or run_all:
+            self.benchmark_queries(options['repeat'])
+
+    # --- Синтетическая нагрузка SQLite ---
+
+    def benchmark_pragmas(self, writes, readers):
+        self.stdout.write(f"🔍 SQLite: {writes} транзакций записи, {readers} параллельных читателей")
+        results = {}
+        for name, pragmas in (('по умолчанию', DEFAULT_PRAGMAS), ('профиль', get_sqlite_pragmas())):
+            with tempfile.TemporaryDirectory() as directory:
+                results[name] = self.run_sqlite_workload(
+                    os.path.join(directory, 'bench.sqlite3'), pragmas, writes, readers
+                )
+
+        self.stdout.write(f"  {'':<14}{'запись, с':>12}{'запись+чтение, с':>20}{'чтений':>10}")
+        for name, (write_time, mixed_time, reads) in results.items():
+            self.stdout.write(f"  {name:<14}{write_time:>12.3f}{mixed_time:>20.3f}{reads:>10}")
+        default, tuned = results['по умолчанию'], results['профиль']
+        if tuned[0] and tuned[1]:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Профиль быстрее: запись x{default[0] / tuned[0]:.1f}, "
+                f"запись при чтении x{default[1] / tuned[1]:.1f}"
+            ))
+
+    @staticmethod
+    def connect(path, pragmas):
+        conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name}={value}')
+        return conn
+
+    def run_sqlite_workload(self, path, pragmas, writes, readers):
+        """
+        Returns:
+            (время записи, время записи при параллельном чтении, число чтений)
+        """
+        conn = self.connect(path, pragmas)
+        conn.execute('CREATE TABLE record (id INTEGER PRIMARY KEY, patient_id INTEGER, data TEXT)')
+        conn.execute('CREATE INDEX record_patient ON record (patient_id)')
+
+        def write_batch(offset):
+            # Одна запись - одна транзакция, как при сохранении формы
+            for i in range(writes):
+                conn.execute('BEGIN IMMEDIATE')
+                conn.execute(
+                    'INSERT INTO record (patient_id, data) VALUES (?, ?)',
+                    ((offset + i) % 100, '{"note": "запись дневника"}')
+                )
+                conn.execute('COMMIT')
+
+        started = time.monotonic()
+        write_batch(0)
+        write_time = time.monotonic() - started
+
+        stop = threading.Event()
+        reads = [0] * readers
+
+        def read(index):
+            reader = self.connect(path, pragmas)
+            while not stop.is_set():
+                reader.execute(
+                    'SELECT id, data FROM record WHERE patient_id = ? ORDER BY id DESC LIMIT 20', (index,)
+                ).fetchall()
+                reads[index] += 1
+            reader.close()
+
+        threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+        for thread in threads:
+            thread.start()
+        started = time.monotonic()
+        write_batch(writes)
+        mixed_time = time.monotonic() - started
+        stop.set()
+        for thread in threads:
+            thread.join()
+        conn.close()
+        return write_time, mixed_time, sum(reads)
+
+    # --- Типовые запросы к текущей БД ---
+
+    def get_queries(self):
+        from documents.models import ClinicalDocument
+        from encounters.models import Encounter
+        from lab_tests.models import LabTestResult
+        from patients.models import Patient
+
+        patient_id = Patient.objects.values_list('pk', flat=True).first()
+        return [
+            ('Список пациентов', lambda: list(
+                Patient.active_objects.order_by('last_name', 'first_name')[:50]
+            )),
+            ('Случаи пациента', lambda: list(
+                Encounter.active_objects.filter(patient_id=patient_id).order_by('-date_start')[:20]
+            )),
+            ('Документы по ключу JSON', lambda: ClinicalDocument.objects.filter(
+                data__has_key='severity_assessment'
+            ).count()),
+            ('Анализы по ключу JSON', lambda: LabTestResult.objects.filter(data__has_key='result').count()),
+        ]
+
+    def benchmark_queries(self, repeat):
+        vendor = connection.vendor
+        self.stdout.write(f"🔍 Запросы к текущей БД ({vendor}), повторов: {repeat}")
+        if vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                self.stdout.write(f"  journal_mode: {cursor.fetchone()[0]}")
+
+        started = time.monotonic()
+        for label, query in self.get_queries():
+            timings = []
+            for _ in range(repeat):
+                query_started = time.perf_counter()
+                query()
+                timings.append((time.perf_counter() - query_started) * 1000)
+            self.stdout.write(
+                f"  {label:<28} медиана {statistics.median(timings):8.2f} мс, "
+                f"максимум {max(timings):8.2f} мс"
+            )
+        self.stdout.write(self.style.SUCCESS(f"✅ Готово за {time.monotonic() - started:.2f} с"))
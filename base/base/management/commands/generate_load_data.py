@@ -0,0 +1,51 @@
+# base/management/commands/generate_load_data.py
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from base.load_data import LoadDataGenerator
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Создает синтетические данные для нагрузочного тестирования: '
+        f'--scale 1 = {LoadDataGenerator.SCALE_UNIT} пациентов со случаями обращения, документами, '
+        'планами, назначениями, подписями и записями на прием. Только для тестовых баз.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help='Масштаб (допускается дробный)')
+        parser.add_argument('--seed', type=int, default=42, help='Seed генератора случайных чисел')
+        parser.add_argument(
+            '--now', help='Дата отсчета ГГГГ-ММ-ДД (по умолчанию - сегодня); с тем же seed дает те же данные'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=LoadDataGenerator.BATCH_SIZE, help='Объектов в пакете bulk_create'
+        )
+
+    def handle(self, *args, **options):
+        if options['scale'] <= 0:
+            raise CommandError('--scale должен быть больше 0')
+        now = None
+        if options['now']:
+            try:
+                now = timezone.make_aware(datetime.strptime(options['now'], '%Y-%m-%d').replace(hour=12))
+            except ValueError:
+                raise CommandError(f"Некорректная дата: {options['now']}")
+
+        self.stdout.write(f"🔍 Генерирую данные: масштаб {options['scale']}, seed {options['seed']}")
+        started = time.monotonic()
+        generator = LoadDataGenerator(
+            scale=options['scale'],
+            seed=options['seed'],
+            now=now,
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        )
+        counts = generator.run()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Создано объектов: {sum(counts.values())} за {time.monotonic() - started:.2f} с"
+        ))
@@ -0,0 +1,35 @@
+# base/management/commands/move_to_cold_storage.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from base.cold_storage import ColdStorageService
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Переносит записи, архивированные дольше ArchiveConfiguration.cold_storage_after_days, '
+        'в теневые таблицы холодного хранилища.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', dest='models', help='Модель app_label.model (можно несколько)')
+        parser.add_argument('--batch-size', type=int, default=ColdStorageService.BATCH_SIZE, help='Размер пакета')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать количество записей к переносу')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        self.stdout.write("🔍 Ищу записи для переноса в холодное хранилище...")
+        started = time.monotonic()
+        result = ColdStorageService.move_to_cold(
+            labels=options['models'], batch_size=options['batch_size'], dry_run=dry_run
+        )
+        elapsed = time.monotonic() - started
+
+        for label, count in sorted(result.items()):
+            self.stdout.write(f"  {label}: {count}")
+        verb = "К переносу" if dry_run else "Перенесено"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {verb} записей: {sum(result.values())} за {elapsed:.2f} с"
+        ))
@@ -0,0 +1,103 @@
+# base/management/commands/query_budget_report.py
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from base.metrics import registry
+
+
+LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Худшие представления по SQL-запросам из метрик QueryBudgetMiddleware: '
+        'среднее число запросов, время БД и ответа, превышения бюджета и места N+1.'
+    )
+
+    SORT_KEYS = {
+        'queries': 'avg_queries',
+        'db': 'avg_db_ms',
+        'time': 'avg_ms',
+        'n_plus_one': 'n_plus_one',
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10, help='Сколько представлений показать')
+        parser.add_argument(
+            '--sort', choices=sorted(self.SORT_KEYS), default='queries', help='Поле сортировки'
+        )
+
+    @staticmethod
+    def parse_labels(labels):
+        """'k1="v1",k2="v2"' в словарь"""
+        return {
+            name: re.sub(r'\\(.)', r'\1', value)
+            for name, value in LABEL_RE.findall(labels)
+        }
+
+    def collect(self):
+        """{view: показатели} по данным хранилища метрик всех процессов"""
+        registry.flush()
+        sums = {
+            'http_request_duration_seconds': 'seconds',
+            'http_request_db_queries': 'queries',
+            'http_request_db_duration_seconds': 'db_seconds',
+        }
+        views = {}
+
+        def get(view):
+            return views.setdefault(view, {
+                'requests': 0, 'seconds': 0.0, 'queries': 0.0, 'db_seconds': 0.0,
+                'exceeded': 0, 'n_plus_one': 0, 'call_sites': {},
+            })
+
+        for name, sample, labels, le, value in registry.store.read():
+            labels = self.parse_labels(labels)
+            if 'view' not in labels:
+                continue
+            if name in sums and sample == 'sum':
+                get(labels['view'])[sums[name]] += value
+            elif name == 'http_request_db_queries' and sample == 'count':
+                get(labels['view'])['requests'] += int(value)
+            elif name == 'query_budget_exceeded_total':
+                get(labels['view'])['exceeded'] += int(value)
+            elif name == 'n_plus_one_queries_total':
+                stats = get(labels['view'])
+                stats['n_plus_one'] += int(value)
+                stats['call_sites'][labels.get('call_site', '')] = int(value)
+
+        for stats in views.values():
+            requests = stats['requests'] or 1
+            stats['avg_queries'] = stats['queries'] / requests
+            stats['avg_db_ms'] = stats['db_seconds'] * 1000 / requests
+            stats['avg_ms'] = stats['seconds'] * 1000 / requests
+        return views
+
+    def handle(self, *args, **options):
+        self.stdout.write("🔍 Собираю статистику SQL-запросов по представлениям...")
+        started = time.monotonic()
+        views = self.collect()
+        if not views:
+            self.stdout.write("Данных нет: включите QUERY_BUDGET_ENABLED и метрики (METRICS_ENABLED)")
+            return
+
+        key = self.SORT_KEYS[options['sort']]
+        worst = sorted(views.items(), key=lambda item: -item[1][key])[:options['limit']]
+        self.stdout.write(
+            f"  {'Представление':<48}{'запросов':>10}{'ср. SQL':>10}{'БД, мс':>10}"
+            f"{'ответ, мс':>11}{'превыш.':>9}{'N+1':>6}"
+        )
+        for view, stats in worst:
+            self.stdout.write(
+                f"  {view[:47]:<48}{stats['requests']:>10}{stats['avg_queries']:>10.1f}"
+                f"{stats['avg_db_ms']:>10.1f}{stats['avg_ms']:>11.1f}{stats['exceeded']:>9}{stats['n_plus_one']:>6}"
+            )
+            for call_site, count in sorted(stats['call_sites'].items(), key=lambda item: -item[1])[:3]:
+                self.stdout.write(f"      N+1 {count}x {call_site}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Представлений: {len(views)}, показано: {len(worst)} за {time.monotonic() - started:.2f} с"
+        ))
@@ -0,0 +1,26 @@
+# base/management/commands/rebuild_archive_statistics.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from base.services import ArchiveStatisticsService
+
+
+class Command(BaseCommand):
+
+    help = 'Пересчитывает дневную статистику архивирования по ArchiveLog и выгруженным файлам логов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--skip-exported', action='store_true',
+            help='Не читать выгруженные файлы (только таблица ArchiveLog)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("📊 Пересчитываю статистику архивирования...")
+        started = time.monotonic()
+        count = ArchiveStatisticsService.rebuild(include_exported=not options['skip_exported'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Учтено записей лога: {count} за {elapsed:.2f} с"
+        ))
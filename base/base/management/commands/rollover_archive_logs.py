@@ -0,0 +1,33 @@
+# base/management/commands/rollover_archive_logs.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from base.services import ArchiveLogRetentionService
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Выгружает логи архивирования старше срока хранения в NDJSON.gz по месяцам '
+        '(ARCHIVE_LOG_EXPORT_DIR) и удаляет их из таблицы ArchiveLog.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Только показать количество записей к выгрузке')
+        parser.add_argument('--batch-size', type=int, default=ArchiveLogRetentionService.BATCH_SIZE, help='Размер пакета')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        self.stdout.write("🗄️ Проверяю сроки хранения логов архивирования...")
+        started = time.monotonic()
+        result = ArchiveLogRetentionService.rollover(batch_size=options['batch_size'], dry_run=dry_run)
+        elapsed = time.monotonic() - started
+
+        for label, count in sorted(result.items()):
+            self.stdout.write(f"  {label}: {count}")
+        verb = "К выгрузке" if dry_run else "Выгружено"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {verb} записей: {sum(result.values())} за {elapsed:.2f} с "
+            f"(каталог {ArchiveLogRetentionService.get_export_dir()})"
+        ))
@@ -0,0 +1,221 @@
+# base/management/commands/run_benchmarks.py
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from base.query_budget import record_queries
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Замеряет горячие представления и сервисы (тестовым клиентом Django) и пишет '
+        'результаты в JSON для сравнения между коммитами (--compare).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Замеров на сценарий')
+        parser.add_argument('--warmup', type=int, default=1, help='Прогревочных запусков (не учитываются)')
+        parser.add_argument('--only', action='append', help='Запустить только указанные сценарии')
+        parser.add_argument('--output', help='Файл JSON с результатами')
+        parser.add_argument('--compare', help='Файл JSON предыдущего запуска для сравнения')
+
+    # --- Окружение ---
+
+    @staticmethod
+    def get_commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, timeout=5
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    def get_client(self):
+        User = get_user_model()
+        user = (
+            User.objects.filter(is_superuser=True).first()
+            or User.objects.filter(doctor_profile__isnull=False).first()
+        )
+        if user is None:
+            raise CommandError('Нет пользователя для входа: выполните generate_load_data')
+        # Хост из ALLOWED_HOSTS вне тестового окружения; вход без проверки пароля
+        client = Client(HTTP_HOST=(settings.ALLOWED_HOSTS or ['localhost'])[0].lstrip('.') or 'localhost')
+        client.force_login(user)
+        return client
+
+    @staticmethod
+    def get_data_volume():
+        """Объем основных таблиц: результаты сравнимы только при одинаковом объеме"""
+        from clinical_scheduling.models import ScheduledAppointment
+        from documents.models import ClinicalDocument
+        from encounters.models import Encounter
+        from patients.models import Patient
+
+        return {
+            model._meta.label: model._base_manager.count()
+            for model in (Patient, Encounter, ClinicalDocument, ScheduledAppointment)
+        }
+
+    # --- Сценарии ---
+
+    def get_scenarios(self):
+        """[(имя, функция или None, причина пропуска)]"""
+        from appointments.services import generate_available_slots
+        from documents.models import ClinicalDocument
+        from encounters.models import Encounter
+        from examination_management.models import ExaminationPlan
+        from patients.models import Patient
+        from pharmacy.services import PatientRecommendationService
+        from treatment_management.services import TreatmentRecommendationService
+
+        client = self.get_client()
+
+        def view(url):
+            def run():
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f'{url}: HTTP {response.status_code}')
+                # Потоковый ответ (PDF) читается целиком
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            return run
+
+        scenarios = []
+        patient = Patient.objects.order_by('pk').first()
+        if patient:
+            scenarios.append(('patient_search', view(
+                reverse('patients:patient_list') + f'?q={patient.last_name[:4].lower()}'
+            ), None))
+        else:
+            scenarios.append(('patient_search', None, 'нет пациентов'))
+
+        encounter = Encounter.objects.annotate(documents=Count('clinical_documents')).order_by('-documents', 'pk').first()
+        scenarios.append(('encounter_detail', view(
+            reverse('encounters:encounter_detail', args=[encounter.pk])
+        ) if encounter else None, 'нет случаев обращения'))
+
+        plan = ExaminationPlan.objects.filter(encounter__isnull=False).annotate(
+            tests=Count('lab_tests')
+        ).order_by('-tests', 'pk').first()
+        scenarios.append(('examination_plan_detail', view(
+            reverse('examination_management:examination_plan_detail', args=[plan.encounter_id, plan.pk])
+        ) if plan else None, 'нет планов обследования'))
+
+        scenarios.append(('scheduling_dashboard', view(reverse('clinical_scheduling:dashboard')), None))
+
+        start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        scenarios.append(('slot_generation', lambda: generate_available_slots(start, start + timedelta(days=7)), None))
+
+        document = ClinicalDocument.objects.order_by('pk').first()
+        scenarios.append(('document_print_pdf', view(
+            reverse('documents:document_print', args=[document.pk])
+        ) if document else None, 'нет документов'))
+
+        diagnosed = Encounter.objects.filter(diagnosis__isnull=False).select_related('diagnosis', 'patient').first()
+        if patient:
+            scenarios.append(('patient_recommendations', lambda: PatientRecommendationService.get_patient_recommendations(
+                patient, diagnosed.diagnosis if diagnosed else None
+            ), None))
+        scenarios.append(('treatment_recommendations', (lambda: TreatmentRecommendationService.get_medication_recommendations(
+            diagnosed.diagnosis.code, diagnosed.patient
+        )) if diagnosed else None, 'нет случаев с диагнозом'))
+        return scenarios
+
+    def measure(self, func, repeat, warmup):
+        for _ in range(warmup):
+            func()
+        timings, queries = [], []
+        for _ in range(repeat):
+            with record_queries() as recorder:
+                started = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(recorder.count)
+        timings.sort()
+        return {
+            'median_ms': round(statistics.median(timings), 2),
+            'min_ms': round(timings[0], 2),
+            'max_ms': round(timings[-1], 2),
+            'queries': max(queries),
+        }
+
+    # --- Запуск ---
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        self.stdout.write(f"🔍 Запускаю сценарии ({repeat} замеров, прогрев {options['warmup']})...")
+        started = time.monotonic()
+
+        results = {}
+        for name, func, reason in self.get_scenarios():
+            if options['only'] and name not in options['only']:
+                continue
+            if func is None:
+                results[name] = {'skipped': reason}
+                self.stdout.write(f"  {name:<28} пропущен: {reason}")
+                continue
+            try:
+                results[name] = self.measure(func, repeat, options['warmup'])
+            except Exception as e:
+                results[name] = {'error': str(e)}
+                self.stdout.write(self.style.ERROR(f"  {name:<28} ошибка: {e}"))
+                continue
+            result = results[name]
+            self.stdout.write(
+                f"  {name:<28} медиана {result['median_ms']:9.2f} мс, "
+                f"мин {result['min_ms']:9.2f} мс, SQL {result['queries']}"
+            )
+
+        report = {
+            'commit': self.get_commit(),
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'repeat': repeat,
+            'data_volume': self.get_data_volume(),
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+            self.stdout.write(f"  Результаты записаны в {options['output']}")
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Сценариев: {len(results)} за {time.monotonic() - started:.2f} с"
+        ))
+
+    def compare(self, path, results):
+        try:
+            with open(path, encoding='utf-8') as previous_file:
+                previous = json.load(previous_file)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Не удалось прочитать {path}: {e}')
+
+        self.stdout.write(f"\n  Сравнение с {path} (коммит {previous.get('commit') or '?'}):")
+        for name, result in results.items():
+            before = previous.get('results', {}).get(name, {})
+            if 'median_ms' not in result or 'median_ms' not in before:
+                continue
+            change = (result['median_ms'] - before['median_ms']) / before['median_ms'] * 100 if before['median_ms'] else 0
+            line = (
+                f"  {name:<28} {before['median_ms']:9.2f} -> {result['median_ms']:9.2f} мс "
+                f"({change:+.0f}%), SQL {before['queries']} -> {result['queries']}"
+            )
+            # Замедление больше чем на 20% выделяется
+            self.stdout.write(self.style.WARNING(line) if change > 20 else line)
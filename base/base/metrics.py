@@ -0,0 +1,322 @@
+"""
+Метрики приложения: счетчики и гистограммы задержек, общие для всех
+процессов (воркеров gunicorn, команд управления).
+
+Каждый процесс накапливает приращения в памяти и периодически сбрасывает
+их в отдельный файл SQLite (UPSERT с суммированием), поэтому значения
+переживают перезапуск и видны из любого воркера. Эндпоинт /metrics отдает
+содержимое хранилища в текстовом формате Prometheus.
+"""
+import atexit
+import functools
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+# Границы гистограмм по умолчанию, сек
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    """Форматирует число для текстового формата Prometheus"""
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    """Канонический вид меток: k1="v1",k2="v2" в порядке имен"""
+    parts = []
+    for name in sorted(labels):
+        value = str(labels[name]).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{value}"')
+    return ','.join(parts)
+
+
+class SQLiteMetricsStore:
+    """
+    Хранилище значений метрик в файле SQLite, общем для процессов.
+    Строка - один временной ряд: (метрика, тип отсчета, метки, граница le).
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS metric_samples ('
+                ' name TEXT NOT NULL, sample TEXT NOT NULL, labels TEXT NOT NULL,'
+                ' le TEXT NOT NULL, value REAL NOT NULL,'
+                ' PRIMARY KEY (name, sample, labels, le))'
+            )
+            self._local.connection = connection
+        return connection
+
+    def add(self, increments):
+        """Атомарно прибавляет приращения {(name, sample, labels, le): value}"""
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT INTO metric_samples (name, sample, labels, le, value) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (name, sample, labels, le) DO UPDATE SET value = value + excluded.value',
+                [(*key, value) for key, value in increments.items()]
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+    def read(self):
+        """Все временные ряды хранилища"""
+        return self._connection().execute(
+            'SELECT name, sample, labels, le, value FROM metric_samples ORDER BY name, labels, sample'
+        ).fetchall()
+
+    def clear(self):
+        self._connection().execute('DELETE FROM metric_samples')
+
+
+class Metric:
+    """Базовый класс метрики с фиксированным набором меток"""
+
+    type_name = 'untyped'
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _labels(self, labels):
+        missing = set(self.labelnames) - set(labels)
+        if missing or len(labels) != len(self.labelnames):
+            raise ValueError(f"Метрика {self.name} ожидает метки {self.labelnames}, получены {tuple(labels)}")
+        return _format_labels(labels)
+
+
+class Counter(Metric):
+    """Монотонный счетчик"""
+
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self.registry.record({(self.name, '', self._labels(labels), ''): amount})
+
+
+class Histogram(Metric):
+    """Гистограмма (кумулятивные корзины, сумма и количество наблюдений)"""
+
+    type_name = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        label_key = self._labels(labels)
+        # Все корзины пишутся всегда, чтобы ряд был полным с первого наблюдения
+        increments = {
+            (self.name, 'bucket', label_key, _format_value(bound)): 1 if value <= bound else 0
+            for bound in self.buckets
+        }
+        increments[(self.name, 'sum', label_key, '')] = value
+        increments[(self.name, 'count', label_key, '')] = 1
+        self.registry.record(increments)
+
+    @contextmanager
+    def time(self, **labels):
+        """Контекстный менеджер, измеряющий длительность блока"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик процесса. Приращения буферизуются и сбрасываются в
+    хранилище не чаще METRICS_FLUSH_INTERVAL секунд, а также при выдаче
+    /metrics и при завершении процесса. Ошибки хранилища не влияют на
+    бизнес-логику: метрики теряются, операция продолжается.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._store = None
+        atexit.register(self.flush)
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'METRICS_ENABLED', True)
+
+    @property
+    def store(self):
+        path = getattr(settings, 'METRICS_DB_PATH', None) or os.path.join(
+            tempfile.gettempdir(), 'base_metrics.sqlite3'
+        )
+        if self._store is None or self._store.path != str(path):
+            self._store = SQLiteMetricsStore(path)
+        return self._store
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def record(self, increments):
+        if not self.enabled:
+            return
+        with self._lock:
+            for key, value in increments.items():
+                self._pending[key] = self._pending.get(key, 0) + value
+            due = time.monotonic() - self._last_flush >= getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Сбрасывает накопленные приращения в общее хранилище"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            self.store.add(pending)
+        except Exception as e:
+            print(f"Ошибка записи метрик: {e}")
+
+    def render(self):
+        """Текстовый формат Prometheus по данным всех процессов"""
+        self.flush()
+        series = {}
+        for name, sample, labels, le, value in self.store.read():
+            series.setdefault(name, []).append((sample, labels, le, value))
+
+        lines = []
+        for name in sorted(series):
+            metric = self._metrics.get(name)
+            if metric:
+                lines.append(f'# HELP {name} {metric.documentation}')
+                lines.append(f'# TYPE {name} {metric.type_name}')
+            rows = sorted(
+                series[name],
+                key=lambda row: (row[1], row[0], float(row[2].replace('+Inf', 'inf')) if row[2] else 0)
+            )
+            for sample, labels, le, value in rows:
+                sample_name = f'{name}_{sample}' if sample else name
+                if le:
+                    labels = f'{labels},le="{le}"' if labels else f'le="{le}"'
+                label_part = f'{{{labels}}}' if labels else ''
+                lines.append(f'{sample_name}{label_part} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+# Метрики клинических процессов
+ENCOUNTER_EVENTS = registry.counter(
+    'encounter_events_total',
+    'События шины encounters по этапам (published, delivered, retried, failed, observed)',
+    ['event_type', 'stage'],
+)
+ENCOUNTER_EVENT_DELIVERY_SECONDS = registry.histogram(
+    'encounter_event_delivery_seconds',
+    'Длительность доставки события побочным обработчикам и наблюдателям',
+    ['event_type'],
+)
+ENCOUNTER_EVENT_LAG_SECONDS = registry.histogram(
+    'encounter_event_lag_seconds',
+    'Задержка от публикации события до его доставки из исходящей очереди',
+    ['event_type'],
+    buckets=(0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0),
+)
+SERVICE_OPERATIONS = registry.counter(
+    'service_operations_total',
+    'Вызовы операций сервисного слоя по результату (ok, error)',
+    ['service', 'operation', 'status'],
+)
+SERVICE_OPERATION_SECONDS = registry.histogram(
+    'service_operation_duration_seconds',
+    'Длительность операций сервисного слоя',
+    ['service', 'operation'],
+)
+
+
+def instrumented(service, operation=None):
+    """
+    Декоратор операции сервиса: считает вызовы по результату и пишет
+    длительность в гистограмму. Для staticmethod/classmethod ставится
+    под декоратором метода.
+    """
+    def decorator(func):
+        name = operation or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            status = 'error'
+            try:
+                result = func(*args, **kwargs)
+                status = 'ok'
+                return result
+            finally:
+                SERVICE_OPERATION_SECONDS.observe(time.perf_counter() - start, service=service, operation=name)
+                SERVICE_OPERATIONS.inc(service=service, operation=name, status=status)
+        return wrapper
+    return decorator
+
+
+# Метрики запросов HTTP (base.query_budget.QueryBudgetMiddleware)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds',
+    'Длительность обработки запроса по представлению',
+    ['view'],
+)
+HTTP_REQUEST_DB_QUERIES = registry.histogram(
+    'http_request_db_queries',
+    'Количество SQL-запросов на HTTP-запрос по представлению',
+    ['view'],
+    buckets=(1, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+HTTP_REQUEST_DB_SECONDS = registry.histogram(
+    'http_request_db_duration_seconds',
+    'Суммарное время SQL-запросов на HTTP-запрос по представлению',
+    ['view'],
+)
+QUERY_BUDGET_EXCEEDED = registry.counter(
+    'query_budget_exceeded_total',
+    'Превышения бюджета запроса по ограничению (queries, db_ms, total_ms)',
+    ['view', 'limit'],
+)
+N_PLUS_ONE_QUERIES = registry.counter(
+    'n_plus_one_queries_total',
+    'Повторы одного вида SQL-запроса в цикле (N+1) по месту вызова',
+    ['view', 'call_site'],
+)
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archiveconfiguration',
+            name='log_retention_days',
+            field=models.PositiveIntegerField(blank=True, help_text='Более старые записи ArchiveLog выгружаются в файлы. Пусто - ARCHIVE_LOG_RETENTION_DAYS', null=True, verbose_name='Хранить логи архивирования, дней'),
+        ),
+        migrations.AddIndex(
+            model_name='archivelog',
+            index=models.Index(fields=['content_type', 'timestamp'], name='archive_log_retention_idx'),
+        ),
+    ]
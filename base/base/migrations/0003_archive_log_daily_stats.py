@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_stats(apps, schema_editor):
+    """Заполняет счетчики по уже записанным логам архивирования"""
+    ArchiveLog = apps.get_model('base', 'ArchiveLog')
+    ArchiveLogDailyStat = apps.get_model('base', 'ArchiveLogDailyStat')
+    rows = ArchiveLog.objects.order_by().annotate(day=TruncDate('timestamp')).values(
+        'day', 'content_type_id', 'action', 'user_id'
+    ).annotate(total=Count('id'))
+    ArchiveLogDailyStat.objects.bulk_create([
+        ArchiveLogDailyStat(
+            day=row['day'], content_type_id=row['content_type_id'], action=row['action'],
+            user_id=row['user_id'], count=row['total']
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0002_archive_log_retention'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveLogDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('action', models.CharField(choices=[('archive', 'Архивирование'), ('restore', 'Восстановление'), ('delete', 'Удаление')], max_length=20, verbose_name='Действие')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Количество')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Статистика архивирования за день',
+                'verbose_name_plural': 'Статистика архивирования по дням',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day', 'action'], name='archive_stat_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'content_type', 'action', 'user'), name='archive_stat_unique_key')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
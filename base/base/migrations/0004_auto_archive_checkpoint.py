@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0003_archive_log_daily_stats'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AutoArchiveCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cutoff', models.DateTimeField(blank=True, null=True, verbose_name='Граница прохода')),
+                ('last_pk', models.BigIntegerField(default=0, verbose_name='Последний обработанный ID')),
+                ('archived_total', models.PositiveIntegerField(default=0, verbose_name='Архивировано за проход')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начало прохода')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Окончание прохода')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+                ('content_type', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Прогресс автоархивирования',
+                'verbose_name_plural': 'Прогресс автоархивирования',
+            },
+        ),
+    ]
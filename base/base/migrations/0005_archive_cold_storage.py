@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0004_auto_archive_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archiveconfiguration',
+            name='cold_storage_after_days',
+            field=models.PositiveIntegerField(blank=True, help_text='Записи, архивированные раньше, переносятся в теневую таблицу. Пусто - не переносить', null=True, verbose_name='Перенос в холодное хранилище через дней'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-19 00:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_anonymous_stats(apps, schema_editor):
+    """Схлопывает повторяющиеся строки без пользователя перед ограничением уникальности"""
+    ArchiveLogDailyStat = apps.get_model('base', 'ArchiveLogDailyStat')
+    duplicates = ArchiveLogDailyStat.objects.filter(user__isnull=True).values(
+        'day', 'content_type_id', 'action'
+    ).annotate(rows=Count('id'), total=Sum('count')).filter(rows__gt=1)
+    for key in duplicates:
+        stats = ArchiveLogDailyStat.objects.filter(
+            user__isnull=True, day=key['day'], content_type_id=key['content_type_id'], action=key['action']
+        ).order_by('id')
+        keep = stats.first()
+        stats.exclude(pk=keep.pk).delete()
+        ArchiveLogDailyStat.objects.filter(pk=keep.pk).update(count=key['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0005_archive_cold_storage'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivelogdailystat',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.RunPython(merge_anonymous_stats, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='archivelogdailystat',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('day', 'content_type', 'action'), name='archive_stat_unique_anonymous'),
+        ),
+    ]
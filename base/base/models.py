@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.backends.utils import names_digest
+from django.db.models.signals import class_prepared
 from django.utils import timezone
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
@@ -33,6 +35,10 @@ class ArchivableModel(models.Model):
         related_name="%(class)s_archived"
     )
     archive_reason = models.TextField("Причина архивирования", blank=True)
+
+    # Основные пути доступа к активным записям: для каждого набора полей
+    # создается частичный индекс WHERE is_archived = false (см. add_active_indexes)
+    active_indexes = ()
     
     class Meta:
         abstract = True
@@ -100,6 +106,41 @@ class ArchivableModel(models.Model):
         return "Активно"
 
 
+def get_active_index_name(model, fields) -> str:
+    """Имя частичного индекса активных записей (не длиннее 30 символов)"""
+    table = model._meta.db_table
+    first_field = fields[0].lstrip('-')
+    return f"{table[:10]}_{first_field[:7]}_{names_digest(table, *fields, length=6)}_act"
+
+
+def add_active_indexes(sender, **kwargs):
+    """
+    Добавляет в Meta.indexes архивируемой модели частичные индексы по
+    наборам полей из active_indexes. Индексы попадают в миграции как
+    обычные; обычные запросы списков (active_objects, active()) идут по
+    ним, не просматривая архивированные строки
+    """
+    if not issubclass(sender, ArchivableModel) or sender._meta.abstract or not sender.active_indexes:
+        return
+    existing = {index.name for index in sender._meta.indexes}
+    indexes = [
+        models.Index(
+            fields=list(fields),
+            condition=Q(is_archived=False),
+            name=get_active_index_name(sender, fields),
+        )
+        for fields in sender.active_indexes
+    ]
+    sender._meta.indexes = [
+        *sender._meta.indexes, *(index for index in indexes if index.name not in existing)
+    ]
+    # Состояние миграций берет индексы только из явно заданных атрибутов Meta
+    sender._meta.original_attrs['indexes'] = sender._meta.indexes
+
+
+class_prepared.connect(add_active_indexes)
+
+
 class NotArchivedManager(models.Manager):
     """
     Менеджер для получения только неархивированных записей
@@ -158,12 +199,45 @@ class ArchiveLog(models.Model):
             models.Index(fields=['action']),
             models.Index(fields=['timestamp']),
             models.Index(fields=['user']),
+            models.Index(fields=['content_type', 'timestamp'], name='archive_log_retention_idx'),
         ]
 
     def __str__(self):
         return f"{self.get_action_display()} {self.content_type.model} #{self.object_id}"
 
 
+class ArchiveLogDailyStat(models.Model):
+    """
+    Дневные счетчики логов архивирования по (модель, действие, пользователь).
+    Обновляются при записи лога и переживают выгрузку старых логов в файлы,
+    поэтому статистика за годы читается из небольшой таблицы.
+    """
+    day = models.DateField("День")
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    action = models.CharField("Действие", max_length=20, choices=ArchiveLog.ACTION_CHOICES)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Пользователь")
+    count = models.PositiveIntegerField("Количество", default=0)
+
+    class Meta:
+        verbose_name = "Статистика архивирования за день"
+        verbose_name_plural = "Статистика архивирования по дням"
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'content_type', 'action', 'user'], name='archive_stat_unique_key'),
+            # NULL в уникальном ключе не сравнивается: строки без пользователя ограничиваются отдельно
+            models.UniqueConstraint(
+                fields=['day', 'content_type', 'action'], condition=models.Q(user__isnull=True),
+                name='archive_stat_unique_anonymous'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'action'], name='archive_stat_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.get_action_display()} {self.content_type_id}: {self.count}"
+
+
 class ArchiveConfiguration(models.Model):
     """
     Конфигурация архивирования для разных моделей
@@ -174,6 +248,14 @@ class ArchiveConfiguration(models.Model):
     cascade_restore = models.BooleanField("Каскадное восстановление", default=True)
     auto_archive_related = models.BooleanField("Автоархивирование связанных", default=True)
     archive_after_days = models.PositiveIntegerField("Автоархивирование через дней", null=True, blank=True)
+    log_retention_days = models.PositiveIntegerField(
+        "Хранить логи архивирования, дней", null=True, blank=True,
+        help_text="Более старые записи ArchiveLog выгружаются в файлы. Пусто - ARCHIVE_LOG_RETENTION_DAYS"
+    )
+    cold_storage_after_days = models.PositiveIntegerField(
+        "Перенос в холодное хранилище через дней", null=True, blank=True,
+        help_text="Записи, архивированные раньше, переносятся в теневую таблицу. Пусто - не переносить"
+    )
     
     # Настройки отображения
     show_archived_in_list = models.BooleanField("Показывать в списке", default=True)
@@ -212,4 +294,24 @@ class ArchiveConfiguration(models.Model):
                 'require_reason': True,
             }
         )
-        return config 
\ No newline at end of file
+        return config 
+
+class AutoArchiveCheckpoint(models.Model):
+    """
+    Прогресс автоархивирования модели: проход идет по первичному ключу,
+    поэтому прерванный запуск продолжается с last_pk
+    """
+    content_type = models.OneToOneField(ContentType, on_delete=models.CASCADE)
+    cutoff = models.DateTimeField("Граница прохода", null=True, blank=True)
+    last_pk = models.BigIntegerField("Последний обработанный ID", default=0)
+    archived_total = models.PositiveIntegerField("Архивировано за проход", default=0)
+    started_at = models.DateTimeField("Начало прохода", null=True, blank=True)
+    finished_at = models.DateTimeField("Окончание прохода", null=True, blank=True)
+    updated_at = models.DateTimeField("Обновлено", auto_now=True)
+
+    class Meta:
+        verbose_name = "Прогресс автоархивирования"
+        verbose_name_plural = "Прогресс автоархивирования"
+
+    def __str__(self):
+        return f"Автоархивирование {self.content_type}: ID > {self.last_pk}"
@@ -0,0 +1,240 @@
+"""
+Бюджет SQL-запросов на HTTP-запрос и поиск N+1.
+
+QueryBudgetMiddleware (включается QUERY_BUDGET_ENABLED) оборачивает
+выполнение SQL через connection.execute_wrapper: считает запросы и время
+БД, группирует запросы по "форме" (SQL без значений) и помечает формы,
+повторенные QUERY_BUDGET_N_PLUS_ONE_THRESHOLD и более раз, как N+1 с
+местом вызова в коде проекта. Результат уходит в заголовок Server-Timing,
+строку журнала base.query_budget и метрики (/metrics); превышение бюджета
+из QUERY_BUDGETS пишется в журнал как предупреждение, а при
+QUERY_BUDGET_RAISE=True приводит к исключению.
+
+Сводка по худшим представлениям: python manage.py query_budget_report.
+В тестах: with assert_query_budget(queries=10): ...
+"""
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+
+import django
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET = {'queries': 50, 'db_ms': 500, 'total_ms': None}
+
+_DJANGO_DIR = os.path.dirname(django.__file__)
+_SQL_STRING = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SQL_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Запрос превысил бюджет SQL-запросов или содержит N+1"""
+
+
+def fingerprint(sql: str) -> str:
+    """Форма SQL-запроса: без значений и с одинаковыми списками IN (...)"""
+    sql = _SQL_STRING.sub('?', sql)
+    sql = _SQL_IN_LIST.sub('IN (...)', sql)
+    sql = _SQL_NUMBER.sub('?', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def get_call_site() -> str:
+    """Ближайший к SQL кадр стека из кода проекта: 'app/views.py:42 in get_context_data'"""
+    base_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(base_dir)
+            and not filename.startswith(_DJANGO_DIR)
+            and filename != __file__
+            and 'site-packages' not in filename
+        ):
+            return f'{os.path.relpath(filename, base_dir)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return 'django'
+
+
+class QueryRecorder:
+    """
+    Обертка execute_wrapper: количество запросов, время БД и повторы форм.
+    Место вызова определяется один раз для формы - при первом повторе.
+    """
+
+    def __init__(self, n_plus_one_threshold=None):
+        self.n_plus_one_threshold = n_plus_one_threshold or getattr(
+            settings, 'QUERY_BUDGET_N_PLUS_ONE_THRESHOLD', 5
+        )
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            shape = fingerprint(sql)
+            entry = self.shapes.get(shape)
+            if entry is None:
+                self.shapes[shape] = [1, None]
+            else:
+                entry[0] += 1
+                if entry[1] is None:
+                    entry[1] = get_call_site()
+
+    @property
+    def db_ms(self) -> float:
+        return self.duration * 1000
+
+    def get_n_plus_one(self):
+        """[(форма SQL, повторов, место вызова)] по убыванию повторов"""
+        return sorted(
+            (
+                (shape, count, call_site)
+                for shape, (count, call_site) in self.shapes.items()
+                if count >= self.n_plus_one_threshold
+            ),
+            key=lambda item: -item[1]
+        )
+
+
+@contextmanager
+def record_queries(n_plus_one_threshold=None):
+    """Записывает SQL-запросы всех подключений внутри блока"""
+    recorder = QueryRecorder(n_plus_one_threshold)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+def get_violations(recorder, budget, total_ms=None):
+    """Превышенные ограничения бюджета: [(ограничение, описание)]"""
+    violations = []
+    if budget.get('queries') is not None and recorder.count > budget['queries']:
+        violations.append(('queries', f"запросов {recorder.count} > {budget['queries']}"))
+    if budget.get('db_ms') is not None and recorder.db_ms > budget['db_ms']:
+        violations.append(('db_ms', f"время БД {recorder.db_ms:.1f} мс > {budget['db_ms']} мс"))
+    if budget.get('total_ms') is not None and total_ms is not None and total_ms > budget['total_ms']:
+        violations.append(('total_ms', f"время ответа {total_ms:.1f} мс > {budget['total_ms']} мс"))
+    return violations
+
+
+def format_n_plus_one(items) -> str:
+    return '; '.join(f'{count}x {call_site}: {shape[:120]}' for shape, count, call_site in items)
+
+
+@contextmanager
+def assert_query_budget(queries=None, db_ms=None, n_plus_one_threshold=None, allow_n_plus_one=False):
+    """
+    Помощник для тестов: блок не должен превышать бюджет и содержать N+1
+
+        with assert_query_budget(queries=12):
+            self.client.get(url)
+    """
+    with record_queries(n_plus_one_threshold) as recorder:
+        yield recorder
+    problems = [message for _, message in get_violations(recorder, {'queries': queries, 'db_ms': db_ms})]
+    n_plus_one = recorder.get_n_plus_one()
+    if n_plus_one and not allow_n_plus_one:
+        problems.append(f'N+1: {format_n_plus_one(n_plus_one)}')
+    if problems:
+        raise QueryBudgetExceeded('; '.join(problems))
+
+
+class QueryBudgetMiddleware:
+    """Учет SQL-запросов и бюджет на HTTP-запрос (QUERY_BUDGET_ENABLED)"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        view = self.get_view_name(request)
+        violations = get_violations(recorder, self.get_budget(request, view), total_ms)
+        n_plus_one = recorder.get_n_plus_one()
+
+        self.add_server_timing(response, recorder, total_ms)
+        self.record_metrics(view, recorder, total_ms, violations, n_plus_one)
+        self.log(request, view, recorder, total_ms, violations, n_plus_one)
+
+        if violations and getattr(settings, 'QUERY_BUDGET_RAISE', False):
+            raise QueryBudgetExceeded(
+                f"{request.method} {request.path}: " + '; '.join(message for _, message in violations)
+            )
+        return response
+
+    @staticmethod
+    def get_view_name(request) -> str:
+        match = getattr(request, 'resolver_match', None)
+        return match.view_name if match else 'unresolved'
+
+    @staticmethod
+    def get_budget(request, view) -> dict:
+        """
+        Бюджет из QUERY_BUDGETS: ключ - имя представления ('patients:patient_list')
+        или префикс пути ('/api/'); иначе QUERY_BUDGET_DEFAULT
+        """
+        budget = dict(getattr(settings, 'QUERY_BUDGET_DEFAULT', DEFAULT_BUDGET))
+        budgets = getattr(settings, 'QUERY_BUDGETS', {})
+        if view in budgets:
+            budget.update(budgets[view])
+        else:
+            prefixes = [key for key in budgets if key.startswith('/') and request.path.startswith(key)]
+            if prefixes:
+                budget.update(budgets[max(prefixes, key=len)])
+        return budget
+
+    @staticmethod
+    def add_server_timing(response, recorder, total_ms):
+        timing = f'db;dur={recorder.db_ms:.1f};desc="{recorder.count} queries", app;dur={total_ms:.1f}'
+        if response.has_header('Server-Timing'):
+            timing = f"{response['Server-Timing']}, {timing}"
+        response['Server-Timing'] = timing
+
+    @staticmethod
+    def record_metrics(view, recorder, total_ms, violations, n_plus_one):
+        metrics.HTTP_REQUEST_SECONDS.observe(total_ms / 1000, view=view)
+        metrics.HTTP_REQUEST_DB_QUERIES.observe(recorder.count, view=view)
+        metrics.HTTP_REQUEST_DB_SECONDS.observe(recorder.duration, view=view)
+        for limit, _ in violations:
+            metrics.QUERY_BUDGET_EXCEEDED.inc(view=view, limit=limit)
+        for _, _, call_site in n_plus_one:
+            metrics.N_PLUS_ONE_QUERIES.inc(view=view, call_site=call_site)
+
+    @staticmethod
+    def log(request, view, recorder, total_ms, violations, n_plus_one):
+        line = (
+            f"{request.method} {request.path} view={view} queries={recorder.count} "
+            f"db={recorder.db_ms:.1f}ms total={total_ms:.1f}ms"
+        )
+        if violations:
+            line += ' budget: ' + '; '.join(message for _, message in violations)
+        if n_plus_one:
+            line += ' N+1: ' + format_n_plus_one(n_plus_one)
+        if violations or n_plus_one:
+            logger.warning(line)
+        else:
+            logger.info(line)
@@ -0,0 +1,121 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+from typing import Dict, Any
+
+
+SNAPSHOT_CACHE_KEY = 'reference_data:snapshot'
+
+
+class ReferenceDataSnapshotService:
+    """
+    Сервис версионированного снимка справочных данных.
+
+    Снимок объединяет справочники, которые постоянно запрашивают виджеты
+    Select2 (группы препаратов, формы выпуска, способы введения, определения
+    лабораторных и инструментальных исследований, отделения). Каждый
+    справочник строится одним запросом, счетчики считаются аннотациями.
+    Снимок хранится в кэше и перестраивается только после изменения
+    исходных таблиц (см. connect_signals).
+    """
+
+    @staticmethod
+    def _get_source_models():
+        """Модели, изменение которых делает снимок неактуальным"""
+        from pharmacy.models import (
+            MedicationGroup, ReleaseForm, AdministrationMethod,
+            TradeName, DosingInstruction
+        )
+        from lab_tests.models import LabTestDefinition
+        from instrumental_procedures.models import InstrumentalProcedureDefinition
+        from departments.models import Department
+        from documents.models import DocumentType
+
+        return [
+            MedicationGroup, ReleaseForm, AdministrationMethod, TradeName,
+            DosingInstruction, LabTestDefinition, InstrumentalProcedureDefinition,
+            Department, DocumentType,
+        ]
+
+    @staticmethod
+    def build_data() -> Dict[str, Any]:
+        """Собирает данные всех справочников"""
+        from pharmacy.services import ReferenceDataService
+        from lab_tests.models import LabTestDefinition
+        from instrumental_procedures.models import InstrumentalProcedureDefinition
+        from departments.models import Department
+
+        return {
+            'medication_groups': ReferenceDataService.get_medication_groups(),
+            'release_forms': ReferenceDataService.get_release_forms(),
+            'administration_methods': ReferenceDataService.get_administration_methods(),
+            'lab_test_definitions': list(
+                LabTestDefinition.objects.order_by('name').values('id', 'name', 'description')
+            ),
+            'instrumental_procedure_definitions': list(
+                InstrumentalProcedureDefinition.objects.order_by('name').values('id', 'name', 'description')
+            ),
+            'departments': list(
+                Department.objects.annotate(
+                    document_types_count=Count('document_types')
+                ).order_by('name').values('id', 'name', 'slug', 'description', 'document_types_count')
+            ),
+        }
+
+    @classmethod
+    def build_snapshot(cls) -> Dict[str, Any]:
+        """
+        Строит снимок: данные, хэш версии и готовое JSON-тело ответа.
+        Версия зависит только от содержимого справочников.
+        """
+        data = cls.build_data()
+        data_json = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, sort_keys=True)
+        version = hashlib.sha256(data_json.encode('utf-8')).hexdigest()[:20]
+        generated_at = timezone.now()
+        content = json.dumps(
+            {'version': version, 'generated_at': generated_at, 'data': data},
+            cls=DjangoJSONEncoder, ensure_ascii=False
+        ).encode('utf-8')
+        return {
+            'version': version,
+            'etag': f'"{version}"',
+            'generated_at': generated_at,
+            'content': content,
+        }
+
+    @classmethod
+    def get_snapshot(cls) -> Dict[str, Any]:
+        """Возвращает снимок из кэша, перестраивая его при необходимости"""
+        snapshot = cache.get(SNAPSHOT_CACHE_KEY)
+        if snapshot is None:
+            snapshot = cls.build_snapshot()
+            cache.set(
+                SNAPSHOT_CACHE_KEY,
+                snapshot,
+                getattr(settings, 'REFERENCE_DATA_SNAPSHOT_TTL', 300)
+            )
+        return snapshot
+
+    @staticmethod
+    def invalidate(**kwargs):
+        """Сбрасывает снимок; используется как обработчик сигналов"""
+        cache.delete(SNAPSHOT_CACHE_KEY)
+
+    @classmethod
+    def connect_signals(cls):
+        """Подключает сброс снимка к изменениям исходных таблиц"""
+        for model in cls._get_source_models():
+            post_save.connect(
+                cls.invalidate, sender=model,
+                dispatch_uid=f'reference_data_snapshot_save_{model._meta.label_lower}'
+            )
+            post_delete.connect(
+                cls.invalidate, sender=model,
+                dispatch_uid=f'reference_data_snapshot_delete_{model._meta.label_lower}'
+            )
@@ -1,20 +1,38 @@
-from django.db import models, transaction
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.db.models.signals import pre_delete
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError, PermissionDenied
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.http import HttpRequest
+from datetime import date, time, timedelta
 from typing import List, Dict, Any, Optional
+import glob
+import gzip
 import json
+import os
+import time as time_module
 
-from .models import ArchiveLog, ArchiveConfiguration
+from .models import ArchiveLog, ArchiveLogDailyStat, ArchiveConfiguration, AutoArchiveCheckpoint
+from .metrics import instrumented
+from .cold_storage import ColdStorageService
 
 
 class ArchiveService:
     """
     Сервис для управления архивированием записей
     """
+
+    # Поля, которые меняются при архивировании и попадают в снимки лога
+    ARCHIVE_FIELDS = ('is_archived', 'archived_at', 'archived_by', 'archive_reason')
+    SENSITIVE_FIELDS = ('password', 'secret_key')
     
     @classmethod
+    @instrumented('archive')
     def archive_record(
         cls, 
         instance, 
@@ -50,6 +68,8 @@ class ArchiveService:
             raise ValidationError("Необходимо указать причину архивирования")
         
         with transaction.atomic():
+            previous = cls._get_instance_data(instance, cls.ARCHIVE_FIELDS)
+
             # Архивируем основную запись
             instance.archive(user, reason)
             
@@ -62,11 +82,12 @@ class ArchiveService:
                     cls._archive_related_records(instance, user, reason, request)
             
             # Логируем действие
-            cls._log_archive_action(instance, user, 'archive', reason, request)
+            cls._log_archive_action(instance, user, 'archive', reason, request, previous)
             
         return True
     
     @classmethod
+    @instrumented('archive')
     def restore_record(
         cls, 
         instance, 
@@ -99,6 +120,12 @@ class ArchiveService:
                 raise PermissionDenied("Нет прав на восстановление")
         
         with transaction.atomic():
+            previous = cls._get_instance_data(instance, cls.ARCHIVE_FIELDS)
+
+            # Возвращаем из холодного хранилища запись и ссылающиеся на нее записи:
+            # restore() модели восстанавливает связанные записи
+            ColdStorageService.move_to_hot(instance.__class__, [instance.pk], with_children=True)
+
             # Восстанавливаем основную запись
             instance.restore(user)
             
@@ -111,11 +138,12 @@ class ArchiveService:
                     cls._restore_related_records(instance, user, request)
             
             # Логируем действие
-            cls._log_archive_action(instance, user, 'restore', "", request)
+            cls._log_archive_action(instance, user, 'restore', "", request, previous)
             
         return True
     
     @classmethod
+    @instrumented('archive')
     def bulk_archive(
         cls, 
         queryset, 
@@ -150,6 +178,7 @@ class ArchiveService:
         return archived_count
     
     @classmethod
+    @instrumented('archive')
     def bulk_restore(
         cls, 
         queryset, 
@@ -246,9 +275,12 @@ class ArchiveService:
         return related_fields
     
     @classmethod
-    def _log_archive_action(cls, instance, user, action, reason, request):
+    def _log_archive_action(cls, instance, user, action, reason, request, previous=None):
         """
-        Логирует действие архивирования
+        Логирует действие архивирования.
+
+        В previous_data/new_data пишутся только изменившиеся поля
+        архивирования (previous - снимок до действия).
         """
         try:
             # Получаем данные запроса
@@ -258,9 +290,13 @@ class ArchiveService:
             if request and isinstance(request, HttpRequest):
                 ip_address = cls._get_client_ip(request)
                 user_agent = request.META.get('HTTP_USER_AGENT', '')
+
+            current = cls._get_instance_data(instance, cls.ARCHIVE_FIELDS) or {}
+            previous = previous or {}
+            changed = [name for name, value in current.items() if previous.get(name) != value]
             
             # Создаем лог
-            ArchiveLog.objects.create(
+            log = ArchiveLog.objects.create(
                 content_type=ContentType.objects.get_for_model(instance),
                 object_id=instance.pk,
                 action=action,
@@ -268,9 +304,10 @@ class ArchiveService:
                 reason=reason,
                 ip_address=ip_address,
                 user_agent=user_agent,
-                previous_data=cls._get_instance_data(instance) if action == 'archive' else None,
-                new_data=cls._get_instance_data(instance) if action == 'restore' else None,
+                previous_data={name: previous.get(name) for name in changed} or None,
+                new_data={name: current[name] for name in changed} or None,
             )
+            ArchiveStatisticsService.record(log.content_type_id, action, log.user_id, log.timestamp)
         except Exception as e:
             print(f"Ошибка логирования архивирования: {e}")
     
@@ -287,30 +324,30 @@ class ArchiveService:
         return ip
     
     @classmethod
-    def _get_instance_data(cls, instance):
+    def _get_instance_data(cls, instance, field_names=None):
         """
-        Получает данные экземпляра для логирования
+        Компактный снимок полей экземпляра для логирования: внешние ключи
+        пишутся как id (без загрузки связанных объектов), чувствительные
+        поля пропускаются
+
+        Args:
+            instance: Экземпляр модели
+            field_names: Имена полей снимка (по умолчанию все)
         """
         try:
             data = {}
-            for field in instance._meta.fields:
-                if field.name not in ['password', 'secret_key']:  # Исключаем чувствительные поля
-                    value = getattr(instance, field.name)
-                    
-                    # Обработка datetime полей
-                    if hasattr(value, 'isoformat'):
-                        value = value.isoformat()
-                    # Обработка User объектов
-                    elif hasattr(value, 'username'):
-                        value = value.username
-                    # Обработка связанных объектов
-                    elif hasattr(value, 'pk'):
-                        value = f"{value.__class__.__name__}(pk={value.pk})"
-                    # Обработка других объектов
-                    elif hasattr(value, '__str__'):
-                        value = str(value)
-                    
-                    data[field.name] = value
+            for field in instance._meta.concrete_fields:
+                if field.name in cls.SENSITIVE_FIELDS:
+                    continue
+                if field_names is not None and field.name not in field_names:
+                    continue
+
+                value = field.value_from_object(instance)
+                if isinstance(value, (date, time)):
+                    value = value.isoformat()
+                elif value is not None and not isinstance(value, (str, int, float, bool, list, dict)):
+                    value = str(value)
+                data[field.attname] = value
             return data
         except Exception as e:
             # Логируем ошибку, но не прерываем процесс
@@ -318,6 +355,438 @@ class ArchiveService:
             return None
 
 
+class ArchiveLogRetentionService:
+    """
+    Хранение логов архивирования.
+
+    В таблице ArchiveLog остаются записи за срок хранения модели
+    (ArchiveConfiguration.log_retention_days или ARCHIVE_LOG_RETENTION_DAYS).
+    Более старые выгружаются в сжатые NDJSON-файлы по месяцам в
+    ARCHIVE_LOG_EXPORT_DIR и удаляются из таблицы, поэтому запросы аудита
+    работают с ограниченным объемом. Запускается командой
+    rollover_archive_logs.
+    """
+
+    BATCH_SIZE = 1000
+    EXPORT_FIELDS = (
+        'id', 'content_type_id', 'object_id', 'action', 'user_id', 'timestamp',
+        'reason', 'ip_address', 'user_agent', 'previous_data', 'new_data',
+    )
+
+    @staticmethod
+    def get_export_dir() -> str:
+        return getattr(settings, 'ARCHIVE_LOG_EXPORT_DIR', None) or os.path.join(settings.MEDIA_ROOT, 'archive_logs')
+
+    @classmethod
+    def get_export_path(cls, month: str) -> str:
+        """Файл выгрузки за месяц 'ГГГГ-ММ'"""
+        return os.path.join(cls.get_export_dir(), month[:4], f'archive_log_{month}.ndjson.gz')
+
+    @staticmethod
+    def get_cutoffs(now=None) -> Dict[int, Any]:
+        """
+        Границы хранения по моделям, у которых есть логи
+
+        Returns:
+            {content_type_id: момент, старше которого логи выгружаются}
+        """
+        now = now or timezone.now()
+        default_days = getattr(settings, 'ARCHIVE_LOG_RETENTION_DAYS', 365)
+        policies = dict(
+            ArchiveConfiguration.objects.filter(log_retention_days__isnull=False)
+            .values_list('content_type_id', 'log_retention_days')
+        )
+        content_type_ids = ArchiveLog.objects.order_by().values_list('content_type_id', flat=True).distinct()
+        return {
+            content_type_id: now - timedelta(days=policies.get(content_type_id, default_days))
+            for content_type_id in content_type_ids
+        }
+
+    @classmethod
+    def _write_batch(cls, rows, label) -> Dict[str, int]:
+        """Дописывает записи в файлы их месяцев (gzip допускает дозапись)"""
+        by_month = {}
+        for row in rows:
+            row['model'] = label
+            by_month.setdefault(timezone.localtime(row['timestamp']).strftime('%Y-%m'), []).append(row)
+
+        written = {}
+        for month, month_rows in by_month.items():
+            path = cls.get_export_path(month)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'ab') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='ab') as stream:
+                    for row in month_rows:
+                        stream.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8') + b'\n')
+                raw.flush()
+                os.fsync(raw.fileno())
+            written[path] = len(month_rows)
+        return written
+
+    @classmethod
+    def rollover(cls, now=None, batch_size=None, dry_run=False) -> Dict[str, int]:
+        """
+        Выгружает устаревшие логи в файлы и удаляет их из таблицы.
+        Записи удаляются пакетами только после записи пакета в файл.
+
+        Args:
+            now: Текущий момент (для расчета границ)
+            batch_size: Размер пакета
+            dry_run: Только посчитать записи к выгрузке
+
+        Returns:
+            {'app_label.model': количество выгруженных записей}
+        """
+        batch_size = batch_size or cls.BATCH_SIZE
+        result = {}
+        for content_type_id, cutoff in cls.get_cutoffs(now).items():
+            content_type = ContentType.objects.get_for_id(content_type_id)
+            label = f'{content_type.app_label}.{content_type.model}'
+            stale = ArchiveLog.objects.filter(content_type_id=content_type_id, timestamp__lt=cutoff)
+
+            if dry_run:
+                count = stale.count()
+            else:
+                count = 0
+                while True:
+                    rows = list(stale.order_by('timestamp', 'id').values(*cls.EXPORT_FIELDS)[:batch_size])
+                    if not rows:
+                        break
+                    cls._write_batch(rows, label)
+                    ArchiveLog.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+                    count += len(rows)
+            if count:
+                result[label] = count
+        return result
+
+    @classmethod
+    def get_exported_months(cls) -> List[str]:
+        """Месяцы 'ГГГГ-ММ', за которые есть выгруженные файлы"""
+        pattern = os.path.join(cls.get_export_dir(), '*', 'archive_log_*.ndjson.gz')
+        return sorted(
+            os.path.basename(path)[len('archive_log_'):-len('.ndjson.gz')]
+            for path in glob.glob(pattern)
+        )
+
+    @classmethod
+    def read_exported(cls, month: str):
+        """
+        Записи, выгруженные за месяц 'ГГГГ-ММ' (генератор словарей)
+        """
+        path = cls.get_export_path(month)
+        if not os.path.exists(path):
+            return
+        with gzip.open(path, 'rt', encoding='utf-8') as stream:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class ArchiveStatisticsService:
+    """
+    Сводная статистика логов архивирования по дням (ArchiveLogDailyStat).
+
+    Счетчик (день, модель, действие, пользователь) увеличивается при записи
+    каждого лога. Выгрузка логов в файлы счетчики не трогает, поэтому
+    статистика за весь период читается из небольшой таблицы. Полный
+    пересчет - команда rebuild_archive_statistics.
+    """
+
+    @staticmethod
+    def record(content_type_id, action, user_id, timestamp=None, amount=1) -> None:
+        """Увеличивает дневной счетчик"""
+        key = {
+            'day': timezone.localdate(timestamp) if timestamp else timezone.localdate(),
+            'content_type_id': content_type_id,
+            'action': action,
+            'user_id': user_id,
+        }
+        if ArchiveLogDailyStat.objects.filter(**key).update(count=F('count') + amount):
+            return
+        try:
+            with transaction.atomic():
+                ArchiveLogDailyStat.objects.create(count=amount, **key)
+        except IntegrityError:
+            # Строку успел создать параллельный запрос
+            ArchiveLogDailyStat.objects.filter(**key).update(count=F('count') + amount)
+
+    @staticmethod
+    @transaction.atomic
+    def release_user(user_id) -> None:
+        """
+        Переносит счетчики пользователя в строки без пользователя, как
+        ArchiveLog.user (SET_NULL) при удалении пользователя. Счетчики с
+        тем же ключом складываются: уникальное ограничение для строк без
+        пользователя допускает одну строку на (день, модель, действие).
+        """
+        for stat in ArchiveLogDailyStat.objects.select_for_update().filter(user_id=user_id):
+            merged = ArchiveLogDailyStat.objects.filter(
+                day=stat.day, content_type_id=stat.content_type_id, action=stat.action, user__isnull=True
+            ).update(count=F('count') + stat.count)
+            if merged:
+                stat.delete()
+            else:
+                stat.user_id = None
+                stat.save(update_fields=['user'])
+
+    @classmethod
+    def connect_signals(cls):
+        """Сохраняет счетчики удаляемых пользователей (pre_delete, до SET_NULL)"""
+        pre_delete.connect(
+            cls._release_deleted_user, sender=settings.AUTH_USER_MODEL,
+            dispatch_uid='archive_statistics_release_user'
+        )
+
+    @classmethod
+    def _release_deleted_user(cls, sender, instance, **kwargs):
+        cls.release_user(instance.pk)
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls, include_exported=True) -> int:
+        """
+        Пересчитывает статистику по таблице ArchiveLog и, при
+        include_exported, по выгруженным файлам.
+
+        Returns:
+            Количество учтенных записей лога
+        """
+        counts = {}
+        rows = ArchiveLog.objects.order_by().annotate(day=TruncDate('timestamp')).values(
+            'day', 'content_type_id', 'action', 'user_id'
+        ).annotate(total=Count('id'))
+        for row in rows:
+            key = (row['day'], row['content_type_id'], row['action'], row['user_id'])
+            counts[key] = counts.get(key, 0) + row['total']
+
+        if include_exported:
+            for month in ArchiveLogRetentionService.get_exported_months():
+                for row in ArchiveLogRetentionService.read_exported(month):
+                    day = timezone.localdate(parse_datetime(row['timestamp']))
+                    key = (day, row['content_type_id'], row['action'], row['user_id'])
+                    counts[key] = counts.get(key, 0) + 1
+
+        ArchiveLogDailyStat.objects.all().delete()
+        ArchiveLogDailyStat.objects.bulk_create(
+            [
+                ArchiveLogDailyStat(day=day, content_type_id=content_type_id, action=action, user_id=user_id, count=total)
+                for (day, content_type_id, action, user_id), total in counts.items()
+            ],
+            batch_size=ArchiveLogRetentionService.BATCH_SIZE
+        )
+        return sum(counts.values())
+
+    @staticmethod
+    def get_statistics(since=None, until=None) -> Dict[str, Any]:
+        """
+        Статистика архивирования за период (даты включительно)
+
+        Args:
+            since: Первый день периода
+            until: Последний день периода
+        """
+        stats = ArchiveLogDailyStat.objects.order_by()
+        if since:
+            stats = stats.filter(day__gte=since)
+        if until:
+            stats = stats.filter(day__lte=until)
+
+        totals = dict(stats.values_list('action').annotate(total=Sum('count')))
+        model_stats = stats.values('content_type__app_label', 'content_type__model').annotate(
+            archive_count=Coalesce(Sum('count', filter=Q(action='archive')), 0),
+            restore_count=Coalesce(Sum('count', filter=Q(action='restore')), 0),
+        ).order_by('content_type__app_label', 'content_type__model')
+        user_stats = stats.filter(user__isnull=False).values(
+            'user__username', 'user__first_name', 'user__last_name'
+        ).annotate(
+            total_actions=Sum('count')
+        ).order_by('-total_actions')[:10]
+
+        return {
+            'total_logs': sum(totals.values()),
+            'archive_count': totals.get('archive', 0),
+            'restore_count': totals.get('restore', 0),
+            'model_statistics': list(model_stats),
+            'top_users': list(user_stats),
+        }
+
+
+class AutoArchiveService:
+    """
+    Автоархивирование по ArchiveConfiguration.archive_after_days.
+
+    Для каждой настроенной модели отбираются неархивированные записи старше
+    срока: модель может задать отбор методом get_auto_archive_queryset(cutoff)
+    (например, только закрытые случаи), иначе используется created_at.
+    Записи обходятся по первичному ключу пакетами; каждый пакет
+    архивируется одним UPDATE в короткой транзакции, логи пишутся
+    bulk_create. Прогресс сохраняется в AutoArchiveCheckpoint, поэтому
+    прерванный (или ограниченный по времени) запуск продолжается с места
+    остановки.
+
+    Каскадное архивирование не выполняется: связанные модели архивируются
+    по своим настройкам archive_after_days.
+    """
+
+    CHUNK_SIZE = 500
+    REASON = "Автоархивирование: истек срок хранения в оперативных данных"
+
+    @staticmethod
+    def get_eligible_queryset(model, cutoff):
+        """Неархивированные записи модели, подлежащие архивированию"""
+        if hasattr(model, 'get_auto_archive_queryset'):
+            queryset = model.get_auto_archive_queryset(cutoff)
+        elif any(field.name == 'created_at' for field in model._meta.concrete_fields):
+            queryset = model._base_manager.filter(created_at__lt=cutoff)
+        else:
+            return None
+        return queryset.filter(is_archived=False)
+
+    @staticmethod
+    def get_configurations(labels=None):
+        """Конфигурации с заданным сроком автоархивирования"""
+        configs = ArchiveConfiguration.objects.filter(
+            is_archivable=True, archive_after_days__isnull=False
+        ).select_related('content_type')
+        if labels:
+            conditions = Q()
+            for label in labels:
+                app_label, _, model_name = label.lower().partition('.')
+                conditions |= Q(content_type__app_label=app_label, content_type__model=model_name)
+            configs = configs.filter(conditions)
+        return configs
+
+    @classmethod
+    def archive_chunk(cls, model, pks, now=None, reason=None) -> int:
+        """
+        Архивирует пакет записей одним UPDATE и пишет логи пакетом
+
+        Returns:
+            Количество архивированных записей
+        """
+        now = now or timezone.now()
+        reason = reason or cls.REASON
+        content_type = ContentType.objects.get_for_model(model)
+
+        with transaction.atomic():
+            ids = list(
+                model._base_manager.select_for_update()
+                .filter(pk__in=pks, is_archived=False).values_list('pk', flat=True)
+            )
+            if not ids:
+                return 0
+            model._base_manager.filter(pk__in=ids).update(
+                is_archived=True, archived_at=now, archived_by=None, archive_reason=reason
+            )
+            ArchiveLog.objects.bulk_create([
+                ArchiveLog(
+                    content_type=content_type,
+                    object_id=pk,
+                    action='archive',
+                    reason=reason,
+                    previous_data={'is_archived': False, 'archived_at': None, 'archive_reason': ''},
+                    new_data={'is_archived': True, 'archived_at': now.isoformat(), 'archive_reason': reason},
+                )
+                for pk in ids
+            ])
+            ArchiveStatisticsService.record(content_type.pk, 'archive', None, now, amount=len(ids))
+        return len(ids)
+
+    @classmethod
+    def run_model(cls, config, now=None, chunk_size=None, max_chunks=None, sleep=0, deadline=None) -> int:
+        """
+        Один запуск автоархивирования модели с продолжением по контрольной точке
+
+        Args:
+            config: ArchiveConfiguration модели
+            chunk_size: Записей в пакете
+            max_chunks: Не более пакетов за запуск
+            sleep: Пауза между пакетами, сек
+            deadline: Момент time.monotonic(), после которого запуск прерывается
+
+        Returns:
+            Количество архивированных записей
+        """
+        model = config.content_type.model_class()
+        if model is None or not hasattr(model, 'is_archived'):
+            return 0
+        now = now or timezone.now()
+        chunk_size = chunk_size or cls.CHUNK_SIZE
+
+        checkpoint, _ = AutoArchiveCheckpoint.objects.get_or_create(content_type=config.content_type)
+        if checkpoint.cutoff is None or checkpoint.finished_at is not None:
+            # Новый проход; незавершенный продолжается со своей границей
+            checkpoint.cutoff = now - timedelta(days=config.archive_after_days)
+            checkpoint.last_pk = 0
+            checkpoint.archived_total = 0
+            checkpoint.started_at = now
+            checkpoint.finished_at = None
+            checkpoint.save()
+
+        queryset = cls.get_eligible_queryset(model, checkpoint.cutoff)
+        if queryset is None:
+            print(f"Автоархивирование {config.content_type}: не задан отбор (нет created_at и get_auto_archive_queryset)")
+            return 0
+
+        archived = 0
+        chunks = 0
+        while True:
+            pks = list(
+                queryset.filter(pk__gt=checkpoint.last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+            )
+            if not pks:
+                checkpoint.finished_at = timezone.now()
+                checkpoint.save(update_fields=['finished_at', 'updated_at'])
+                break
+
+            count = cls.archive_chunk(model, pks)
+            archived += count
+            checkpoint.last_pk = pks[-1]
+            checkpoint.archived_total += count
+            checkpoint.save(update_fields=['last_pk', 'archived_total', 'updated_at'])
+
+            chunks += 1
+            if max_chunks and chunks >= max_chunks:
+                break
+            if deadline and time_module.monotonic() >= deadline:
+                break
+            if sleep:
+                time_module.sleep(sleep)
+        return archived
+
+    @classmethod
+    def run(cls, labels=None, chunk_size=None, max_chunks=None, sleep=0, time_limit=None, dry_run=False) -> Dict[str, int]:
+        """
+        Автоархивирование всех настроенных моделей
+
+        Args:
+            labels: Ограничить моделями 'app_label.model'
+            time_limit: Ограничение длительности запуска, сек
+            dry_run: Только посчитать записи к архивированию
+
+        Returns:
+            {'app_label.model': количество записей}
+        """
+        now = timezone.now()
+        deadline = time_module.monotonic() + time_limit if time_limit else None
+        result = {}
+        for config in cls.get_configurations(labels):
+            label = f'{config.content_type.app_label}.{config.content_type.model}'
+            if dry_run:
+                model = config.content_type.model_class()
+                queryset = model and cls.get_eligible_queryset(
+                    model, now - timedelta(days=config.archive_after_days)
+                )
+                count = queryset.count() if queryset is not None else 0
+            else:
+                count = cls.run_model(config, now, chunk_size, max_chunks, sleep, deadline)
+            if count:
+                result[label] = count
+            if deadline and time_module.monotonic() >= deadline:
+                break
+        return result
+
+
 class ArchiveQuerySet(models.QuerySet):
     """
     QuerySet с поддержкой архивирования
@@ -359,6 +828,36 @@ class ArchiveQuerySet(models.QuerySet):
         """
         return self.filter(is_archived=True, archived_at__lte=date)
 
+    def for_list(self):
+        """
+        Записи для списков: архивированные остаются, только если это
+        разрешено ArchiveConfiguration.show_archived_in_list
+        """
+        config = ArchiveConfiguration.get_config(self.model)
+        return self if config.show_archived_in_list else self.active()
+
+    def for_search(self):
+        """
+        Записи для поиска: архивированные остаются, только если это
+        разрешено ArchiveConfiguration.show_archived_in_search
+        """
+        config = ArchiveConfiguration.get_config(self.model)
+        return self if config.show_archived_in_search else self.active()
+
+    def including_cold(self):
+        """
+        Добавляет записи из холодного хранилища (UNION ALL с теневой таблицей).
+        Вызывается последним: объединенный QuerySet нельзя дополнительно
+        фильтровать, сортировка сохраняется
+        """
+        from .cold_storage import ColdStorageService
+
+        cold = ColdStorageService.as_cold_queryset(self)
+        if cold is None:
+            return self
+        ordering = self.query.order_by or (self.model._meta.ordering if self.query.default_ordering else ())
+        return self.order_by().union(cold.order_by(), all=True).order_by(*ordering)
+
 
 class ArchiveManager(models.Manager):
     """
@@ -373,6 +872,15 @@ class ArchiveManager(models.Manager):
     
     def archived(self):
         return self.get_queryset().archived()
+
+    def for_list(self):
+        return self.get_queryset().for_list()
+
+    def for_search(self):
+        return self.get_queryset().for_search()
+
+    def including_cold(self):
+        return self.get_queryset().including_cold()
     
     def archive_record(self, instance, user=None, reason="", request=None):
         return ArchiveService.archive_record(instance, user, reason, request)
@@ -385,3 +893,13 @@ class ArchiveManager(models.Manager):
     
     def bulk_restore(self, queryset, user=None, request=None):
         return ArchiveService.bulk_restore(queryset, user, request)
+
+
+class ActiveArchiveManager(ArchiveManager):
+    """
+    Менеджер только активных записей для списков и поиска. Запросы идут
+    по частичным индексам из ArchivableModel.active_indexes
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().active()
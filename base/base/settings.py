@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 
+from base.db_profiles import get_database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -74,6 +76,7 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'base.query_budget.QueryBudgetMiddleware',  # Бюджет SQL-запросов (QUERY_BUDGET_ENABLED)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -113,12 +116,13 @@ WSGI_APPLICATION = 'base.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# Профиль выбирается переменными окружения (base/db_profiles.py):
+# DB_ENGINE=sqlite (по умолчанию, WAL и PRAGMA на каждое соединение)
+# или DB_ENGINE=postgresql (DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT,
+# DB_CONN_MAX_AGE, DB_POOL=min:max)
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': get_database_settings(BASE_DIR),
 }
 
 
@@ -213,13 +217,56 @@ CACHES = {
     }
 }
 
+# Снимок справочных данных (base.reference_data)
+REFERENCE_DATA_SNAPSHOT_TTL = 300  # Время жизни снимка в кэше, сек
+REFERENCE_DATA_CACHE_MAX_AGE = 300  # Cache-Control max-age для клиентов, сек
+
+# Исходящая очередь событий обращений (encounters.events.outbox)
+ENCOUNTER_EVENTS_DISPATCH = 'thread'  # 'thread', 'sync' или 'worker' (только process_encounter_outbox)
+ENCOUNTER_EVENTS_WORKERS = 2  # Потоков-исполнителей в режиме 'thread'
+ENCOUNTER_OUTBOX_MAX_ATTEMPTS = 5  # Попыток доставки до статуса 'failed'
+ENCOUNTER_OUTBOX_LOCK_TIMEOUT = 300  # Через сколько секунд зависшее событие перехватывается, сек
+
+# Кэш статистики панели планировщика (clinical_scheduling), сек
+CLINICAL_SCHEDULING_STATS_TTL = 60
+
+# Горизонт листа выполнения назначений медсестры по умолчанию, ч
+MEDICATION_WORKLIST_HOURS = 4
+
+# Хранение логов архивирования (ArchiveLog)
+ARCHIVE_LOG_RETENTION_DAYS = 365  # Срок хранения в таблице, если в ArchiveConfiguration не задан свой, дней
+ARCHIVE_LOG_EXPORT_DIR = os.path.join(MEDIA_ROOT, 'archive_logs')  # Куда выгружаются старые логи (NDJSON.gz по месяцам)
+
+# Метрики (base.metrics), эндпоинт /metrics
+METRICS_ENABLED = True
+METRICS_DB_PATH = os.environ.get('METRICS_DB_PATH')  # Общий для воркеров файл SQLite; по умолчанию во временном каталоге
+METRICS_FLUSH_INTERVAL = 5  # Как часто процесс сбрасывает приращения в хранилище, сек
+METRICS_AUTH_TOKEN = os.environ.get('METRICS_AUTH_TOKEN', '')  # Bearer-токен для Prometheus
+
+# Тесты пишут метрики во временный файл, а не в METRICS_DB_PATH
+TEST_RUNNER = 'base.test_runner.MetricsIsolatedTestRunner'
+
+# Бюджет SQL-запросов на HTTP-запрос и поиск N+1 (base.query_budget)
+QUERY_BUDGET_ENABLED = os.environ.get('QUERY_BUDGET_ENABLED', '') == '1'
+QUERY_BUDGET_RAISE = False  # Исключение при превышении (для разработки)
+QUERY_BUDGET_N_PLUS_ONE_THRESHOLD = 5  # Повторов одной формы SQL, считающихся N+1
+QUERY_BUDGET_DEFAULT = {'queries': 50, 'db_ms': 500, 'total_ms': None}
+QUERY_BUDGETS = {
+    # Имя представления или префикс пути: ограничения поверх QUERY_BUDGET_DEFAULT
+    # 'examination_management:examination_plan_detail': {'queries': 30},
+    # '/api/': {'queries': 20, 'db_ms': 200},
+}
+
 # Настройки для ограничения попыток входа
 LOGIN_ATTEMPTS_LIMIT = 3
 LOGIN_ATTEMPTS_TIMEOUT = 300  # 5 минут блокировки
+LOGIN_IP_ATTEMPTS_LIMIT = 20  # Неудачных входов с одного IP (любые пользователи) за LOGIN_ATTEMPTS_TIMEOUT
+TRUSTED_PROXY_COUNT = 0  # Обратных прокси перед приложением, дописывающих X-Forwarded-For; 0 - заголовок игнорируется
 
 # IP-фильтрация для входа в систему
 IP_WHITELIST_ENABLED = True  # Включить/выключить IP-фильтрацию
 IP_BLOCKED_RESPONSE_TYPE = '403'  # Тип ответа для заблокированных IP: '403', '404', 'redirect'
+IP_WHITELIST_RELOAD_INTERVAL = 30  # Как часто воркер проверяет изменения белого списка в БД (manage_ip_whitelist), сек
 
 # Разрешенные IP-адреса (точные)
 ALLOWED_LOGIN_IPS = [
@@ -0,0 +1,134 @@
+"""
+Отложенные межмодульные побочные эффекты сигналов.
+
+Обработчики сигналов не выполняют работу сразу, а ставят ее в буфер
+текущей транзакции по ключу (вид работы, целевой объект). Повторная
+постановка той же работы в той же транзакции не дублирует ее, а
+обновляет аргументы. Буфер выполняется один раз в transaction.on_commit;
+работа, поставленная самими обработчиками во время выполнения буфера,
+выполняется следующим проходом, но ключи, уже выполненные в этой цепочке,
+повторно не запускаются.
+
+Вне транзакции (autocommit) работа выполняется сразу. Чтобы объединить
+эффекты нескольких сохранений в одном запросе, оберните их в coalesce().
+
+Обработчики должны перечитывать состояние из БД и быть идемпотентными:
+работа, поставленная внутри откатившейся точки сохранения, все равно
+выполняется при коммите внешней транзакции.
+
+Трассировка выполненной работы пишется в логгер base.side_effects
+на уровне DEBUG.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+logger = logging.getLogger(__name__)
+
+_state = threading.local()
+
+
+def _target_key(target):
+    """Ключ целевого объекта: модель и pk для экземпляров моделей"""
+    meta = getattr(target, '_meta', None)
+    if meta is not None:
+        return (meta.label_lower, target.pk)
+    return target
+
+
+class SideEffectBuffer:
+    """Буфер отложенной работы одной транзакции"""
+
+    def __init__(self, using):
+        self.using = using
+        self.items = {}
+        self.enqueued = 0
+
+    def add(self, kind, target, handler, args, kwargs):
+        self.enqueued += 1
+        # Повторная постановка сохраняет позицию и обновляет аргументы
+        self.items[(kind, _target_key(target))] = (handler, target, args, kwargs)
+
+    def is_scheduled(self, connection):
+        """Буфер ожидает коммита (его on_commit не отброшен откатом)"""
+        return any(entry[1] == self.flush for entry in connection.run_on_commit)
+
+    def flush(self):
+        connection = connections[self.using]
+        if getattr(connection, '_side_effect_buffer', None) is self:
+            connection._side_effect_buffer = None
+
+        executed = getattr(_state, 'executed', None)
+        outermost = executed is None
+        if outermost:
+            executed = _state.executed = set()
+        try:
+            pending = [(key, item) for key, item in self.items.items() if key not in executed]
+            logger.debug(
+                'Побочные эффекты: поставлено %s, к выполнению %s', self.enqueued, len(pending)
+            )
+            # Работа, поставленная обработчиками, попадает в следующий проход
+            with transaction.atomic(using=self.using):
+                for key, (handler, target, args, kwargs) in pending:
+                    executed.add(key)
+                    _run(key, handler, target, args, kwargs, self.using)
+        finally:
+            if outermost:
+                _state.executed = None
+
+
+def _run(key, handler, target, args, kwargs, using):
+    start = time.perf_counter()
+    try:
+        with transaction.atomic(using=using):
+            handler(target, *args, **kwargs)
+    except Exception as e:
+        # Ошибка побочного эффекта не отменяет уже зафиксированную операцию
+        print(f"Ошибка побочного эффекта {key[0]} {key[1]}: {e}")
+        return
+    logger.debug('Побочный эффект %s %s: %.1f мс', key[0], key[1], (time.perf_counter() - start) * 1000)
+
+
+def defer(kind, target, handler, *args, using=None, **kwargs):
+    """
+    Ставит работу handler(target, *args, **kwargs) в буфер текущей
+    транзакции. Работа с тем же (kind, target) выполняется один раз.
+
+    Args:
+        kind: Вид работы, например 'examination.complete'
+        target: Целевой объект (экземпляр модели или хешируемое значение)
+        handler: Функция, выполняющая работу
+        using: Псевдоним БД
+    """
+    using = using or DEFAULT_DB_ALIAS
+    connection = connections[using]
+
+    if not connection.in_atomic_block:
+        key = (kind, _target_key(target))
+        executed = getattr(_state, 'executed', None)
+        if executed is not None:
+            if key in executed:
+                return
+            executed.add(key)
+        _run(key, handler, target, args, kwargs, using)
+        return
+
+    buffer = getattr(connection, '_side_effect_buffer', None)
+    if buffer is None or not buffer.is_scheduled(connection):
+        buffer = connection._side_effect_buffer = SideEffectBuffer(using)
+        transaction.on_commit(buffer.flush, using=using)
+    buffer.add(kind, target, handler, args, kwargs)
+
+
+@contextmanager
+def coalesce(using=None):
+    """
+    Объединяет побочные эффекты всех сохранений блока в один проход
+    после коммита (открывает транзакцию, если ее нет)
+    """
+    with transaction.atomic(using=using or DEFAULT_DB_ALIAS):
+        yield
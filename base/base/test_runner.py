@@ -0,0 +1,36 @@
+"""
+Запуск тестов с отдельным хранилищем метрик.
+
+Реестр base.metrics сбрасывает приращения в общий для воркеров файл
+SQLite (METRICS_DB_PATH, по умолчанию во временном каталоге). Тесты
+пишут метрики во временный файл, который удаляется после прогона,
+чтобы не смешивать их с метриками запущенного сервера.
+"""
+import os
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class MetricsIsolatedTestRunner(DiscoverRunner):
+    """DiscoverRunner с METRICS_DB_PATH во временном каталоге на весь прогон"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.metrics_dir = tempfile.mkdtemp(prefix='base_metrics_test_')
+        self.metrics_override = override_settings(
+            METRICS_DB_PATH=os.path.join(self.metrics_dir, 'metrics.sqlite3')
+        )
+        self.metrics_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        from .metrics import registry
+
+        # Остаток приращений сбрасывается сейчас, а не при выходе из процесса
+        # (atexit), когда настройки уже указывают на общее хранилище
+        registry.flush()
+        self.metrics_override.disable()
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
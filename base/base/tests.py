@@ -0,0 +1,686 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import side_effects
+from .cold_storage import ColdStorageService
+from .db_profiles import get_database_settings
+from .metrics import MetricsRegistry
+from .query_budget import QueryBudgetExceeded, assert_query_budget, fingerprint
+from .reference_data import ReferenceDataSnapshotService
+from .models import ArchiveConfiguration, ArchiveLog, ArchiveLogDailyStat, AutoArchiveCheckpoint
+from .services import (
+    ArchiveLogRetentionService, ArchiveService, ArchiveStatisticsService, AutoArchiveService,
+)
+
+
+class MetricsTests(TestCase):
+    """Общее хранилище метрик и эндпоинт /metrics"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.settings_override = override_settings(METRICS_DB_PATH=self.path, METRICS_FLUSH_INTERVAL=0)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_values_are_shared_between_registries(self):
+        # Два реестра с общим файлом - как два воркера
+        first, second = MetricsRegistry(), MetricsRegistry()
+        for worker in (first, second):
+            worker.counter('jobs_total', 'Задания', ['queue']).inc(queue='default')
+            worker.histogram('job_seconds', 'Длительность', buckets=(0.1, 1.0)).observe(0.5)
+
+        output = first.render()
+        self.assertIn('# TYPE jobs_total counter', output)
+        self.assertIn('jobs_total{queue="default"} 2', output)
+        self.assertIn('job_seconds_bucket{le="0.1"} 0', output)
+        self.assertIn('job_seconds_bucket{le="1"} 2', output)
+        self.assertIn('job_seconds_bucket{le="+Inf"} 2', output)
+        self.assertIn('job_seconds_count 2', output)
+        self.assertIn('job_seconds_sum 1', output)
+
+    def test_endpoint_requires_staff_or_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+        with override_settings(METRICS_AUTH_TOKEN='secret'):
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+        staff = get_user_model().objects.create_user(username='admin', password='password', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+
+class SideEffectsTests(TestCase):
+    """Отложенные побочные эффекты с объединением по (вид, цель)"""
+
+    def setUp(self):
+        self.calls = []
+
+    def handler(self, target, **kwargs):
+        self.calls.append((target, kwargs))
+
+    def test_same_work_runs_once_after_commit_with_latest_arguments(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            side_effects.defer('report.rebuild', 1, self.handler, note='первый')
+            side_effects.defer('report.rebuild', 2, self.handler, note='другая цель')
+            side_effects.defer('report.rebuild', 1, self.handler, note='последний')
+            self.assertEqual(self.calls, [])
+
+        self.assertEqual(self.calls, [(1, {'note': 'последний'}), (2, {'note': 'другая цель'})])
+
+    def test_rolled_back_work_is_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    side_effects.defer('report.rebuild', 1, self.handler)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            side_effects.defer('report.rebuild', 2, self.handler)
+
+        self.assertEqual([target for target, _ in self.calls], [2])
+
+    def test_handler_errors_do_not_stop_other_work(self):
+        def failing(target):
+            raise ValueError('сбой')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            side_effects.defer('report.fail', 1, failing)
+            side_effects.defer('report.rebuild', 1, self.handler)
+
+        self.assertEqual(len(self.calls), 1)
+
+
+class SideEffectsCommitTests(TransactionTestCase):
+    """Выполнение буфера при реальном коммите (вне тестовой транзакции)"""
+
+    def test_autocommit_runs_immediately(self):
+        calls = []
+        side_effects.defer('report.rebuild', 1, lambda target: calls.append(target))
+        self.assertEqual(calls, [1])
+
+    def test_work_enqueued_by_handlers_runs_once_per_chain(self):
+        calls = []
+
+        def rebuild(target):
+            calls.append(('rebuild', target))
+            # Обработчик вызывает сохранения, которые снова ставят ту же работу
+            side_effects.defer('report.rebuild', target, rebuild)
+            side_effects.defer('report.notify', target, notify)
+
+        def notify(target):
+            calls.append(('notify', target))
+
+        with self.assertLogs('base.side_effects', 'DEBUG') as logs:
+            with side_effects.coalesce():
+                for _ in range(3):
+                    side_effects.defer('report.rebuild', 1, rebuild)
+
+        self.assertEqual(calls, [('rebuild', 1), ('notify', 1)])
+        self.assertIn('поставлено 3, к выполнению 1', logs.output[0])
+
+
+
+class ArchiveLogRetentionTests(TestCase):
+    """Компактные снимки и выгрузка устаревших логов архивирования"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from patients.models import Patient
+
+        cls.user = get_user_model().objects.create_user(username='archivist', password='password')
+        cls.patients = [
+            Patient.objects.create(
+                last_name=f'Архивный{i}', first_name='Пациент',
+                birth_date=datetime.date(1970, 1, 1), gender='male'
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.export_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(ARCHIVE_LOG_EXPORT_DIR=self.export_dir, ARCHIVE_LOG_RETENTION_DAYS=30)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.export_dir, ignore_errors=True)
+
+    def test_snapshot_contains_changed_fields_only(self):
+        patient = self.patients[0]
+        ArchiveService.archive_record(patient, self.user, 'Дубликат', cascade=False)
+
+        log = ArchiveLog.objects.get(object_id=patient.pk, action='archive')
+        self.assertEqual(set(log.new_data), {'is_archived', 'archived_at', 'archived_by_id', 'archive_reason'})
+        self.assertEqual(log.new_data['archived_by_id'], self.user.pk)
+        self.assertEqual(log.previous_data['is_archived'], False)
+
+    def test_rollover_moves_stale_logs_to_monthly_files(self):
+        for patient in self.patients:
+            ArchiveService.archive_record(patient, self.user, 'Дубликат', cascade=False)
+        content_type = ContentType.objects.get_for_model(self.patients[0])
+        ArchiveConfiguration.objects.filter(content_type=content_type).update(log_retention_days=10)
+
+        old = timezone.make_aware(datetime.datetime(2025, 1, 15, 12, 0))
+        stale_ids = [self.patients[0].pk, self.patients[1].pk]
+        ArchiveLog.objects.filter(object_id__in=stale_ids).update(timestamp=old)
+        now = old + datetime.timedelta(days=20)
+        ArchiveLog.objects.filter(object_id=self.patients[2].pk).update(timestamp=now - datetime.timedelta(days=5))
+
+        self.assertEqual(ArchiveLogRetentionService.rollover(now=now, dry_run=True), {'patients.patient': 2})
+        self.assertEqual(ArchiveLogRetentionService.rollover(now=now, batch_size=1), {'patients.patient': 2})
+
+        self.assertEqual(list(ArchiveLog.objects.values_list('object_id', flat=True)), [self.patients[2].pk])
+        exported = list(ArchiveLogRetentionService.read_exported('2025-01'))
+        self.assertEqual(sorted(row['object_id'] for row in exported), sorted(stale_ids))
+        self.assertEqual(exported[0]['model'], 'patients.patient')
+        self.assertEqual(exported[0]['new_data']['archive_reason'], 'Дубликат')
+
+
+class ArchiveStatisticsTests(TestCase):
+    """Дневные счетчики архивирования и эндпоинт статистики"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from patients.models import Patient
+
+        cls.user = get_user_model().objects.create_user(username='archivist', password='password')
+        for i in range(3):
+            patient = Patient.objects.create(
+                last_name=f'Статистика{i}', first_name='Пациент',
+                birth_date=datetime.date(1970, 1, 1), gender='female'
+            )
+            ArchiveService.archive_record(patient, cls.user, 'Дубликат', cascade=False)
+        ArchiveService.restore_record(patient, cls.user, cascade=False)
+
+    def test_counters_follow_log_writes_and_rebuild(self):
+        expected = {
+            'total_logs': 4, 'archive_count': 3, 'restore_count': 1,
+            'model_statistics': [{
+                'content_type__app_label': 'patients', 'content_type__model': 'patient',
+                'archive_count': 3, 'restore_count': 1,
+            }],
+            'top_users': [{
+                'user__username': 'archivist', 'user__first_name': '', 'user__last_name': '', 'total_actions': 4,
+            }],
+        }
+        self.assertEqual(ArchiveLogDailyStat.objects.count(), 2)
+        self.assertEqual(ArchiveStatisticsService.get_statistics(), expected)
+
+        ArchiveLogDailyStat.objects.all().delete()
+        self.assertEqual(ArchiveStatisticsService.rebuild(include_exported=False), 4)
+        self.assertEqual(ArchiveStatisticsService.get_statistics(), expected)
+
+    def test_user_deletion_keeps_counters(self):
+        content_type_id = ArchiveLogDailyStat.objects.values_list('content_type_id', flat=True).first()
+        ArchiveStatisticsService.record(content_type_id, 'archive', None)
+
+        # Счетчики пользователя складываются со строкой без пользователя
+        self.user.delete()
+        self.assertEqual(
+            sorted(ArchiveLogDailyStat.objects.values_list('action', 'user_id', 'count')),
+            [('archive', None, 4), ('restore', None, 1)]
+        )
+        statistics = ArchiveStatisticsService.get_statistics()
+        self.assertEqual((statistics['total_logs'], statistics['archive_count']), (5, 4))
+        self.assertEqual(statistics['top_users'], [])
+
+        ArchiveStatisticsService.record(content_type_id, 'archive', None)
+        self.assertEqual(ArchiveLogDailyStat.objects.get(action='archive').count, 5)
+
+    def test_statistics_endpoint_reads_rollup(self):
+        with self.assertNumQueries(3):
+            ArchiveStatisticsService.get_statistics()
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('api-archive-statistics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['archive_count'], 3)
+
+        tomorrow = (timezone.localdate() + datetime.timedelta(days=1)).isoformat()
+        response = self.client.get(reverse('api-archive-statistics'), {'since': tomorrow})
+        self.assertEqual(response.json()['total_logs'], 0)
+
+        for since in ('2026-02-30', 'вчера'):
+            response = self.client.get(reverse('api-archive-statistics'), {'since': since})
+            self.assertEqual(response.status_code, 400)
+
+
+class AutoArchiveTests(TestCase):
+    """Пакетное автоархивирование по archive_after_days"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from appointments.models import AppointmentEvent
+        from patients.models import Patient
+
+        patient = Patient.objects.create(
+            last_name='Автоархив', first_name='Пациент',
+            birth_date=datetime.date(1970, 1, 1), gender='male'
+        )
+        now = timezone.now()
+        cls.old_events = []
+        for days in (100, 90, 80, 70, 60):
+            end = now - datetime.timedelta(days=days)
+            cls.old_events.append(AppointmentEvent.objects.create(
+                patient=patient, start=end - datetime.timedelta(minutes=30), end=end
+            ))
+        cls.fresh_event = AppointmentEvent.objects.create(patient=patient, start=now, end=now)
+        cls.content_type = ContentType.objects.get_for_model(AppointmentEvent)
+        ArchiveConfiguration.objects.update_or_create(
+            content_type=cls.content_type, defaults={'archive_after_days': 30}
+        )
+
+    def test_chunks_resume_from_checkpoint(self):
+        from appointments.models import AppointmentEvent
+
+        label = 'appointments.appointmentevent'
+        self.assertEqual(AutoArchiveService.run(labels=[label], dry_run=True), {label: 5})
+        self.assertEqual(AutoArchiveService.run(labels=[label], chunk_size=2, max_chunks=1), {label: 2})
+
+        checkpoint = AutoArchiveCheckpoint.objects.get(content_type=self.content_type)
+        self.assertIsNone(checkpoint.finished_at)
+        self.assertEqual(checkpoint.archived_total, 2)
+
+        self.assertEqual(AutoArchiveService.run(labels=[label], chunk_size=2), {label: 3})
+        checkpoint.refresh_from_db()
+        self.assertIsNotNone(checkpoint.finished_at)
+        self.assertEqual(checkpoint.archived_total, 5)
+
+        self.assertEqual(
+            set(AppointmentEvent.all_objects.filter(is_archived=True).values_list('pk', flat=True)),
+            {event.pk for event in self.old_events}
+        )
+        self.assertEqual(list(AppointmentEvent.objects.active().values_list('pk', flat=True)), [self.fresh_event.pk])
+        self.assertEqual(ArchiveLog.objects.filter(content_type=self.content_type, action='archive').count(), 5)
+        self.assertEqual(ArchiveStatisticsService.get_statistics()['archive_count'], 5)
+
+        # Следующий проход начинается заново, но архивировать уже нечего
+        self.assertEqual(AutoArchiveService.run(labels=[label]), {})
+
+    def test_chunk_is_one_update_and_bulk_log(self):
+        from appointments.models import AppointmentEvent
+
+        pks = [event.pk for event in self.old_events]
+        AutoArchiveService.archive_chunk(AppointmentEvent, pks[:1])
+        # Точка сохранения, SELECT FOR UPDATE, UPDATE, INSERT логов, UPDATE дневного счетчика
+        with self.assertNumQueries(6):
+            self.assertEqual(AutoArchiveService.archive_chunk(AppointmentEvent, pks), 4)
+
+
+    def test_model_hooks_select_closed_records(self):
+        from django.contrib.auth import get_user_model
+
+        from encounters.models import Encounter
+        from examination_management.models import ExaminationLabTest, ExaminationPlan
+        from lab_tests.models import LabTestDefinition
+        from patients.models import Patient
+        from pharmacy.models import Medication
+        from treatment_management.models import TreatmentMedication, TreatmentPlan
+
+        user = get_user_model().objects.create_user(username='archivist', password='password')
+        patient = Patient.objects.first()
+        now = timezone.now()
+        old = now - datetime.timedelta(days=60)
+        closed = Encounter.objects.create(patient=patient, doctor=user, date_start=old, date_end=old)
+        open_encounter = Encounter.objects.create(patient=patient, doctor=user, date_start=old)
+
+        examination_plans = [ExaminationPlan.objects.create(encounter=closed, name=f'Обследование {i}') for i in range(2)]
+        ExaminationLabTest.objects.create(
+            examination_plan=examination_plans[1], lab_test=LabTestDefinition.objects.create(name='Общий анализ крови')
+        )
+        treatment_plans = [TreatmentPlan.objects.create(encounter=closed, name=f'Лечение {i}') for i in range(2)]
+        TreatmentMedication.objects.create(
+            treatment_plan=treatment_plans[1], medication=Medication.objects.create(name='Препарат'),
+            dosage='1 таб.', frequency='1 раз в день'
+        )
+        ExaminationPlan.objects.update(created_at=old)
+        TreatmentPlan.objects.update(created_at=old)
+
+        cutoff = now - datetime.timedelta(days=30)
+        # Планы с активными назначениями и незакрытые случаи не архивируются
+        self.assertEqual(
+            list(AutoArchiveService.get_eligible_queryset(ExaminationPlan, cutoff).values_list('pk', flat=True)),
+            [examination_plans[0].pk]
+        )
+        self.assertEqual(
+            list(AutoArchiveService.get_eligible_queryset(TreatmentPlan, cutoff).values_list('pk', flat=True)),
+            [treatment_plans[0].pk]
+        )
+        eligible_encounters = set(AutoArchiveService.get_eligible_queryset(Encounter, cutoff).values_list('pk', flat=True))
+        self.assertIn(closed.pk, eligible_encounters)
+        self.assertNotIn(open_encounter.pk, eligible_encounters)
+
+
+class ColdStorageTests(TransactionTestCase):
+    """Перенос давно архивированных записей в теневые таблицы и обратно"""
+
+    def setUp(self):
+        from documents.models import ClinicalDocument, DocumentType
+        from encounters.models import Encounter
+        from patients.models import Patient
+
+        self.user = get_user_model().objects.create_user(username='archivist', password='password')
+        self.patient = Patient.objects.create(
+            last_name='Холодный', first_name='Пациент',
+            birth_date=datetime.date(1970, 1, 1), gender='male'
+        )
+        document_type = DocumentType.objects.create(name='Эпикриз', schema={})
+        start = timezone.now() - datetime.timedelta(days=400)
+        self.encounters = [
+            Encounter.objects.create(patient=self.patient, date_start=start + datetime.timedelta(days=i))
+            for i in range(2)
+        ]
+        self.documents = [
+            ClinicalDocument.objects.create(document_type=document_type, encounter=encounter, author=self.user)
+            for encounter in self.encounters
+        ]
+        old = timezone.now() - datetime.timedelta(days=100)
+        # Второй документ не архивирован и удерживает свой случай в горячей таблице
+        for obj in [self.encounters[0], self.encounters[1], self.documents[0]]:
+            type(obj).all_objects.filter(pk=obj.pk).update(is_archived=True, archived_at=old)
+        for model in (ClinicalDocument, Encounter):
+            ArchiveConfiguration.objects.update_or_create(
+                content_type=ContentType.objects.get_for_model(model), defaults={'cold_storage_after_days': 30}
+            )
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            for table in ColdStorageService.get_tables(refresh=True):
+                cursor.execute(f'DROP TABLE {connection.ops.quote_name(table)}')
+        ColdStorageService.get_tables(refresh=True)
+
+    def test_move_to_cold_and_back_on_restore(self):
+        from documents.models import ClinicalDocument
+        from encounters.models import Encounter
+
+        expected = {'documents.clinicaldocument': 1, 'encounters.encounter': 1}
+        self.assertEqual(ColdStorageService.move_to_cold(dry_run=True), {'documents.clinicaldocument': 1})
+        self.assertEqual(ColdStorageService.move_to_cold(), expected)
+
+        hot = Encounter.objects.filter(patient=self.patient)
+        self.assertEqual(list(hot.values_list('pk', flat=True)), [self.encounters[1].pk])
+        combined = list(hot.including_cold())
+        self.assertEqual([encounter.pk for encounter in combined], [self.encounters[1].pk, self.encounters[0].pk])
+        self.assertIsInstance(combined[1], Encounter)
+        self.assertTrue(combined[1].is_archived)
+
+        document = ColdStorageService.get_object(ClinicalDocument, self.documents[0].pk)
+        self.assertIsNotNone(document)
+        ArchiveService.restore_record(document, self.user, cascade=False)
+
+        # Вместе с документом возвращается случай, на который он ссылается
+        self.assertTrue(ClinicalDocument.objects.filter(pk=document.pk, is_archived=False).exists())
+        self.assertEqual(list(hot.order_by('pk').values_list('pk', flat=True)), [e.pk for e in self.encounters])
+        self.assertEqual(hot.including_cold().count(), 2)
+
+
+class ActiveRecordsTests(TestCase):
+    """Менеджеры активных записей и частичные индексы active_indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from patients.models import Patient
+
+        cls.active = Patient.objects.create(
+            last_name='Активный', first_name='Пациент', birth_date=datetime.date(1970, 1, 1), gender='male'
+        )
+        cls.archived = Patient.objects.create(
+            last_name='Архивный', first_name='Пациент', birth_date=datetime.date(1970, 1, 1), gender='male',
+            is_archived=True
+        )
+
+    def test_partial_indexes_are_generated_from_declaration(self):
+        from patients.models import Patient
+
+        index = next(index for index in Patient._meta.indexes if index.condition is not None)
+        self.assertEqual(index.fields, ['last_name', 'first_name'])
+        self.assertEqual(index.condition.children, [('is_archived', False)])
+        self.assertLessEqual(len(index.name), 30)
+
+    def test_list_and_search_follow_configuration(self):
+        from patients.models import Patient
+
+        self.assertEqual(list(Patient.active_objects.all()), [self.active])
+        self.assertEqual(Patient.objects.for_list().count(), 2)
+        self.assertEqual(list(Patient.objects.for_search()), [self.active])
+
+        ArchiveConfiguration.objects.filter(
+            content_type=ContentType.objects.get_for_model(Patient)
+        ).update(show_archived_in_list=False)
+        self.assertEqual(list(Patient.objects.for_list()), [self.active])
+
+
+class DatabaseProfileTests(TestCase):
+    """Профиль БД из переменных окружения"""
+
+    def test_sqlite_profile_applies_pragmas_on_connect(self):
+        database = get_database_settings('/srv', env={'SQLITE_MMAP_SIZE': '0'})
+        self.assertEqual(database['ENGINE'], 'django.db.backends.sqlite3')
+        self.assertIn('PRAGMA journal_mode=WAL;', database['OPTIONS']['init_command'])
+        self.assertIn('PRAGMA mmap_size=0;', database['OPTIONS']['init_command'])
+        # Текущее соединение открыто с PRAGMA профиля
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    def test_postgresql_profile_uses_persistent_or_pooled_connections(self):
+        database = get_database_settings('/srv', env={'DB_ENGINE': 'postgresql', 'DB_NAME': 'clinic'})
+        self.assertEqual(database['NAME'], 'clinic')
+        self.assertEqual(database['CONN_MAX_AGE'], 600)
+        self.assertTrue(database['CONN_HEALTH_CHECKS'])
+
+        database = get_database_settings('/srv', env={'DB_ENGINE': 'postgresql', 'DB_POOL': '2:10'})
+        self.assertEqual(database['OPTIONS']['pool'], {'min_size': 2, 'max_size': 10})
+        self.assertEqual(database['CONN_MAX_AGE'], 0)
+
+
+class QueryBudgetTests(TestCase):
+    """Бюджет SQL-запросов и поиск N+1"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.settings_override = override_settings(METRICS_DB_PATH=self.path, METRICS_FLUSH_INTERVAL=0)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_repeated_query_shape_is_reported_with_call_site(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21"),
+            'SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?'
+        )
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            with assert_query_budget(queries=10, n_plus_one_threshold=3):
+                for pk in range(3):
+                    list(ArchiveLog.objects.filter(pk=pk))
+        self.assertIn('N+1: 3x base/tests.py:', str(raised.exception))
+
+        with assert_query_budget(queries=1) as recorder:
+            list(ArchiveLog.objects.all())
+        self.assertEqual(recorder.count, 1)
+
+    @override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGETS={'/auth/': {'total_ms': 0}})
+    def test_middleware_reports_timing_and_budget(self):
+        url = reverse('authentication:login')
+        with self.assertLogs('base.query_budget', 'WARNING') as logs:
+            response = self.client.get(url)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=')
+        self.assertIn('view=authentication:login', logs.output[0])
+
+        output = StringIO()
+        call_command('query_budget_report', stdout=output)
+        self.assertIn('authentication:login', output.getvalue())
+
+        with override_settings(QUERY_BUDGET_RAISE=True):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(url)
+
+
+class LoadDataTests(TestCase):
+
+    def test_generate_load_data_and_run_benchmarks(self):
+        call_command('generate_load_data', scale=0.01, seed=7, now='2026-01-15', stdout=StringIO())
+        from encounters.models import Encounter
+        from patients.models import Patient
+        self.assertEqual(Patient.objects.count(), 10)
+        self.assertTrue(Encounter.objects.exists())
+        self.assertFalse(Encounter.objects.filter(diagnosis__isnull=True).exists())
+
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir)
+        report_path = os.path.join(output_dir, 'bench.json')
+        call_command(
+            'run_benchmarks', only=['patient_search', 'slot_generation', 'treatment_recommendations'],
+            repeat=1, warmup=0, output=report_path, stdout=StringIO()
+        )
+        with open(report_path, encoding='utf-8') as report_file:
+            report = json.load(report_file)
+        self.assertEqual(set(report['results']), {'patient_search', 'slot_generation', 'treatment_recommendations'})
+        self.assertIn('median_ms', report['results']['treatment_recommendations'])
+
+        # Диагнозы случаев обращения находят схемы лечения
+        from pharmacy.services import PatientRecommendationService
+        encounter = Encounter.objects.select_related('diagnosis', 'patient').order_by('pk').first()
+        self.assertTrue(PatientRecommendationService.get_patient_recommendations(encounter.patient, encounter.diagnosis))
+        self.assertIn('median_ms', report['results']['patient_search'])
+        self.assertEqual(report['data_volume']['patients.Patient'], 10)
+
+
+class ApiLayerTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('api_user', password='x')
+        self.client.force_login(self.user)
+        content_type = ContentType.objects.get_for_model(ArchiveLog)
+        for object_id in range(5):
+            ArchiveLog.objects.create(content_type=content_type, object_id=object_id, action='archive', user=self.user)
+        # Одинаковое время: порядок страниц держится на id
+        ArchiveLog.objects.update(timestamp=timezone.now())
+
+    def test_archive_logs_keyset_pages_and_sparse_fields(self):
+        url = reverse('archive-logs-list')
+        seen = []
+        page = self.client.get(url, {'page_size': 2, 'fields': 'id,action_display,user'}).json()
+        self.assertNotIn('count', page)
+        while True:
+            seen.extend(item['id'] for item in page['results'])
+            self.assertEqual(set(page['results'][0]), {'id', 'action_display', 'user'})
+            self.assertEqual(page['results'][0]['user'], self.user.pk)
+            if not page['next']:
+                break
+            page = self.client.get(page['next']).json()
+        self.assertEqual(seen, sorted(ArchiveLog.objects.values_list('id', flat=True), reverse=True))
+
+        expanded = self.client.get(url, {'page_size': 1, 'expand': 'user'}).json()['results'][0]
+        self.assertEqual(expanded['user']['username'], 'api_user')
+        self.assertEqual(self.client.get(url, {'cursor': 'broken'}).status_code, 404)
+
+    def test_etag_and_gzip(self):
+        url = reverse('archive-logs-list')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_calendar_window_returns_plain_list(self):
+        from appointments.models import AppointmentEvent
+        from patients.models import Patient
+        patient = Patient.objects.create(last_name='Иванов', first_name='Иван', birth_date=datetime.date(1980, 1, 1))
+        start = timezone.now().replace(microsecond=0)
+        AppointmentEvent.objects.create(patient=patient, start=start, end=start + datetime.timedelta(minutes=30))
+        AppointmentEvent.objects.create(
+            patient=patient, start=start + datetime.timedelta(days=3), end=start + datetime.timedelta(days=3, minutes=30)
+        )
+
+        url = reverse('appointments:appointmentevent-list')
+        window = self.client.get(url, {
+            'start': (start - datetime.timedelta(hours=1)).isoformat(),
+            'end': (start + datetime.timedelta(days=1)).isoformat(),
+        }).json()
+        self.assertEqual([event['title'] for event in window], ['Иванов И.'])
+        self.assertEqual(window[0]['patient'], patient.pk)
+
+        paged = self.client.get(url, {'page_size': 1, 'expand': 'patient'}).json()
+        self.assertEqual(paged['results'][0]['patient']['full_name'], 'Иванов Иван')
+        self.assertEqual(len(self.client.get(paged['next']).json()['results']), 1)
+
+        response = self.client.get(url, {'start': '2026-02-30T00:00:00', 'end': '2026-03-02T00:00:00'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ReferenceDataSnapshotTests(TestCase):
+    """Версионированный снимок справочников со строгим ETag"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.client.force_login(get_user_model().objects.create_user('reference_user', password='x'))
+        self.url = reverse('reference-data-list')
+
+    def test_etag_and_not_modified(self):
+        from pharmacy.models import MedicationGroup
+
+        MedicationGroup.objects.create(name='Антибиотики')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(response['ETag'], f'"{body["version"]}"')
+        self.assertIn('must-revalidate', response['Cache-Control'])
+        self.assertEqual([group['name'] for group in body['data']['medication_groups']], ['Антибиотики'])
+
+        # Снимок берется из кэша: справочники не перечитываются
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertFalse([query for query in queries.captured_queries if 'pharmacy_' in query['sql']])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_version_changes_after_source_model_save(self):
+        from pharmacy.models import Medication, MedicationGroup, ReleaseForm, TradeName
+
+        group = MedicationGroup.objects.create(name='Антибиотики')
+        etag = self.client.get(self.url)['ETag']
+
+        # Сигнал post_save справочника сбрасывает снимок
+        TradeName.objects.create(
+            name='Флемоксин', medication=Medication.objects.create(name='Амоксициллин'),
+            medication_group=group, release_form=ReleaseForm.objects.create(name='Таблетки'),
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['data']['medication_groups'][0]['medications_count'], 1)
+
+        # Без изменений версия стабильна и после перестройки снимка
+        etag = response['ETag']
+        MedicationGroup.objects.filter(pk=group.pk).update(description=None)
+        ReferenceDataSnapshotService.invalidate()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
@@ -26,6 +26,7 @@ app_name = 'base'
 urlpatterns = [
     # Основные URL-адреса приложений
     path('admin/', admin.site.urls),
+    path('metrics', views.metrics, name='metrics'),  # Метрики в формате Prometheus
     path('select2/', include('django_select2.urls')),  # Добавляем URL-адреса django-select2
     path('auth/', include('authentication.urls')),  # URL-адреса для аутентификации
     path('', include('patients.urls')),  # ← Вот это подключает страницу с Vue
@@ -1,7 +1,9 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib import messages
-from django.http import JsonResponse, Http404
+from django.http import JsonResponse, Http404, HttpResponse
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
@@ -14,7 +16,8 @@ import json
 
 from .models import ArchiveLog, ArchiveConfiguration
 from .forms import ArchiveForm, RestoreForm, BulkArchiveForm, ArchiveFilterForm
-from .services import ArchiveService
+from .services import ArchiveService, ArchiveStatisticsService
+from .cold_storage import ColdStorageService
 
 
 @login_required
@@ -86,9 +89,12 @@ def restore_record(request, app_label, model_name, pk):
     try:
         content_type = ContentType.objects.get(app_label=app_label, model=model_name)
         model_class = content_type.model_class()
-        instance = get_object_or_404(model_class, pk=pk)
+        # Запись может находиться в холодном хранилище
+        instance = ColdStorageService.get_object(model_class, pk)
     except (ContentType.DoesNotExist, AttributeError):
         raise Http404("Модель не найдена")
+    if instance is None:
+        raise Http404("Запись не найдена")
     
     # Проверяем поддержку архивирования
     if not hasattr(instance, 'is_archived'):
@@ -266,7 +272,7 @@ def archive_logs(request):
     Представление для просмотра логов архивирования
     """
     # Получаем логи архивирования
-    logs = ArchiveLog.objects.all()
+    logs = ArchiveLog.objects.select_related('content_type', 'user')
     
     # Фильтры
     action = request.GET.get('action')
@@ -293,6 +299,8 @@ def archive_logs(request):
         'models': ContentType.objects.filter(
             id__in=logs.values_list('content_type', flat=True).distinct()
         ),
+        # Сводка за весь период из дневных счетчиков (включая выгруженные логи)
+        'statistics': ArchiveStatisticsService.get_statistics(),
     }
     
     return render(request, 'base/archive_logs.html', context)
@@ -321,7 +329,10 @@ def archive_ajax(request):
         # Получаем модель и запись
         content_type = ContentType.objects.get(app_label=app_label, model=model_name)
         model_class = content_type.model_class()
-        instance = get_object_or_404(model_class, pk=pk)
+        # Архивированная запись может находиться в холодном хранилище
+        instance = ColdStorageService.get_object(model_class, pk)
+        if instance is None:
+            return JsonResponse({'error': 'Запись не найдена'}, status=404)
         
         if action == 'archive':
             if instance.is_archived:
@@ -402,3 +413,20 @@ def archive_configuration(request):
     }
     
     return render(request, 'base/archive_configuration.html', context)
+
+
+def metrics(request):
+    """
+    Метрики в текстовом формате Prometheus.
+    Доступ по токену METRICS_AUTH_TOKEN (заголовок Authorization: Bearer <токен>)
+    или для персонала с активной сессией.
+    """
+    from .metrics import registry
+    
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', '')
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    has_token = bool(token) and constant_time_compare(authorization, f'Bearer {token}')
+    if not has_token and not (request.user.is_authenticated and request.user.is_staff):
+        raise PermissionDenied("Доступ запрещен")
+    
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
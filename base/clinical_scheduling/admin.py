@@ -3,7 +3,7 @@ from django.utils.translation import gettext_lazy as _
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from .models import ScheduledAppointment
+from .models import ScheduledAppointment, AppointmentExecutionLog
 
 @admin.register(ScheduledAppointment)
 class ScheduledAppointmentAdmin(admin.ModelAdmin):
@@ -152,7 +152,7 @@ class ScheduledAppointmentAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related(
             'patient', 'created_department', 'encounter', 
             'executed_by', 'rejected_by'
-        )
+        ).with_assignments()
     
     def has_add_permission(self, request):
         """Разрешаем создание только администраторам"""
@@ -177,3 +177,14 @@ class ScheduledAppointmentAdmin(admin.ModelAdmin):
             return True
         
         return obj.can_be_edited_by_user(request.user)
+
+
+@admin.register(AppointmentExecutionLog)
+class AppointmentExecutionLogAdmin(admin.ModelAdmin):
+    list_display = ['appointment', 'previous_status', 'new_status', 'user', 'created_at']
+    list_filter = ['new_status', 'created_at']
+    search_fields = ['appointment__patient__last_name', 'notes']
+    raw_id_fields = ['appointment', 'user']
+    readonly_fields = ['appointment', 'previous_status', 'new_status', 'user', 'notes', 'created_at']
+    list_select_related = ['appointment__patient', 'user']
+
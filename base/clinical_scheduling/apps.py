@@ -6,3 +6,10 @@ class ClinicalSchedulingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clinical_scheduling'
     verbose_name = _('Клиническое расписание')
+
+    def ready(self):
+        """Регистрируем сигналы при запуске приложения"""
+        try:
+            import clinical_scheduling.signals
+        except ImportError:
+            pass
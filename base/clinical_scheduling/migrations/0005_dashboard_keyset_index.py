@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical_scheduling', '0004_alter_scheduledappointment_options_and_more'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('departments', '0003_patientdepartmentstatus_archive_reason_and_more'),
+        ('encounters', '0013_encounter_event_outbox'),
+        ('patients', '0002_patient_archive_reason_patient_archived_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scheduledappointment',
+            index=models.Index(fields=['-scheduled_date', 'scheduled_time', 'id'], name='sched_appt_keyset_idx'),
+        ),
+    ]
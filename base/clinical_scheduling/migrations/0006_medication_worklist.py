@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical_scheduling', '0005_dashboard_keyset_index'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('departments', '0003_patientdepartmentstatus_archive_reason_and_more'),
+        ('encounters', '0013_encounter_event_outbox'),
+        ('patients', '0002_patient_archive_reason_patient_archived_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentExecutionLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('previous_status', models.CharField(max_length=20, verbose_name='Предыдущий статус')),
+                ('new_status', models.CharField(max_length=20, verbose_name='Новый статус')),
+                ('notes', models.TextField(blank=True, verbose_name='Примечания')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+            ],
+            options={
+                'verbose_name': 'Запись журнала выполнения',
+                'verbose_name_plural': 'Журнал выполнения назначений',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='scheduledappointment',
+            index=models.Index(fields=['created_department', 'scheduled_date', 'scheduled_time', 'execution_status'], name='sched_appt_worklist_idx'),
+        ),
+        migrations.AddField(
+            model_name='appointmentexecutionlog',
+            name='appointment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='execution_logs', to='clinical_scheduling.scheduledappointment', verbose_name='Запланированное событие'),
+        ),
+        migrations.AddField(
+            model_name='appointmentexecutionlog',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AddIndex(
+            model_name='appointmentexecutionlog',
+            index=models.Index(fields=['appointment', 'created_at'], name='clinical_sc_appoint_71499e_idx'),
+        ),
+    ]
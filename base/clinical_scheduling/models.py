@@ -4,6 +4,34 @@ from django.contrib.contenttypes.models import ContentType
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from django.utils import timezone
+from django.db.models.query import ModelIterable
+
+
+class ScheduledAppointmentQuerySet(models.QuerySet):
+    """QuerySet запланированных событий с пакетной загрузкой назначений"""
+    
+    _with_assignments = False
+    
+    def with_assignments(self):
+        """
+        Загружает назначения (GenericForeignKey assignment) при выборке:
+        один запрос на тип контента вместо запроса на каждую запись
+        """
+        clone = self._chain()
+        clone._with_assignments = True
+        return clone
+    
+    def _clone(self):
+        clone = super()._clone()
+        clone._with_assignments = self._with_assignments
+        return clone
+    
+    def _fetch_all(self):
+        fetched = self._result_cache is not None
+        super()._fetch_all()
+        if not fetched and self._with_assignments and issubclass(self._iterable_class, ModelIterable):
+            self.model.attach_assignments(self._result_cache)
+
 
 class ScheduledAppointment(models.Model):
     """
@@ -105,6 +133,8 @@ class ScheduledAppointment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ScheduledAppointmentQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('Запланированное клиническое событие')
         verbose_name_plural = _('Запланированные клинические события')
@@ -116,6 +146,13 @@ class ScheduledAppointment(models.Model):
             models.Index(fields=['patient', 'scheduled_date']),
             models.Index(fields=['created_department', 'scheduled_date']),
             models.Index(fields=['encounter', 'scheduled_date']),
+            # Порядок списка панели планировщика (keyset-пагинация)
+            models.Index(fields=['-scheduled_date', 'scheduled_time', 'id'], name='sched_appt_keyset_idx'),
+            # Лист выполнения назначений отделения: фильтр и порядок целиком по индексу
+            models.Index(
+                fields=['created_department', 'scheduled_date', 'scheduled_time', 'execution_status'],
+                name='sched_appt_worklist_idx'
+            ),
         ]
         unique_together = ['content_type', 'object_id', 'scheduled_date', 'scheduled_time']
     
@@ -123,6 +160,45 @@ class ScheduledAppointment(models.Model):
         assignment_name = getattr(self.assignment, 'treatment_name', str(self.assignment))
         return f"{assignment_name} - {self.scheduled_date} {self.scheduled_time or ''}"
     
+    # Связанные объекты, загружаемые вместе с назначением по типу модели
+    ASSIGNMENT_SELECT_RELATED = {
+        'treatment_management.treatmentmedication': ('medication', 'route'),
+        'examination_management.examinationlabtest': ('lab_test', 'examination_plan'),
+        'examination_management.examinationinstrumental': ('instrumental_procedure', 'examination_plan'),
+    }
+    
+    @classmethod
+    def attach_assignments(cls, appointments):
+        """
+        Загружает назначения (GenericForeignKey assignment) для списка
+        записей одним запросом на тип контента и кладет их в кэш поля,
+        чтобы обращение к appointment.assignment не выполняло запросов.
+        
+        Returns:
+            Тот же список записей
+        """
+        object_ids = {}
+        for appointment in appointments:
+            object_ids.setdefault(appointment.content_type_id, set()).add(appointment.object_id)
+        
+        field = cls._meta.get_field('assignment')
+        loaded = {}
+        for content_type_id, ids in object_ids.items():
+            model_class = ContentType.objects.get_for_id(content_type_id).model_class()
+            if model_class is None:
+                continue
+            queryset = model_class._base_manager.filter(pk__in=ids)
+            related = cls.ASSIGNMENT_SELECT_RELATED.get(model_class._meta.label_lower)
+            if related:
+                queryset = queryset.select_related(*related)
+            loaded.update({(content_type_id, obj.pk): obj for obj in queryset})
+        
+        for appointment in appointments:
+            field.set_cached_value(
+                appointment, loaded.get((appointment.content_type_id, appointment.object_id))
+            )
+        return appointments
+    
     @property
     def is_overdue(self):
         """Проверяет, просрочено ли назначение"""
@@ -204,7 +280,9 @@ class ScheduledAppointment(models.Model):
         assignment = self.assignment
         
         # Если GenericForeignKey не работает, получаем объект напрямую
-        if assignment is None and self.content_type and self.object_id:
+        # (кроме случая, когда назначения уже загружены with_assignments())
+        if (assignment is None and self.content_type_id and self.object_id
+                and not self._meta.get_field('assignment').is_cached(self)):
             try:
                 model_class = self.content_type.model_class()
                 assignment = model_class.objects.get(id=self.object_id)
@@ -259,4 +337,41 @@ class ScheduledAppointment(models.Model):
                 'name': str(assignment), 
                 'patient': self.patient,
                 'department': self.created_department
-            }
\ No newline at end of file
+            }
+
+
+class AppointmentExecutionLog(models.Model):
+    """
+    Журнал выполнения запланированных событий (в т.ч. массовых отметок
+    из листа выполнения назначений)
+    """
+    
+    appointment = models.ForeignKey(
+        ScheduledAppointment,
+        on_delete=models.CASCADE,
+        verbose_name=_('Запланированное событие'),
+        related_name='execution_logs'
+    )
+    previous_status = models.CharField(_('Предыдущий статус'), max_length=20)
+    new_status = models.CharField(_('Новый статус'), max_length=20)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_('Пользователь')
+    )
+    notes = models.TextField(_('Примечания'), blank=True)
+    created_at = models.DateTimeField(_('Создано'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('Запись журнала выполнения')
+        verbose_name_plural = _('Журнал выполнения назначений')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['appointment', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.appointment_id}: {self.previous_status} -> {self.new_status}"
+
@@ -1,11 +1,19 @@
+import base64
+import json
 from django.utils import timezone
-from datetime import timedelta, time
+from datetime import timedelta, time, date
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from .models import ScheduledAppointment
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, F
+from .models import ScheduledAppointment, AppointmentExecutionLog
 from departments.models import PatientDepartmentStatus, Department
+from base.metrics import instrumented
 
 class ClinicalSchedulingService:
     @staticmethod
+    @instrumented('clinical_scheduling')
     def create_schedule_for_assignment(assignment, user, start_date=None, first_time=None, times_per_day=None, duration_days=None):
         """
         Создает расписание для назначения
@@ -405,6 +413,104 @@ class ClinicalSchedulingService:
         
         return queryset.order_by('-scheduled_date', 'scheduled_time')
     
+    @staticmethod
+    def sync_assignment_status(assignment, status):
+        """
+        Переносит статус назначения (или плана) на его запланированные
+        события одним UPDATE вместо сохранения каждой записи.
+        
+        QuerySet.update() не вызывает post_save, поэтому после коммита
+        отправляется один сигнал appointments_status_synced с затронутыми
+        отделениями (на него подписан сброс кэша статистики панели).
+        
+        Args:
+            assignment: Назначение или план (TreatmentMedication, ExaminationLabTest, ...)
+            status: Новый статус назначения (cancelled, paused, active, completed)
+        
+        Returns:
+            int: количество обновленных событий
+        """
+        now = timezone.now()
+        appointments = ScheduledAppointment.objects.filter(
+            content_type=ContentType.objects.get_for_model(assignment),
+            object_id=assignment.pk
+        )
+        
+        if status == 'cancelled':
+            # Отменяем все будущие события
+            appointments = appointments.filter(scheduled_date__gte=now.date())
+            values = {'execution_status': 'canceled'}
+        elif status == 'paused':
+            # Пропускаем будущие события на время приостановки
+            appointments = appointments.filter(scheduled_date__gte=now.date())
+            values = {'execution_status': 'skipped'}
+        elif status == 'active':
+            # Возобновляем приостановленные события
+            appointments = appointments.filter(execution_status='skipped')
+            values = {'execution_status': 'scheduled'}
+        elif status == 'completed':
+            # Помечаем ожидающие события как выполненные
+            appointments = appointments.filter(execution_status='scheduled')
+            values = {'execution_status': 'completed', 'executed_at': now}
+        else:
+            return 0
+        
+        return ClinicalSchedulingService._bulk_update_appointments(assignment, appointments, values)
+    
+    @staticmethod
+    def set_assignment_execution_status(assignment, execution_status, user=None, notes=''):
+        """
+        Массовый аналог ScheduledAppointment.mark_as_*: выставляет статус
+        выполнения всем событиям назначения одним UPDATE
+        
+        Args:
+            assignment: Назначение (ExaminationLabTest, ExaminationInstrumental, ...)
+            execution_status: completed, rejected, skipped, partial или иной статус
+            user: Пользователь, выполняющий действие
+            notes: Примечания (причина)
+        
+        Returns:
+            int: количество обновленных событий
+        """
+        now = timezone.now()
+        values = {'execution_status': execution_status}
+        if execution_status == 'completed':
+            values.update(executed_at=now, executed_by=user, execution_notes=notes)
+        elif execution_status == 'rejected':
+            values.update(rejection_reason=notes, rejection_date=now, rejected_by=user)
+        elif execution_status == 'skipped':
+            values.update(executed_by=user, execution_notes=notes)
+        elif execution_status == 'partial':
+            values.update(executed_by=user, execution_notes=notes, partial_reason=notes, partial_amount='')
+        
+        appointments = ScheduledAppointment.objects.filter(
+            content_type=ContentType.objects.get_for_model(assignment),
+            object_id=assignment.pk
+        )
+        return ClinicalSchedulingService._bulk_update_appointments(assignment, appointments, values)
+    
+    @staticmethod
+    def _bulk_update_appointments(assignment, appointments, values):
+        """
+        Обновляет события одним UPDATE и после коммита отправляет один
+        сигнал appointments_status_synced с затронутыми отделениями
+        """
+        department_ids = set(appointments.values_list('created_department_id', flat=True).distinct())
+        if not department_ids:
+            return 0
+        
+        updated = appointments.update(updated_at=timezone.now(), **values)
+        
+        from .signals import appointments_status_synced
+        transaction.on_commit(lambda: appointments_status_synced.send(
+            sender=ScheduledAppointment,
+            assignment=assignment,
+            execution_status=values['execution_status'],
+            department_ids=department_ids,
+            count=updated,
+        ))
+        return updated
+    
     @staticmethod
     def get_patient_schedule(patient, start_date=None, end_date=None):
         """Получает расписание пациента за период"""
@@ -418,9 +524,10 @@ class ClinicalSchedulingService:
         if end_date:
             queryset = queryset.filter(scheduled_date__lte=end_date)
         
+        # Назначения загружаются пакетно: один запрос на тип контента
         return queryset.select_related(
-            'executed_by', 'rejected_by', 'created_department'
-        ).order_by('-scheduled_date', 'scheduled_time')
+            'patient', 'executed_by', 'rejected_by', 'created_department'
+        ).order_by('-scheduled_date', 'scheduled_time').with_assignments()
     
     @staticmethod
     def create_schedule_for_recommendation(recommendation, patient, department, start_date, first_time, times_per_day, duration_days, encounter=None):
@@ -470,4 +577,288 @@ class ClinicalSchedulingService:
                 )
                 schedules.append(schedule)
         
-        return schedules
\ No newline at end of file
+        return schedules
+
+
+class ScheduleDashboardService:
+    """
+    Данные главной страницы планировщика: статистика одним запросом с
+    условной агрегацией, кэш статистики по (отделение, дата) и
+    keyset-пагинация списка по (scheduled_date, scheduled_time, id).
+    """
+    
+    CACHE_PREFIX = 'clinical_scheduling:dashboard_stats'
+    PAGE_SIZE = 50
+    SHOW_ALL_PAGE_SIZE = 200
+    
+    @staticmethod
+    def get_queryset(patient_id=None, department_id=None, encounter_id=None):
+        """Отфильтрованные назначения без отмененных"""
+        queryset = ScheduledAppointment.objects.exclude(execution_status='canceled')
+        if patient_id:
+            queryset = queryset.filter(patient_id=patient_id)
+        if department_id:
+            queryset = queryset.filter(created_department_id=department_id)
+        if encounter_id:
+            queryset = queryset.filter(encounter_id=encounter_id)
+        return queryset
+    
+    @staticmethod
+    def compute_statistics(queryset, today=None):
+        """Все счетчики панели одним запросом с условной агрегацией"""
+        today = today or timezone.now().date()
+        return queryset.order_by().aggregate(
+            total_appointments=Count('id'),
+            completed_appointments=Count('id', filter=Q(execution_status='completed')),
+            pending_appointments=Count('id', filter=Q(execution_status='scheduled')),
+            overdue_appointments=Count('id', filter=Q(
+                scheduled_date__lt=today,
+                execution_status__in=['scheduled', 'partial']
+            )),
+        )
+    
+    @classmethod
+    def get_statistics(cls, patient_id=None, department_id=None, encounter_id=None):
+        """
+        Статистика панели с кэшированием.
+        Ключ включает отделение, дату (для счетчика просроченных) и версию
+        отделения; смена статуса назначения увеличивает версию его
+        отделения и общую версию, поэтому устаревшие значения не читаются.
+        """
+        today = timezone.now().date()
+        department_key = department_id or 'all'
+        versions = cache.get_many([cls._version_key('all'), cls._version_key(department_key)])
+        key = ':'.join(str(part) for part in (
+            cls.CACHE_PREFIX, department_key, today.isoformat(),
+            patient_id or '-', encounter_id or '-',
+            versions.get(cls._version_key('all'), 0),
+            versions.get(cls._version_key(department_key), 0),
+        ))
+        statistics = cache.get(key)
+        if statistics is None:
+            statistics = cls.compute_statistics(
+                cls.get_queryset(patient_id, department_id, encounter_id), today
+            )
+            cache.set(key, statistics, getattr(settings, 'CLINICAL_SCHEDULING_STATS_TTL', 60))
+        return statistics
+    
+    @classmethod
+    def invalidate_statistics(cls, department_ids=()):
+        """Сбрасывает кэш статистики для отделений (и общий)"""
+        for department_key in ['all', *set(department_ids)]:
+            key = cls._version_key(department_key)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, None)
+    
+    @classmethod
+    def _version_key(cls, department_key):
+        return f'{cls.CACHE_PREFIX}:version:{department_key}'
+    
+    @staticmethod
+    def encode_cursor(appointment):
+        """Курсор страницы по последней показанной записи"""
+        payload = [
+            appointment.scheduled_date.isoformat(),
+            appointment.scheduled_time.isoformat() if appointment.scheduled_time else None,
+            appointment.pk,
+        ]
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        """Разбирает курсор; для поврежденного курсора возвращает None"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            scheduled_date, scheduled_time, pk = json.loads(base64.urlsafe_b64decode(padded))
+            return (
+                date.fromisoformat(scheduled_date),
+                time.fromisoformat(scheduled_time) if scheduled_time else None,
+                int(pk),
+            )
+        except (ValueError, TypeError):
+            return None
+    
+    @classmethod
+    def get_page(cls, queryset, cursor=None, page_size=None, date_filter=None):
+        """
+        Страница списка в порядке: дата по убыванию, время по возрастанию
+        (без времени - первыми), id по возрастанию. Для фильтра "Сегодня"
+        (date_filter='today') список упорядочен только по времени и id.
+        Следующая страница выбирается условием после курсора, без OFFSET.
+        
+        Returns:
+            tuple: (список назначений, курсор следующей страницы или None)
+        """
+        page_size = page_size or cls.PAGE_SIZE
+        by_time_only = date_filter == 'today'
+        ordering = [F('scheduled_time').asc(nulls_first=True), 'id']
+        if not by_time_only:
+            ordering.insert(0, '-scheduled_date')
+        queryset = queryset.select_related(
+            'patient', 'created_department', 'encounter', 'executed_by', 'rejected_by'
+        ).order_by(*ordering)
+        
+        position = cls.decode_cursor(cursor) if cursor else None
+        if position:
+            scheduled_date, scheduled_time, pk = position
+            if scheduled_time is None:
+                later_time = Q(scheduled_time__isnull=False)
+                same_time = Q(scheduled_time__isnull=True)
+            else:
+                later_time = Q(scheduled_time__gt=scheduled_time)
+                same_time = Q(scheduled_time=scheduled_time)
+            after_cursor = later_time | same_time & Q(id__gt=pk)
+            if not by_time_only:
+                after_cursor = Q(scheduled_date__lt=scheduled_date) | Q(scheduled_date=scheduled_date) & after_cursor
+            queryset = queryset.filter(after_cursor)
+        
+        rows = list(queryset.with_assignments()[:page_size + 1])
+        next_cursor = cls.encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+        return rows[:page_size], next_cursor
+
+
+class MedicationWorklistService:
+    """
+    Лист выполнения назначений для постовой медсестры: все, что нужно
+    выполнить в отделении в ближайшие N часов (и просроченное), с массовой
+    отметкой выполнения одним UPDATE.
+    """
+    
+    DUE_STATUSES = ('scheduled', 'partial')
+    DEFAULT_HOURS = getattr(settings, 'MEDICATION_WORKLIST_HOURS', 4)
+    BULK_ACTIONS = {
+        'completed': 'Выполнено',
+        'skipped': 'Пропущено',
+    }
+    
+    @staticmethod
+    def get_due_queryset(department_id, hours=None, now=None, include_overdue=True, medications_only=True):
+        """
+        Назначения отделения к выполнению до now + hours.
+        Фильтр по (created_department, scheduled_date, scheduled_time)
+        обслуживается индексом sched_appt_worklist_idx.
+        
+        Args:
+            department_id: ID отделения
+            hours: горизонт планирования, часов
+            now: текущий момент (по умолчанию timezone.localtime())
+            include_overdue: включать невыполненные назначения до now
+            medications_only: только лекарственные назначения
+        """
+        now = now or timezone.localtime()
+        end = now + timedelta(hours=hours or MedicationWorklistService.DEFAULT_HOURS)
+        
+        # Назначения без времени считаются назначениями на весь день
+        before_end = (
+            Q(scheduled_date__lt=end.date())
+            | Q(scheduled_date=end.date(), scheduled_time__lte=end.time())
+            | Q(scheduled_date=end.date(), scheduled_time__isnull=True)
+        )
+        queryset = ScheduledAppointment.objects.filter(
+            before_end,
+            created_department_id=department_id,
+            execution_status__in=MedicationWorklistService.DUE_STATUSES,
+        )
+        if not include_overdue:
+            queryset = queryset.filter(
+                Q(scheduled_date__gt=now.date())
+                | Q(scheduled_date=now.date(), scheduled_time__gte=now.time())
+                | Q(scheduled_date=now.date(), scheduled_time__isnull=True)
+            )
+        if medications_only:
+            from treatment_management.models import TreatmentMedication
+            queryset = queryset.filter(
+                content_type=ContentType.objects.get_for_model(TreatmentMedication)
+            )
+        return queryset.select_related('patient', 'created_department').order_by(
+            'scheduled_date', F('scheduled_time').asc(nulls_first=True), 'patient__last_name', 'id'
+        )
+    
+    @staticmethod
+    def get_worklist(department_id, hours=None, group_by='patient', now=None, include_overdue=True, medications_only=True):
+        """
+        Лист выполнения, сгруппированный по пациенту или по времени.
+        Назначения (assignment) загружаются пакетно по типу контента.
+        
+        Returns:
+            list: [{'key', 'title', 'items': [ScheduledAppointment, ...]}, ...]
+        """
+        appointments = MedicationWorklistService.get_due_queryset(
+            department_id, hours, now, include_overdue, medications_only
+        ).with_assignments()
+        
+        groups = {}
+        for appointment in appointments:
+            if group_by == 'time':
+                key = (appointment.scheduled_date, appointment.scheduled_time)
+                title = f"{appointment.scheduled_date:%d.%m.%Y} {appointment.scheduled_time:%H:%M}" \
+                    if appointment.scheduled_time else f"{appointment.scheduled_date:%d.%m.%Y} (в течение дня)"
+            else:
+                key = appointment.patient_id
+                title = appointment.patient.full_name
+            group = groups.setdefault(key, {'key': key, 'title': title, 'items': []})
+            group['items'].append(appointment)
+        
+        result = list(groups.values())
+        if group_by != 'time':
+            result.sort(key=lambda group: group['title'])
+        return result
+    
+    @staticmethod
+    def bulk_mark(appointment_ids, action, user, notes='', department_id=None):
+        """
+        Массовая отметка назначений одним UPDATE с пакетной записью журнала.
+        Отмечаются только назначения в статусах к выполнению (и, если
+        указано, только своего отделения); остальные пропускаются.
+        
+        Args:
+            appointment_ids: ID запланированных событий
+            action: 'completed' или 'skipped'
+            user: пользователь, выполняющий отметку
+            notes: примечание к выполнению
+            department_id: ограничение по отделению
+        
+        Returns:
+            int: количество отмеченных назначений
+        """
+        if action not in MedicationWorklistService.BULK_ACTIONS:
+            raise ValueError(f"Недопустимое действие: {action}")
+        
+        with transaction.atomic():
+            queryset = ScheduledAppointment.objects.filter(
+                id__in=appointment_ids,
+                execution_status__in=MedicationWorklistService.DUE_STATUSES,
+            )
+            if department_id:
+                queryset = queryset.filter(created_department_id=department_id)
+            
+            rows = list(queryset.select_for_update().values_list('id', 'execution_status', 'created_department_id'))
+            if not rows:
+                return 0
+            
+            updated = ScheduledAppointment.objects.filter(id__in=[row[0] for row in rows]).update(
+                execution_status=action,
+                executed_by=user,
+                executed_at=timezone.now(),
+                execution_notes=notes,
+                updated_at=timezone.now(),
+            )
+            AppointmentExecutionLog.objects.bulk_create([
+                AppointmentExecutionLog(
+                    appointment_id=appointment_id,
+                    previous_status=previous_status,
+                    new_status=action,
+                    user=user,
+                    notes=notes,
+                )
+                for appointment_id, previous_status, _ in rows
+            ])
+            
+            # QuerySet.update() не вызывает сигналы - сбрасываем кэш статистики явно
+            department_ids = {row[2] for row in rows}
+            transaction.on_commit(lambda: ScheduleDashboardService.invalidate_statistics(department_ids))
+        
+        return updated
+
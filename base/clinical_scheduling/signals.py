@@ -0,0 +1,34 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver, Signal
+
+from base.side_effects import defer
+from .models import ScheduledAppointment
+from .services import ScheduleDashboardService
+
+
+# Массовая смена статуса событий вслед за статусом назначения
+# (ClinicalSchedulingService.sync_assignment_status), отправляется после коммита
+appointments_status_synced = Signal()
+
+
+@receiver(post_save, sender=ScheduledAppointment)
+@receiver(post_delete, sender=ScheduledAppointment)
+def invalidate_dashboard_statistics(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш статистики панели планировщика для отделения назначения
+    (один раз на отделение за транзакцию, после коммита).
+    Массовые изменения через QuerySet.update() сигналов не вызывают и
+    должны вызывать ScheduleDashboardService.invalidate_statistics() сами.
+    """
+    defer('clinical_scheduling.statistics', instance.created_department_id, _invalidate_department_statistics)
+
+
+def _invalidate_department_statistics(department_id):
+    ScheduleDashboardService.invalidate_statistics([department_id])
+
+
+@receiver(appointments_status_synced)
+def invalidate_statistics_after_status_sync(sender, department_ids, **kwargs):
+    """Сбрасывает кэш статистики один раз на массовое обновление"""
+    ScheduleDashboardService.invalidate_statistics(department_ids)
+
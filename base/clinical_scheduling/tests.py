@@ -1,3 +1,344 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from authentication.models import UserProfile
+from departments.models import Department
+from encounters.models import Encounter
+from patients.models import Patient
+from pharmacy.models import Medication
+from treatment_management.models import TreatmentMedication, TreatmentPlan, TreatmentRecommendation
+
+from .models import AppointmentExecutionLog, ScheduledAppointment
+from .services import ClinicalSchedulingService, MedicationWorklistService, ScheduleDashboardService
+
+
+class MedicationWorklistTests(TestCase):
+    """Лист выполнения назначений медсестры"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='nurse', password='password')
+        cls.department = Department.objects.create(name='Терапия', slug='therapy')
+        cls.other_department = Department.objects.create(name='Хирургия', slug='surgery')
+        cls.patient = Patient.objects.create(
+            last_name='Сидоров', first_name='Сидор',
+            birth_date=datetime.date(1970, 1, 1), gender='male'
+        )
+        encounter = Encounter.objects.create(patient=cls.patient, doctor=cls.user, date_start=timezone.now())
+        plan = TreatmentPlan.objects.create(encounter=encounter, name='План лечения')
+        cls.medications = [
+            TreatmentMedication.objects.create(
+                treatment_plan=plan, medication=Medication.objects.create(name=f'Препарат {i}'),
+                dosage='1 таб.', frequency='1 раз в день'
+            )
+            for i in range(3)
+        ]
+        cls.now = timezone.localtime().replace(hour=10, minute=0, second=0, microsecond=0)
+        content_type = ContentType.objects.get_for_model(TreatmentMedication)
+
+        def appointment(medication, time, department=None, days=0, status='scheduled'):
+            return ScheduledAppointment.objects.create(
+                content_type=content_type, object_id=medication.pk, patient=cls.patient,
+                created_department=department or cls.department, encounter=encounter,
+                scheduled_date=cls.now.date() + datetime.timedelta(days=days),
+                scheduled_time=time, execution_status=status,
+            )
+
+        cls.overdue = appointment(cls.medications[0], datetime.time(8, 0))
+        cls.due = appointment(cls.medications[1], datetime.time(12, 0))
+        cls.all_day = appointment(cls.medications[2], None)
+        cls.later = appointment(cls.medications[0], datetime.time(18, 0))
+        cls.tomorrow = appointment(cls.medications[1], datetime.time(9, 0), days=1)
+        cls.done = appointment(cls.medications[2], datetime.time(9, 0), status='completed')
+        cls.foreign = appointment(cls.medications[1], datetime.time(11, 0), department=cls.other_department)
+
+    def setUp(self):
+        # Кэш ContentType прогревается заранее, чтобы бюджет не зависел от порядка тестов
+        ContentType.objects.get_for_model(TreatmentMedication)
+
+    def test_due_items_within_horizon(self):
+        # Назначения с пациентами и отделением + лекарства с путем введения
+        with self.assertNumQueries(2):
+            groups = MedicationWorklistService.get_worklist(self.department.pk, hours=4, now=self.now)
+            names = [appointment.get_assignment_info()['name'] for appointment in groups[0]['items']]
+
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(
+            [appointment.pk for appointment in groups[0]['items']],
+            [self.all_day.pk, self.overdue.pk, self.due.pk]
+        )
+        self.assertEqual(names, ['Препарат 2', 'Препарат 0', 'Препарат 1'])
+
+        upcoming = MedicationWorklistService.get_due_queryset(
+            self.department.pk, hours=4, now=self.now, include_overdue=False
+        )
+        self.assertNotIn(self.overdue, upcoming)
+
+    def test_bulk_mark_skips_ineligible(self):
+        ids = [self.overdue.pk, self.due.pk, self.done.pk, self.foreign.pk]
+        with self.captureOnCommitCallbacks(execute=True):
+            updated = MedicationWorklistService.bulk_mark(
+                ids, 'completed', self.user, notes='Обход', department_id=self.department.pk
+            )
+
+        self.assertEqual(updated, 2)
+        self.due.refresh_from_db()
+        self.assertEqual((self.due.execution_status, self.due.executed_by), ('completed', self.user))
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.execution_status, 'scheduled')
+        self.assertEqual(
+            set(AppointmentExecutionLog.objects.values_list('appointment_id', 'previous_status', 'new_status')),
+            {(self.overdue.pk, 'scheduled', 'completed'), (self.due.pk, 'scheduled', 'completed')}
+        )
+
+    def test_bulk_mark_rejects_unknown_action(self):
+        with self.assertRaises(ValueError):
+            MedicationWorklistService.bulk_mark([self.due.pk], 'canceled', self.user)
+
+    def test_worklist_view_and_bulk_mark(self):
+        UserProfile.objects.create(user=self.user, employee_id='N-001', department=self.department, position='Медсестра')
+        self.client.force_login(self.user)
+        url = reverse('clinical_scheduling:medication_worklist')
+        response = self.client.get(url, {'hours': 72})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Препарат 1')
+
+        response = self.client.post(reverse('clinical_scheduling:worklist_bulk_mark'), {
+            'appointment_ids': [self.due.pk, self.foreign.pk],
+            'action': 'skipped',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.due.refresh_from_db()
+        self.assertEqual(self.due.execution_status, 'skipped')
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.execution_status, 'scheduled')
+
+    def test_bulk_mark_ignores_department_from_request(self):
+        # Отделение из запроса не расширяет права: чужие назначения не отмечаются
+        UserProfile.objects.create(user=self.user, employee_id='N-001', department=self.department, position='Медсестра')
+        self.client.force_login(self.user)
+        self.client.post(reverse('clinical_scheduling:worklist_bulk_mark'), {
+            'department_id': self.other_department.pk,
+            'appointment_ids': [self.foreign.pk],
+            'action': 'completed',
+        })
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.execution_status, 'scheduled')
+
+        response = self.client.get(
+            reverse('clinical_scheduling:medication_worklist'),
+            {'department_id': self.other_department.pk, 'hours': 72}
+        )
+        self.assertEqual(response.context['department_id'], self.department.pk)
+
+    def test_bulk_mark_without_profile_department_is_denied(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('clinical_scheduling:worklist_bulk_mark'), {
+            'department_id': self.department.pk,
+            'appointment_ids': [self.due.pk],
+            'action': 'completed',
+        })
+        self.due.refresh_from_db()
+        self.assertEqual(self.due.execution_status, 'scheduled')
+
+
+class ScheduledAppointmentAssignmentsTests(TestCase):
+    """Пакетная загрузка назначений для списков расписания"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username='doctor', password='password')
+        department = Department.objects.create(name='Терапия', slug='therapy')
+        cls.patient = Patient.objects.create(
+            last_name='Орлова', first_name='Анна',
+            birth_date=datetime.date(1985, 5, 5), gender='female'
+        )
+        encounter = Encounter.objects.create(patient=cls.patient, doctor=user, date_start=timezone.now())
+        plan = TreatmentPlan.objects.create(encounter=encounter, name='План лечения')
+        assignments = [
+            TreatmentMedication.objects.create(
+                treatment_plan=plan, medication=Medication.objects.create(name=f'Препарат {i}'),
+                dosage='1 таб.', frequency='2 раза в день'
+            )
+            for i in range(3)
+        ] + [
+            TreatmentRecommendation.objects.create(treatment_plan=plan, text=f'Рекомендация {i}')
+            for i in range(2)
+        ]
+        for day, assignment in enumerate(assignments):
+            ScheduledAppointment.objects.create(
+                content_type=ContentType.objects.get_for_model(assignment), object_id=assignment.pk,
+                patient=cls.patient, created_department=department, encounter=encounter,
+                scheduled_date=datetime.date(2025, 1, 1) + datetime.timedelta(days=day),
+                scheduled_time=datetime.time(9, 0),
+            )
+
+    def setUp(self):
+        ContentType.objects.get_for_model(TreatmentMedication)
+        ContentType.objects.get_for_model(TreatmentRecommendation)
+
+    def test_with_assignments_loads_one_query_per_type(self):
+        # Записи + лекарства + рекомендации
+        with self.assertNumQueries(3):
+            appointments = list(ScheduledAppointment.objects.select_related('patient', 'created_department').with_assignments())
+            labels = [str(appointment) for appointment in appointments]
+            names = {appointment.get_assignment_info()['name'] for appointment in appointments}
+
+        self.assertEqual(len(labels), 5)
+        self.assertIn('Препарат 0', names)
+        self.assertIn('Рекомендация 1', names)
+
+    def test_with_assignments_survives_chaining_and_slicing(self):
+        queryset = ScheduledAppointment.objects.with_assignments().filter(patient=self.patient).order_by('id')
+        with self.assertNumQueries(2):
+            appointments = list(queryset[:2])
+            [appointment.assignment.medication.name for appointment in appointments]
+
+    def test_patient_schedule(self):
+        with self.assertNumQueries(3):
+            schedule = list(ClinicalSchedulingService.get_patient_schedule(
+                self.patient, start_date='2025-01-02', end_date='2025-01-04'
+            ))
+            [appointment.get_assignment_info() for appointment in schedule]
+        self.assertEqual(len(schedule), 3)
+
+
+class AssignmentStatusSyncTests(TestCase):
+    """Перенос статуса назначения на запланированные события"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username='doctor', password='password')
+        cls.department = Department.objects.create(name='Терапия', slug='therapy')
+        patient = Patient.objects.create(
+            last_name='Кузнецов', first_name='Олег',
+            birth_date=datetime.date(1960, 3, 3), gender='male'
+        )
+        encounter = Encounter.objects.create(patient=patient, doctor=user, date_start=timezone.now())
+        plan = TreatmentPlan.objects.create(encounter=encounter, name='План лечения')
+        cls.medication = TreatmentMedication.objects.create(
+            treatment_plan=plan, medication=Medication.objects.create(name='Препарат'),
+            dosage='1 таб.', frequency='6 раз в день'
+        )
+        # 30 дней по 6 приемов
+        ClinicalSchedulingService.create_schedule_for_assignment(
+            cls.medication, user, start_date=timezone.now().date(),
+            first_time=datetime.time(6, 0), times_per_day=6, duration_days=30
+        )
+        ScheduledAppointment.objects.update(created_department=cls.department)
+
+    def test_pause_and_resume_are_set_based(self):
+        appointments = ScheduledAppointment.objects.filter(object_id=self.medication.pk)
+        self.assertEqual(appointments.count(), 180)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertNumQueries(2):
+                updated = ClinicalSchedulingService.sync_assignment_status(self.medication, 'paused')
+        self.assertEqual(updated, 180)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(appointments.filter(execution_status='skipped').count(), 180)
+
+        self.assertEqual(ClinicalSchedulingService.sync_assignment_status(self.medication, 'active'), 180)
+        self.assertEqual(appointments.filter(execution_status='scheduled').count(), 180)
+
+    def test_status_change_signal_updates_schedule(self):
+        self.medication.status = 'cancelled'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.medication.save()
+        self.assertFalse(
+            ScheduledAppointment.objects.filter(object_id=self.medication.pk).exclude(execution_status='canceled').exists()
+        )
+
+
+class ScheduleDashboardServiceTests(TestCase):
+    """Статистика и keyset-пагинация главной страницы планировщика"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username='head_nurse', password='password')
+        cls.department = Department.objects.create(name='Терапия', slug='therapy')
+        cls.other_department = Department.objects.create(name='Хирургия', slug='surgery')
+        patient = Patient.objects.create(
+            last_name='Петров', first_name='Петр',
+            birth_date=datetime.date(1960, 3, 3), gender='male'
+        )
+        encounter = Encounter.objects.create(patient=patient, doctor=user, date_start=timezone.now())
+        plan = TreatmentPlan.objects.create(encounter=encounter, name='План лечения')
+        content_type = ContentType.objects.get_for_model(TreatmentMedication)
+        cls.today = timezone.now().date()
+
+        def appointment(days, scheduled_time, status='scheduled', department=None):
+            medication = TreatmentMedication.objects.create(
+                treatment_plan=plan, medication=Medication.objects.create(name=f'Препарат {TreatmentMedication.objects.count()}'),
+                dosage='1 таб.', frequency='3 раза в день'
+            )
+            return ScheduledAppointment.objects.create(
+                content_type=content_type, object_id=medication.pk, patient=patient,
+                created_department=department or cls.department, encounter=encounter,
+                scheduled_date=cls.today + datetime.timedelta(days=days),
+                scheduled_time=scheduled_time, execution_status=status,
+            )
+
+        cls.appointments = [
+            appointment(0, datetime.time(9, 0)),
+            appointment(0, datetime.time(9, 0), status='completed'),
+            appointment(0, None),
+            appointment(0, datetime.time(14, 0)),
+            appointment(-1, datetime.time(8, 0)),
+            appointment(-1, None, status='partial'),
+            appointment(-2, datetime.time(20, 0), department=cls.other_department),
+            appointment(1, datetime.time(7, 0), status='canceled'),
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def walk_pages(self, **kwargs):
+        queryset = ScheduleDashboardService.get_queryset(department_id=kwargs.pop('department_id', None))
+        pages, cursor = [], None
+        while True:
+            rows, cursor = ScheduleDashboardService.get_page(queryset, cursor, page_size=2, **kwargs)
+            pages.append([appointment.pk for appointment in rows])
+            if not cursor:
+                return pages
+
+    def test_statistics_in_one_query_with_versioned_cache(self):
+        with self.assertNumQueries(1):
+            statistics = ScheduleDashboardService.get_statistics(department_id=self.department.pk)
+        self.assertEqual(statistics, {
+            'total_appointments': 6,
+            'completed_appointments': 1,
+            'pending_appointments': 4,
+            'overdue_appointments': 2,
+        })
+        # Повторный вызов читается из кэша
+        with self.assertNumQueries(0):
+            ScheduleDashboardService.get_statistics(department_id=self.department.pk)
+
+        # Массовое обновление сбрасывает кэш через версию отделения
+        ScheduledAppointment.objects.filter(pk=self.appointments[0].pk).update(execution_status='completed')
+        ScheduleDashboardService.invalidate_statistics([self.department.pk])
+        statistics = ScheduleDashboardService.get_statistics(department_id=self.department.pk)
+        self.assertEqual((statistics['completed_appointments'], statistics['pending_appointments']), (2, 3))
+        self.assertEqual(ScheduleDashboardService.get_statistics()['total_appointments'], 7)
+
+    def test_keyset_pages_follow_dashboard_order(self):
+        a = self.appointments
+        pages = self.walk_pages()
+        self.assertEqual(pages, [[a[2].pk, a[0].pk], [a[1].pk, a[3].pk], [a[5].pk, a[4].pk], [a[6].pk]])
+
+        # "Сегодня": только время и id, без учета даты
+        pages = self.walk_pages(date_filter='today', department_id=self.department.pk)
+        self.assertEqual(pages, [[a[2].pk, a[5].pk], [a[4].pk, a[0].pk], [a[1].pk, a[3].pk]])
 
-# Create your tests here.
+    def test_broken_cursor_starts_from_first_page(self):
+        queryset = ScheduleDashboardService.get_queryset()
+        first_page, _ = ScheduleDashboardService.get_page(queryset, page_size=2)
+        rows, _ = ScheduleDashboardService.get_page(queryset, 'not-a-cursor', page_size=2)
+        self.assertEqual(rows, first_page)
@@ -5,6 +5,8 @@ app_name = 'clinical_scheduling'
 
 urlpatterns = [
     path('', views.dashboard, name='dashboard'),
+    path('worklist/', views.medication_worklist, name='medication_worklist'),
+    path('worklist/bulk-mark/', views.worklist_bulk_mark, name='worklist_bulk_mark'),
     path('schedule-settings/', views.schedule_settings, name='schedule_settings'),
     path('appointment/<int:appointment_id>/', views.appointment_detail, name='appointment_detail'),
     path('appointment/<int:appointment_id>/complete/', views.mark_as_completed, name='mark_completed'),
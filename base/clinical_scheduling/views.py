@@ -12,7 +12,7 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.utils.http import url_has_allowed_host_and_scheme
 
 from .models import ScheduledAppointment
-from .services import ClinicalSchedulingService
+from .services import ClinicalSchedulingService, ScheduleDashboardService, MedicationWorklistService
 from .forms import ScheduleSettingsForm
 
 
@@ -53,56 +53,31 @@ def dashboard(request):
     department_id = request.GET.get('department_id')
     encounter_id = request.GET.get('encounter_id')
     show_all = request.GET.get('show_all') == 'true'
+    cursor = request.GET.get('cursor')
     
-    # Базовый queryset
-    queryset = ScheduledAppointment.objects.select_related(
-        'patient', 'created_department', 'encounter', 'executed_by', 'rejected_by'
-    ).exclude(
-        execution_status='canceled'  # Исключаем отмененные назначения
-    )
+    # Базовый queryset (без отмененных назначений)
+    queryset = ScheduleDashboardService.get_queryset(patient_id, department_id, encounter_id)
     
-    # Проверяем, есть ли фильтр по дате
-    date_filter = request.GET.get('date_filter')
-    if date_filter == 'today':
-        # Для фильтра "Сегодня" сортируем только по времени
-        queryset = queryset.order_by('scheduled_time')
-    else:
-        # Для остальных случаев сортируем по дате и времени
-        queryset = queryset.order_by('-scheduled_date', 'scheduled_time')
+    # Статистика считается одним запросом и кэшируется по (отделение, дата)
+    statistics = ScheduleDashboardService.get_statistics(patient_id, department_id, encounter_id)
     
-    # Применяем фильтры
-    if patient_id:
-        queryset = queryset.filter(patient_id=patient_id)
+    # Keyset-пагинация вместо загрузки всего списка
+    page_size = ScheduleDashboardService.SHOW_ALL_PAGE_SIZE if show_all else ScheduleDashboardService.PAGE_SIZE
+    # Для фильтра "Сегодня" список сортируется только по времени
+    date_filter = request.GET.get('date_filter')
+    appointments, next_cursor = ScheduleDashboardService.get_page(queryset, cursor, page_size, date_filter)
+    show_all_param = 'true' if show_all else 'false'
     
-    if department_id:
-        queryset = queryset.filter(created_department_id=department_id)
-    
-    if encounter_id:
-        queryset = queryset.filter(encounter_id=encounter_id)
-    
-    # Получаем статистику
-    total_appointments = queryset.count()
-    completed_appointments = queryset.filter(execution_status='completed').count()
-    pending_appointments = queryset.filter(execution_status='scheduled').count()
-    overdue_appointments = queryset.filter(
-        scheduled_date__lt=timezone.now().date(),
-        execution_status__in=['scheduled', 'partial']
-    ).count()
-    
-    # Определяем, сколько записей показывать
-    if show_all:
-        appointments = queryset
-        show_all_param = 'true'
-    else:
-        appointments = queryset[:50]  # Ограничиваем для производительности
-        show_all_param = 'false'
+    # Параметры ссылок пагинации сохраняют текущие фильтры
+    page_params = request.GET.copy()
+    page_params.pop('cursor', None)
+    first_page_query = page_params.urlencode()
+    if next_cursor:
+        page_params['cursor'] = next_cursor
     
     context = {
         'appointments': appointments,
-        'total_appointments': total_appointments,
-        'completed_appointments': completed_appointments,
-        'pending_appointments': pending_appointments,
-        'overdue_appointments': overdue_appointments,
+        **statistics,
         'filters': {
             'patient_id': patient_id,
             'department_id': department_id,
@@ -110,6 +85,9 @@ def dashboard(request):
             'show_all': show_all_param,
         },
         'show_all': show_all,
+        'is_first_page': not cursor,
+        'first_page_query': first_page_query,
+        'next_page_query': page_params.urlencode() if next_cursor else None,
         'return_url': get_safe_return_url(request),
     }
     
@@ -214,6 +192,87 @@ def schedule_settings(request):
     return render(request, 'clinical_scheduling/schedule_settings.html', context)
 
 
+def _worklist_department_id(request):
+    """
+    Отделение листа выполнения. Суперпользователь может выбрать отделение
+    параметром department_id; остальным - только отделение из профиля
+    """
+    if request.user.is_superuser:
+        department_id = request.GET.get('department_id') or request.POST.get('department_id')
+        if department_id:
+            return department_id
+    try:
+        return request.user.userprofile.department_id
+    except (AttributeError, ObjectDoesNotExist):
+        return None
+
+
+@login_required
+def medication_worklist(request):
+    """Лист выполнения назначений постовой медсестры"""
+    department_id = _worklist_department_id(request)
+    try:
+        hours = max(1, min(int(request.GET.get('hours', MedicationWorklistService.DEFAULT_HOURS)), 72))
+    except ValueError:
+        hours = MedicationWorklistService.DEFAULT_HOURS
+    group_by = 'time' if request.GET.get('group_by') == 'time' else 'patient'
+    medications_only = request.GET.get('all_types') != 'true'
+    
+    groups = []
+    if department_id:
+        groups = MedicationWorklistService.get_worklist(
+            department_id, hours=hours, group_by=group_by, medications_only=medications_only
+        )
+    
+    context = {
+        'title': 'Лист выполнения назначений',
+        'groups': groups,
+        'total_items': sum(len(group['items']) for group in groups),
+        'department_id': department_id,
+        'hours': hours,
+        'group_by': group_by,
+        'medications_only': medications_only,
+        'bulk_actions': MedicationWorklistService.BULK_ACTIONS,
+        'today': timezone.localdate(),
+    }
+    return render(request, 'clinical_scheduling/worklist.html', context)
+
+
+@login_required
+def worklist_bulk_mark(request):
+    """Массовая отметка выполнения из листа назначений"""
+    if request.method != 'POST':
+        return redirect('clinical_scheduling:medication_worklist')
+    
+    appointment_ids = [value for value in request.POST.getlist('appointment_ids') if value.isdigit()]
+    action = request.POST.get('action')
+    notes = request.POST.get('notes', '')
+    return_url = get_safe_return_url(request, 'clinical_scheduling:medication_worklist')
+    
+    if not appointment_ids:
+        messages.warning(request, 'Не выбрано ни одного назначения')
+        return redirect(return_url)
+    if action not in MedicationWorklistService.BULK_ACTIONS:
+        messages.error(request, 'Недопустимое действие')
+        return redirect(return_url)
+    
+    # Без прав суперпользователя отмечаются только назначения отделения из профиля
+    department_id = None if request.user.is_superuser else _worklist_department_id(request)
+    if not request.user.is_superuser and not department_id:
+        messages.error(request, 'У вас нет прав для редактирования этих назначений')
+        return redirect(return_url)
+    
+    updated = MedicationWorklistService.bulk_mark(
+        appointment_ids, action, request.user, notes=notes, department_id=department_id
+    )
+    skipped = len(appointment_ids) - updated
+    label = MedicationWorklistService.BULK_ACTIONS[action].lower()
+    messages.success(request, f'Отмечено как "{label}": {updated}')
+    if skipped:
+        messages.warning(request, f'Пропущено (уже выполнены или недоступны): {skipped}')
+    return redirect(return_url)
+
+
 @login_required
 def mark_as_completed(request, appointment_id):
     """Отметить назначение как выполненное"""
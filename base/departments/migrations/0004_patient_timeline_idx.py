@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('departments', '0003_patientdepartmentstatus_archive_reason_and_more'),
+        ('encounters', '0014_active_partial_indexes'),
+        ('patients', '0003_active_partial_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patientdepartmentstatus',
+            index=models.Index(fields=['patient', 'admission_date'], name='deptstatus_patient_adm_idx'),
+        ),
+    ]
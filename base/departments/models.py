@@ -61,6 +61,10 @@ class PatientDepartmentStatus(ArchivableModel, models.Model):
     class Meta:
         verbose_name = "Статус пациента в отделении"
         verbose_name_plural = "Статусы пациентов в отделениях"
+        indexes = [
+            # Хронология пациента (patients.services.PatientTimelineService)
+            models.Index(fields=['patient', 'admission_date'], name='deptstatus_patient_adm_idx'),
+        ]
 
     def __str__(self):
         return f"{self.patient.full_name} - {self.department.name} ({self.get_status_display()})"
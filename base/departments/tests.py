@@ -1,3 +1,89 @@
+import datetime
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from documents.models import ClinicalDocument, DocumentSearchTerm, DocumentType
+from documents.services import DocumentSearchIndexService
+from patients.models import Patient
+from pharmacy.models import Medication
+from treatment_management.models import TreatmentMedication, TreatmentPlan
+
+from .models import Department, PatientDepartmentStatus
+
+
+class PatientDepartmentHistoryViewTests(TestCase):
+    """История пациента в отделении: фильтры и пагинация в БД"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='doctor', password='password')
+        department = Department.objects.create(name='Терапия', slug='therapy')
+        patient = Patient.objects.create(
+            last_name='Иванов', first_name='Иван',
+            birth_date=datetime.date(1980, 1, 1), gender='male'
+        )
+        cls.patient_status = PatientDepartmentStatus.objects.create(patient=patient, department=department)
+        document_type = DocumentType.objects.create(name='Дневник', department=department, schema={})
+
+        cls.day = timezone.make_aware(datetime.datetime(2025, 3, 10, 12, 0))
+        texts = ['Состояние удовлетворительное', 'Жалобы на головную боль', 'Состояние средней тяжести']
+        cls.documents = []
+        # Индекс слов строится обработчиком сигнала после коммита
+        with cls.captureOnCommitCallbacks(execute=True):
+            for offset, text in enumerate(texts):
+                document = ClinicalDocument.objects.create(
+                    document_type=document_type, patient_department_status=cls.patient_status,
+                    author=cls.user, data={'severity_assessment': text}
+                )
+                ClinicalDocument.objects.filter(pk=document.pk).update(
+                    created_at=cls.day + datetime.timedelta(days=offset)
+                )
+                cls.documents.append(document)
+
+        plan = TreatmentPlan.objects.create(patient_department_status=cls.patient_status, name='Основной')
+        for i in range(12):
+            TreatmentMedication.objects.create(
+                treatment_plan=plan, medication=Medication.objects.create(name=f'Препарат {i}'),
+                dosage='1 таб.', frequency='1 раз в день'
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse('departments:patient_history', args=[self.patient_status.pk])
+
+    def test_documents_are_indexed_on_commit(self):
+        document = self.documents[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            document.data = {'severity_assessment': 'Ёмкость легких снижена'}
+            document.save()
+        self.assertEqual(
+            set(DocumentSearchTerm.objects.filter(document=document).values_list('term', flat=True)),
+            {'емкость', 'легких', 'снижена'}
+        )
+
+    def test_period_is_half_open_range_including_end_date(self):
+        response = self.client.get(self.url, {'start_date': '2025-03-11', 'end_date': '2025-03-12'})
+        self.assertEqual(
+            [document.pk for document in response.context['documents_page_obj']],
+            [self.documents[2].pk, self.documents[1].pk]
+        )
+
+    def test_search_uses_word_prefixes(self):
+        response = self.client.get(self.url, {'search_query': 'состоян тяжест'})
+        self.assertEqual(
+            [document.pk for document in response.context['documents_page_obj']],
+            [self.documents[2].pk]
+        )
+        self.assertEqual(DocumentSearchIndexService.rebuild(), 3)
+        response = self.client.get(self.url, {'search_query': 'жалоб'})
+        self.assertEqual(response.context['documents_page_obj'].paginator.count, 1)
 
-# Create your tests here.
+    def test_medications_are_paginated_in_database(self):
+        response = self.client.get(self.url, {'treatment_medications_page': 2})
+        page = response.context['treatment_medications_page_obj']
+        self.assertEqual(page.paginator.count, 12)
+        self.assertEqual(len(page.object_list), 2)
+        self.assertIsInstance(page.object_list[0], TreatmentMedication)
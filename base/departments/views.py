@@ -1,5 +1,8 @@
 import logging
-from django.db.models import Q
+from datetime import datetime, time, timedelta
+
+from django.db.models import Prefetch, Q
+from django.utils import timezone
 from django.views.generic import ListView, DetailView, View, UpdateView
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
@@ -10,6 +13,7 @@ from django.core.paginator import Paginator
 
 from .models import Department, PatientDepartmentStatus
 from documents.models import ClinicalDocument
+from documents.services import DocumentSearchIndexService
 from .forms import DocumentAndAssignmentFilterForm, PatientAcceptanceForm
 # Импорты treatment_assignments удалены - больше не нужны
 from treatment_management.models import TreatmentPlan, TreatmentMedication
@@ -80,35 +84,36 @@ class PatientDepartmentHistoryView(LoginRequiredMixin, DetailView):
     template_name = 'departments/patient_history.html'
     context_object_name = 'patient_status'
 
+    def get_queryset(self):
+        return super().get_queryset().select_related('patient', 'department')
+
     def get_filter_form(self):
         """Создает форму фильтрации для документов и назначений"""
-        return DocumentAndAssignmentFilterForm(self.request.GET, department=self.get_object().department)
+        return DocumentAndAssignmentFilterForm(self.request.GET, department=self.object.department)
+
+    @staticmethod
+    def get_period_filter(start_date, end_date, field='created_at'):
+        """
+        Фильтр по периоду как полуоткрытый диапазон [начало start_date,
+        начало дня после end_date). В отличие от __date сравнивает само
+        поле и использует индексы (владелец, created_at).
+        """
+        conditions = {}
+        if start_date:
+            conditions[f'{field}__gte'] = timezone.make_aware(datetime.combine(start_date, time.min))
+        if end_date:
+            conditions[f'{field}__lt'] = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+        return Q(**conditions)
 
     def get_filtered_documents_and_assignments(self, patient_status, filter_form):
-        # Теперь используем прямые связи для departments
-        documents = patient_status.clinical_documents.all().select_related('document_type', 'author')
-        treatment_plans = patient_status.treatment_plans.all().prefetch_related(
-            'medications__medication'
-        )
-        examination_plans = patient_status.examination_plans.all().prefetch_related(
-            'lab_tests__lab_test',
-            'instrumental_procedures__instrumental_procedure'
-        )
-        
+        # Все выборки остаются запросами и пагинируются в БД
+        documents = patient_status.clinical_documents.select_related('document_type', 'author')
+        treatment_plans = patient_status.treatment_plans.all()
+        examination_plans = patient_status.examination_plans.all()
+
         # Назначения treatment_assignments удалены - больше не нужны
         general_treatment_assignments = []
 
-        # Получаем препараты из планов лечения
-        treatment_medications = []
-        for plan in treatment_plans:
-            for medication in plan.medications.all():
-                treatment_medications.append({
-                    'plan': plan,
-                    'medication': medication,
-                    'created_date': plan.created_at,
-                    'created_by': plan.created_by
-                })
-
         # Применяем фильтры
         if filter_form.is_valid():
             start_date = filter_form.cleaned_data.get('start_date')
@@ -117,36 +122,26 @@ class PatientDepartmentHistoryView(LoginRequiredMixin, DetailView):
             document_type = filter_form.cleaned_data.get('document_type')
             search_query = filter_form.cleaned_data.get('search_query')
 
-            if start_date:
-                documents = documents.filter(created_at__date__gte=start_date)
-                # general_treatment_assignments = general_treatment_assignments.filter(created_at__date__gte=start_date)  # УДАЛЕНО
-                treatment_plans = treatment_plans.filter(created_at__date__gte=start_date)
-                examination_plans = examination_plans.filter(created_at__date__gte=start_date)
-
-            if end_date:
-                documents = documents.filter(created_at__date__lte=end_date)
-                # general_treatment_assignments = general_treatment_assignments.filter(created_at__date__lte=end_date)  # УДАЛЕНО
-                treatment_plans = treatment_plans.filter(created_at__date__lte=end_date)
-                examination_plans = examination_plans.filter(created_at__date__lte=end_date)
+            if start_date or end_date:
+                period = self.get_period_filter(start_date, end_date)
+                documents = documents.filter(period)
+                treatment_plans = treatment_plans.filter(period)
+                examination_plans = examination_plans.filter(period)
 
             if author:
-                documents = documents.filter(author__username__icontains=author)
-                # general_treatment_assignments = general_treatment_assignments.filter(assigning_doctor__username__icontains=author)  # УДАЛЕНО
-                treatment_plans = treatment_plans.filter(created_by__username__icontains=author)
-                examination_plans = examination_plans.filter(created_by__username__icontains=author)
+                documents = documents.filter(author=author)
+                treatment_plans = treatment_plans.filter(created_by=author)
+                examination_plans = examination_plans.filter(created_by=author)
 
             if document_type:
                 documents = documents.filter(document_type=document_type)
 
             if search_query:
+                # Текст документов ищется по индексу слов, а не LIKE по JSON
                 documents = documents.filter(
-                    Q(data__icontains=search_query) |
+                    DocumentSearchIndexService.search_q(search_query) |
                     Q(document_type__name__icontains=search_query)
                 )
-                # general_treatment_assignments = general_treatment_assignments.filter(  # УДАЛЕНО
-                #     Q(general_treatment__icontains=search_query) |
-                #     Q(notes__icontains=search_query)
-                # )
                 treatment_plans = treatment_plans.filter(
                     Q(name__icontains=search_query) |
                     Q(description__icontains=search_query)
@@ -156,6 +151,11 @@ class PatientDepartmentHistoryView(LoginRequiredMixin, DetailView):
                     Q(description__icontains=search_query)
                 )
 
+        # Препараты - прямой запрос по отфильтрованным планам с join плана
+        treatment_medications = TreatmentMedication.objects.filter(
+            treatment_plan__in=treatment_plans.values('pk')
+        ).select_related('treatment_plan__created_by', 'medication')
+
         return {
             'documents': documents,
             'general_treatment_assignments': general_treatment_assignments,
@@ -171,31 +171,33 @@ class PatientDepartmentHistoryView(LoginRequiredMixin, DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        patient_status = self.get_object()
+        patient_status = self.object
         filter_form = self.get_filter_form()
 
         # Получаем отфильтрованные данные
         filtered_data = self.get_filtered_documents_and_assignments(patient_status, filter_form)
-        
-        # Пагинируем данные
+
+        # Пагинируем данные; связанные записи подгружаются только для текущей страницы
         documents_page_obj = self.paginate_queryset(
-            filtered_data['documents'].order_by('-created_at'), 
+            filtered_data['documents'].order_by('-created_at', '-pk'),
             'documents_page'
         )
-        # general_treatment_assignments_page_obj = self.paginate_queryset(  # УДАЛЕНО
-        #     filtered_data['general_treatment_assignments'].order_by('-created_at'), 
-        #     'general_treatment_assignments_page'
-        # )
         treatment_plans_page_obj = self.paginate_queryset(
-            filtered_data['treatment_plans'].order_by('-created_at'), 
+            filtered_data['treatment_plans'].order_by('-created_at', '-pk').prefetch_related(
+                Prefetch('medications', queryset=TreatmentMedication.objects.select_related('medication', 'route')),
+                'recommendations',
+            ),
             'treatment_plans_page'
         )
         treatment_medications_page_obj = self.paginate_queryset(
-            filtered_data['treatment_medications'], 
+            filtered_data['treatment_medications'].order_by('-treatment_plan__created_at', '-created_at', '-pk'),
             'treatment_medications_page'
         )
         examination_plans_page_obj = self.paginate_queryset(
-            filtered_data['examination_plans'].order_by('-created_at'),
+            filtered_data['examination_plans'].order_by('-created_at', '-pk').prefetch_related(
+                'lab_tests__lab_test',
+                'instrumental_procedures__instrumental_procedure'
+            ),
             'examination_plans_page'
         )
 
@@ -206,7 +208,6 @@ class PatientDepartmentHistoryView(LoginRequiredMixin, DetailView):
             'department': patient_status.department,
             'filter_form': filter_form,
             'documents_page_obj': documents_page_obj,
-            # 'general_treatment_assignments_page_obj': general_treatment_assignments_page_obj,  # УДАЛЕНО
             'treatment_plans_page_obj': treatment_plans_page_obj,
             'treatment_medications_page_obj': treatment_medications_page_obj,
             'examination_plans_page_obj': examination_plans_page_obj,
@@ -2,6 +2,8 @@ from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
 from datetime import timedelta
 from .models import DocumentSignature, SignatureWorkflow, SignatureTemplate
+from base.metrics import instrumented
+from base.side_effects import coalesce
 
 
 class SignatureService:
@@ -10,6 +12,7 @@ class SignatureService:
     """
     
     @staticmethod
+    @instrumented('signatures')
     def create_signatures_for_document(document, workflow_type='simple', custom_workflow=None):
         """
         Создает необходимые подписи для документа
@@ -127,6 +130,7 @@ class SignatureService:
         return signatures
     
     @staticmethod
+    @instrumented('signatures')
     def create_signatures_from_template(document, template_name):
         """
         Создает подписи на основе шаблона
@@ -152,6 +156,7 @@ class SignatureService:
             raise ValueError(f"Шаблон '{template_name}' не найден")
     
     @staticmethod
+    @instrumented('signatures')
     def sign_document(signature_id, user, notes=''):
         """
         Подписывает документ
@@ -166,7 +171,10 @@ class SignatureService:
         """
         try:
             signature = DocumentSignature.objects.get(pk=signature_id)
-            signature.sign(user, notes)
+            # Реакции на подпись (завершение документа, исследования,
+            # расписание) выполняются одним проходом после коммита
+            with coalesce():
+                signature.sign(user, notes)
             return signature
         except DocumentSignature.DoesNotExist:
             raise ValueError("Подпись не найдена")
@@ -174,6 +182,7 @@ class SignatureService:
             raise e
     
     @staticmethod
+    @instrumented('signatures')
     def reject_document(signature_id, user, reason):
         """
         Отклоняет документ
@@ -196,6 +205,7 @@ class SignatureService:
             raise e
     
     @staticmethod
+    @instrumented('signatures')
     def cancel_document(signature_id, user, reason):
         """
         Отменяет подпись
@@ -333,6 +343,7 @@ class SignatureService:
         ).select_related('content_type', 'required_signer')
     
     @staticmethod
+    @instrumented('signatures')
     def auto_expire_signatures():
         """
         Автоматически помечает истекшие подписи как истекшие
@@ -1,8 +1,8 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver, Signal
 from django.contrib.contenttypes.models import ContentType
-from django.utils import timezone
 
+from base.side_effects import defer
 from .models import DocumentSignature
 from .services import SignatureService
 
@@ -33,19 +33,14 @@ def handle_document_signature_change(sender, instance, created, **kwargs):
         return
     
     if instance.status == 'signed':
-        # Подпись получена - проверяем завершение документа
+        # Подпись получена - завершение документа проверяется один раз
+        # после коммита, даже если в транзакции подписано несколько подписей
         document = instance.content_object
-        
-        if SignatureService.check_document_completion(document):
-            # Документ полностью подписан - отправляем сигнал
-            document_fully_signed.send(
-                sender=sender, 
-                document=document, 
-                signatures=SignatureService.get_signatures_for_document(document)
+        if document is not None:
+            defer(
+                'signatures.document_completion', document, _handle_document_completion,
+                signer=instance.actual_signer
             )
-            
-            # Обновляем статус в examination_management если это результат исследования
-            _update_examination_status(document, instance.actual_signer)
     
     elif instance.status == 'rejected':
         # Подпись отклонена - отправляем сигнал
@@ -60,6 +55,23 @@ def handle_document_signature_change(sender, instance, created, **kwargs):
         signature_expired.send(sender=sender, instance=instance)
 
 
+def _handle_document_completion(document, signer):
+    """
+    Отправляет document_fully_signed и обновляет examination_management,
+    если все подписи документа получены
+    """
+    if SignatureService.check_document_completion(document):
+        # Документ полностью подписан - отправляем сигнал
+        document_fully_signed.send(
+            sender=DocumentSignature,
+            document=document,
+            signatures=SignatureService.get_signatures_for_document(document)
+        )
+        
+        # Обновляем статус в examination_management если это результат исследования
+        _update_examination_status(document, signer)
+
+
 def _update_examination_status(document, signer):
     """
     Обновляет статус в examination_management после подписания
@@ -71,17 +83,21 @@ def _update_examination_status(document, signer):
     try:
         # Проверяем, есть ли связь с examination_management
         if hasattr(document, 'examination_plan'):
-            # Это результат исследования - обновляем статус
+            # Это результат исследования - завершаем исследование и синхронизируем
+            # clinical_scheduling (один раз на транзакцию)
             examination_item = _find_examination_item(document)
             if examination_item:
-                examination_item.status = 'completed'
-                examination_item.completed_at = timezone.now()
-                examination_item.completed_by = signer
-                examination_item.save()
+                from examination_management.services import ExaminationStatusService
                 
-                # Синхронизируем с clinical_scheduling
-                _sync_with_clinical_scheduling(examination_item, signer)
+                defer(
+                    'examination.complete', examination_item,
+                    ExaminationStatusService.complete_examination_item,
+                    user=signer, notes='Документ подписан'
+                )
     
+    except ImportError:
+        # examination_management не установлен
+        pass
     except Exception as e:
         # Логируем ошибку, но не прерываем процесс
         print(f"Ошибка при обновлении статуса examination_management: {e}")
@@ -138,31 +154,6 @@ def _find_examination_item(document):
         return None
 
 
-def _sync_with_clinical_scheduling(examination_item, signer):
-    """
-    Синхронизирует статус с clinical_scheduling
-    
-    Args:
-        examination_item: Элемент плана обследования
-        signer: Пользователь, который подписал
-    """
-    try:
-        from examination_management.services import ExaminationStatusService
-        
-        ExaminationStatusService.update_assignment_status(
-            examination_item, 
-            'completed', 
-            signer,
-            notes='Документ подписан'
-        )
-    
-    except ImportError:
-        # examination_management.services не доступен
-        pass
-    except Exception as e:
-        print(f"Ошибка при синхронизации с clinical_scheduling: {e}")
-
-
 # Сигналы для интеграции с другими приложениями
 
 @receiver(post_save, sender='instrumental_procedures.InstrumentalProcedureResult')
@@ -171,29 +162,32 @@ def create_signatures_for_instrumental_result(sender, instance, created, **kwarg
     Создает необходимые подписи для результата инструментального исследования
     ТОЛЬКО когда результат действительно заполнен (is_completed=True)
     """
-    # Создаем подписи когда результат заполнен (независимо от created)
+    # Создаем подписи когда результат заполнен (независимо от created),
+    # один раз после коммита
     if instance.is_completed:
-        try:
-            # Проверяем, что подписи еще не созданы
-            if not SignatureService.get_signatures_for_document(instance).exists():
-                # Определяем тип рабочего процесса на основе сложности исследования
-                workflow_type = 'simple'  # По умолчанию простая подпись
-                
-                # Для сложных исследований можно использовать расширенный процесс
-                if hasattr(instance.procedure_definition, 'complexity'):
-                    if instance.procedure_definition.complexity == 'high':
-                        workflow_type = 'standard'
-                    elif instance.procedure_definition.complexity == 'critical':
-                        workflow_type = 'complex'
-                
-                SignatureService.create_signatures_for_document(instance, workflow_type)
-                print(f"Созданы подписи для инструментального исследования {instance.id}")
+        defer('signatures.ensure', instance, _ensure_instrumental_result_signatures)
+
+
+def _ensure_instrumental_result_signatures(instance):
+    try:
+        # Проверяем, что подписи еще не созданы
+        if not SignatureService.get_signatures_for_document(instance).exists():
+            # Определяем тип рабочего процесса на основе сложности исследования
+            workflow_type = 'simple'  # По умолчанию простая подпись
             
-        except Exception as e:
-            # Логируем ошибку, но не прерываем процесс
-            print(f"Ошибка при создании подписей для инструментального исследования: {e}")
-    else:
-        pass
+            # Для сложных исследований можно использовать расширенный процесс
+            if hasattr(instance.procedure_definition, 'complexity'):
+                if instance.procedure_definition.complexity == 'high':
+                    workflow_type = 'standard'
+                elif instance.procedure_definition.complexity == 'critical':
+                    workflow_type = 'complex'
+            
+            SignatureService.create_signatures_for_document(instance, workflow_type)
+            print(f"Созданы подписи для инструментального исследования {instance.id}")
+        
+    except Exception as e:
+        # Логируем ошибку, но не прерываем процесс
+        print(f"Ошибка при создании подписей для инструментального исследования: {e}")
 
 
 @receiver(post_save, sender='lab_tests.LabTestResult')
@@ -202,22 +196,27 @@ def create_signatures_for_lab_test_result(sender, instance, created, **kwargs):
     Создает необходимые подписи для результата лабораторного исследования
     ТОЛЬКО когда результат действительно заполнен (is_completed=True)
     """
-    # Создаем подписи когда результат заполнен (независимо от created)
+    # Создаем подписи когда результат заполнен (независимо от created),
+    # один раз после коммита
     if instance.is_completed:
-        try:
-            # Проверяем, что подписи еще не созданы
-            if not SignatureService.get_signatures_for_document(instance).exists():
-                # Для лабораторных исследований обычно достаточно простой подписи
-                workflow_type = 'simple'
-                
-                # Но для критичных анализов может потребоваться расширенная подпись
-                if hasattr(instance.procedure_definition, 'critical') and instance.procedure_definition.critical:
-                    workflow_type = 'standard'
-                
-                SignatureService.create_signatures_for_document(instance, workflow_type)
+        defer('signatures.ensure', instance, _ensure_lab_test_result_signatures)
+
+
+def _ensure_lab_test_result_signatures(instance):
+    try:
+        # Проверяем, что подписи еще не созданы
+        if not SignatureService.get_signatures_for_document(instance).exists():
+            # Для лабораторных исследований обычно достаточно простой подписи
+            workflow_type = 'simple'
             
-        except Exception as e:
-            print(f"Ошибка при создании подписей для лабораторного исследования: {e}")
+            # Но для критичных анализов может потребоваться расширенная подпись
+            if hasattr(instance.procedure_definition, 'critical') and instance.procedure_definition.critical:
+                workflow_type = 'standard'
+            
+            SignatureService.create_signatures_for_document(instance, workflow_type)
+        
+    except Exception as e:
+        print(f"Ошибка при создании подписей для лабораторного исследования: {e}")
 
 
 # Сигналы для других типов документов (можно расширять)
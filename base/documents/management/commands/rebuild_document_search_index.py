@@ -0,0 +1,20 @@
+# documents/management/commands/rebuild_document_search_index.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from documents.services import DocumentSearchIndexService
+
+
+class Command(BaseCommand):
+
+    help = 'Полностью перестраивает поисковый индекс клинических документов (слова из данных документа).'
+
+    def handle(self, *args, **options):
+        self.stdout.write("🔍 Перестраиваю поисковый индекс документов...")
+        started = time.monotonic()
+        count = DocumentSearchIndexService.rebuild()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Проиндексировано документов: {count} за {elapsed:.2f} с"
+        ))
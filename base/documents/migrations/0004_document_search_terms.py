@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_search_terms(apps, schema_editor):
+    """Заполняет поисковый индекс для уже существующих документов"""
+    from documents.services import DocumentSearchIndexService
+
+    ClinicalDocument = apps.get_model('documents', 'ClinicalDocument')
+    DocumentSearchTerm = apps.get_model('documents', 'DocumentSearchTerm')
+    terms = [
+        DocumentSearchTerm(document_id=document_id, term=term)
+        for document_id, data in ClinicalDocument.objects.values_list('pk', 'data').iterator()
+        for term in DocumentSearchIndexService._data_terms(data)
+    ]
+    DocumentSearchTerm.objects.bulk_create(terms, batch_size=DocumentSearchIndexService.BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_clinicaldocument_archive_reason_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Слово')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='documents.clinicaldocument', verbose_name='Документ')),
+            ],
+            options={
+                'verbose_name': 'Слово поискового индекса документов',
+                'verbose_name_plural': 'Поисковый индекс документов',
+                'indexes': [models.Index(fields=['term', 'document'], name='document_search_term_idx')],
+            },
+        ),
+        migrations.RunPython(build_search_terms, migrations.RunPython.noop),
+    ]
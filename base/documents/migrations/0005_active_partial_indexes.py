@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('departments', '0003_patientdepartmentstatus_archive_reason_and_more'),
+        ('documents', '0004_document_search_terms'),
+        ('encounters', '0014_active_partial_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clinicaldocument',
+            index=models.Index(condition=models.Q(('is_archived', False)), fields=['encounter', 'datetime_document'], name='documents__encount_aa1fb7_act'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+from base.db_profiles import postgres_only_sql
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнять в транзакции
+    atomic = False
+
+    dependencies = [
+        ('documents', '0005_active_partial_indexes'),
+    ]
+
+    operations = [
+        postgres_only_sql(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS clinical_document_data_gin '
+            'ON documents_clinicaldocument USING gin (data)',
+            'DROP INDEX CONCURRENTLY IF EXISTS clinical_document_data_gin',
+        ),
+    ]
@@ -6,7 +6,7 @@ from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.db.models import Q
 from base.models import ArchivableModel
-from base.services import ArchiveManager
+from base.services import ActiveArchiveManager, ArchiveManager
 
 
 # 1. Новая модель для описания структуры документа
@@ -86,6 +86,10 @@ class ClinicalDocument(ArchivableModel, models.Model):
     # Менеджеры для архивирования
     objects = ArchiveManager()
     all_objects = models.Manager()
+    active_objects = ActiveArchiveManager()
+
+    # Частичные индексы активных записей: документы случая по дате
+    active_indexes = [('encounter', 'datetime_document')]
 
     class Meta:
         verbose_name = "Клинический документ"
@@ -177,6 +181,31 @@ class ClinicalDocument(ArchivableModel, models.Model):
                 return self.content_object.get_patient()
         return None
 
+
+class DocumentSearchTerm(models.Model):
+    """
+    Слово из данных документа для индексного поиска по тексту.
+    Поиск по префиксу слова идет диапазоном по индексу (term, document)
+    вместо LIKE '%...%' по JSON-полю.
+    """
+    document = models.ForeignKey(
+        ClinicalDocument,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name="Документ"
+    )
+    term = models.CharField("Слово", max_length=64)
+
+    class Meta:
+        verbose_name = "Слово поискового индекса документов"
+        verbose_name_plural = "Поисковый индекс документов"
+        indexes = [
+            models.Index(fields=['term', 'document'], name='document_search_term_idx'),
+        ]
+
+    def __str__(self):
+        return self.term
+
 # 3. Обновленная модель для шаблонов
 class DocumentTemplate(models.Model):
     """
@@ -6,8 +6,6 @@ from functools import lru_cache
 from django.core.cache import cache
 from django.db import models
 from django.contrib.postgres.indexes import GinIndex
-from django.contrib.postgres.search import SearchVectorField
-from django.contrib.postgres.indexes import GinIndex
 
 
 class DocumentOptimizations:
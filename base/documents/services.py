@@ -3,18 +3,21 @@
 """
 from typing import Dict, List, Optional, Any
 from django.db import transaction
+from django.db.models import Q
 from django.contrib.auth.models import AbstractUser
 from django.core.cache import cache
 from django.utils import timezone
 import json
 import hashlib
 import os
+import re
 from io import BytesIO
 from django.conf import settings
 from django.template.loader import render_to_string
 
-from .models import DocumentType, ClinicalDocument, DocumentTemplate
+from .models import DocumentType, ClinicalDocument, DocumentTemplate, DocumentSearchTerm
 from .optimizations import DocumentOptimizations
+from base.metrics import instrumented
 
 
 class DocumentService:
@@ -214,6 +217,7 @@ class DocumentPrintService:
             self.font_name = "DejaVuSans"
             self.font_bold_name = "DejaVuSans"
     
+    @instrumented('document_print')
     def generate_pdf(self, clinical_document, template_name=None, print_settings=None):
         """
         Генерирует PDF документ для печати с помощью FPDF2 для надежной поддержки кириллицы.
@@ -458,4 +462,101 @@ class DocumentTemplateService:
         """
         Рендерит HTML шаблон для печати
         """
-        return render_to_string(template_name, context) 
\ No newline at end of file
+        return render_to_string(template_name, context) 
+
+class DocumentSearchIndexService:
+    """
+    Сервис поискового индекса документов.
+
+    Индекс хранит нормализованные слова из значений поля data. Поиск
+    ищет каждое слово запроса как префикс слова документа диапазоном
+    по индексу, поэтому не зависит от объема JSON. Поддерживается
+    сигналами documents.signals; полная перестройка выполняется командой
+    rebuild_document_search_index.
+    """
+
+    BATCH_SIZE = 1000
+    MAX_TERM_LENGTH = 64
+    # Верхняя граница диапазона префикса: больше любого символа слова
+    PREFIX_END = '\U0010ffff'
+
+    _WORD_RE = re.compile(r'[^\W_]+')
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        """Разбивает текст на нормализованные слова без повторов"""
+        text = str(text).lower().replace('ё', 'е')
+        words = dict.fromkeys(word[:cls.MAX_TERM_LENGTH] for word in cls._WORD_RE.findall(text))
+        return list(words)
+
+    @classmethod
+    def _data_terms(cls, data) -> set:
+        """Слова из всех значений JSON-данных документа (без имен полей)"""
+        terms = set()
+        stack = [data]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, dict):
+                stack.extend(value.values())
+            elif isinstance(value, (list, tuple)):
+                stack.extend(value)
+            elif value is not None and not isinstance(value, bool):
+                terms.update(cls.tokenize(value))
+        return terms
+
+    @classmethod
+    @transaction.atomic
+    def index_document(cls, document: ClinicalDocument) -> None:
+        """
+        Перестраивает слова индекса документа по его текущим данным в БД.
+
+        :param document: Документ (данные перечитываются по pk)
+        """
+        DocumentSearchTerm.objects.filter(document_id=document.pk).delete()
+        data = ClinicalDocument.all_objects.filter(pk=document.pk).values_list('data', flat=True).first()
+        if data is None:
+            return
+        DocumentSearchTerm.objects.bulk_create(
+            [DocumentSearchTerm(document_id=document.pk, term=term) for term in cls._data_terms(data)],
+            batch_size=cls.BATCH_SIZE
+        )
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls) -> int:
+        """
+        Полностью перестраивает поисковый индекс документов.
+
+        :return: Количество проиндексированных документов
+        """
+        DocumentSearchTerm.objects.all().delete()
+        count = 0
+        terms = []
+        documents = ClinicalDocument.all_objects.values_list('pk', 'data').iterator(chunk_size=cls.BATCH_SIZE)
+        for document_id, data in documents:
+            count += 1
+            terms.extend(DocumentSearchTerm(document_id=document_id, term=term) for term in cls._data_terms(data))
+            if len(terms) >= cls.BATCH_SIZE * 10:
+                DocumentSearchTerm.objects.bulk_create(terms, batch_size=cls.BATCH_SIZE)
+                terms = []
+        DocumentSearchTerm.objects.bulk_create(terms, batch_size=cls.BATCH_SIZE)
+        return count
+
+    @classmethod
+    def search_q(cls, query: str) -> Q:
+        """
+        Условие "документ содержит все слова запроса (по префиксу)".
+
+        :param query: Текст запроса
+        :return: Q для фильтрации запроса документов
+        """
+        words = cls.tokenize(query)
+        if not words:
+            return Q(pk__in=[])
+        condition = Q()
+        for word in words:
+            matching = DocumentSearchTerm.objects.filter(
+                term__gte=word, term__lt=word + cls.PREFIX_END
+            ).values('document_id')
+            condition &= Q(pk__in=matching)
+        return condition
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from base.side_effects import defer
+from .models import ClinicalDocument
+from .services import DocumentSearchIndexService
+
+
+@receiver(post_save, sender=ClinicalDocument)
+def index_clinical_document(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Поддерживает поисковый индекс документа при изменении его данных
+    """
+    if raw:
+        return
+    if update_fields is not None and 'data' not in update_fields:
+        return
+    defer('documents.search_index', instance, DocumentSearchIndexService.index_document)
@@ -350,13 +350,19 @@ class DocumentPrintListView(LoginRequiredMixin, View):
     
     def get(self, request):
         try:
+            # Архивированные документы показываются по настройкам ArchiveConfiguration
+            search_query = request.GET.get('q')
+            documents = (
+                ClinicalDocument.objects.for_search() if search_query else ClinicalDocument.objects.for_list()
+            )
+
             # Получаем документы пользователя (или все, если staff)
             if request.user.is_staff:
-                documents = ClinicalDocument.objects.all().select_related(
+                documents = documents.select_related(
                     'document_type', 'author', 'content_type'
                 ).order_by('-datetime_document')
             else:
-                documents = ClinicalDocument.objects.filter(
+                documents = documents.filter(
                     author=request.user
                 ).select_related(
                     'document_type', 'author', 'content_type'
@@ -368,7 +374,6 @@ class DocumentPrintListView(LoginRequiredMixin, View):
                 documents = documents.filter(document_type_id=document_type_filter)
             
             # Поиск по названию
-            search_query = request.GET.get('q')
             if search_query:
                 documents = documents.filter(
                     document_type__name__icontains=search_query
@@ -5,7 +5,7 @@ from django.shortcuts import render, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 
-from .models import Encounter
+from .models import Encounter, EncounterEventOutbox
 from .services.encounter_service import EncounterService
 from .forms import EncounterReopenForm, EncounterUndoForm
 
@@ -146,3 +146,21 @@ class EncounterAdmin(admin.ModelAdmin):
     last_command_info.allow_tags = True
 
 
+
+
+@admin.register(EncounterEventOutbox)
+class EncounterEventOutboxAdmin(admin.ModelAdmin):
+    list_display = ('id', 'encounter_id', 'event_type', 'status', 'attempts', 'available_at', 'processed_at')
+    list_filter = ('status', 'event_type')
+    search_fields = ('encounter_id',)
+    readonly_fields = ('encounter_id', 'event_type', 'payload', 'created_at', 'processed_at', 'locked_at', 'last_error')
+    actions = ['retry_selected']
+
+    def retry_selected(self, request, queryset):
+        """Возвращает события с ошибкой в очередь"""
+        from django.utils import timezone
+        updated = queryset.filter(status='failed').update(
+            status='pending', attempts=0, available_at=timezone.now(), last_error=''
+        )
+        self.message_user(request, f"Возвращено в очередь событий: {updated}")
+    retry_selected.short_description = "Повторить обработку выбранных событий"
@@ -1,10 +1,13 @@
 from abc import ABC, abstractmethod
+import json
 from typing import Dict, List, Callable, Any
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import datetime
 
+from base.metrics import ENCOUNTER_EVENTS
 from ..models import Encounter
 from departments.models import PatientDepartmentStatus, Department
 
@@ -28,6 +31,27 @@ class EncounterEvent(ABC):
     def get_description(self) -> str:
         """Возвращает описание события"""
         return f"{self.get_event_type()}: {self.encounter}"
+    
+    def to_payload(self) -> Dict[str, Any]:
+        """Сериализует событие для исходящей очереди"""
+        return {
+            'user_id': self.user.pk if self.user else None,
+            'timestamp': self.timestamp.isoformat(),
+            'metadata': json.loads(json.dumps(self.metadata, cls=DjangoJSONEncoder, default=str)),
+        }
+    
+    @classmethod
+    def from_payload(cls, encounter: Encounter, payload: Dict[str, Any]) -> 'EncounterEvent':
+        """Восстанавливает событие из записи исходящей очереди"""
+        user = User.objects.filter(pk=payload.get('user_id')).first() if payload.get('user_id') else None
+        event = cls(encounter, user=user, **cls._payload_kwargs(payload), **payload.get('metadata', {}))
+        event.timestamp = datetime.fromisoformat(payload['timestamp'])
+        return event
+    
+    @classmethod
+    def _payload_kwargs(cls, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Дополнительные аргументы конструктора из payload"""
+        return {}
 
 
 class EncounterClosedEvent(EncounterEvent):
@@ -41,6 +65,20 @@ class EncounterClosedEvent(EncounterEvent):
     def get_event_type(self) -> str:
         return "encounter_closed"
     
+    def to_payload(self) -> Dict[str, Any]:
+        payload = super().to_payload()
+        payload['outcome'] = self.outcome
+        payload['transfer_department_id'] = self.transfer_department.pk if self.transfer_department else None
+        return payload
+    
+    @classmethod
+    def _payload_kwargs(cls, payload: Dict[str, Any]) -> Dict[str, Any]:
+        department_id = payload.get('transfer_department_id')
+        return {
+            'outcome': payload.get('outcome'),
+            'transfer_department': Department.objects.filter(pk=department_id).first() if department_id else None,
+        }
+    
     def get_description(self) -> str:
         base_desc = f"Encounter {self.encounter.id} closed with outcome: {self.outcome}"
         if self.transfer_department:
@@ -79,7 +117,16 @@ class EncounterUnarchivedEvent(EncounterEvent):
 
 
 class EventHandler(ABC):
-    """Базовый класс для обработчиков событий"""
+    """
+    Базовый класс для обработчиков событий.
+    
+    Критичные обработчики (critical = True) изменяют связанные данные и
+    выполняются синхронно в транзакции изменения обращения; ошибка в них
+    откатывает транзакцию. Остальные обработчики считаются побочными и
+    выполняются асинхронно через исходящую очередь.
+    """
+    
+    critical = False
     
     @abstractmethod
     def handle(self, event: EncounterEvent) -> None:
@@ -99,6 +146,8 @@ class LoggingEventHandler(EventHandler):
 class PatientDepartmentStatusEventHandler(EventHandler):
     """Обработчик событий для управления статусами пациентов в отделениях"""
     
+    critical = True
+    
     def handle(self, event: EncounterEvent) -> None:
         if isinstance(event, EncounterClosedEvent):
             self._handle_encounter_closed(event)
@@ -134,6 +183,8 @@ class PatientDepartmentStatusEventHandler(EventHandler):
 class AppointmentSyncEventHandler(EventHandler):
     """Обработчик событий для синхронизации с appointments"""
     
+    critical = True
+    
     def handle(self, event: EncounterEvent) -> None:
         if isinstance(event, EncounterClosedEvent):
             self._handle_encounter_closed(event)
@@ -186,23 +237,52 @@ class EventBus:
             self._handlers[event_type] = []
         self._handlers[event_type].append(handler)
     
+    def get_handlers(self, event_type: str, critical: bool) -> List[EventHandler]:
+        """Возвращает критичные или побочные обработчики для типа событий"""
+        return [
+            handler for handler in self._handlers.get(event_type, [])
+            if handler.critical == critical
+        ]
+    
     def publish(self, event: EncounterEvent):
-        """Публикует событие для всех зарегистрированных обработчиков и наблюдателей"""
+        """
+        Публикует событие.
+        
+        Критичные обработчики выполняются сразу, в текущей транзакции.
+        Побочные обработчики и наблюдатели не вызываются здесь: событие
+        записывается в исходящую очередь (EncounterEventOutbox) в той же
+        транзакции и обрабатывается после коммита, поэтому запрос
+        закрытия/возврата обращения не ждет логирования и уведомлений.
+        """
         event_type = event.get_event_type()
         
-        # Обработка через EventHandler
-        handlers = self._handlers.get(event_type, [])
-        for handler in handlers:
-            try:
-                handler.handle(event)
-            except Exception as e:
-                print(f"Error handling event {event_type}: {e}")
+        for handler in self.get_handlers(event_type, critical=True):
+            handler.handle(event)
         
-        # Уведомление наблюдателей
-        try:
-            self.observer_manager.notify_observers(event)
-        except Exception as e:
-            print(f"Error notifying observers for event {event_type}: {e}")
+        from .outbox import outbox_dispatcher
+        outbox_dispatcher.enqueue(event)
+        ENCOUNTER_EVENTS.inc(event_type=event_type, stage='published')
+    
+    def dispatch_side_effects(self, event: EncounterEvent):
+        """
+        Выполняет побочные обработчики и уведомляет наблюдателей.
+        Вызывается диспетчером очереди; ошибка обработчика приводит к
+        повторной попытке доставки события.
+        """
+        for handler in self.get_handlers(event.get_event_type(), critical=False):
+            handler.handle(event)
+        
+        # Наблюдатели изолированы друг от друга в Subject.notify
+        self.observer_manager.notify_observers(event)
+
+
+# Классы событий по типу для восстановления из исходящей очереди
+EVENT_CLASSES = {
+    'encounter_closed': EncounterClosedEvent,
+    'encounter_reopened': EncounterReopenedEvent,
+    'encounter_archived': EncounterArchivedEvent,
+    'encounter_unarchived': EncounterUnarchivedEvent,
+}
 
 
 # Глобальный экземпляр шины событий
@@ -0,0 +1,189 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from base.metrics import ENCOUNTER_EVENTS, ENCOUNTER_EVENT_DELIVERY_SECONDS, ENCOUNTER_EVENT_LAG_SECONDS
+from ..models import Encounter, EncounterEventOutbox
+
+
+class OutboxDispatcher:
+    """
+    Диспетчер исходящей очереди событий encounters.
+
+    Режимы (settings.ENCOUNTER_EVENTS_DISPATCH):
+        'thread' - после коммита очередь обращения разбирается в пуле потоков;
+        'sync'   - после коммита очередь разбирается в текущем потоке;
+        'worker' - очередь разбирает только команда process_encounter_outbox.
+
+    Порядок событий одного обращения сохраняется: в процессе обращения
+    распределяются по однопоточным исполнителям по encounter_id, а между
+    процессами следующее событие не берется, пока не обработано предыдущее.
+    """
+
+    def __init__(self):
+        self._executors: List[ThreadPoolExecutor] = []
+        self._lock = threading.Lock()
+
+    @property
+    def mode(self) -> str:
+        return getattr(settings, 'ENCOUNTER_EVENTS_DISPATCH', 'thread')
+
+    @property
+    def max_attempts(self) -> int:
+        return getattr(settings, 'ENCOUNTER_OUTBOX_MAX_ATTEMPTS', 5)
+
+    @property
+    def lock_timeout(self) -> timedelta:
+        return timedelta(seconds=getattr(settings, 'ENCOUNTER_OUTBOX_LOCK_TIMEOUT', 300))
+
+    def retry_delay(self, attempts: int) -> timedelta:
+        """Экспоненциальная задержка перед повторной попыткой"""
+        return timedelta(seconds=min(2 ** attempts, 300))
+
+    def enqueue(self, event) -> EncounterEventOutbox:
+        """
+        Записывает событие в очередь в текущей транзакции и планирует
+        обработку после коммита.
+        """
+        entry = EncounterEventOutbox.objects.create(
+            encounter_id=event.encounter.pk,
+            event_type=event.get_event_type(),
+            payload=event.to_payload(),
+        )
+        encounter_id = entry.encounter_id
+        transaction.on_commit(lambda: self.schedule(encounter_id))
+        return entry
+
+    def schedule(self, encounter_id: int) -> None:
+        """Запускает разбор очереди обращения согласно режиму"""
+        if self.mode == 'sync':
+            self.drain_encounter(encounter_id)
+        elif self.mode == 'thread':
+            self._executor_for(encounter_id).submit(self._drain_in_thread, encounter_id)
+
+    def _executor_for(self, encounter_id: int) -> ThreadPoolExecutor:
+        with self._lock:
+            if not self._executors:
+                workers = getattr(settings, 'ENCOUNTER_EVENTS_WORKERS', 2)
+                self._executors = [
+                    ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'encounter-events-{i}')
+                    for i in range(workers)
+                ]
+        return self._executors[encounter_id % len(self._executors)]
+
+    def _drain_in_thread(self, encounter_id: int) -> None:
+        try:
+            self.drain_encounter(encounter_id)
+        except Exception as e:
+            print(f"Ошибка обработки очереди событий обращения {encounter_id}: {e}")
+        finally:
+            # Соединения потока пула не должны оставаться открытыми
+            connections.close_all()
+
+    def drain_encounter(self, encounter_id: int) -> int:
+        """
+        Обрабатывает события обращения по порядку до первого события,
+        которое еще не готово к обработке или отложено после ошибки.
+
+        Returns:
+            Количество успешно обработанных событий
+        """
+        processed = 0
+        while True:
+            entry = EncounterEventOutbox.objects.filter(
+                encounter_id=encounter_id,
+                status__in=['pending', 'processing'],
+            ).order_by('id').first()
+            if entry is None or not self._claim(entry):
+                return processed
+            if not self._process(entry):
+                return processed
+            processed += 1
+
+    def _claim(self, entry: EncounterEventOutbox) -> bool:
+        """Атомарно берет событие в обработку; зависшие события перехватываются"""
+        now = timezone.now()
+        if entry.available_at > now:
+            return False
+        claimable = EncounterEventOutbox.objects.filter(pk=entry.pk, status='pending')
+        if entry.status == 'processing':
+            if entry.locked_at and entry.locked_at > now - self.lock_timeout:
+                return False
+            claimable = EncounterEventOutbox.objects.filter(
+                pk=entry.pk, status='processing', locked_at=entry.locked_at
+            )
+        claimed = claimable.update(status='processing', locked_at=now, attempts=F('attempts') + 1)
+        if claimed:
+            entry.refresh_from_db(fields=['attempts'])
+        return bool(claimed)
+
+    def _process(self, entry: EncounterEventOutbox) -> bool:
+        """Доставляет событие побочным обработчикам и фиксирует результат"""
+        from .encounter_events import EVENT_CLASSES, event_bus
+
+        event_type = entry.event_type
+        try:
+            encounter = Encounter.all_objects.select_related('patient').filter(pk=entry.encounter_id).first()
+            event_class = EVENT_CLASSES.get(entry.event_type)
+            if encounter is None or event_class is None:
+                # Доставить некому: обращение удалено или тип события неизвестен
+                self._finish(entry, 'failed', f"Невозможно восстановить событие {entry.event_type}")
+                ENCOUNTER_EVENTS.inc(event_type=event_type, stage='failed')
+                return True
+            with ENCOUNTER_EVENT_DELIVERY_SECONDS.time(event_type=event_type):
+                event_bus.dispatch_side_effects(event_class.from_payload(encounter, entry.payload))
+        except Exception as e:
+            if entry.attempts >= self.max_attempts:
+                # Исчерпаны попытки: событие не блокирует очередь обращения
+                self._finish(entry, 'failed', str(e))
+                ENCOUNTER_EVENTS.inc(event_type=event_type, stage='failed')
+                return True
+            ENCOUNTER_EVENTS.inc(event_type=event_type, stage='retried')
+            EncounterEventOutbox.objects.filter(pk=entry.pk).update(
+                status='pending',
+                locked_at=None,
+                last_error=str(e),
+                available_at=timezone.now() + self.retry_delay(entry.attempts),
+            )
+            return False
+
+        self._finish(entry, 'done')
+        ENCOUNTER_EVENTS.inc(event_type=event_type, stage='delivered')
+        ENCOUNTER_EVENT_LAG_SECONDS.observe(
+            (timezone.now() - entry.created_at).total_seconds(), event_type=event_type
+        )
+        return True
+
+    def _finish(self, entry: EncounterEventOutbox, status: str, error: str = '') -> None:
+        EncounterEventOutbox.objects.filter(pk=entry.pk).update(
+            status=status, locked_at=None, last_error=error, processed_at=timezone.now()
+        )
+
+    def due_encounter_ids(self, limit: Optional[int] = None) -> Iterable[int]:
+        """ID обращений, у которых есть события, готовые к обработке"""
+        now = timezone.now()
+        queryset = EncounterEventOutbox.objects.filter(
+            status__in=['pending', 'processing'], available_at__lte=now
+        ).order_by('encounter_id').values_list('encounter_id', flat=True).distinct()
+        return list(queryset[:limit] if limit else queryset)
+
+    def drain_all(self, limit: Optional[int] = None) -> int:
+        """Разбирает очередь всех обращений; используется командой-воркером"""
+        return sum(self.drain_encounter(encounter_id) for encounter_id in self.due_encounter_ids(limit))
+
+    def purge(self, older_than_days: int) -> int:
+        """Удаляет обработанные события старше указанного срока"""
+        deleted, _ = EncounterEventOutbox.objects.filter(
+            status='done', processed_at__lt=timezone.now() - timedelta(days=older_than_days)
+        ).delete()
+        return deleted
+
+
+# Глобальный диспетчер исходящей очереди
+outbox_dispatcher = OutboxDispatcher()
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from encounters.events.outbox import outbox_dispatcher
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает исходящую очередь событий обращений (EncounterEventOutbox)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать очередь один раз и завершиться'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Пауза между проходами в режиме воркера, сек'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=500,
+            help='Максимум обращений за один проход'
+        )
+        parser.add_argument(
+            '--purge-days',
+            type=int,
+            help='Удалить обработанные события старше N дней и завершиться'
+        )
+
+    def handle(self, *args, **options):
+        if options.get('purge_days') is not None:
+            deleted = outbox_dispatcher.purge(options['purge_days'])
+            self.stdout.write(self.style.SUCCESS(f'Удалено обработанных событий: {deleted}'))
+            return
+
+        if options['once']:
+            processed = outbox_dispatcher.drain_all(limit=options['limit'])
+            self.stdout.write(self.style.SUCCESS(f'Обработано событий: {processed}'))
+            return
+
+        self.stdout.write('Воркер очереди событий обращений запущен (Ctrl+C для остановки)')
+        try:
+            while True:
+                processed = outbox_dispatcher.drain_all(limit=options['limit'])
+                if processed:
+                    self.stdout.write(f'Обработано событий: {processed}')
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Воркер остановлен')
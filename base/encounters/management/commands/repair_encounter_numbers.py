@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from encounters.models import Encounter
+
+
+class Command(BaseCommand):
+    help = 'Заполняет и исправляет порядковые номера обращений пациентов (Encounter.sequence_number)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--patient',
+            type=int,
+            help='ID пациента (по умолчанию - все пациенты)'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только показать количество расхождений без исправления'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пакета bulk_update'
+        )
+
+    def handle(self, *args, **options):
+        patient_id = options.get('patient')
+
+        if options['check']:
+            queryset = Encounter.all_objects.all()
+            if patient_id is not None:
+                queryset = queryset.filter(patient_id=patient_id)
+            mismatched = sum(
+                1 for current, expected in queryset.annotate(
+                    expected_number=Encounter.sequence_window()
+                ).values_list('sequence_number', 'expected_number')
+                if current != expected
+            )
+            self.stdout.write(f'Обращений с неверным номером: {mismatched}')
+            return
+
+        fixed = Encounter.renumber_patient_encounters(
+            patient_id=patient_id,
+            batch_size=options['batch_size']
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено номеров обращений: {fixed}')
+        )
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:06
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+
+def backfill_sequence_numbers(apps, schema_editor):
+    """Заполняет порядковые номера существующих обращений"""
+    Encounter = apps.get_model('encounters', 'Encounter')
+    rows = Encounter.objects.annotate(
+        expected_number=Window(
+            expression=RowNumber(),
+            partition_by=[F('patient_id')],
+            order_by=[F('date_start').asc(), F('id').asc()],
+        )
+    ).values_list('id', 'expected_number')
+    Encounter.objects.bulk_update(
+        [Encounter(id=pk, sequence_number=number) for pk, number in rows],
+        ['sequence_number'],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('departments', '0003_patientdepartmentstatus_archive_reason_and_more'),
+        ('diagnosis', '0001_initial'),
+        ('encounters', '0011_encounter_archive_reason_encounter_archived_by_and_more'),
+        ('patients', '0002_patient_archive_reason_patient_archived_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='encounter',
+            name='sequence_number',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Номер обращения среди всех обращений пациента по дате начала', null=True, verbose_name='Порядковый номер обращения пациента'),
+        ),
+        migrations.AddIndex(
+            model_name='encounter',
+            index=models.Index(fields=['patient', 'date_start'], name='encounter_patient_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='encounter',
+            index=models.Index(fields=['patient', 'sequence_number'], name='encounter_patient_seq_idx'),
+        ),
+        migrations.RunPython(backfill_sequence_numbers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('encounters', '0012_encounter_sequence_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EncounterEventOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('encounter_id', models.BigIntegerField(db_index=True, verbose_name='ID случая обращения')),
+                ('event_type', models.CharField(max_length=50, verbose_name='Тип события')),
+                ('payload', models.JSONField(default=dict, verbose_name='Данные события')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('processing', 'Обрабатывается'), ('done', 'Обработано'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Доступно для обработки с')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Взято в обработку')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Обработано')),
+            ],
+            options={
+                'verbose_name': 'Событие в очереди',
+                'verbose_name_plural': 'Очередь событий обращений',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'available_at'], name='enc_outbox_status_idx'), models.Index(fields=['encounter_id', 'status', 'id'], name='enc_outbox_encounter_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('departments', '0003_patientdepartmentstatus_archive_reason_and_more'),
+        ('diagnosis', '0001_initial'),
+        ('encounters', '0013_encounter_event_outbox'),
+        ('patients', '0003_active_partial_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='encounter',
+            index=models.Index(condition=models.Q(('is_archived', False)), fields=['patient', 'date_start'], name='encounters_patient_e2e84d_act'),
+        ),
+    ]
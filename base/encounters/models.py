@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.conf import settings
 from patients.models import Patient
 from django.utils import timezone
@@ -10,7 +11,7 @@ from documents.models import ClinicalDocument
 from departments.models import PatientDepartmentStatus, Department
 from diagnosis.models import Diagnosis
 from base.models import ArchivableModel
-from base.services import ArchiveManager
+from base.services import ActiveArchiveManager, ArchiveManager
 
 class EncounterDiagnosis(ArchivableModel):
     """Модель для хранения диагнозов случая обращения"""
@@ -129,6 +130,13 @@ class Encounter(ArchivableModel, models.Model):
     date_start = models.DateTimeField("Дата начала")
     date_end = models.DateTimeField("Дата завершения", null=True, blank=True)
     is_active = models.BooleanField("Активен", default=True)
+    sequence_number = models.PositiveIntegerField(
+        "Порядковый номер обращения пациента",
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Номер обращения среди всех обращений пациента по дате начала"
+    )
 
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -136,6 +144,10 @@ class Encounter(ArchivableModel, models.Model):
 
     objects = ArchiveManager()
     all_objects = models.Manager()
+    active_objects = ActiveArchiveManager()
+
+    # Частичные индексы активных записей: случаи пациента по дате
+    active_indexes = [('patient', 'date_start')]
     
     class OptimizedManager(models.Manager):
         """Менеджер с оптимизированными запросами для избежания N+1 проблем"""
@@ -158,9 +170,18 @@ class Encounter(ArchivableModel, models.Model):
         verbose_name_plural = "Случаи обращений"
         indexes = [
             models.Index(fields=['is_active']),
+            models.Index(fields=['patient', 'date_start'], name='encounter_patient_start_idx'),
+            models.Index(fields=['patient', 'sequence_number'], name='encounter_patient_seq_idx'),
         ]
         ordering = ["is_active", "-date_start"]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем исходную дату начала для поддержки порядковых номеров
+        instance._loaded_date_start = instance.__dict__.get('date_start')
+        return instance
+
     def __str__(self):
         if self.outcome:
             return f"Случай от {self.date_start.strftime('%d.%m.%Y')} — {self.patient.full_name} ({self.get_outcome_display()})"
@@ -240,7 +261,22 @@ class Encounter(ArchivableModel, models.Model):
             self.is_active = False
         else:
             self.is_active = True
-        super().save(*args, **kwargs)
+
+        if self._state.adding and self.sequence_number is None and self.patient_id:
+            # Номер присваивается в одной транзакции со вставкой
+            with transaction.atomic():
+                self._assign_sequence_number()
+                super().save(*args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
+            loaded_date_start = getattr(self, '_loaded_date_start', None)
+            if loaded_date_start is not None and loaded_date_start != self.date_start:
+                # Дата начала изменилась - порядок обращений пациента мог измениться
+                Encounter.renumber_patient_encounters(self.patient_id)
+                self.sequence_number = Encounter.all_objects.values_list(
+                    'sequence_number', flat=True
+                ).get(pk=self.pk)
+        self._loaded_date_start = self.date_start
         # Синхронизация статуса AppointmentEvent
         if hasattr(self, 'appointment'):
             from appointments.models import AppointmentStatus
@@ -250,6 +286,75 @@ class Encounter(ArchivableModel, models.Model):
                     appointment.status = AppointmentStatus.COMPLETED
                     appointment.save(update_fields=['status'])
 
+    def delete(self, *args, **kwargs):
+        patient_id, sequence_number = self.patient_id, self.sequence_number
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            if sequence_number is not None:
+                # Сдвигаем номера последующих обращений пациента
+                Encounter.all_objects.filter(
+                    patient_id=patient_id,
+                    sequence_number__gt=sequence_number
+                ).update(sequence_number=F('sequence_number') - 1)
+        return result
+
+    def _assign_sequence_number(self):
+        """
+        Присваивает порядковый номер новому обращению по дате начала.
+        Обычно обращение добавляется в конец (одна агрегация по индексу);
+        для обращения "задним числом" последующие номера сдвигаются
+        одним UPDATE.
+        """
+        # Блокируем пациента, чтобы параллельные вставки не получили один номер
+        list(Patient.objects.select_for_update().filter(pk=self.patient_id).values_list('pk', flat=True))
+        patient_encounters = Encounter.all_objects.filter(patient_id=self.patient_id)
+        preceding = patient_encounters.filter(date_start__lte=self.date_start).count()
+        patient_encounters.filter(date_start__gt=self.date_start).update(
+            sequence_number=F('sequence_number') + 1
+        )
+        self.sequence_number = preceding + 1
+
+    @classmethod
+    def sequence_window(cls):
+        """Оконное выражение номера обращения внутри пациента (date_start, id)"""
+        from django.db.models import Window
+        from django.db.models.functions import RowNumber
+        return Window(
+            expression=RowNumber(),
+            partition_by=[F('patient_id')],
+            order_by=[F('date_start').asc(), F('id').asc()],
+        )
+
+    @classmethod
+    def renumber_patient_encounters(cls, patient_id=None, batch_size=1000):
+        """
+        Пересчитывает порядковые номера обращений (одного пациента или всех).
+        Обновляются только записи с расхождением.
+
+        Returns:
+            int: количество исправленных записей
+        """
+        queryset = cls.all_objects.all()
+        if patient_id is not None:
+            queryset = queryset.filter(patient_id=patient_id)
+        rows = queryset.annotate(
+            expected_number=cls.sequence_window()
+        ).values_list('id', 'sequence_number', 'expected_number')
+
+        to_update = [
+            cls(id=pk, sequence_number=expected)
+            for pk, current, expected in rows
+            if current != expected
+        ]
+        with transaction.atomic():
+            cls.all_objects.bulk_update(to_update, ['sequence_number'], batch_size=batch_size)
+        return len(to_update)
+
+    @classmethod
+    def get_auto_archive_queryset(cls, cutoff):
+        """Автоархивирование: случаи, закрытые раньше cutoff"""
+        return cls.all_objects.filter(date_end__lt=cutoff)
+
     def _archive_related_records(self, user, reason):
         """Архивирует связанные записи при архивировании Encounter"""
         # Архивируем все связанные диагнозы
@@ -320,3 +425,45 @@ class Encounter(ArchivableModel, models.Model):
         if main_diagnosis and main_diagnosis.diagnosis:
             return main_diagnosis.diagnosis
         return None
+
+
+class EncounterEventOutbox(models.Model):
+    """
+    Исходящая очередь побочных событий шины encounters.
+
+    Запись создается в той же транзакции, что и изменение обращения, и
+    обрабатывается после коммита (пулом потоков или командой
+    process_encounter_outbox). События одного обращения обрабатываются
+    строго в порядке id.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает'),
+        ('processing', 'Обрабатывается'),
+        ('done', 'Обработано'),
+        ('failed', 'Ошибка'),
+    ]
+
+    # Без внешнего ключа: события удаленного обращения сохраняются для аудита
+    encounter_id = models.BigIntegerField("ID случая обращения", db_index=True)
+    event_type = models.CharField("Тип события", max_length=50)
+    payload = models.JSONField("Данные события", default=dict)
+    status = models.CharField("Статус", max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField("Попыток", default=0)
+    available_at = models.DateTimeField("Доступно для обработки с", default=timezone.now)
+    locked_at = models.DateTimeField("Взято в обработку", null=True, blank=True)
+    last_error = models.TextField("Последняя ошибка", blank=True)
+    created_at = models.DateTimeField("Создано", auto_now_add=True)
+    processed_at = models.DateTimeField("Обработано", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Событие в очереди"
+        verbose_name_plural = "Очередь событий обращений"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='enc_outbox_status_idx'),
+            models.Index(fields=['encounter_id', 'status', 'id'], name='enc_outbox_encounter_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} #{self.encounter_id} ({self.get_status_display()})"
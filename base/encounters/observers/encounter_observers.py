@@ -4,6 +4,7 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import datetime
 
+from base.metrics import ENCOUNTER_EVENTS
 from ..models import Encounter
 from ..events.encounter_events import EncounterEvent
 
@@ -76,7 +77,13 @@ class LoggingObserver(Observer):
 
 
 class MetricsObserver(Observer):
-    """Наблюдатель для сбора метрик"""
+    """
+    Наблюдатель для сбора метрик.
+    
+    Счетчики по типам событий пишутся в общее хранилище base.metrics
+    (эндпоинт /metrics, видны всем воркерам); словарь self.metrics
+    остается сводкой текущего процесса.
+    """
     
     def __init__(self):
         super().__init__("MetricsObserver")
@@ -94,6 +101,8 @@ class MetricsObserver(Observer):
         user_id = event.user.id if event.user else 'anonymous'
         encounter_id = event.encounter.id
         
+        ENCOUNTER_EVENTS.inc(event_type=event_type, stage='observed')
+        
         # Общие метрики
         self.metrics['total_events'] += 1
         self.metrics['last_event_time'] = event.timestamp
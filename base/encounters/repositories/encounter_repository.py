@@ -1,8 +1,11 @@
 from typing import List, Optional, Dict, Any
-from django.db.models import QuerySet
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import QuerySet, Prefetch, Count
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ObjectDoesNotExist
 
-from ..models import Encounter
+from ..models import Encounter, EncounterDiagnosis
 from patients.models import Patient
 
 
@@ -74,6 +77,94 @@ class EncounterRepository:
         except ObjectDoesNotExist:
             return None
     
+    def get_detail_context(self, encounter_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Загрузка агрегата обращения для детальной страницы за фиксированное
+        число запросов: обращение (с пациентом, врачом, отделением перевода),
+        диагнозы, планы лечения и обследования, документы с типами и авторами
+        и сводка подписей документов.
+        
+        Диагнозы группируются по типу в Python по уже загруженному списку,
+        поэтому повторных запросов из шаблона не возникает.
+        
+        Args:
+            encounter_id: ID случая обращения
+            
+        Returns:
+            Dict с контекстом шаблона или None если обращение не найдено
+        """
+        prefetches = [
+            Prefetch(
+                'diagnoses',
+                queryset=EncounterDiagnosis.objects.select_related('diagnosis'),
+            ),
+        ]
+        if apps.is_installed('treatment_management'):
+            prefetches.append('treatment_plans')
+        if apps.is_installed('examination_management'):
+            prefetches.append('examination_plans')
+        if apps.is_installed('documents'):
+            from documents.models import ClinicalDocument
+            prefetches.append(Prefetch(
+                'clinical_documents',
+                queryset=ClinicalDocument.objects.select_related(
+                    'document_type', 'author', 'author__doctor_profile'
+                ).order_by('-datetime_document'),
+            ))
+        
+        try:
+            encounter = Encounter.objects.select_related(
+                'patient', 'doctor', 'doctor__doctor_profile',
+                'transfer_to_department', 'archived_by'
+            ).prefetch_related(*prefetches).get(id=encounter_id)
+        except ObjectDoesNotExist:
+            return None
+        
+        diagnoses = {'main': [], 'complication': [], 'comorbidity': []}
+        for diagnosis in encounter.diagnoses.all():
+            diagnoses.setdefault(diagnosis.diagnosis_type, []).append(diagnosis)
+        
+        documents = list(encounter.clinical_documents.all()) if apps.is_installed('documents') else []
+        self.attach_signature_summaries(documents)
+        
+        return {
+            'encounter': encounter,
+            'encounter_number': self.get_encounter_number(encounter),
+            'patient': encounter.patient,
+            'main_diagnosis': diagnoses['main'][0] if diagnoses['main'] else None,
+            'complications': diagnoses['complication'],
+            'comorbidities': diagnoses['comorbidity'],
+            'treatment_plans': list(encounter.treatment_plans.all()) if apps.is_installed('treatment_management') else [],
+            'examination_plans': list(encounter.examination_plans.all()) if apps.is_installed('examination_management') else [],
+            'documents': documents,
+        }
+    
+    def attach_signature_summaries(self, documents: List[Any]) -> None:
+        """
+        Добавляет документам атрибут signature_summary
+        ({'total', 'signed', 'pending'}) одним агрегирующим запросом.
+        
+        Args:
+            documents: список ClinicalDocument
+        """
+        for document in documents:
+            document.signature_summary = {'total': 0, 'signed': 0, 'pending': 0}
+        if not documents or not apps.is_installed('document_signatures'):
+            return
+        
+        from document_signatures.models import DocumentSignature
+        by_id = {document.pk: document for document in documents}
+        rows = DocumentSignature.objects.filter(
+            content_type=ContentType.objects.get_for_model(documents[0]),
+            object_id__in=by_id.keys()
+        ).values('object_id', 'status').annotate(count=Count('id')).order_by()
+        
+        for row in rows:
+            summary = by_id[row['object_id']].signature_summary
+            summary['total'] += row['count']
+            if row['status'] in ('signed', 'pending'):
+                summary[row['status']] += row['count']
+    
     def get_by_patient(self, patient: Patient) -> QuerySet[Encounter]:
         """
         Получение всех случаев обращения пациента.
@@ -146,7 +237,9 @@ class EncounterRepository:
     
     def get_encounter_number(self, encounter: Encounter) -> int:
         """
-        Вычисление номера обращения для пациента.
+        Номер обращения для пациента.
+        Берется из сохраненного sequence_number; для записей без номера
+        (до заполнения командой repair_encounter_numbers) вычисляется запросом.
         
         Args:
             encounter: Случай обращения
@@ -154,11 +247,33 @@ class EncounterRepository:
         Returns:
             Номер обращения (начиная с 1)
         """
-        return Encounter.objects.filter(
+        if encounter.sequence_number:
+            return encounter.sequence_number
+        return Encounter.all_objects.filter(
             patient_id=encounter.patient_id,
             date_start__lt=encounter.date_start
         ).count() + 1
     
+    def with_encounter_numbers(self, queryset: QuerySet[Encounter]) -> QuerySet[Encounter]:
+        """
+        Аннотирует список обращений номером encounter_number.
+        Используется сохраненный sequence_number, а при его отсутствии -
+        оконная функция RowNumber по пациенту.
+        
+        Примечание: оконная функция нумерует только строки, попавшие в
+        queryset, поэтому fallback точен для нефильтрованных по пациенту
+        списков (все обращения пациента).
+        
+        Args:
+            queryset: QuerySet случаев обращения
+            
+        Returns:
+            QuerySet с аннотацией encounter_number
+        """
+        return queryset.annotate(
+            encounter_number=Coalesce('sequence_number', Encounter.sequence_window())
+        )
+    
     def get_patient_encounters_count(self, patient: Patient) -> int:
         """
         Получение количества случаев обращения пациента.
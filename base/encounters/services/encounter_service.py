@@ -356,9 +356,6 @@ class EncounterService:
     # Приватные методы вычислений
     
     def _calculate_encounter_number(self) -> int:
-        """Вычисление номера обращения для пациента"""
-        # Используем более эффективный запрос с select_related
-        return Encounter.objects.filter(
-            patient_id=self.encounter.patient_id,
-            date_start__lt=self.encounter.date_start
-        ).select_related('patient').count() + 1 
\ No newline at end of file
+        """Номер обращения для пациента (сохраненный sequence_number)"""
+        from ..repositories.encounter_repository import EncounterRepository
+        return EncounterRepository().get_encounter_number(self.encounter)
@@ -0,0 +1,245 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from diagnosis.models import Diagnosis
+from document_signatures.models import DocumentSignature, SignatureWorkflow
+from documents.models import ClinicalDocument, DocumentType
+from examination_management.models import ExaminationPlan
+from patients.models import Patient
+from treatment_management.models import TreatmentPlan
+
+from .events.encounter_events import EncounterClosedEvent, EncounterReopenedEvent, event_bus
+from .events.outbox import outbox_dispatcher
+from .models import Encounter, EncounterDiagnosis, EncounterEventOutbox
+from .repositories.encounter_repository import EncounterRepository
+
+
+# Обращение, диагнозы, планы лечения, планы обследования, документы, подписи
+DETAIL_CONTEXT_QUERY_BUDGET = 6
+
+
+class EncounterDetailContextTests(TestCase):
+    """Бюджет запросов детальной страницы обращения"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='doctor', password='password')
+        cls.patient = Patient.objects.create(
+            last_name='Иванов', first_name='Иван',
+            birth_date=datetime.date(1980, 1, 1), gender='male'
+        )
+        cls.encounter = Encounter.objects.create(
+            patient=cls.patient, doctor=cls.user, date_start=timezone.now()
+        )
+
+        main, complication, comorbidity = [
+            Diagnosis.objects.create(code=f'A0{i}', name=f'Диагноз {i}') for i in range(3)
+        ]
+        EncounterDiagnosis.objects.create(encounter=cls.encounter, diagnosis_type='main', diagnosis=main)
+        EncounterDiagnosis.objects.create(encounter=cls.encounter, diagnosis_type='complication', diagnosis=complication)
+        EncounterDiagnosis.objects.create(encounter=cls.encounter, diagnosis_type='comorbidity', diagnosis=comorbidity)
+        EncounterDiagnosis.objects.create(
+            encounter=cls.encounter, diagnosis_type='comorbidity', custom_diagnosis='Собственный диагноз'
+        )
+
+        TreatmentPlan.objects.create(encounter=cls.encounter, name='План лечения')
+        ExaminationPlan.objects.create(encounter=cls.encounter, name='План обследования')
+
+        document_type = DocumentType.objects.create(name='Осмотр', schema={})
+        workflow = SignatureWorkflow.objects.create(
+            name='Стандартный', workflow_type=SignatureWorkflow.WORKFLOW_TYPES[0][0]
+        )
+        content_type = ContentType.objects.get_for_model(ClinicalDocument)
+        for i in range(5):
+            document = ClinicalDocument.objects.create(
+                document_type=document_type, encounter=cls.encounter, author=cls.user, data={}
+            )
+            DocumentSignature.objects.create(
+                content_type=content_type, object_id=document.pk, workflow=workflow,
+                signature_type='doctor', status='signed' if i % 2 else 'pending',
+                required_signer=cls.user
+            )
+
+    def setUp(self):
+        # Кэш ContentType прогревается заранее, чтобы бюджет не зависел от порядка тестов
+        ContentType.objects.get_for_model(ClinicalDocument)
+
+    def test_detail_context_query_budget(self):
+        with self.assertNumQueries(DETAIL_CONTEXT_QUERY_BUDGET):
+            context = EncounterRepository().get_detail_context(self.encounter.pk)
+            # Все, что использует шаблон, уже загружено
+            context['main_diagnosis'].get_display_name()
+            [diagnosis.get_display_name() for diagnosis in context['comorbidities']]
+            context['encounter'].patient.get_full_name_with_age()
+            for document in context['documents']:
+                document.document_type.name
+                document.author.username
+                document.signature_summary
+
+        self.assertEqual(context['main_diagnosis'].diagnosis.code, 'A00')
+        self.assertEqual(len(context['complications']), 1)
+        self.assertEqual(len(context['comorbidities']), 2)
+        self.assertEqual(len(context['treatment_plans']), 1)
+        self.assertEqual(len(context['examination_plans']), 1)
+        self.assertEqual(len(context['documents']), 5)
+        self.assertEqual(
+            sum(document.signature_summary['signed'] for document in context['documents']), 2
+        )
+
+    def test_query_budget_does_not_grow_with_documents(self):
+        document_type = DocumentType.objects.first()
+        for _ in range(10):
+            ClinicalDocument.objects.create(
+                document_type=document_type, encounter=self.encounter, author=self.user, data={}
+            )
+
+        with self.assertNumQueries(DETAIL_CONTEXT_QUERY_BUDGET):
+            context = EncounterRepository().get_detail_context(self.encounter.pk)
+        self.assertEqual(len(context['documents']), 15)
+
+    def test_missing_encounter(self):
+        self.assertIsNone(EncounterRepository().get_detail_context(0))
+
+    def test_detail_view(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('encounters:encounter_detail', args=[self.encounter.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['main_diagnosis'].diagnosis.code, 'A00')
+        self.assertContains(response, 'Сопутствующие: 2')
+
+
+@override_settings(ENCOUNTER_EVENTS_DISPATCH='sync')
+class EncounterEventOutboxTests(TestCase):
+    """Доставка побочных событий через исходящую очередь"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='doctor', password='password')
+        patient = Patient.objects.create(
+            last_name='Петров', first_name='Петр',
+            birth_date=datetime.date(1990, 1, 1), gender='male'
+        )
+        cls.encounter = Encounter.objects.create(patient=patient, doctor=cls.user, date_start=timezone.now())
+
+    def test_side_effects_run_after_commit(self):
+        with mock.patch.object(event_bus, 'dispatch_side_effects') as dispatch:
+            with self.captureOnCommitCallbacks(execute=True):
+                event_bus.publish(EncounterClosedEvent(self.encounter, outcome='consultation_end', user=self.user))
+                self.assertEqual(EncounterEventOutbox.objects.get().status, 'pending')
+                dispatch.assert_not_called()
+
+        entry = EncounterEventOutbox.objects.get()
+        self.assertEqual(entry.status, 'done')
+        event = dispatch.call_args.args[0]
+        self.assertIsInstance(event, EncounterClosedEvent)
+        self.assertEqual(event.outcome, 'consultation_end')
+        self.assertEqual(event.user, self.user)
+
+    def test_failed_event_is_retried_and_blocks_later_events(self):
+        with mock.patch.object(event_bus, 'dispatch_side_effects', side_effect=RuntimeError('недоступно')):
+            with self.captureOnCommitCallbacks(execute=True):
+                event_bus.publish(EncounterClosedEvent(self.encounter, outcome='consultation_end'))
+                event_bus.publish(EncounterReopenedEvent(self.encounter))
+
+        first, second = EncounterEventOutbox.objects.order_by('id')
+        self.assertEqual((first.status, first.attempts), ('pending', 1))
+        self.assertGreater(first.available_at, timezone.now())
+        self.assertEqual((second.status, second.attempts), ('pending', 0))
+
+        EncounterEventOutbox.objects.update(available_at=timezone.now())
+        with mock.patch.object(event_bus, 'dispatch_side_effects') as dispatch:
+            self.assertEqual(outbox_dispatcher.drain_all(), 2)
+        self.assertEqual(
+            [type(call.args[0]) for call in dispatch.call_args_list],
+            [EncounterClosedEvent, EncounterReopenedEvent]
+        )
+
+
+class EncounterSequenceNumberTests(TestCase):
+    """Порядковые номера обращений пациента"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = Patient.objects.create(
+            last_name='Смирнова', first_name='Ольга',
+            birth_date=datetime.date(1975, 6, 1), gender='female'
+        )
+        cls.other_patient = Patient.objects.create(
+            last_name='Кузнецов', first_name='Олег',
+            birth_date=datetime.date(1990, 2, 2), gender='male'
+        )
+        cls.base = timezone.now().replace(microsecond=0) - datetime.timedelta(days=30)
+
+    def create(self, days, patient=None):
+        return Encounter.objects.create(
+            patient=patient or self.patient, date_start=self.base + datetime.timedelta(days=days)
+        )
+
+    def numbers(self, patient=None):
+        """[(id, номер)] в порядке (date_start, id)"""
+        return list(
+            Encounter.all_objects.filter(patient=patient or self.patient)
+            .order_by('date_start', 'id').values_list('id', 'sequence_number')
+        )
+
+    def test_append_and_backdated_insert(self):
+        first, second = self.create(0), self.create(10)
+        self.assertEqual((first.sequence_number, second.sequence_number), (1, 2))
+        self.assertEqual(self.create(0, patient=self.other_patient).sequence_number, 1)
+
+        backdated = self.create(5)
+        self.assertEqual(backdated.sequence_number, 2)
+        self.assertEqual(self.numbers(), [(first.pk, 1), (backdated.pk, 2), (second.pk, 3)])
+
+    def test_same_date_start_orders_by_id(self):
+        first, later = self.create(0), self.create(10)
+        same = self.create(0)
+        self.assertEqual(same.sequence_number, 2)
+        self.assertEqual(self.numbers(), [(first.pk, 1), (same.pk, 2), (later.pk, 3)])
+        # Оконный пересчет дает те же номера
+        self.assertEqual(Encounter.renumber_patient_encounters(self.patient.pk), 0)
+
+    def test_date_start_change_renumbers(self):
+        first, second, third = self.create(0), self.create(10), self.create(20)
+        first.date_start = self.base + datetime.timedelta(days=15)
+        first.save()
+        self.assertEqual(first.sequence_number, 2)
+        self.assertEqual(self.numbers(), [(second.pk, 1), (first.pk, 2), (third.pk, 3)])
+
+        # Сохранение без изменения даты номера не трогает
+        reloaded = Encounter.all_objects.get(pk=third.pk)
+        reloaded.save()
+        self.assertEqual(self.numbers(), [(second.pk, 1), (first.pk, 2), (third.pk, 3)])
+
+    def test_delete_compacts_numbers(self):
+        first, second, third = self.create(0), self.create(10), self.create(20)
+        other = self.create(5, patient=self.other_patient)
+        second.delete()
+        self.assertEqual(self.numbers(), [(first.pk, 1), (third.pk, 2)])
+        self.assertEqual(self.numbers(self.other_patient), [(other.pk, 1)])
+
+    def test_repair_command_fixes_only_mismatches(self):
+        first, second, third = self.create(0), self.create(10), self.create(20)
+        other = self.create(0, patient=self.other_patient)
+        Encounter.all_objects.filter(pk__in=[first.pk, third.pk]).update(sequence_number=None)
+        Encounter.all_objects.filter(pk=other.pk).update(sequence_number=7)
+
+        output = StringIO()
+        call_command('repair_encounter_numbers', '--check', stdout=output)
+        self.assertIn('Обращений с неверным номером: 3', output.getvalue())
+        self.assertEqual(self.numbers()[0], (first.pk, None))
+
+        call_command('repair_encounter_numbers', '--patient', str(self.patient.pk), stdout=StringIO())
+        self.assertEqual(self.numbers(), [(first.pk, 1), (second.pk, 2), (third.pk, 3)])
+        self.assertEqual(self.numbers(self.other_patient), [(other.pk, 7)])
+
+        self.assertEqual(Encounter.renumber_patient_encounters(), 1)
+        self.assertEqual(self.numbers(self.other_patient), [(other.pk, 1)])
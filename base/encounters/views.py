@@ -5,7 +5,7 @@ from django.views.generic import (
     ListView, DetailView, CreateView, UpdateView, DeleteView, View
 )
 from django.contrib.contenttypes.models import ContentType
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404
 from django.db.models import Q
 from django.utils import timezone
 
@@ -15,6 +15,7 @@ from .forms import (
     EncounterDiagnosisAdvancedForm, EncounterCloseForm
 )
 from .services.encounter_service import EncounterService
+from .repositories.encounter_repository import EncounterRepository
 from patients.models import Patient
 
 
@@ -27,8 +28,10 @@ class EncounterListView(LoginRequiredMixin, ListView):
     paginate_by = 20
 
     def get_queryset(self):
-        # Показываем как активные, так и архивированные записи
-        return Encounter.objects.select_related('patient', 'doctor').order_by('-date_start')
+        # Архивированные записи показываются, если это разрешено show_archived_in_list
+        return EncounterRepository().with_encounter_numbers(
+            Encounter.objects.for_list().select_related('patient', 'doctor')
+        ).order_by('-date_start')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -42,93 +45,17 @@ class EncounterDetailView(LoginRequiredMixin, DetailView):
     template_name = 'encounters/detail.html'
     context_object_name = 'encounter'
 
-    def get_queryset(self):
-        return Encounter.objects.select_related(
-            'patient', 'doctor'
-        ).prefetch_related(
-            'diagnoses__diagnosis'
-        )
+    def get_object(self, queryset=None):
+        # Весь агрегат обращения загружается репозиторием за фиксированное
+        # число запросов (см. EncounterRepository.get_detail_context)
+        self.detail_context = EncounterRepository().get_detail_context(self.kwargs['pk'])
+        if self.detail_context is None:
+            raise Http404("Обращение не найдено")
+        return self.detail_context['encounter']
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        encounter = self.object
-        
-        # Добавляем порядковый номер обращения для данного пациента
-        patient_encounters = Encounter.objects.filter(
-            patient=encounter.patient
-        ).order_by('date_start')
-        
-        # Находим позицию текущего обращения в списке обращений пациента
-        encounter_position = 1
-        for i, patient_encounter in enumerate(patient_encounters):
-            if patient_encounter.pk == encounter.pk:
-                encounter_position = i + 1
-                break
-        
-        context['encounter_number'] = encounter_position
-        
-        # Добавляем информацию о диагнозах
-        main_diagnosis = encounter.diagnoses.filter(diagnosis_type='main').first()
-        complications = encounter.diagnoses.filter(diagnosis_type='complication')
-        comorbidities = encounter.diagnoses.filter(diagnosis_type='comorbidity')
-        
-        context.update({
-            'main_diagnosis': main_diagnosis,
-            'complications': complications,
-            'comorbidities': comorbidities,
-            'patient': encounter.patient,
-        })
-        
-        # Добавляем информацию о планах лечения
-        try:
-            from treatment_management.models import TreatmentPlan
-            treatment_plans = TreatmentPlan.objects.filter(encounter=encounter)
-            context['treatment_plans'] = treatment_plans
-        except ImportError:
-            # Если приложение treatment_management не установлено
-            context['treatment_plans'] = []
-        
-        # Добавляем информацию о планах обследования
-        try:
-            from examination_management.models import ExaminationPlan
-            examination_plans = ExaminationPlan.objects.filter(encounter=encounter)
-            context['examination_plans'] = examination_plans
-        except ImportError:
-            # Если приложение examination_management не установлено
-            context['examination_plans'] = []
-        
-        # Добавляем прикрепленные документы (включая дневники)
-        try:
-            from documents.models import ClinicalDocument
-            # Получаем все документы, связанные с этим случаем
-            # Используем прямое поле encounter в ClinicalDocument
-            all_documents = ClinicalDocument.objects.filter(
-                encounter=encounter
-            ).select_related('document_type', 'author').order_by('-datetime_document')
-            
-            # Убираем GenericRelation, используем только прямую связь
-            # generic_documents = encounter.documents.all()
-            
-            # Объединяем документы, убирая дубликаты
-            all_document_ids = set()
-            combined_documents = []
-            
-            # Добавляем документы из новой системы
-            for doc in all_documents:
-                combined_documents.append(doc)
-                all_document_ids.add(doc.pk)
-            
-            # Убираем GenericRelation, так как используем только прямую связь
-            # for doc in generic_documents:
-            #     if doc.pk not in all_document_ids:
-            #         combined_documents.append(doc)
-            #         all_document_ids.add(doc.pk)
-            
-            context['documents'] = combined_documents
-        except ImportError:
-            # Fallback к прямой связи, если приложение documents не установлено
-            context['documents'] = encounter.clinical_documents.all()
-        
+        context.update(self.detail_context)
         return context
 
 
@@ -372,17 +299,8 @@ class EncounterCloseView(LoginRequiredMixin, View):
             messages.warning(request, 'Этот случай обращения уже находится в закрытом состоянии')
             return redirect('encounters:encounter_detail', pk=pk)
         
-        # Вычисляем порядковый номер обращения для данного пациента
-        patient_encounters = Encounter.objects.filter(
-            patient=encounter.patient
-        ).order_by('date_start')
-        
-        # Находим позицию текущего обращения в списке обращений пациента
-        encounter_position = 1
-        for i, patient_encounter in enumerate(patient_encounters):
-            if patient_encounter.pk == encounter.pk:
-                encounter_position = i + 1
-                break
+        # Порядковый номер обращения для данного пациента
+        encounter_position = EncounterRepository().get_encounter_number(encounter)
         
         # Создаем сервис для валидации
         service = EncounterService(encounter)
@@ -439,17 +357,8 @@ class EncounterCloseView(LoginRequiredMixin, View):
             # Показываем общее уведомление об ошибках
             messages.error(request, "Пожалуйста, исправьте ошибки в форме закрытия случая")
         
-        # Вычисляем порядковый номер обращения для данного пациента
-        patient_encounters = Encounter.objects.filter(
-            patient=encounter.patient
-        ).order_by('date_start')
-        
-        # Находим позицию текущего обращения в списке обращений пациента
-        encounter_position = 1
-        for i, patient_encounter in enumerate(patient_encounters):
-            if patient_encounter.pk == encounter.pk:
-                encounter_position = i + 1
-                break
+        # Порядковый номер обращения для данного пациента
+        encounter_position = EncounterRepository().get_encounter_number(encounter)
         
         return render(request, 'encounters/close_form.html', {
             'form': form,
@@ -7,7 +7,7 @@ from django.dispatch import receiver
 from django.urls import reverse
 from django.core.exceptions import ValidationError
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 from encounters.models import Encounter
 from lab_tests.models import LabTestDefinition
 from instrumental_procedures.models import InstrumentalProcedureDefinition
@@ -312,6 +312,16 @@ class ExaminationPlan(ArchivableModel, BaseExaminationPlan):
     # Менеджеры для архивирования
     objects = ArchiveManager()
     all_objects = models.Manager()
+
+    @classmethod
+    def get_auto_archive_queryset(cls, cutoff):
+        """Автоархивирование: планы старше cutoff без активных и приостановленных исследований"""
+        open_statuses = ['active', 'paused']
+        return cls.all_objects.filter(created_at__lt=cutoff).exclude(
+            Exists(ExaminationLabTest._base_manager.filter(examination_plan=OuterRef('pk'), status__in=open_statuses))
+        ).exclude(
+            Exists(ExaminationInstrumental._base_manager.filter(examination_plan=OuterRef('pk'), status__in=open_statuses))
+        )
     
     def _archive_related_records(self, user, reason):
         """Архивирует связанные записи при архивировании ExaminationPlan"""
@@ -325,32 +325,39 @@ class ExaminationStatusService:
             notes: Примечания к изменению статуса
         """
         try:
-            from clinical_scheduling.models import ScheduledAppointment
-            from django.contrib.contenttypes.models import ContentType
+            from clinical_scheduling.services import ClinicalSchedulingService
             
-            content_type = ContentType.objects.get_for_model(examination_item.__class__)
-            scheduled_appointments = ScheduledAppointment.objects.filter(
-                content_type=content_type,
-                object_id=examination_item.pk
+            # Один UPDATE вместо сохранения каждого события
+            ClinicalSchedulingService.set_assignment_execution_status(
+                examination_item, new_status, user, notes
             )
-            
-            if scheduled_appointments.exists():
-                for appointment in scheduled_appointments:
-                    if new_status == 'completed':
-                        appointment.mark_as_completed(user, notes)
-                    elif new_status == 'rejected':
-                        appointment.mark_as_rejected(user, notes)
-                    elif new_status == 'skipped':
-                        appointment.mark_as_skipped(user, notes)
-                    elif new_status == 'partial':
-                        appointment.mark_as_partial(user, notes, '')
-                    else:
-                        appointment.execution_status = new_status
-                        appointment.save(update_fields=['execution_status'])
                         
         except Exception as e:
             print(f"Ошибка при обновлении статуса назначения: {e}")
     
+    @staticmethod
+    def complete_examination_item(examination_item, user=None, notes=''):
+        """
+        Отмечает исследование выполненным и переносит статус на его
+        запланированные события. Выполняется как отложенный побочный
+        эффект (base.side_effects): при заполнении результата и подписании
+        в одной транзакции работа выполняется один раз.
+        
+        Args:
+            examination_item: ExaminationLabTest или ExaminationInstrumental
+            user: Пользователь, завершивший исследование
+            notes: Примечания к выполнению
+        """
+        # Состояние перечитывается: с момента постановки оно могло измениться
+        examination_item = type(examination_item)._base_manager.get(pk=examination_item.pk)
+        if examination_item.status != 'completed':
+            examination_item.status = 'completed'
+            examination_item.completed_at = timezone.now()
+            examination_item.completed_by = user
+            examination_item.save()
+        
+        ExaminationStatusService.update_assignment_status(examination_item, 'completed', user, notes)
+    
     @staticmethod
     def create_schedule_for_assignment(examination_item, user, start_date=None, first_time=None, times_per_day=1, duration_days=1):
         """
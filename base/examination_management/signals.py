@@ -5,7 +5,9 @@ from django.utils import timezone
 
 from .models import ExaminationLabTest, ExaminationInstrumental
 from clinical_scheduling.models import ScheduledAppointment
-from .services import ExaminationIntegrationService
+from base.side_effects import defer
+from clinical_scheduling.services import ClinicalSchedulingService
+from .services import ExaminationIntegrationService, ExaminationStatusService
 
 
 @receiver(post_save, sender=ExaminationLabTest)
@@ -13,64 +15,14 @@ def sync_examination_lab_test_status(sender, instance, created, **kwargs):
     """
     Синхронизирует статус лабораторного исследования с запланированными событиями
     
-    Когда статус ExaminationLabTest изменяется, автоматически обновляются
-    соответствующие ScheduledAppointment в clinical_scheduling
+    Когда статус ExaminationLabTest изменяется, соответствующие
+    ScheduledAppointment в clinical_scheduling обновляются одним запросом
     """
     if created:
         # Новое исследование - ничего не синхронизируем
         return
     
-    # Получаем ContentType для ExaminationLabTest
-    content_type = ContentType.objects.get_for_model(ExaminationLabTest)
-    
-    # Находим все запланированные события для этого исследования
-    scheduled_appointments = ScheduledAppointment.objects.filter(
-        content_type=content_type,
-        object_id=instance.pk
-    )
-    
-    if not scheduled_appointments.exists():
-        return
-    
-    # Обновляем статус запланированных событий в зависимости от статуса исследования
-    # Используем status из ArchivableModel
-    if instance.status == 'cancelled':
-        # Отменяем все будущие запланированные события
-        future_appointments = scheduled_appointments.filter(
-            scheduled_date__gte=timezone.now().date()
-        )
-        
-        for appointment in future_appointments:
-            appointment.execution_status = 'canceled'
-            appointment.save(update_fields=['execution_status'])
-            
-    elif instance.status == 'paused':
-        # Приостанавливаем все будущие запланированные события
-        future_appointments = scheduled_appointments.filter(
-            scheduled_date__gte=timezone.now().date()
-        )
-        
-        for appointment in future_appointments:
-            appointment.execution_status = 'skipped'  # Пропускаем на время приостановки
-            appointment.save(update_fields=['execution_status'])
-            
-    elif instance.status == 'active':
-        # Возобновляем приостановленные события
-        paused_appointments = scheduled_appointments.filter(
-            execution_status='skipped'
-        )
-        
-        for appointment in paused_appointments:
-            appointment.execution_status = 'scheduled'
-            appointment.save(update_fields=['execution_status'])
-            
-    elif instance.status == 'completed':
-        # Помечаем все события как завершенные
-        for appointment in scheduled_appointments:
-            if appointment.execution_status == 'scheduled':
-                appointment.execution_status = 'completed'
-                appointment.executed_at = timezone.now()
-                appointment.save(update_fields=['execution_status', 'executed_at'])
+    ClinicalSchedulingService.sync_assignment_status(instance, instance.status)
 
 
 @receiver(post_save, sender=ExaminationInstrumental)
@@ -78,63 +30,14 @@ def sync_examination_instrumental_status(sender, instance, created, **kwargs):
     """
     Синхронизирует статус инструментального исследования с запланированными событиями
     
-    Когда статус ExaminationInstrumental изменяется, автоматически обновляются
-    соответствующие ScheduledAppointment в clinical_scheduling
+    Когда статус ExaminationInstrumental изменяется, соответствующие
+    ScheduledAppointment в clinical_scheduling обновляются одним запросом
     """
     if created:
         # Новое исследование - ничего не синхронизируем
         return
     
-    # Получаем ContentType для ExaminationInstrumental
-    content_type = ContentType.objects.get_for_model(ExaminationInstrumental)
-    
-    # Находим все запланированные события для этого исследования
-    scheduled_appointments = ScheduledAppointment.objects.filter(
-        content_type=content_type,
-        object_id=instance.pk
-    )
-    
-    if not scheduled_appointments.exists():
-        return
-    
-    # Обновляем статус запланированных событий в зависимости от статуса исследования
-    if instance.status == 'cancelled':
-        # Отменяем все будущие запланированные события
-        future_appointments = scheduled_appointments.filter(
-            scheduled_date__gte=timezone.now().date()
-        )
-        
-        for appointment in future_appointments:
-            appointment.execution_status = 'canceled'
-            appointment.save(update_fields=['execution_status'])
-            
-    elif instance.status == 'paused':
-        # Приостанавливаем все будущие запланированные события
-        future_appointments = scheduled_appointments.filter(
-            scheduled_date__gte=timezone.now().date()
-        )
-        
-        for appointment in future_appointments:
-            appointment.execution_status = 'skipped'  # Пропускаем на время приостановки
-            appointment.save(update_fields=['execution_status'])
-            
-    elif instance.status == 'active':
-        # Возобновляем приостановленные события
-        paused_appointments = scheduled_appointments.filter(
-            execution_status='skipped'
-        )
-        
-        for appointment in paused_appointments:
-            appointment.execution_status = 'scheduled'
-            appointment.save(update_fields=['execution_status'])
-            
-    elif instance.status == 'completed':
-        # Помечаем все события как завершенные
-        for appointment in scheduled_appointments:
-            if appointment.execution_status == 'scheduled':
-                appointment.execution_status = 'completed'
-                appointment.executed_at = timezone.now()
-                appointment.save(update_fields=['execution_status', 'executed_at'])
+    ClinicalSchedulingService.sync_assignment_status(instance, instance.status)
 
 
 # ============================================================================
@@ -270,27 +173,17 @@ def sync_instrumental_result_completion(sender, instance, created, **kwargs):
     """
     Синхронизирует статус выполнения инструментального исследования
     когда данные результата заполнены
+    
+    Завершение исследования и обновление clinical_scheduling выполняются
+    один раз после коммита (base.side_effects), сколько бы раз результат
+    ни сохранялся в транзакции
     """
-    try:
-        # Обновляем статус при изменении или создании, если результат заполнен
-        if instance.examination_instrumental and instance.is_completed:
-            # Используем прямую связь с ExaminationInstrumental
-            examination = instance.examination_instrumental
-            
-            # Если данные заполнены, обновляем статус в examination_management
-            examination.status = 'completed'
-            examination.completed_at = timezone.now()
-            examination.completed_by = instance.author
-            examination.save()
-            
-            # Обновляем статус в clinical_scheduling
-            from .services import ExaminationStatusService
-            ExaminationStatusService.update_assignment_status(
-                examination, 'completed', instance.author, 'Данные результата заполнены'
-            )
-                
-    except Exception as e:
-        print(f"Ошибка при синхронизации статуса инструментального исследования: {e}")
+    if instance.examination_instrumental_id and instance.is_completed:
+        defer(
+            'examination.complete', instance.examination_instrumental,
+            ExaminationStatusService.complete_examination_item,
+            user=instance.author, notes='Данные результата заполнены'
+        )
 
 
 @receiver(post_save, sender='lab_tests.LabTestResult')
@@ -298,29 +191,16 @@ def sync_lab_test_result_completion(sender, instance, created, **kwargs):
     """
     Синхронизирует статус выполнения лабораторного исследования
     когда данные результата заполнены
+    
+    Завершение исследования и обновление clinical_scheduling выполняются
+    один раз после коммита (base.side_effects)
     """
-    try:
-        # Обновляем статус при изменении или создании, если результат заполнен
-        if instance.examination_lab_test and instance.is_completed:
-            # Используем прямую связь с ExaminationLabTest
-            examination = instance.examination_lab_test
-            
-            # Если данные заполнены, обновляем статус в examination_management
-            examination.status = 'completed'
-            examination.completed_at = timezone.now()
-            examination.completed_by = instance.author
-            examination.save()
-            
-            # Обновляем статус в clinical_scheduling
-            from .services import ExaminationStatusService
-            ExaminationStatusService.update_assignment_status(
-                examination, 'completed', instance.author, 'Данные результата заполнены'
-            )
-                
-    except Exception as e:
-        print(f"Ошибка при синхронизации статуса лабораторного исследования: {e}")
-        import traceback
-        traceback.print_exc()
+    if instance.examination_lab_test_id and instance.is_completed:
+        defer(
+            'examination.complete', instance.examination_lab_test,
+            ExaminationStatusService.complete_examination_item,
+            user=instance.author, notes='Данные результата заполнены'
+        )
 
 
 # ============================================================================
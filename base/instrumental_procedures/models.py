@@ -94,6 +94,10 @@ class InstrumentalProcedureResult(models.Model):
         verbose_name = "Результат инструментального исследования"
         verbose_name_plural = "Результаты инструментальных исследований"
         ordering = ["-datetime_result"]
+        indexes = [
+            # Хронология пациента (patients.services.PatientTimelineService)
+            models.Index(fields=['patient', 'datetime_result'], name='instrresult_patient_time_idx'),
+        ]
 
     def __str__(self):
         return f"Результат {self.procedure_definition.name} для {self.patient} от {self.datetime_result.strftime('%d.%m.%Y')}"
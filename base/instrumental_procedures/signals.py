@@ -1,10 +1,10 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
-from django.utils import timezone
 
 from .models import InstrumentalProcedureResult
 from clinical_scheduling.models import ScheduledAppointment
+from clinical_scheduling.services import ClinicalSchedulingService
 
 
 @receiver(post_save, sender=InstrumentalProcedureResult)
@@ -19,24 +19,8 @@ def sync_instrumental_procedure_result_status(sender, instance, created, **kwarg
         # Обновление результата - ничего не синхронизируем
         return
     
-    # Получаем ContentType для InstrumentalProcedureResult
-    content_type = ContentType.objects.get_for_model(InstrumentalProcedureResult)
-    
-    # Находим все запланированные события для этого результата
-    scheduled_appointments = ScheduledAppointment.objects.filter(
-        content_type=content_type,
-        object_id=instance.pk
-    )
-    
-    if not scheduled_appointments.exists():
-        return
-    
-    # Помечаем все связанные события как завершенные
-    for appointment in scheduled_appointments:
-        if appointment.execution_status == 'scheduled':
-            appointment.execution_status = 'completed'
-            appointment.executed_at = timezone.now()
-            appointment.save(update_fields=['execution_status', 'executed_at'])
+    # Помечаем ожидающие связанные события как завершенные одним UPDATE
+    ClinicalSchedulingService.sync_assignment_status(instance, 'completed')
 
 
 @receiver(post_delete, sender=InstrumentalProcedureResult)
@@ -15,6 +15,7 @@ from django.shortcuts import redirect, get_object_or_404
 from django.contrib import messages
 from django.urls import reverse
 from document_signatures.services import SignatureService
+from base.side_effects import coalesce
 
 
 class InstrumentalProcedureResultListView(LoginRequiredMixin, ListView):
@@ -96,7 +97,9 @@ class InstrumentalProcedureResultCreateView(LoginRequiredMixin, View):
                 datetime_result=form.cleaned_data['datetime_result'],
                 data={k: v for k, v in form.cleaned_data.items() if k != 'datetime_result'}
             )
-            result.save()
+            # Побочные эффекты сохранения выполняются одним проходом после коммита
+            with coalesce():
+                result.save()
 
             messages.success(request, 'Результат успешно создан')
             return redirect(reverse_lazy('instrumental_procedures:result_list'))
@@ -149,7 +152,9 @@ class InstrumentalProcedureResultUpdateView(LoginRequiredMixin, View):
                 result.is_completed = False
                 messages.warning(request, 'Результат обновлен, но данные не заполнены')
             
-            result.save()
+            # Побочные эффекты сохранения выполняются одним проходом после коммита
+            with coalesce():
+                result.save()
             return redirect(reverse_lazy('instrumental_procedures:result_detail', kwargs={'pk': result.pk}))
 
         return render(request, self.template_name, {
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('examination_management', '0011_add_scheduled_time_to_instrumental'),
+        ('lab_tests', '0005_labtestresult_cancellation_reason_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='labtestresult',
+            name='examination_lab_test',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='lab_test_results', to='examination_management.examinationlabtest', verbose_name='Назначение лабораторного исследования'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+from base.db_profiles import postgres_only_sql
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнять в транзакции
+    atomic = False
+
+    dependencies = [
+        ('lab_tests', '0006_labtestresult_examination_lab_test'),
+    ]
+
+    operations = [
+        postgres_only_sql(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS lab_test_result_data_gin '
+            'ON lab_tests_labtestresult USING gin (data)',
+            'DROP INDEX CONCURRENTLY IF EXISTS lab_test_result_data_gin',
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('examination_management', '0011_add_scheduled_time_to_instrumental'),
+        ('lab_tests', '0007_labtestresult_data_gin'),
+        ('patients', '0003_active_partial_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='labtestresult',
+            index=models.Index(fields=['patient', 'datetime_result'], name='labresult_patient_time_idx'),
+        ),
+    ]
@@ -92,6 +92,10 @@ class LabTestResult(models.Model):
         verbose_name = "Результат лабораторного исследования"
         verbose_name_plural = "Результаты лабораторных исследований"
         ordering = ["-datetime_result"]
+        indexes = [
+            # Хронология пациента (patients.services.PatientTimelineService)
+            models.Index(fields=['patient', 'datetime_result'], name='labresult_patient_time_idx'),
+        ]
 
     def __str__(self):
         return f"Результат {self.procedure_definition.name} для {self.patient} от {self.datetime_result.strftime('%d.%m.%Y')}"
@@ -1,10 +1,10 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
-from django.utils import timezone
 
 from .models import LabTestResult
 from clinical_scheduling.models import ScheduledAppointment
+from clinical_scheduling.services import ClinicalSchedulingService
 
 
 @receiver(post_save, sender=LabTestResult)
@@ -19,24 +19,8 @@ def sync_lab_test_result_status(sender, instance, created, **kwargs):
         # Обновление результата - ничего не синхронизируем
         return
     
-    # Получаем ContentType для LabTestResult
-    content_type = ContentType.objects.get_for_model(LabTestResult)
-    
-    # Находим все запланированные события для этого результата
-    scheduled_appointments = ScheduledAppointment.objects.filter(
-        content_type=content_type,
-        object_id=instance.pk
-    )
-    
-    if not scheduled_appointments.exists():
-        return
-    
-    # Помечаем все связанные события как завершенные
-    for appointment in scheduled_appointments:
-        if appointment.execution_status == 'scheduled':
-            appointment.execution_status = 'completed'
-            appointment.executed_at = timezone.now()
-            appointment.save(update_fields=['execution_status', 'executed_at'])
+    # Помечаем ожидающие связанные события как завершенные одним UPDATE
+    ClinicalSchedulingService.sync_assignment_status(instance, 'completed')
 
 
 @receiver(post_delete, sender=LabTestResult)
@@ -12,7 +12,7 @@ from profiles.models import DoctorProfile
 from departments.models import Department, PatientDepartmentStatus
 from encounters.models import Encounter
 from appointments.models import Schedule, AppointmentEvent
-from pharmacy.models import Medication, DosingRule
+from pharmacy.models import Medication, Regimen, PopulationCriteria, DosingInstruction
 from lab_tests.models import LabTestDefinition, LabTestResult
 from instrumental_procedures.models import InstrumentalProcedureDefinition, InstrumentalProcedureResult
 from documents.models import DocumentType, ClinicalDocument, DocumentTemplate
@@ -301,43 +301,45 @@ class Command(BaseCommand):
     def create_medications(self):
         """Создает препараты и правила дозирования"""
         medications_data = [
-            {'name': 'Парацетамол', 'form': 'таблетки'},
-            {'name': 'Ибупрофен', 'form': 'таблетки'},
-            {'name': 'Амоксициллин', 'form': 'капсулы'},
-            {'name': 'Аспирин', 'form': 'таблетки'},
-            {'name': 'Омепразол', 'form': 'капсулы'},
-            {'name': 'Метформин', 'form': 'таблетки'},
-            {'name': 'Аторвастатин', 'form': 'таблетки'},
-            {'name': 'Лозартан', 'form': 'таблетки'}
+            {'name': 'Парацетамол', 'form': Medication.MedicationForm.TABLET},
+            {'name': 'Ибупрофен', 'form': Medication.MedicationForm.TABLET},
+            {'name': 'Амоксициллин', 'form': Medication.MedicationForm.CAPSULE},
+            {'name': 'Аспирин', 'form': Medication.MedicationForm.TABLET},
+            {'name': 'Омепразол', 'form': Medication.MedicationForm.CAPSULE},
+            {'name': 'Метформин', 'form': Medication.MedicationForm.TABLET},
+            {'name': 'Аторвастатин', 'form': Medication.MedicationForm.TABLET},
+            {'name': 'Лозартан', 'form': Medication.MedicationForm.TABLET}
         ]
         
         medications = []
         for med_data in medications_data:
             medication, created = Medication.objects.get_or_create(
                 name=med_data['name'],
-                defaults={
-                    'form': med_data['form'],
-                    'description': f'Описание препарата {med_data["name"]}'
-                }
+                defaults={'medication_form': med_data['form']}
             )
             medications.append(medication)
             
-            # Создаем правила дозирования
+            # Создаем схему применения (модель DosingRule заменена схемами Regimen)
             if created:
-                DosingRule.objects.create(
+                regimen = Regimen.objects.create(
                     medication=medication,
                     name='Стандартная дозировка для взрослых',
-                    route_of_administration='oral',
+                    notes='Принимать после еды'
+                )
+                PopulationCriteria.objects.create(
+                    regimen=regimen,
+                    name='Взрослые',
                     min_age_days=6570,  # 18 лет
                     max_age_days=36500,  # 100 лет
                     min_weight_kg=Decimal('50.00'),
-                    max_weight_kg=Decimal('120.00'),
-                    is_loading_dose=False,
-                    dosage_value=Decimal('1.00'),
-                    dosage_unit='таблетка',
-                    frequency_text='3 раза в сутки, каждые 8 часов',
-                    max_daily_dosage_text='3.00',
-                    notes='Принимать после еды'
+                    max_weight_kg=Decimal('120.00')
+                )
+                DosingInstruction.objects.create(
+                    regimen=regimen,
+                    dose_type='MAINTENANCE',
+                    dose_description='1 таблетка',
+                    frequency_description='3 раза в сутки, каждые 8 часов',
+                    duration_description='5-7 дней'
                 )
         
         self.stdout.write(f'Создано {len(medications)} препаратов с правилами дозирования')
@@ -0,0 +1,217 @@
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+
+
+# Центили таблиц роста: [3rd, 10th, 25th, 50th, 75th, 90th, 97th]
+CENTILES = np.array([3, 10, 25, 50, 75, 90, 97], dtype=float)
+
+SEXES = ('boys', 'girls')
+MEASURES = ('weight', 'length')
+
+
+def get_sex_key(patient):
+    """Определяет таблицу по полу пациента: 'boys' или 'girls'"""
+    if patient is not None and getattr(patient, 'gender', None) == 'female':
+        return 'girls'
+    return 'boys'
+
+
+def ga_to_days(weeks, days):
+    """Срок гестации в днях; None, если дни вне диапазона 0-6 (как в ключах таблиц)"""
+    if weeks is None or days is None or not 0 <= days <= 6:
+        return None
+    return weeks * 7 + days
+
+
+@lru_cache(maxsize=None)
+def load_raw_table(sex, measure):
+    """Читает JSON-таблицу с диска один раз за процесс"""
+    path = os.path.join(settings.BASE_DIR, 'newborns', 'static', 'newborns', sex, f'{measure}_data.json')
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+class CentileTables:
+    """
+    Таблицы центилей в виде массивов NumPy.
+
+    tables[measure] имеет форму (пол, срок гестации в днях, центиль);
+    строки для сроков без данных заполнены NaN.
+    """
+
+    def __init__(self):
+        ga_days = set()
+        for sex in SEXES:
+            for measure in MEASURES:
+                for key in load_raw_table(sex, measure):
+                    weeks, days = key.split('+')
+                    ga_days.add(ga_to_days(int(weeks), int(days)))
+
+        self.min_ga_days = min(ga_days)
+        self.max_ga_days = max(ga_days)
+        size = self.max_ga_days - self.min_ga_days + 1
+
+        self.tables = {}
+        for measure in MEASURES:
+            table = np.full((len(SEXES), size, len(CENTILES)), np.nan)
+            for sex_index, sex in enumerate(SEXES):
+                for key, centiles in load_raw_table(sex, measure).items():
+                    weeks, days = key.split('+')
+                    row = ga_to_days(int(weeks), int(days)) - self.min_ga_days
+                    table[sex_index, row] = centiles
+            self.tables[measure] = table
+
+    def rows(self, measure, sex_indices, ga_days):
+        """
+        Возвращает строки центилей для массивов полов и сроков.
+        Для сроков вне таблицы возвращаются строки NaN.
+        """
+        ga_days = np.asarray(ga_days, dtype=float)
+        valid = ~np.isnan(ga_days) & (ga_days >= self.min_ga_days) & (ga_days <= self.max_ga_days)
+        positions = np.where(valid, ga_days - self.min_ga_days, 0).astype(int)
+        result = self.tables[measure][np.asarray(sex_indices, dtype=int), positions]
+        result[~valid] = np.nan
+        return result
+
+    @staticmethod
+    def centile_indices(rows, values):
+        """
+        Индекс первого центиля, не меньшего значения (как searchsorted
+        с side='left'), ограниченный последним центилем.
+        Векторизовано по строкам с разными порогами.
+        """
+        values = np.asarray(values, dtype=float)
+        indices = (rows < values[:, None]).sum(axis=1)
+        return np.minimum(indices, len(CENTILES) - 1)
+
+    @staticmethod
+    def estimate_percentiles(rows, values):
+        """
+        Оценка перцентиля линейной интерполяцией между соседними
+        центилями; значения вне таблицы ограничиваются 3-м и 97-м.
+        """
+        values = np.asarray(values, dtype=float)
+        upper = np.clip((rows < values[:, None]).sum(axis=1), 1, len(CENTILES) - 1)
+        lower = upper - 1
+        take = np.arange(len(values))
+        low_value = rows[take, lower]
+        high_value = rows[take, upper]
+        span = np.where(high_value > low_value, high_value - low_value, 1.0)
+        fraction = np.clip((values - low_value) / span, 0.0, 1.0)
+        return CENTILES[lower] + fraction * (CENTILES[upper] - CENTILES[lower])
+
+
+@lru_cache(maxsize=1)
+def get_centile_tables():
+    """Таблицы центилей, загружаемые один раз за процесс"""
+    return CentileTables()
+
+
+def weight_conclusion(weight_idx):
+    """Заключение по массе тела по индексу центиля"""
+    if weight_idx <= 1:
+        return "Маловесный для гестационного возраста"
+    if weight_idx >= 5:
+        return "Крупный новорожденный"
+    return "Развитие гармоничное"
+
+
+def harmony_conclusion(weight_idx, length_idx):
+    """Оценка гармоничности развития по индексам центилей массы и длины"""
+    if 2 <= weight_idx <= 4 and 2 <= length_idx <= 4:
+        return "Гармоничное развитие"
+    if (weight_idx <= 1 or weight_idx >= 5) or (length_idx <= 1 or length_idx >= 5):
+        return "Дисгармоничное развитие"
+    return "Развитие в пределах нормы"
+
+
+def assess_arrays(sex_keys, ga_days, weights_kg, lengths_cm):
+    """
+    Векторизованная оценка физического развития.
+
+    Args:
+        sex_keys: последовательность 'boys'/'girls'
+        ga_days: сроки гестации в днях (None — нет данных)
+        weights_kg: массы тела, кг
+        lengths_cm: длины тела, см
+
+    Returns:
+        dict массивов: has_data, weight_index, length_index,
+        weight_percentile, length_percentile, weight_rows
+    """
+    tables = get_centile_tables()
+    sex_indices = np.array([SEXES.index(sex) for sex in sex_keys], dtype=int)
+    ga = np.array([np.nan if days is None else days for days in ga_days], dtype=float)
+    weights = np.asarray(weights_kg, dtype=float)
+    lengths = np.asarray(lengths_cm, dtype=float)
+
+    weight_rows = tables.rows('weight', sex_indices, ga)
+    length_rows = tables.rows('length', sex_indices, ga)
+    has_data = ~np.isnan(weight_rows).any(axis=1) & ~np.isnan(length_rows).any(axis=1)
+
+    return {
+        'has_data': has_data,
+        'weight_index': tables.centile_indices(weight_rows, weights),
+        'length_index': tables.centile_indices(length_rows, lengths),
+        'weight_percentile': tables.estimate_percentiles(weight_rows, weights),
+        'length_percentile': tables.estimate_percentiles(length_rows, lengths),
+        'weight_rows': weight_rows,
+    }
+
+
+def assess_profiles(profiles):
+    """
+    Оценивает физическое развитие списка профилей новорожденных одним
+    векторизованным вызовом (отделение неонатологии, отчет по регистру).
+
+    Args:
+        profiles: итерируемое NewbornProfile (желательно с select_related('patient'))
+
+    Returns:
+        dict: {patient_id: {'has_data', 'weight_index', 'length_index',
+               'weight_percentile', 'length_percentile', 'weight_conclusion',
+               'harmony_conclusion', 'summary'}}
+    """
+    profiles = list(profiles)
+    if not profiles:
+        return {}
+
+    weights_kg = [float(p.birth_weight_grams) / 1000.0 for p in profiles]
+    arrays = assess_arrays(
+        [get_sex_key(p.patient) for p in profiles],
+        [ga_to_days(p.gestational_age_weeks, p.gestational_age_days) for p in profiles],
+        weights_kg,
+        [float(p.birth_height_cm) for p in profiles],
+    )
+
+    results = {}
+    for i, profile in enumerate(profiles):
+        if not arrays['has_data'][i]:
+            results[profile.pk] = {
+                'has_data': False,
+                'summary': "Нет данных для данного гестационного возраста.",
+            }
+            continue
+
+        weight_idx = int(arrays['weight_index'][i])
+        length_idx = int(arrays['length_index'][i])
+        weight_result = weight_conclusion(weight_idx)
+        harmony_result = harmony_conclusion(weight_idx, length_idx)
+        weight_centiles = arrays['weight_rows'][i].tolist()
+        debug_info = f" (вес: {weights_kg[i]}кг, центили: {weight_centiles}, индекс: {weight_idx})"
+
+        results[profile.pk] = {
+            'has_data': True,
+            'weight_index': weight_idx,
+            'length_index': length_idx,
+            'weight_percentile': round(float(arrays['weight_percentile'][i]), 1),
+            'length_percentile': round(float(arrays['length_percentile'][i]), 1),
+            'weight_conclusion': weight_result,
+            'harmony_conclusion': harmony_result,
+            'summary': f"Масса тела: {weight_result}. Гармоничность развития: {harmony_result}.{debug_info}",
+        }
+    return results
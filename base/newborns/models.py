@@ -1,12 +1,8 @@
 from django.db import models
 from patients.models import Patient
 from django.core.validators import MaxValueValidator, MinValueValidator
-import os
-from django.conf import settings
-import json
 
-weight_path = os.path.join(settings.BASE_DIR, 'base', 'newborns', 'static', 'newborns', 'weight_data.json')
-length_path = os.path.join(settings.BASE_DIR, 'base', 'newborns', 'static', 'newborns', 'length_data.json')
+from .centiles import get_sex_key, load_raw_table, assess_profiles
 
 class NewbornProfile(models.Model):
     # Связь "один-к-одному" с основной моделью пациента
@@ -45,80 +41,40 @@ class NewbornProfile(models.Model):
         return f"{self.gestational_age_weeks}+{self.gestational_age_days}"
 
     def load_centile_data(self):
-        # Определяем пол: 'boys' или 'girls'
-        gender = 'boys'
-        patient = self.patient
-        if patient and hasattr(patient, 'gender'):
-            if patient.gender == 'female':
-                gender = 'girls'
-        weight_path = os.path.join(settings.BASE_DIR, 'newborns', 'static', 'newborns', gender, 'weight_data.json')
-        length_path = os.path.join(settings.BASE_DIR, 'newborns', 'static', 'newborns', gender, 'length_data.json')
-        with open(weight_path, encoding='utf-8') as f:
-            weight_data = json.load(f)
-        with open(length_path, encoding='utf-8') as f:
-            length_data = json.load(f)
-        return weight_data, length_data
+        # Таблицы читаются с диска один раз за процесс (newborns.centiles)
+        gender = get_sex_key(self.patient)
+        return load_raw_table(gender, 'weight'), load_raw_table(gender, 'length')
 
     def calculate_physical_development(self):
-        weight_data, length_data = self.load_centile_data()
-        ga_key = self.get_ga_key()
-        weight_kg = float(self.birth_weight_grams) / 1000.0  # конвертируем в кг
-        length = self.birth_height_cm
-
-        def get_centile_index(centiles, value):
-            # Центили: [3rd, 10th, 25th, 50th, 75th, 90th, 97th]
-            # Индексы: [0,    1,     2,     3,     4,     5,     6]
-            for i, threshold in enumerate(centiles):
-                if value <= threshold:
-                    return i
-            return len(centiles) - 1  # Если больше всех, возвращаем последний индекс
-
-        def conclusion(weight_idx, length_idx):
-            # Интерпретация индексов:
-            # 0-1: Очень низкий вес (3rd-10th центиль)
-            # 2: Низкий вес (25th центиль) 
-            # 3: Нормальный вес (50th центиль)
-            # 4: Высокий вес (75th центиль)
-            # 5-6: Очень высокий вес (90th-97th центиль)
-            
-            if weight_idx <= 1:
-                weight_note = "Маловесный для гестационного возраста"
-            elif weight_idx == 2:
-                weight_note = "Развитие гармоничное"
-            elif weight_idx == 3:
-                weight_note = "Развитие гармоничное"
-            elif weight_idx == 4:
-                weight_note = "Развитие гармоничное"
-            elif weight_idx >= 5:
-                weight_note = "Крупный новорожденный"
-            else:
-                weight_note = "Вес в пределах нормы"
-
-            # Оценка гармоничности развития
-            if 2 <= weight_idx <= 4 and 2 <= length_idx <= 4:
-                harmony = "Гармоничное развитие"
-            elif (weight_idx <= 1 or weight_idx >= 5) or (length_idx <= 1 or length_idx >= 5):
-                harmony = "Дисгармоничное развитие"
-            else:
-                harmony = "Развитие в пределах нормы"
-                
-            return weight_note, harmony
-
-        if ga_key in weight_data and ga_key in length_data:
-            weight_centiles = weight_data[ga_key]
-            length_centiles = length_data[ga_key]
-            
-            weight_idx = get_centile_index(weight_centiles, weight_kg)
-            length_idx = get_centile_index(length_centiles, length)
-            
-            weight_result, harmony_result = conclusion(weight_idx, length_idx)
-            
-            # Добавляем детальную информацию для отладки
-            debug_info = f" (вес: {weight_kg}кг, центили: {weight_centiles}, индекс: {weight_idx})"
-            
-            return f"Масса тела: {weight_result}. Гармоничность развития: {harmony_result}.{debug_info}"
-        else:
-            return "Нет данных для данного гестационного возраста."
+        return assess_profiles([self])[self.pk]['summary']
+
+    @classmethod
+    def assess_many(cls, profiles=None):
+        """
+        Оценка физического развития группы новорожденных одним
+        векторизованным вызовом.
+
+        Args:
+            profiles: QuerySet или список профилей (по умолчанию весь регистр)
+
+        Returns:
+            dict: {patient_id: результат newborns.centiles.assess_profiles}
+        """
+        if profiles is None:
+            profiles = cls.objects.all()
+        if isinstance(profiles, models.QuerySet):
+            profiles = profiles.select_related('patient')
+        return assess_profiles(profiles)
+
+    @classmethod
+    def assess_department(cls, department):
+        """Оценка всех новорожденных, находящихся в отделении"""
+        return cls.assess_many(
+            cls.objects.filter(
+                patient__department_statuses__department=department,
+                patient__department_statuses__status='accepted',
+            ).distinct()
+        )
 
     def save(self, *args, **kwargs):
         self.physical_development = self.calculate_physical_development()
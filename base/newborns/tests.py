@@ -0,0 +1,78 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+
+from departments.models import Department, PatientDepartmentStatus
+from patients.models import Patient
+
+from .models import NewbornProfile
+
+
+# Заключения прежнего расчета по одному профилю (чтение JSON и цикл по центилям)
+LEGACY_SUMMARIES = [
+    (('male', 40, 0, 3260, 50),
+     'Масса тела: Развитие гармоничное. Гармоничность развития: Гармоничное развитие. '
+     '(вес: 3.26кг, центили: [2.55, 2.64, 2.78, 3.26, 3.8, 3.97, 4.08], индекс: 3)'),
+    (('female', 33, 2, 1500, 40),
+     'Масса тела: Развитие гармоничное. Гармоничность развития: Дисгармоничное развитие. '
+     '(вес: 1.5кг, центили: [1.26, 1.36, 1.51, 2.03, 2.6, 2.77, 2.9], индекс: 2)'),
+    (('male', 24, 0, 1000, 35),
+     'Масса тела: Крупный новорожденный. Гармоничность развития: Дисгармоничное развитие. '
+     '(вес: 1.0кг, центили: [0.42, 0.44, 0.47, 0.6, 0.77, 0.83, 0.87], индекс: 6)'),
+    (('female', 42, 6, 5000, 60),
+     'Масса тела: Крупный новорожденный. Гармоничность развития: Дисгармоничное развитие. '
+     '(вес: 5.0кг, центили: [2.96, 3.06, 3.21, 3.71, 4.25, 4.43, 4.54], индекс: 6)'),
+    (('male', 30, 3, 1200, 38),
+     'Масса тела: Развитие гармоничное. Гармоничность развития: Гармоничное развитие. '
+     '(вес: 1.2кг, центили: [0.95, 0.99, 1.07, 1.36, 1.75, 1.88, 1.96], индекс: 3)'),
+    (('male', 40, 7, 3000, 50), 'Нет данных для данного гестационного возраста.'),
+]
+
+
+class PhysicalDevelopmentTests(TestCase):
+    """Оценка физического развития по таблицам центилей"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profiles = []
+        for i, ((gender, weeks, days, grams, length), _) in enumerate(LEGACY_SUMMARIES):
+            patient = Patient.objects.create(
+                last_name=f'Новорожденный {i}', first_name='Ребенок',
+                birth_date=datetime.date(2026, 1, 1), gender=gender
+            )
+            cls.profiles.append(NewbornProfile.objects.create(
+                patient=patient, gestational_age_weeks=weeks, gestational_age_days=days,
+                birth_weight_grams=grams, birth_height_cm=length, head_circumference_cm=Decimal('34.0'),
+            ))
+
+    def test_summary_matches_legacy_calculation(self):
+        for profile, (_, expected) in zip(self.profiles, LEGACY_SUMMARIES):
+            with self.subTest(profile=profile.get_ga_key()):
+                self.assertEqual(profile.calculate_physical_development(), expected)
+                self.assertEqual(profile.physical_development, expected)
+
+    def test_assess_many_matches_single_profile(self):
+        with self.assertNumQueries(1):
+            results = NewbornProfile.assess_many()
+        self.assertEqual(
+            {pk: result['summary'] for pk, result in results.items()},
+            {profile.pk: expected for profile, (_, expected) in zip(self.profiles, LEGACY_SUMMARIES)}
+        )
+        first = results[self.profiles[0].pk]
+        self.assertEqual((first['weight_index'], first['length_index']), (3, 4))
+        self.assertEqual(first['weight_percentile'], 50.0)
+        self.assertFalse(results[self.profiles[-1].pk]['has_data'])
+        self.assertEqual(NewbornProfile.assess_many([]), {})
+
+    def test_assess_department_only_accepted_patients(self):
+        department = Department.objects.create(name='Неонатология', slug='neonatology')
+        accepted, pending = self.profiles[0], self.profiles[1]
+        PatientDepartmentStatus.objects.create(patient=accepted.patient, department=department, status='accepted')
+        # Повторное поступление не дублирует профиль
+        PatientDepartmentStatus.objects.create(patient=accepted.patient, department=department, status='accepted')
+        PatientDepartmentStatus.objects.create(patient=pending.patient, department=department)
+
+        results = NewbornProfile.assess_department(department)
+        self.assertEqual(list(results), [accepted.pk])
+        self.assertEqual(results[accepted.pk]['summary'], LEGACY_SUMMARIES[0][1])
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0002_patient_archive_reason_patient_archived_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='patient',
+            name='patients_pa_is_arch_b8e241_idx',
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(condition=models.Q(('is_archived', False)), fields=['last_name', 'first_name'], name='patients_p_last_na_d82507_act'),
+        ),
+    ]
@@ -5,7 +5,7 @@ from django.db.models import Q
 from typing import Optional
 import datetime
 from base.models import ArchivableModel
-from base.services import ArchiveManager
+from base.services import ActiveArchiveManager, ArchiveManager
 
 
 class Patient(ArchivableModel):
@@ -51,7 +51,6 @@ class Patient(ArchivableModel):
         indexes = [
             models.Index(fields=['last_name', 'first_name']),
             models.Index(fields=['birth_date']),
-            models.Index(fields=['is_archived']),
         ]
 
     def clean(self):
@@ -96,8 +95,12 @@ class Patient(ArchivableModel):
         from django.urls import reverse
         return reverse('patients:patient_detail', kwargs={'pk': self.pk})
     
-    # Менеджер для архивирования
+    # Менеджеры для архивирования
     objects = ArchiveManager()
+    active_objects = ActiveArchiveManager()
+
+    # Частичные индексы активных записей: поиск по ФИО
+    active_indexes = [('last_name', 'first_name')]
     
     def _archive_related_records(self, user, reason):
         """
@@ -134,22 +137,21 @@ class Patient(ArchivableModel):
         
         # Архивируем встречи пациента
         from encounters.models import Encounter
-        encounters = Encounter.objects.filter(patient=self, is_archived=False)
+        encounters = Encounter.active_objects.filter(patient=self)
         for encounter in encounters:
             encounter.archive(user, f"Каскадное архивирование пациента: {reason}")
         
         # Архивируем документы пациента
         from documents.models import ClinicalDocument
-        documents = ClinicalDocument.objects.filter(
-            Q(encounter__patient=self) | Q(patient_department_status__patient=self),
-            is_archived=False
+        documents = ClinicalDocument.active_objects.filter(
+            Q(encounter__patient=self) | Q(patient_department_status__patient=self)
         )
         for document in documents:
             document.archive(user, f"Каскадное архивирование пациента: {reason}")
         
         # Архивируем назначения пациента
         from appointments.models import AppointmentEvent
-        appointments = AppointmentEvent.objects.filter(patient=self, is_archived=False)
+        appointments = AppointmentEvent.active_objects.filter(patient=self)
         for appointment in appointments:
             appointment.archive(user, f"Каскадное архивирование пациента: {reason}")
     
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+
+from base.api_mixins import SparseFieldsetSerializerMixin
 from .models import Patient, PatientContact, PatientAddress, PatientDocument
 
 
@@ -20,7 +22,7 @@ class PatientDocumentSerializer(serializers.ModelSerializer):
         fields = ['document_type', 'document_number']
 
 
-class PatientSerializer(serializers.ModelSerializer):
+class PatientSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     contact = PatientContactSerializer()
     address = PatientAddressSerializer()
     document = PatientDocumentSerializer()
@@ -0,0 +1,319 @@
+"""
+Лента событий пациента.
+
+Случаи обращения, отделения, документы, результаты исследований, планы,
+назначения и записи на прием сводятся в один поток, упорядоченный по
+времени. Каждый источник дает проекцию (время, вид, id); проекции
+объединяются UNION ALL в одном SQL-запросе с ORDER BY и LIMIT страницы.
+Условие курсора и фильтры по дате применяются внутри каждой ветки, поэтому
+каждая ветка читает индекс (пациент, время) только с позиции курсора.
+Объекты страницы загружаются одним запросом на вид.
+
+    page = PatientTimelineService.get_page(patient, kinds=['document'], cursor=request.GET.get('cursor'))
+    page['entries']  # [{'timestamp', 'kind', 'label', 'title', 'url', 'object'}]
+    page['next_cursor']
+"""
+import base64
+import json
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection
+from django.db.models import DateTimeField, F, IntegerField, Q, Value
+from django.db.models.functions import Cast
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+class DateStart(Cast):
+    """
+    Начало дня для DateField как DateTimeField. В SQLite - datetime(), в том
+    же текстовом формате, что и хранимые Django дата-время: иначе сравнение
+    с курсором по равенству не срабатывает
+    """
+
+    def __init__(self, expression):
+        super().__init__(expression, DateTimeField())
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        return f'datetime({sql})', params
+
+
+def _plan_owner_url(plan, url_name):
+    if plan.encounter_id:
+        return reverse(url_name, kwargs={'owner_model': 'encounter', 'owner_id': plan.encounter_id, 'pk': plan.pk})
+    if plan.patient_department_status_id:
+        return reverse(url_name, kwargs={
+            'owner_model': 'patientdepartmentstatus', 'owner_id': plan.patient_department_status_id, 'pk': plan.pk
+        })
+    return None
+
+
+class PatientTimelineService:
+    """Сервис ленты событий пациента с keyset-пагинацией"""
+
+    PAGE_SIZE = 30
+    MAX_PAGE_SIZE = 100
+
+    @staticmethod
+    def get_sources():
+        """
+        Источники ленты: вид -> модель, условие по пациенту, время события,
+        select_related для загрузки страницы, заголовок и ссылка
+        """
+        from appointments.models import AppointmentEvent
+        from clinical_scheduling.models import ScheduledAppointment
+        from departments.models import PatientDepartmentStatus
+        from documents.models import ClinicalDocument
+        from encounters.models import Encounter
+        from examination_management.models import ExaminationPlan
+        from instrumental_procedures.models import InstrumentalProcedureResult
+        from lab_tests.models import LabTestResult
+        from treatment_management.models import TreatmentPlan
+
+        def by_patient(patient_id):
+            return Q(patient_id=patient_id)
+
+        def by_owner(patient_id):
+            return Q(encounter__patient_id=patient_id) | Q(patient_department_status__patient_id=patient_id)
+
+        return {
+            'encounter': {
+                'model': Encounter,
+                'label': 'Случай обращения',
+                'condition': by_patient,
+                'timestamp': F('date_start'),
+                'select_related': (),
+                'title': lambda obj: f'Случай обращения №{obj.sequence_number}' if obj.sequence_number else 'Случай обращения',
+                'url': lambda obj: reverse('encounters:encounter_detail', args=[obj.pk]),
+            },
+            'department': {
+                'model': PatientDepartmentStatus,
+                'label': 'Отделение',
+                'condition': by_patient,
+                'timestamp': F('admission_date'),
+                'select_related': ('department',),
+                'title': lambda obj: f'{obj.department.name} ({obj.get_status_display()})',
+                'url': lambda obj: reverse('departments:department_detail', args=[obj.department_id]),
+            },
+            'document': {
+                'model': ClinicalDocument,
+                'label': 'Документ',
+                'condition': by_owner,
+                'timestamp': F('datetime_document'),
+                'select_related': ('document_type',),
+                'title': lambda obj: obj.document_type.name,
+                'url': lambda obj: reverse('documents:document_detail', args=[obj.pk]),
+            },
+            'lab_result': {
+                'model': LabTestResult,
+                'label': 'Лабораторное исследование',
+                'condition': by_patient,
+                'timestamp': F('datetime_result'),
+                'select_related': ('procedure_definition',),
+                'title': lambda obj: obj.procedure_definition.name,
+                'url': lambda obj: reverse('lab_tests:result_detail', args=[obj.pk]),
+            },
+            'instrumental_result': {
+                'model': InstrumentalProcedureResult,
+                'label': 'Инструментальное исследование',
+                'condition': by_patient,
+                'timestamp': F('datetime_result'),
+                'select_related': ('procedure_definition',),
+                'title': lambda obj: obj.procedure_definition.name,
+                'url': lambda obj: reverse('instrumental_procedures:result_detail', args=[obj.pk]),
+            },
+            'examination_plan': {
+                'model': ExaminationPlan,
+                'label': 'План обследования',
+                'condition': by_owner,
+                'timestamp': F('created_at'),
+                'select_related': (),
+                'title': lambda obj: obj.name,
+                'url': lambda obj: _plan_owner_url(obj, 'examination_management:plan_detail'),
+            },
+            'treatment_plan': {
+                'model': TreatmentPlan,
+                'label': 'План лечения',
+                'condition': by_owner,
+                'timestamp': F('created_at'),
+                'select_related': (),
+                'title': lambda obj: obj.name,
+                'url': lambda obj: _plan_owner_url(obj, 'treatment_management:plan_detail'),
+            },
+            'scheduled': {
+                'model': ScheduledAppointment,
+                'label': 'Назначение',
+                'condition': by_patient,
+                # Время назначения необязательно: событие ставится на начало дня
+                'timestamp': DateStart('scheduled_date'),
+                'select_related': (),
+                'title': lambda obj: '{} ({})'.format(
+                    getattr(obj.assignment, 'treatment_name', None) or obj.assignment or 'Назначение',
+                    obj.get_execution_status_display()
+                ),
+                'url': lambda obj: reverse('clinical_scheduling:appointment_detail', args=[obj.pk]),
+            },
+            'appointment': {
+                'model': AppointmentEvent,
+                'label': 'Запись на прием',
+                'condition': by_patient,
+                'timestamp': F('start'),
+                'select_related': (),
+                'title': lambda obj: f'Запись на прием ({obj.get_status_display()})',
+                'url': lambda obj: reverse('appointments:detail', args=[obj.pk]),
+            },
+        }
+
+    @classmethod
+    def get_kind_choices(cls):
+        """[(вид, название)] для фильтра ленты"""
+        return [(kind, source['label']) for kind, source in cls.get_sources().items()]
+
+    # --- Курсор ---
+
+    @staticmethod
+    def encode_cursor(row):
+        timestamp, kind, pk = row
+        return base64.urlsafe_b64encode(json.dumps([timestamp.isoformat(), kind, pk]).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """(время, вид, id) или None для пустого или поврежденного курсора"""
+        if not cursor:
+            return None
+        try:
+            raw_timestamp, kind, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            timestamp = parse_datetime(raw_timestamp)
+            return (timestamp, str(kind), int(pk)) if timestamp else None
+        except (ValueError, TypeError):
+            return None
+
+    # --- Запрос ---
+
+    @classmethod
+    def get_branch(cls, rank, source, patient_id, cursor=None, since=None, until=None, limit=None):
+        """
+        Проекция (timeline_ts, timeline_kind, timeline_id) одного источника.
+        Вид хранится номером источника (rank): порядок не зависит от сортировки строк в БД
+        """
+        queryset = source['model']._base_manager.filter(source['condition'](patient_id)).annotate(
+            timeline_ts=source['timestamp']
+        )
+        if since:
+            queryset = queryset.filter(timeline_ts__gte=since)
+        if until:
+            queryset = queryset.filter(timeline_ts__lt=until)
+
+        if cursor:
+            # Порядок ленты: время, вид, id по убыванию. Вид в ветке постоянен,
+            # поэтому условие (время, вид, id) < курсора упрощается до условия по времени и id
+            timestamp, cursor_rank, pk = cursor
+            if rank < cursor_rank:
+                queryset = queryset.filter(timeline_ts__lte=timestamp)
+            elif rank > cursor_rank:
+                queryset = queryset.filter(timeline_ts__lt=timestamp)
+            else:
+                queryset = queryset.filter(Q(timeline_ts__lt=timestamp) | Q(timeline_ts=timestamp, pk__lt=pk))
+
+        queryset = queryset.annotate(
+            timeline_kind=Value(rank, output_field=IntegerField()),
+            timeline_id=F('pk'),
+        ).values_list('timeline_ts', 'timeline_kind', 'timeline_id')
+
+        # PostgreSQL допускает LIMIT в ветках UNION, SQLite - нет
+        if limit and connection.features.supports_slicing_ordering_in_compound:
+            queryset = queryset.order_by('-timeline_ts', '-timeline_id')[:limit]
+        else:
+            queryset = queryset.order_by()
+        return queryset
+
+    @classmethod
+    def get_rows(cls, patient_id, kinds=None, cursor=None, since=None, until=None, limit=PAGE_SIZE):
+        """Строки (время, вид, id) страницы: один запрос UNION ALL"""
+        sources = cls.get_sources()
+        ranks = {kind: rank for rank, kind in enumerate(sources)}
+        if cursor:
+            timestamp, kind, pk = cursor
+            if kind not in ranks:
+                return []
+            cursor = (timestamp, ranks[kind], pk)
+
+        branches = [
+            cls.get_branch(ranks[kind], sources[kind], patient_id, cursor, since, until, limit)
+            for kind in sources if not kinds or kind in kinds
+        ]
+        if not branches:
+            return []
+        queryset = branches[0].union(*branches[1:], all=True) if len(branches) > 1 else branches[0]
+        rows = queryset.order_by('-timeline_ts', '-timeline_kind', '-timeline_id')[:limit]
+        kind_names = list(sources)
+        return [cls.normalize_row(timestamp, kind_names[rank], pk) for timestamp, rank, pk in rows]
+
+    @staticmethod
+    def normalize_row(timestamp, kind, pk):
+        # Начало дня в SQLite может вернуться строкой
+        if isinstance(timestamp, str):
+            timestamp = parse_datetime(timestamp) or datetime.fromisoformat(timestamp)
+        if timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp, dt_timezone.utc)
+        return timestamp, kind, pk
+
+    @classmethod
+    def hydrate(cls, rows):
+        """Записи ленты для строк страницы: один запрос на вид"""
+        from clinical_scheduling.models import ScheduledAppointment
+
+        sources = cls.get_sources()
+        ids_by_kind = {}
+        for _, kind, pk in rows:
+            ids_by_kind.setdefault(kind, []).append(pk)
+
+        objects = {}
+        for kind, ids in ids_by_kind.items():
+            source = sources[kind]
+            objects[kind] = source['model']._base_manager.select_related(*source['select_related']).in_bulk(ids)
+            if source['model'] is ScheduledAppointment:
+                ScheduledAppointment.attach_assignments(list(objects[kind].values()))
+
+        entries = []
+        for timestamp, kind, pk in rows:
+            obj = objects[kind].get(pk)
+            if obj is None:
+                # Запись удалена между запросами
+                continue
+            source = sources[kind]
+            entries.append({
+                'timestamp': timestamp,
+                'kind': kind,
+                'label': source['label'],
+                'title': source['title'](obj),
+                'url': source['url'](obj),
+                'object': obj,
+            })
+        return entries
+
+    @classmethod
+    def get_page(cls, patient, kinds=None, cursor=None, since=None, until=None, page_size=None):
+        """
+        Страница ленты пациента.
+
+        Args:
+            patient: пациент или его id
+            kinds: виды событий (ключи get_sources), по умолчанию все
+            cursor: строка курсора из next_cursor предыдущей страницы
+            since, until: границы времени события [since, until)
+            page_size: размер страницы (не больше MAX_PAGE_SIZE)
+
+        Returns:
+            {'entries': [...], 'next_cursor': str или None}
+        """
+        patient_id = getattr(patient, 'pk', patient)
+        page_size = min(page_size or cls.PAGE_SIZE, cls.MAX_PAGE_SIZE)
+        rows = cls.get_rows(
+            patient_id, kinds=kinds, cursor=cls.decode_cursor(cursor),
+            since=since, until=until, limit=page_size + 1
+        )
+        next_cursor = cls.encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+        return {'entries': cls.hydrate(rows[:page_size]), 'next_cursor': next_cursor}
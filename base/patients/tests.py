@@ -1,3 +1,66 @@
+import datetime
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from appointments.models import AppointmentEvent
+from encounters.models import Encounter
+
+from .models import Patient
+from .services import PatientTimelineService
+
+
+class PatientTimelineTests(TestCase):
+
+    def setUp(self):
+        self.patient = Patient.objects.create(last_name='Петров', first_name='Петр', birth_date=datetime.date(1970, 5, 1))
+        other = Patient.objects.create(last_name='Сидоров', first_name='Иван', birth_date=datetime.date(1985, 1, 1))
+        self.now = timezone.now().replace(microsecond=0)
+        for days in (1, 2, 2, 5):
+            Encounter.objects.create(patient=self.patient, date_start=self.now - datetime.timedelta(days=days))
+        Encounter.objects.create(patient=other, date_start=self.now)
+        # То же время, что у одного из случаев: порядок решает вид события
+        AppointmentEvent.objects.create(
+            patient=self.patient, start=self.now - datetime.timedelta(days=2),
+            end=self.now - datetime.timedelta(days=2) + datetime.timedelta(minutes=30)
+        )
+
+    def collect(self, **kwargs):
+        entries, cursor = [], None
+        while True:
+            page = PatientTimelineService.get_page(self.patient, cursor=cursor, page_size=2, **kwargs)
+            entries.extend(page['entries'])
+            cursor = page['next_cursor']
+            if not cursor:
+                return entries
+
+    def test_pages_cover_merged_stream_in_order(self):
+        entries = self.collect()
+        self.assertEqual(len(entries), 5)
+        self.assertEqual(len({(entry['kind'], entry['object'].pk) for entry in entries}), 5)
+        timestamps = [entry['timestamp'] for entry in entries]
+        self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+        self.assertIn('appointment', [entry['kind'] for entry in entries])
+
+    def test_kind_and_date_filters(self):
+        encounters = self.collect(kinds=['encounter'], since=self.now - datetime.timedelta(days=3))
+        self.assertEqual([entry['kind'] for entry in encounters], ['encounter'] * 3)
+        self.assertEqual(PatientTimelineService.get_page(self.patient, kinds=['unknown'])['entries'], [])
+
+    def test_patient_card_and_next_page(self):
+        user = get_user_model().objects.create_user('timeline_doctor', password='x')
+        self.client.force_login(user)
+        response = self.client.get(reverse('patients:patient_timeline', args=[self.patient.pk]), {'kind': 'encounter'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'data-kind="encounter"', count=4)
+        self.assertEqual(self.client.get(reverse('patients:patient_detail', args=[self.patient.pk])).status_code, 200)
 
-# Create your tests here.
+        # Несуществующая дата не фильтрует ленту
+        response = self.client.get(
+            reverse('patients:patient_timeline', args=[self.patient.pk]),
+            {'kind': 'encounter', 'since': '2026-02-30', 'until': '2026-13-01'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'data-kind="encounter"', count=4)
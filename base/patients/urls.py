@@ -8,6 +8,7 @@ urlpatterns = [
     path('patients/', views.patient_list, name='patient_list'),
     path('patient/add/', views.patient_create, name='patient_create'),
     path('patient/<int:pk>/', views.patient_detail, name='patient_detail'),
+    path('patient/<int:pk>/timeline/', views.patient_timeline, name='patient_timeline'),
     # urls.py
     path('patient/<int:parent_id>/newborn/', views.newborn_create, name='newborn_create'),
     path('patient/<int:parent_id>/child/', views.child_create, name='child_create'),
@@ -3,6 +3,8 @@ from django.db.models import Q
 from django.shortcuts import render, get_object_or_404, redirect
 from django.db import transaction
 from urllib.parse import urlencode
+from datetime import datetime, time, timedelta
+from django.utils.dateparse import parse_date
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required
@@ -13,6 +15,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView
 
 from .models import Patient, PatientContact, PatientAddress, PatientDocument
+from .services import PatientTimelineService
 from .forms import PatientForm, PatientContactForm, PatientAddressForm, PatientDocumentForm
 from newborns.forms import NewbornProfileForm
 from encounters.models import Encounter
@@ -52,14 +55,14 @@ def save_patient_with_related(patient_form, contact_form, address_form, document
 
 @login_required
 def home(request):
-    latest_patients = Patient.objects.order_by('-created_at')[:5]
-    total_patients = Patient.objects.count()
+    latest_patients = Patient.active_objects.order_by('-created_at')[:5]
+    total_patients = Patient.active_objects.count()
     # Подсчёт приёмов на сегодня для текущего врача
     today = timezone.localdate()
     user = request.user
     todays_appointments = 0
     if user.is_authenticated and hasattr(user, 'doctor_profile'):
-        todays_appointments = AppointmentEvent.objects.filter(
+        todays_appointments = AppointmentEvent.active_objects.filter(
             schedule__doctor=user,
             start__date=today,
             status='scheduled'
@@ -74,7 +77,8 @@ def home(request):
 @login_required
 def patient_list(request):
     query = request.GET.get('q')
-    patients = Patient.objects.all()
+    # Показ архивированных задается ArchiveConfiguration (show_archived_in_list / _in_search)
+    patients = Patient.objects.for_search() if query else Patient.objects.for_list()
     
     if query:
         # Нормализуем поисковый запрос - приводим к нижнему регистру
@@ -123,6 +127,47 @@ def patient_detail(request, pk):
         'contact': contact,
         'address': address,
         'document': document,
+        'timeline': get_timeline_page(request, patient),
+        'timeline_kinds': PatientTimelineService.get_kind_choices(),
+        'timeline_selected_kinds': request.GET.getlist('kind'),
+    })
+
+
+def _parse_date_param(value):
+    """Дата ГГГГ-ММ-ДД из параметра; неверная дата (например, 2026-02-30) не фильтрует ленту"""
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def get_timeline_page(request, patient):
+    """Страница ленты по параметрам запроса: kind (несколько), since/until (ГГГГ-ММ-ДД), cursor"""
+    tz = timezone.get_current_timezone()
+    since = _parse_date_param(request.GET.get('since'))
+    until = _parse_date_param(request.GET.get('until'))
+    page = PatientTimelineService.get_page(
+        patient,
+        kinds=request.GET.getlist('kind') or None,
+        cursor=request.GET.get('cursor'),
+        # Границы - начало дня since и конец дня until в часовом поясе клиники
+        since=datetime.combine(since, time.min, tz) if since else None,
+        until=datetime.combine(until + timedelta(days=1), time.min, tz) if until else None,
+    )
+    if page['next_cursor']:
+        params = request.GET.copy()
+        params['cursor'] = page['next_cursor']
+        page['next_url'] = reverse('patients:patient_timeline', args=[patient.pk]) + '?' + params.urlencode()
+    return page
+
+
+@login_required
+def patient_timeline(request, pk):
+    """Следующая страница ленты пациента (фрагмент для подгрузки при прокрутке)"""
+    patient = get_object_or_404(Patient, pk=pk)
+    return render(request, 'patients/_timeline_entries.html', {
+        'patient': patient,
+        'timeline': get_timeline_page(request, patient),
     })
 
 
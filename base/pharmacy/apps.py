@@ -5,3 +5,10 @@ class PharmacyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pharmacy'
     verbose_name = 'Аптека'
+    
+    def ready(self):
+        """Регистрируем сигналы при запуске приложения"""
+        try:
+            import pharmacy.signals
+        except ImportError:
+            pass
@@ -0,0 +1,20 @@
+# pharmacy/management/commands/rebuild_medication_search_index.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from pharmacy.services import MedicationSearchIndexService
+
+
+class Command(BaseCommand):
+    
+    help = 'Полностью перестраивает поисковый индекс препаратов (названия, МНН, ATC, формы выпуска).'
+
+    def handle(self, *args, **options):
+        self.stdout.write("🔍 Перестраиваю поисковый индекс препаратов...")
+        started = time.monotonic()
+        count = MedicationSearchIndexService.rebuild()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Проиндексировано записей: {count} за {elapsed:.2f} с"
+        ))
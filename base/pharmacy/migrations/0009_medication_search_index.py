@@ -0,0 +1,72 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_search_index(apps, schema_editor):
+    """Заполняет поисковый индекс для уже существующих препаратов"""
+    from pharmacy.services import MedicationSearchIndexService
+
+    Medication = apps.get_model('pharmacy', 'Medication')
+    TradeName = apps.get_model('pharmacy', 'TradeName')
+    MedicationSearchEntry = apps.get_model('pharmacy', 'MedicationSearchEntry')
+    MedicationSearchTrigram = apps.get_model('pharmacy', 'MedicationSearchTrigram')
+    entries = MedicationSearchIndexService._build_entries(
+        Medication.objects.select_related('generic_concept').iterator(),
+        TradeName.objects.select_related('medication', 'release_form').iterator(),
+        entry_model=MedicationSearchEntry,
+    )
+    MedicationSearchIndexService._save_entries(
+        entries, entry_model=MedicationSearchEntry, trigram_model=MedicationSearchTrigram
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pharmacy', '0008_dosinginstruction_compatible_forms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MedicationSearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('generic', 'МНН'), ('trade_product', 'Торговый продукт'), ('trade_name', 'Торговое название')], max_length=20, verbose_name='Тип записи')),
+                ('display_name', models.CharField(max_length=255, verbose_name='Отображаемое название')),
+                ('generic_name', models.CharField(blank=True, max_length=255, verbose_name='МНН')),
+                ('release_form', models.CharField(blank=True, max_length=100, verbose_name='Форма выпуска')),
+                ('atc_code', models.CharField(blank=True, db_index=True, max_length=50, verbose_name='ATC код')),
+                ('name_key', models.CharField(db_index=True, max_length=255, verbose_name='Ключ названия')),
+                ('generic_key', models.CharField(db_index=True, max_length=255, verbose_name='Ключ МНН')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активен')),
+                ('medication', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='pharmacy.medication', verbose_name='Препарат')),
+                ('trade_name', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='pharmacy.tradename', verbose_name='Торговое название')),
+            ],
+            options={
+                'verbose_name': 'Запись поискового индекса препаратов',
+                'verbose_name_plural': 'Поисковый индекс препаратов',
+            },
+        ),
+        migrations.CreateModel(
+            name='MedicationSearchTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3, verbose_name='Триграмма')),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='pharmacy.medicationsearchentry', verbose_name='Запись индекса')),
+            ],
+            options={
+                'verbose_name': 'Триграмма препарата',
+                'verbose_name_plural': 'Триграммы препаратов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='medicationsearchentry',
+            index=models.Index(fields=['kind', 'is_active'], name='pharmacy_search_kind_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicationsearchtrigram',
+            index=models.Index(fields=['trigram', 'entry'], name='pharmacy_trigram_idx'),
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -279,6 +279,74 @@ class TradeName(models.Model):
     def __str__(self):
         return f"{self.name} ({self.medication.name})"
 
+
+class MedicationSearchEntry(models.Model):
+    """
+    Денормализованная запись поискового индекса препаратов.
+    Строится из Medication и TradeName и поддерживается сигналами,
+    см. pharmacy.services.MedicationSearchIndexService.
+    """
+
+    class Kind(models.TextChoices):
+        GENERIC = 'generic', _('МНН')
+        TRADE_PRODUCT = 'trade_product', _('Торговый продукт')
+        TRADE_NAME = 'trade_name', _('Торговое название')
+
+    kind = models.CharField(max_length=20, choices=Kind.choices, verbose_name=_("Тип записи"))
+    medication = models.ForeignKey(
+        Medication,
+        on_delete=models.CASCADE,
+        related_name='search_entries',
+        verbose_name=_("Препарат")
+    )
+    trade_name = models.ForeignKey(
+        TradeName,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='search_entries',
+        verbose_name=_("Торговое название")
+    )
+    display_name = models.CharField(max_length=255, verbose_name=_("Отображаемое название"))
+    generic_name = models.CharField(max_length=255, blank=True, verbose_name=_("МНН"))
+    release_form = models.CharField(max_length=100, blank=True, verbose_name=_("Форма выпуска"))
+    atc_code = models.CharField(max_length=50, blank=True, db_index=True, verbose_name=_("ATC код"))
+    name_key = models.CharField(max_length=255, db_index=True, verbose_name=_("Ключ названия"))
+    generic_key = models.CharField(max_length=255, db_index=True, verbose_name=_("Ключ МНН"))
+    is_active = models.BooleanField(default=True, verbose_name=_("Активен"))
+
+    class Meta:
+        verbose_name = _("Запись поискового индекса препаратов")
+        verbose_name_plural = _("Поисковый индекс препаратов")
+        indexes = [
+            models.Index(fields=['kind', 'is_active'], name='pharmacy_search_kind_idx'),
+        ]
+
+    def __str__(self):
+        return self.display_name
+
+
+class MedicationSearchTrigram(models.Model):
+    """Триграмма поискового ключа для нечеткого поиска препаратов"""
+    entry = models.ForeignKey(
+        MedicationSearchEntry,
+        on_delete=models.CASCADE,
+        related_name='trigrams',
+        verbose_name=_("Запись индекса")
+    )
+    trigram = models.CharField(max_length=3, verbose_name=_("Триграмма"))
+
+    class Meta:
+        verbose_name = _("Триграмма препарата")
+        verbose_name_plural = _("Триграммы препаратов")
+        indexes = [
+            models.Index(fields=['trigram', 'entry'], name='pharmacy_trigram_idx'),
+        ]
+
+    def __str__(self):
+        return self.trigram
+
+
 class RegimenManager(models.Manager):
     """
     Менеджер для модели Regimen с оптимизированными методами фильтрации
@@ -2,15 +2,17 @@
 from datetime import date
 from collections import defaultdict
 from typing import List, Dict, Optional, Tuple
-from django.db.models import Q, Prefetch
+from django.db.models import Q, Prefetch, Count, Case, When, IntegerField
 from django.core.exceptions import ValidationError
 from django.db import transaction
 
 from .models import (
     Medication, TradeName, Regimen, PopulationCriteria, 
     DosingInstruction, RegimenAdjustment, MedicationGroup,
-    ReleaseForm, AdministrationMethod
+    ReleaseForm, AdministrationMethod, MedicationSearchEntry,
+    MedicationSearchTrigram
 )
+from .utils import build_search_key, build_trigrams, build_code_key
 from patients.models import Patient
 from diagnosis.models import Diagnosis
 
@@ -290,13 +292,15 @@ class ReferenceDataService:
     @staticmethod
     def get_medication_groups() -> List[Dict]:
         """Получает список всех фармакологических групп."""
-        groups = MedicationGroup.objects.all()
+        groups = MedicationGroup.objects.annotate(
+            medications_count=Count('tradename')
+        ).order_by('name')
         return [
             {
                 'id': group.id,
                 'name': group.name,
                 'description': group.description,
-                'medications_count': group.medications.count()
+                'medications_count': group.medications_count
             }
             for group in groups
         ]
@@ -304,13 +308,15 @@ class ReferenceDataService:
     @staticmethod
     def get_release_forms() -> List[Dict]:
         """Получает список всех форм выпуска."""
-        forms = ReleaseForm.objects.all()
+        forms = ReleaseForm.objects.annotate(
+            medications_count=Count('tradename')
+        ).order_by('name')
         return [
             {
                 'id': form.id,
                 'name': form.name,
                 'description': form.description,
-                'medications_count': form.medications.count()
+                'medications_count': form.medications_count
             }
             for form in forms
         ]
@@ -318,12 +324,15 @@ class ReferenceDataService:
     @staticmethod
     def get_administration_methods() -> List[Dict]:
         """Получает список всех способов введения."""
-        methods = AdministrationMethod.objects.all()
+        methods = AdministrationMethod.objects.annotate(
+            instructions_count=Count('dosinginstruction')
+        ).order_by('name')
         return [
             {
                 'id': method.id,
                 'name': method.name,
-                'description': method.description
+                'description': method.description,
+                'instructions_count': method.instructions_count
             }
             for method in methods
         ]
@@ -342,9 +351,273 @@ def get_medication_recommendations(patient, diagnosis=None, allergies_med_ids=No
     )
 
 
+class MedicationSearchIndexService:
+    """
+    Сервис поддержки поискового индекса препаратов.
+
+    Индекс хранит канонические (нормализованные и транслитерированные)
+    ключи торговых названий, МНН, ATC-кодов и форм выпуска, а также их
+    триграммы. Поддерживается сигналами pharmacy.signals при сохранении
+    Medication и TradeName; полная перестройка выполняется командой
+    rebuild_medication_search_index.
+    """
+
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def _build_entries(medications, trade_names, entry_model=MedicationSearchEntry):
+        """
+        Строит несохраненные записи индекса для препаратов и торговых названий.
+        entry_model - модель записи (в миграциях - историческая)
+        """
+        entries = []
+        for medication in medications:
+            generic = medication.generic_concept
+            if generic is not None:
+                entries.append(entry_model(
+                    kind=MedicationSearchEntry.Kind.TRADE_PRODUCT,
+                    medication=medication,
+                    display_name=medication.trade_name or medication.name,
+                    generic_name=generic.name,
+                    release_form=medication.get_medication_form_display() if medication.medication_form else '',
+                    atc_code=build_code_key(medication.code),
+                    is_active=medication.is_active,
+                ))
+            else:
+                entries.append(entry_model(
+                    kind=MedicationSearchEntry.Kind.GENERIC,
+                    medication=medication,
+                    display_name=medication.name,
+                    generic_name=medication.name,
+                    release_form=medication.get_medication_form_display() if medication.medication_form else '',
+                    atc_code=build_code_key(medication.code),
+                    is_active=medication.is_active,
+                ))
+
+        for trade_name in trade_names:
+            entries.append(entry_model(
+                kind=MedicationSearchEntry.Kind.TRADE_NAME,
+                medication=trade_name.medication,
+                trade_name=trade_name,
+                display_name=trade_name.name,
+                generic_name=trade_name.medication.name,
+                release_form=trade_name.release_form.name if trade_name.release_form else '',
+                atc_code=build_code_key(trade_name.atc_code),
+                is_active=trade_name.is_active and trade_name.medication.is_active,
+            ))
+
+        for entry in entries:
+            entry.name_key = build_search_key(entry.display_name)
+            entry.generic_key = build_search_key(entry.generic_name)
+        return entries
+
+    @staticmethod
+    def _entry_trigrams(entry):
+        """Триграммы записи: название, МНН и форма выпуска"""
+        return (
+            build_trigrams(entry.name_key)
+            | build_trigrams(entry.generic_key)
+            | build_trigrams(build_search_key(entry.release_form))
+        )
+
+    @classmethod
+    def _save_entries(cls, entries, entry_model=MedicationSearchEntry, trigram_model=MedicationSearchTrigram):
+        """Сохраняет записи и их триграммы пакетами"""
+        for i in range(0, len(entries), cls.BATCH_SIZE):
+            batch = entry_model.objects.bulk_create(entries[i:i + cls.BATCH_SIZE])
+            trigrams = [
+                trigram_model(entry=entry, trigram=trigram)
+                for entry in batch
+                for trigram in cls._entry_trigrams(entry)
+            ]
+            trigram_model.objects.bulk_create(trigrams, batch_size=cls.BATCH_SIZE * 10)
+
+    @classmethod
+    @transaction.atomic
+    def reindex_medication(cls, medication_id: int) -> None:
+        """
+        Перестраивает записи индекса препарата, его торговых названий и
+        торговых продуктов, ссылающихся на него как на МНН.
+
+        :param medication_id: ID препарата
+        """
+        medications = list(
+            Medication.objects.filter(
+                Q(pk=medication_id) | Q(generic_concept_id=medication_id)
+            ).select_related('generic_concept')
+        )
+        medication_ids = [m.pk for m in medications] or [medication_id]
+        trade_names = TradeName.objects.filter(
+            medication_id=medication_id
+        ).select_related('medication', 'release_form')
+
+        MedicationSearchEntry.objects.filter(
+            Q(medication_id__in=medication_ids, trade_name__isnull=True) |
+            Q(medication_id=medication_id, trade_name__isnull=False)
+        ).delete()
+        cls._save_entries(cls._build_entries(medications, trade_names))
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls) -> int:
+        """
+        Полностью перестраивает поисковый индекс.
+
+        :return: Количество записей в индексе
+        """
+        MedicationSearchTrigram.objects.all().delete()
+        MedicationSearchEntry.objects.all().delete()
+        entries = cls._build_entries(
+            Medication.objects.select_related('generic_concept').iterator(chunk_size=cls.BATCH_SIZE),
+            TradeName.objects.select_related('medication', 'release_form').iterator(chunk_size=cls.BATCH_SIZE),
+        )
+        cls._save_entries(entries)
+        return len(entries)
+
+    @staticmethod
+    def lookup(query: str, limit: int = 20, kinds: Optional[List[str]] = None,
+               active_only: bool = True) -> List[MedicationSearchEntry]:
+        """
+        Ищет записи индекса с ранжированием.
+
+        Кандидаты собираются тремя индексными запросами: префикс ключа
+        названия/МНН (диапазон по индексу), префикс ATC-кода и совпадение
+        триграмм. Ранжирование выполняется по небольшому набору кандидатов.
+
+        :param query: Поисковый запрос на кириллице или латинице
+        :param limit: Максимальное количество результатов (None - без ограничения)
+        :param kinds: Типы записей (MedicationSearchEntry.Kind)
+        :param active_only: Только активные препараты
+        :return: Список записей индекса в порядке релевантности
+        """
+        key = build_search_key(query)
+        if not key:
+            return []
+
+        def limited(queryset, factor):
+            return queryset[:limit * factor] if limit else queryset
+
+        entries = MedicationSearchEntry.objects.all()
+        if kinds:
+            entries = entries.filter(kind__in=kinds)
+        if active_only:
+            entries = entries.filter(is_active=True)
+
+        key_upper = key + '\uffff'
+        candidate_ids = set(limited(
+            entries.filter(
+                Q(name_key__gte=key, name_key__lt=key_upper) |
+                Q(generic_key__gte=key, generic_key__lt=key_upper)
+            ).values_list('id', flat=True), 2
+        ))
+
+        code_key = build_code_key(query)
+        if code_key[:1].isalpha() and code_key[1:3].isdigit():
+            candidate_ids.update(limited(
+                entries.filter(
+                    atc_code__gte=code_key, atc_code__lt=code_key + '\uffff'
+                ).values_list('id', flat=True), 2
+            ))
+
+        trigrams = build_trigrams(key)
+        min_hits = max(1, len(trigrams) // 3)
+        trigram_hits = dict(limited(
+            MedicationSearchTrigram.objects.filter(
+                trigram__in=trigrams, entry__in=entries
+            ).values('entry_id').annotate(
+                hits=Count('id')
+            ).filter(hits__gte=min_hits).order_by('-hits').values_list(
+                'entry_id', 'hits'
+            ), 3
+        ))
+        candidate_ids.update(trigram_hits)
+        if not candidate_ids:
+            return []
+
+        def score(entry):
+            value = 0
+            if entry.name_key == key:
+                value += 100
+            elif entry.name_key.startswith(key):
+                value += 80
+            elif any(word.startswith(key) for word in entry.name_key.split()):
+                value += 60
+            if entry.generic_key.startswith(key):
+                value += 50
+            if code_key and entry.atc_code.startswith(code_key):
+                value += 70
+            value += 40 * len(trigrams & build_trigrams(entry.name_key)) / len(trigrams)
+            value += 20 * trigram_hits.get(entry.id, 0) / len(trigrams)
+            return value
+
+        candidates = MedicationSearchEntry.objects.filter(id__in=candidate_ids)
+        ranked = sorted(candidates, key=lambda e: (-score(e), len(e.display_name), e.display_name))
+        return ranked[:limit] if limit else ranked
+
+
 class MedicationSearchService:
-    """Сервис для интеллектуального поиска лекарств."""
-    
+    """
+    Сервис для интеллектуального поиска лекарств.
+    Единая точка входа для всех автодополнений препаратов; работает
+    поверх индекса MedicationSearchIndexService.
+    """
+
+    @staticmethod
+    def _ranked_queryset(entries, limit: Optional[int]):
+        """Возвращает QuerySet препаратов в порядке ранжирования индекса"""
+        medication_ids = list(dict.fromkeys(entry.medication_id for entry in entries))
+        if limit:
+            medication_ids = medication_ids[:limit]
+        ordering = Case(
+            *[When(pk=pk, then=position) for position, pk in enumerate(medication_ids)],
+            output_field=IntegerField()
+        )
+        queryset = Medication.objects.filter(pk__in=medication_ids).select_related('generic_concept')
+        if medication_ids:
+            queryset = queryset.annotate(search_rank=ordering).order_by('search_rank')
+        return queryset
+
+    @staticmethod
+    def autocomplete(query: str, limit: int = 20, kinds: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Поиск для виджетов автодополнения.
+
+        :param query: Поисковый запрос
+        :param limit: Максимальное количество результатов
+        :param kinds: Типы записей индекса (по умолчанию все)
+        :return: Список словарей в формате результатов Select2
+        """
+        results = []
+        for entry in MedicationSearchIndexService.lookup(query, limit=limit, kinds=kinds):
+            if entry.kind == MedicationSearchEntry.Kind.GENERIC:
+                results.append({
+                    'id': entry.medication_id,
+                    'text': f"{entry.display_name} (МНН)",
+                    'trade_name_id': None,
+                    'trade_name': None,
+                    'generic_concept': entry.generic_name,
+                    'kind': entry.kind,
+                })
+            elif entry.kind == MedicationSearchEntry.Kind.TRADE_NAME:
+                results.append({
+                    'id': entry.medication_id,
+                    'text': f"{entry.display_name} ({entry.generic_name})",
+                    'trade_name_id': entry.trade_name_id,
+                    'trade_name': entry.display_name,
+                    'generic_concept': entry.generic_name,
+                    'kind': entry.kind,
+                })
+            else:
+                results.append({
+                    'id': entry.medication_id,
+                    'text': f"{entry.display_name} ({entry.generic_name})",
+                    'trade_name_id': entry.medication_id,
+                    'trade_name': entry.display_name,
+                    'generic_concept': entry.generic_name,
+                    'kind': entry.kind,
+                })
+        return results
+
     @staticmethod
     def search(query: str, limit: int = 20):
         """
@@ -355,13 +628,10 @@ class MedicationSearchService:
         :param limit: Максимальное количество результатов
         :return: QuerySet торговых препаратов
         """
-        # Используем наш кастомный менеджер и его метод active()
-        return Medication.objects.active().trade_products().filter(
-            # Искать либо в торговом названии самого продукта...
-            Q(trade_name__icontains=query) | 
-            # ...либо в названии связанного с ним концепта (МНН).
-            Q(generic_concept__name__icontains=query)
-        ).select_related('generic_concept').order_by('trade_name')[:limit]
+        entries = MedicationSearchIndexService.lookup(
+            query, limit=limit, kinds=[MedicationSearchEntry.Kind.TRADE_PRODUCT]
+        )
+        return MedicationSearchService._ranked_queryset(entries, limit)
     
     @staticmethod
     def search_generics(query: str, limit: int = 20):
@@ -372,9 +642,10 @@ class MedicationSearchService:
         :param limit: Максимальное количество результатов
         :return: QuerySet МНН
         """
-        return Medication.objects.active().generics().filter(
-            Q(name__icontains=query)
-        ).order_by('name')[:limit]
+        entries = MedicationSearchIndexService.lookup(
+            query, limit=limit, kinds=[MedicationSearchEntry.Kind.GENERIC]
+        )
+        return MedicationSearchService._ranked_queryset(entries, limit)
     
     @staticmethod
     def search_all(query: str, limit: int = 20):
@@ -385,11 +656,23 @@ class MedicationSearchService:
         :param limit: Максимальное количество результатов
         :return: QuerySet всех препаратов
         """
-        return Medication.objects.active().filter(
-            Q(name__icontains=query) |
-            Q(trade_name__icontains=query) |
-            Q(generic_concept__name__icontains=query)
-        ).select_related('generic_concept').order_by('name', 'trade_name')[:limit]
+        entries = MedicationSearchIndexService.lookup(
+            query, limit=limit,
+            kinds=[MedicationSearchEntry.Kind.GENERIC, MedicationSearchEntry.Kind.TRADE_PRODUCT]
+        )
+        return MedicationSearchService._ranked_queryset(entries, limit)
+
+    @staticmethod
+    def search_catalog(query: str):
+        """
+        Ищет по всему справочнику для списка препаратов: все типы записей,
+        включая неактивные, без ограничения количества.
+        
+        :param query: Поисковый запрос
+        :return: QuerySet препаратов в порядке релевантности
+        """
+        entries = MedicationSearchIndexService.lookup(query, limit=None, active_only=False)
+        return MedicationSearchService._ranked_queryset(entries, None)
 
     """Сервис для экспорта лекарств в CSV файлы."""
     
@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Medication, TradeName
+from .services import MedicationSearchIndexService
+
+
+def _schedule_reindex(medication_id):
+    """Перестраивает индекс препарата после фиксации транзакции"""
+    transaction.on_commit(
+        lambda: MedicationSearchIndexService.reindex_medication(medication_id)
+    )
+
+
+@receiver(post_save, sender=Medication)
+def index_medication(sender, instance, raw=False, **kwargs):
+    """
+    Поддерживает поисковый индекс препаратов при сохранении Medication
+    """
+    if raw:
+        return
+    _schedule_reindex(instance.pk)
+
+
+@receiver(post_save, sender=TradeName)
+@receiver(post_delete, sender=TradeName)
+def index_trade_name(sender, instance, raw=False, **kwargs):
+    """
+    Поддерживает поисковый индекс при изменении или удалении торгового названия
+    """
+    if raw:
+        return
+    if Medication.objects.filter(pk=instance.medication_id).exists():
+        _schedule_reindex(instance.medication_id)
@@ -1,3 +1,90 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 
-# Create your tests here.
+from .models import Medication, MedicationGroup, MedicationSearchEntry, ReleaseForm, TradeName
+from .services import MedicationSearchIndexService, MedicationSearchService
+from .utils import build_search_key
+
+
+class SearchKeyTests(SimpleTestCase):
+    """Канонический поисковый ключ"""
+
+    def test_cyrillic_and_latin_spellings_share_key(self):
+        key = build_search_key('Амоксициллин')
+        self.assertEqual(key, 'amoksicilin')
+        for spelling in ('amoxicillin', 'AMOKSICILLIN', 'амоксицилин'):
+            self.assertEqual(build_search_key(spelling), key)
+        self.assertEqual(build_search_key('Цефтриаксон 1,0 г'), build_search_key('ceftriakson 1 0 g'))
+
+
+class MedicationSearchIndexTests(TestCase):
+    """Поиск препаратов по индексу и его поддержка сигналами"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.amoxicillin = Medication.objects.create(name='Амоксициллин', code='J01CA04')
+        cls.ampicillin = Medication.objects.create(name='Ампициллин', code='J01CA01')
+        cls.azithromycin = Medication.objects.create(name='Азитромицин', code='J01FA10')
+        cls.flemoxin = Medication.objects.create(
+            name='Флемоксин Солютаб', trade_name='Флемоксин Солютаб', generic_concept=cls.amoxicillin,
+            medication_form=Medication.MedicationForm.TABLET,
+        )
+        cls.group = MedicationGroup.objects.create(name='Антибиотики')
+        cls.release_form = ReleaseForm.objects.create(name='Таблетки')
+        # Сигналы в setUpTestData ставят переиндексацию на коммит, которого нет
+        MedicationSearchIndexService.rebuild()
+
+    def test_cyrillic_and_latin_queries_give_same_results(self):
+        cyrillic = list(MedicationSearchService.search_all('Амокс'))
+        self.assertEqual(cyrillic[0], self.amoxicillin)
+        self.assertIn(self.flemoxin, cyrillic)
+        self.assertEqual(list(MedicationSearchService.search_all('amox')), cyrillic)
+
+    def test_atc_prefix_and_trigram_ranking(self):
+        self.assertEqual(
+            set(MedicationSearchService.search_all('J01CA')), {self.amoxicillin, self.ampicillin}
+        )
+        self.assertEqual(list(MedicationSearchService.search_all('J01FA10')), [self.azithromycin])
+
+        # Опечатка в середине слова находится по триграммам
+        self.assertEqual(MedicationSearchService.search_all('азитрамицин').first(), self.azithromycin)
+        self.assertEqual(MedicationSearchService.search_generics('амоксиц').first(), self.amoxicillin)
+        self.assertEqual(list(MedicationSearchService.search('флемокс')), [self.flemoxin])
+
+    def test_catalog_search_includes_inactive_and_is_unbounded(self):
+        Medication.objects.filter(pk=self.ampicillin.pk).update(is_active=False)
+        MedicationSearchIndexService.reindex_medication(self.ampicillin.pk)
+
+        self.assertNotIn(self.ampicillin, MedicationSearchService.search_all('J01CA'))
+        self.assertIn(self.ampicillin, MedicationSearchService.search_catalog('J01CA'))
+        self.assertEqual(
+            {entry.medication_id for entry in MedicationSearchIndexService.lookup('J01', limit=None, active_only=False)},
+            {self.amoxicillin.pk, self.ampicillin.pk, self.azithromycin.pk}
+        )
+
+    def test_index_follows_save_and_delete_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            cefazolin = Medication.objects.create(name='Цефазолин', code='J01DB04')
+        self.assertEqual(list(MedicationSearchService.search_all('cefaz')), [cefazolin])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            trade_name = TradeName.objects.create(
+                name='Золин', medication=cefazolin, medication_group=self.group,
+                release_form=self.release_form, atc_code='J01DB04',
+            )
+        results = MedicationSearchService.autocomplete('золин', kinds=[MedicationSearchEntry.Kind.TRADE_NAME])
+        self.assertEqual([(item['trade_name_id'], item['id']) for item in results], [(trade_name.pk, cefazolin.pk)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            trade_name.delete()
+        self.assertEqual(MedicationSearchService.autocomplete('золин', kinds=[MedicationSearchEntry.Kind.TRADE_NAME]), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cefazolin.name = 'Цефазолина натриевая соль'
+            cefazolin.save()
+        self.assertEqual(
+            list(MedicationSearchEntry.objects.filter(medication=cefazolin).values_list('name_key', flat=True)),
+            ['cefazolina natrievaia sol']
+        )
+
+        cefazolin.delete()
+        self.assertFalse(MedicationSearchEntry.objects.filter(medication_id=cefazolin.pk).exists())
@@ -0,0 +1,81 @@
+import re
+import unicodedata
+
+
+# Упрощенная транслитерация кириллицы в латиницу, подобранная так,
+# чтобы русские и латинские написания МНН сходились к одному ключу
+# (амоксициллин -> amoksicilin, amoxicillin -> amoksicilin)
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'i', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'h', 'ц': 'c', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch', 'ъ': '',
+    'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+}
+
+# Фонетическое выравнивание латинских написаний
+LATIN_FOLDING = (
+    ('ph', 'f'),
+    ('th', 't'),
+    ('x', 'ks'),
+    ('w', 'v'),
+    ('y', 'i'),
+)
+
+_NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+_REPEATED_RE = re.compile(r'([a-z])\1+')
+
+TRIGRAM_SIZE = 3
+
+
+def normalize_search_text(text):
+    """
+    Приводит строку к нижнему регистру, убирает диакритику и
+    лишние пробелы. Кириллица сохраняется.
+    """
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.split())
+
+
+def transliterate_to_latin(text):
+    """Транслитерирует нормализованную строку в латиницу"""
+    return ''.join(CYRILLIC_TO_LATIN.get(ch, ch) for ch in text)
+
+
+def build_search_key(text):
+    """
+    Строит канонический поисковый ключ: нормализация, транслитерация,
+    фонетическое выравнивание, схлопывание повторов.
+
+    Один и тот же ключ получается для "Амоксиклав", "amoxiclav" и
+    "amoksiklav", поэтому раскладка клавиатуры не влияет на поиск.
+    """
+    key = transliterate_to_latin(normalize_search_text(text))
+    for source, target in LATIN_FOLDING:
+        key = key.replace(source, target)
+    key = _NON_WORD_RE.sub(' ', key)
+    key = _REPEATED_RE.sub(r'\1', key)
+    return ' '.join(key.split())
+
+
+def build_trigrams(key):
+    """
+    Возвращает множество триграмм ключа. Каждое слово дополняется
+    пробелами слева, чтобы совпадение с началом слова весило больше.
+    """
+    trigrams = set()
+    for word in key.split():
+        padded = f'  {word} '
+        for i in range(len(padded) - TRIGRAM_SIZE + 1):
+            trigrams.add(padded[i:i + TRIGRAM_SIZE])
+    return trigrams
+
+
+def build_code_key(code):
+    """Нормализует ATC-код: верхний регистр без пробелов"""
+    if not code:
+        return ''
+    return re.sub(r'\s+', '', str(code)).upper()
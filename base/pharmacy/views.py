@@ -19,7 +19,9 @@ class MedicationListView(LoginRequiredMixin, ListView):
         queryset = super().get_queryset()
         query = self.request.GET.get('q')
         if query:
-            queryset = queryset.filter(name__icontains=query)
+            # Поиск через индекс: торговые названия, МНН, ATC, транслитерация
+            from .services import MedicationSearchService
+            queryset = MedicationSearchService.search_catalog(query)
         return queryset
 
     def get_context_data(self, **kwargs):
@@ -63,33 +65,10 @@ class MedicationAjaxSearchView(LoginRequiredMixin, View):
                 'pagination': {'more': False}
             })
         
-        # Используем новый сервис для поиска
+        # Единый сервис поиска по индексу препаратов
         from .services import MedicationSearchService
         
-        # Ищем торговые продукты (основной поиск)
-        trade_products = MedicationSearchService.search(query, limit=20)
-        
-        results = []
-        for product in trade_products:
-            results.append({
-                'id': product.pk,
-                'text': f"{product.trade_name} ({product.generic_concept.name})",
-                'trade_name_id': product.pk,  # ID торгового продукта
-                'trade_name': product.trade_name,
-                'generic_concept': product.generic_concept.name,
-            })
-        
-        # Если торговых продуктов мало, добавляем МНН
-        if len(results) < 10:
-            generics = MedicationSearchService.search_generics(query, limit=10)
-            for generic in generics:
-                results.append({
-                    'id': generic.pk,
-                    'text': f"{generic.name} (МНН)",
-                    'trade_name_id': None,
-                    'trade_name': None,
-                    'generic_concept': generic.name,
-                })
+        results = MedicationSearchService.autocomplete(query, limit=20)
         
         return JsonResponse({
             'results': results,
@@ -105,16 +84,14 @@ class MedicationAjaxSearchLightView(LoginRequiredMixin, View):
         query = request.GET.get('q', '')
         page = request.GET.get('page', 1)
         
-        from django.db.models import Q
-        
         if not query:
             # Возвращаем первые 50 препаратов с их торговыми названиями для быстрого старта
-            medications = Medication.objects.all().order_by('name')[:50]
+            medications = Medication.objects.prefetch_related('trade_names').order_by('name')[:50]
             results = []
             for medication in medications:
                 # Показываем МНН и первое торговое название
-                trade_names = medication.trade_names.all()[:1]
-                if trade_names.exists():
+                trade_names = medication.trade_names.all()
+                if trade_names:
                     results.append({
                         'id': medication.pk,
                         'text': f"{trade_names[0].name} ({medication.name})",
@@ -125,30 +102,22 @@ class MedicationAjaxSearchLightView(LoginRequiredMixin, View):
                         'text': f"{medication.name}",
                     })
         else:
-            # Поиск по МНН и торговым названиям
-            medications = Medication.objects.filter(
-                Q(name__icontains=query) |  # Поиск по МНН
-                Q(trade_names__name__icontains=query)  # Поиск по торговым названиям
-            ).distinct().order_by('name')[:20]
+            # Поиск по МНН и торговым названиям через индекс
+            from .services import MedicationSearchService
+            from .models import MedicationSearchEntry
             
-            results = []
-            for medication in medications:
-                # Получаем торговые названия для этого препарата
-                trade_names = medication.trade_names.filter(name__icontains=query)
-                
-                if trade_names.exists():
-                    # Если найдены торговые названия, показываем их
-                    for trade_name in trade_names:
-                        results.append({
-                            'id': medication.pk,
-                            'text': f"{trade_name.name} ({medication.name})",
-                        })
-                else:
-                    # Если поиск был по МНН, показываем МНН
-                    results.append({
-                        'id': medication.pk,
-                        'text': f"{medication.name}",
-                    })
+            entries = MedicationSearchService.autocomplete(
+                query,
+                limit=20,
+                kinds=[MedicationSearchEntry.Kind.GENERIC, MedicationSearchEntry.Kind.TRADE_NAME]
+            )
+            results = [
+                {
+                    'id': entry['id'],
+                    'text': entry['generic_concept'] if entry['trade_name'] is None else entry['text'],
+                }
+                for entry in entries
+            ]
         
         return JsonResponse({
             'results': results,
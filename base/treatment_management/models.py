@@ -4,7 +4,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 from pharmacy.models import Medication
 from base.models import ArchivableModel
 from base.services import ArchiveManager
@@ -174,6 +174,16 @@ class TreatmentPlan(ArchivableModel, BaseTreatmentPlan):
     # Менеджеры для архивирования
     objects = ArchiveManager()
     all_objects = models.Manager()
+
+    @classmethod
+    def get_auto_archive_queryset(cls, cutoff):
+        """Автоархивирование: планы старше cutoff без активных и приостановленных назначений"""
+        open_statuses = ['active', 'paused']
+        return cls.all_objects.filter(created_at__lt=cutoff).exclude(
+            Exists(TreatmentMedication.all_objects.filter(treatment_plan=OuterRef('pk'), status__in=open_statuses))
+        ).exclude(
+            Exists(TreatmentRecommendation.all_objects.filter(treatment_plan=OuterRef('pk'), status__in=open_statuses))
+        )
     
     def _archive_related_records(self, user, reason):
         """Архивирует связанные записи при архивировании TreatmentPlan"""